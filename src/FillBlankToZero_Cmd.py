@@ -1,11 +1,24 @@
 import os
 import re
 import sys
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+
+from output_manifest import OutputManifest, extract_manifest_option
+
+
+# 列の種類の優先順位 (time > float > int > other)
+TYPE_RANK_OTHER = 0
+TYPE_RANK_INT = 1
+TYPE_RANK_FLOAT = 2
+TYPE_RANK_TIME = 3
+TYPE_NAMES_BY_RANK = ("other", "int", "float", "time")
 
 
 def print_usage() -> None:
-    usage = "Usage: python FillBlankToZero_Cmd.py <input.tsv> [--header-lines N]"
+    usage = (
+        "Usage: python FillBlankToZero_Cmd.py <input.tsv> [--header-lines N]"
+        " [--streaming] [--sample-rows N] [--manifest <json_path>]"
+    )
     print(usage)
 
 
@@ -46,10 +59,30 @@ def is_int_value(value: str) -> bool:
 
 def parse_arguments(argv: List[str]):
     header_lines = 2
+    streaming = False
+    sample_rows: Optional[int] = None
     positional: List[str] = []
     i = 1
     while i < len(argv):
         arg = argv[i]
+        if arg == "--streaming":
+            streaming = True
+            i += 1
+            continue
+        if arg == "--sample-rows":
+            if i + 1 >= len(argv):
+                print_usage()
+                return None
+            try:
+                sample_rows = int(argv[i + 1])
+            except ValueError:
+                print_usage()
+                return None
+            if sample_rows < 0:
+                print_usage()
+                return None
+            i += 2
+            continue
         if arg == "--header-lines":
             if i + 1 >= len(argv):
                 print_usage()
@@ -72,7 +105,7 @@ def parse_arguments(argv: List[str]):
         return None
 
     input_path = positional[0]
-    return input_path, header_lines
+    return input_path, header_lines, streaming, sample_rows
 
 
 def build_output_path(input_path: str) -> str:
@@ -84,37 +117,49 @@ def build_output_path(input_path: str) -> str:
     return os.path.join(directory, output_filename)
 
 
-def determine_column_types(rows: List[List[str]], header_lines: int, max_cols: int) -> List[str]:
-    data_rows = rows[header_lines:]
-    types: List[str] = []
+def classify_value_rank(value: str) -> int:
+    if is_time_value(value):
+        return TYPE_RANK_TIME
+    if is_float_value(value):
+        return TYPE_RANK_FLOAT
+    if is_int_value(value):
+        return TYPE_RANK_INT
+    return TYPE_RANK_OTHER
 
-    for col_idx in range(max_cols):
-        has_time = False
-        has_float = False
-        has_int = False
 
-        for row in data_rows:
-            value = row[col_idx] if col_idx < len(row) else None
-            if is_blank(value):
-                continue
-            if is_time_value(value):
-                has_time = True
-                break
-            if is_float_value(value):
-                has_float = True
-            elif is_int_value(value):
-                has_int = True
-
-        if has_time:
-            types.append("time")
-        elif has_float:
-            types.append("float")
-        elif has_int:
-            types.append("int")
-        else:
-            types.append("other")
+def update_column_ranks(column_ranks: List[int], row: List[str]) -> None:
+    # 列ごとに、これまでに見つかった最も優先順位の高い種類を記録する
+    # (time が見つかった列はそれ以上調べない)
+    if len(row) > len(column_ranks):
+        column_ranks.extend([TYPE_RANK_OTHER] * (len(row) - len(column_ranks)))
+    for col_idx, value in enumerate(row):
+        if column_ranks[col_idx] == TYPE_RANK_TIME or is_blank(value):
+            continue
+        rank = classify_value_rank(value)
+        if rank > column_ranks[col_idx]:
+            column_ranks[col_idx] = rank
 
-    return types
+
+def build_column_types(column_ranks: List[int], max_cols: int) -> List[str]:
+    return [
+        TYPE_NAMES_BY_RANK[column_ranks[col_idx]] if col_idx < len(column_ranks) else "other"
+        for col_idx in range(max_cols)
+    ]
+
+
+def determine_column_types(
+    rows: List[List[str]],
+    header_lines: int,
+    max_cols: int,
+    sample_rows: Optional[int] = None,
+) -> List[str]:
+    data_rows = rows[header_lines:]
+    if sample_rows is not None:
+        data_rows = data_rows[:sample_rows]
+    column_ranks: List[int] = []
+    for row in data_rows:
+        update_column_ranks(column_ranks, row)
+    return build_column_types(column_ranks, max_cols)
 
 
 def fill_row(row: List[str], column_types: List[str]) -> List[str]:
@@ -154,12 +199,58 @@ def write_output(output_path: str, header_lines: int, raw_lines: List[str], fill
             outfile.write("\t".join(row) + "\n")
 
 
+# ///////////////////////////////////////////////////////////////
+# --streaming: ファイルを 2 回読み、1 行ずつ書き出す
+#   1 回目: 列数と列ごとの種類だけを記録する
+#           (--sample-rows N の場合、種類の判定はデータ行の先頭 N 行だけで行い、
+#            残りの行は列数を数えるだけにする)
+#   2 回目: 1 行ずつ空欄を埋めて書き出す
+#   使用メモリは列数に比例し、ファイルの大きさには依存しない。
+# ///////////////////////////////////////////////////////////////
+def iterate_lines(input_path: str) -> Iterator[str]:
+    with open(input_path, "r", encoding="utf-8", newline="") as infile:
+        for line in infile:
+            yield line
+
+
+def split_line(line: str) -> List[str]:
+    return line.rstrip("\n").rstrip("\r").split("\t")
+
+
+def scan_column_types(input_path: str, header_lines: int, sample_rows: Optional[int]) -> List[str]:
+    max_cols = 0
+    column_ranks: List[int] = []
+    for line_index, line in enumerate(iterate_lines(input_path)):
+        data_index = line_index - header_lines
+        if data_index < 0 or (sample_rows is not None and data_index >= sample_rows):
+            max_cols = max(max_cols, line.count("\t") + 1)
+            continue
+        row = split_line(line)
+        max_cols = max(max_cols, len(row))
+        update_column_ranks(column_ranks, row)
+    return build_column_types(column_ranks, max_cols)
+
+
+def write_output_streaming(input_path: str, output_path: str, header_lines: int, column_types: List[str]) -> None:
+    with open(output_path, "w", encoding="utf-8", newline="") as outfile:
+        for line_index, line in enumerate(iterate_lines(input_path)):
+            if line_index < header_lines:
+                outfile.write(line)
+                continue
+            outfile.write("\t".join(fill_row(split_line(line), column_types)) + "\n")
+
+
 def main(argv: List[str]) -> int:
+    try:
+        argv, manifest_path = extract_manifest_option(argv)
+    except ValueError:
+        print_usage()
+        return 1
     parsed = parse_arguments(argv)
     if parsed is None:
         return 1
 
-    input_path, header_lines = parsed
+    input_path, header_lines, streaming, sample_rows = parsed
     output_path = build_output_path(input_path)
 
     if not os.path.exists(input_path):
@@ -167,22 +258,30 @@ def main(argv: List[str]) -> int:
         return 1
 
     try:
-        rows, raw_lines = load_rows(input_path)
-        if not rows:
-            max_cols = 0
+        if streaming:
+            column_types = scan_column_types(input_path, header_lines, sample_rows)
+            write_output_streaming(input_path, output_path, header_lines, column_types)
         else:
-            max_cols = max(len(row) for row in rows)
+            rows, raw_lines = load_rows(input_path)
+            if not rows:
+                max_cols = 0
+            else:
+                max_cols = max(len(row) for row in rows)
 
-        column_types = determine_column_types(rows, header_lines, max_cols)
+            column_types = determine_column_types(rows, header_lines, max_cols, sample_rows)
 
-        data_rows = rows[header_lines:]
-        filled_data_rows = [fill_row(row, column_types) for row in data_rows]
+            data_rows = rows[header_lines:]
+            filled_data_rows = [fill_row(row, column_types) for row in data_rows]
 
-        write_output(output_path, header_lines, raw_lines, filled_data_rows)
+            write_output(output_path, header_lines, raw_lines, filled_data_rows)
     except Exception as exc:  # noqa: BLE001
         print(exc)
         return 1
 
+    if manifest_path is not None:
+        manifest = OutputManifest("FillBlankToZero_Cmd.py")
+        manifest.add(output_path)
+        manifest.write(manifest_path)
     return 0
 
 
@@ -1,32 +1,28 @@
 import os
 import re
 import sys
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 
-def is_blank(pszValue: Optional[str]) -> bool:
-    if pszValue is None:
-        return True
-    if pszValue == "":
-        return True
-    if pszValue.strip() == "":
-        return True
-    return False
+from output_manifest import OutputManifest, extract_manifest_option
 
 
-def normalize_value(pszValue: str) -> str:
-    return pszValue.strip()
+# セルの種類コード (空欄 / 種類なし / time / int / float)
+TYPE_CODE_BLANK: int = -1
+TYPE_CODE_NONE: int = 0
+TYPE_CODE_TIME: int = 1
+TYPE_CODE_INT: int = 2
+TYPE_CODE_FLOAT: int = 3
 
+TIME_PATTERN: str = r"\d+:\d{2}:\d{2}"
+INT_PATTERN: str = r"[+-]?\d+"
+FLOAT_PATTERN: str = r"[+-]?\d+\.\d+"
 
-def detect_type(pszValue: str) -> Optional[str]:
-    pszNormalized: str = normalize_value(pszValue)
-    if re.fullmatch(r"\d+:\d{2}:\d{2}", pszNormalized):
-        return "time"
-    if re.fullmatch(r"[+-]?\d+", pszNormalized):
-        return "int"
-    if re.fullmatch(r"[+-]?\d+\.\d+", pszNormalized):
-        return "float"
-    return None
+
+def normalize_value(pszValue: str) -> str:
+    return pszValue.strip()
 
 
 def parse_arguments(objArgvList: List[str]) -> Optional[Tuple[str, str]]:
@@ -46,7 +42,7 @@ def parse_arguments(objArgvList: List[str]) -> Optional[Tuple[str, str]]:
         iIndex += 1
 
     if len(objPositionalList) != 1:
-        print("Usage: python FillZeroToBlank_Cmd.py INPUT [--delimiter \\\"\\t\\\"]")
+        print("Usage: python FillZeroToBlank_Cmd.py INPUT [--delimiter \\\"\\t\\\"] [--manifest JSON_PATH]")
         return None
 
     pszInputPath: str = objPositionalList[0]
@@ -95,56 +91,82 @@ def get_max_columns(objRowsList: List[List[str]]) -> int:
     return max(len(objRow) for objRow in objRowsList)
 
 
-def determine_unit_score(objValuesList: List[str]) -> Tuple[Optional[str], Optional[float]]:
-    iTotalNonBlank: int = 0
-    objCountsDict: Dict[str, int] = {"time": 0, "int": 0, "float": 0}
-
-    for pszValue in objValuesList:
-        if is_blank(pszValue):
-            continue
-        iTotalNonBlank += 1
-        pszType: Optional[str] = detect_type(pszValue)
-        if pszType is None:
-            continue
-        objCountsDict[pszType] += 1
-
-    if iTotalNonBlank == 0:
-        return None, None
-
-    pszRepresentative: Optional[str] = None
-    iMaxCount: int = 0
-    for pszKey in ("time", "int", "float"):
-        if objCountsDict[pszKey] > iMaxCount:
-            iMaxCount = objCountsDict[pszKey]
-            pszRepresentative = pszKey
-
-    if pszRepresentative is None or iMaxCount == 0:
-        return None, None
-
-    fScore: float = iMaxCount / float(iTotalNonBlank)
-    return pszRepresentative, fScore
-
-
-def evaluate_direction(objRowsList: List[List[str]]) -> str:
-    iMaxColumns: int = get_max_columns(objRowsList)
-    objColumnScoresList: List[float] = []
-    for iCol in range(iMaxColumns):
-        objValuesList: List[str] = []
-        for objRow in objRowsList:
-            if iCol < len(objRow):
-                objValuesList.append(objRow[iCol])
-            else:
-                objValuesList.append("")
-        pszRepresentative, fScore = determine_unit_score(objValuesList)
-        if fScore is not None:
-            objColumnScoresList.append(fScore)
-
-    objRowScoresList: List[float] = []
-    for objRow in objRowsList:
-        pszRepresentative, fScore = determine_unit_score(objRow)
-        if fScore is not None:
-            objRowScoresList.append(fScore)
-
+def pad_rows(objRowsList: List[List[str]], iMaxColumns: int) -> np.ndarray:
+    # 列数の足りない行は "" で埋めた 2 次元配列 (行 x 列) にする
+    objTable: np.ndarray = np.empty((len(objRowsList), iMaxColumns), dtype=object)
+    for iRow, objRow in enumerate(objRowsList):
+        if len(objRow) == iMaxColumns:
+            objTable[iRow, :] = objRow
+        else:
+            objTable[iRow, :] = objRow + [""] * (iMaxColumns - len(objRow))
+    return objTable
+
+
+def classify_cells(objTable: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return per-cell type codes and per-cell zero-type codes.
+
+    Values are factorized so that each distinct string is classified once,
+    with vectorized regex matching on the distinct values.
+    The zero-type code is the cell's type code when the cell is the zero of
+    that type (should_blank_*), otherwise TYPE_CODE_NONE.
+    """
+    objCodes: np.ndarray
+    objUniqueValues: np.ndarray
+    objCodes, objUniqueValues = pd.factorize(objTable.ravel(), sort=False)
+    objUnique: pd.Series = pd.Series(objUniqueValues, dtype=object)
+    objNormalized: pd.Series = objUnique.str.strip()
+
+    objUniqueTypes: np.ndarray = np.full(len(objUnique), TYPE_CODE_NONE, dtype=np.int8)
+    objUniqueTypes[objNormalized.str.fullmatch(FLOAT_PATTERN).to_numpy(dtype=bool)] = TYPE_CODE_FLOAT
+    objUniqueTypes[objNormalized.str.fullmatch(INT_PATTERN).to_numpy(dtype=bool)] = TYPE_CODE_INT
+    objUniqueTypes[objNormalized.str.fullmatch(TIME_PATTERN).to_numpy(dtype=bool)] = TYPE_CODE_TIME
+    objUniqueTypes[objNormalized.eq("").to_numpy(dtype=bool)] = TYPE_CODE_BLANK
+
+    # 0 と判定する値は種類ごとの候補 (異なる値) だけを調べる
+    objUniqueZeroTypes: np.ndarray = np.full(len(objUnique), TYPE_CODE_NONE, dtype=np.int8)
+    for iTypeCode, objShouldBlank in (
+        (TYPE_CODE_TIME, should_blank_time),
+        (TYPE_CODE_INT, should_blank_int),
+        (TYPE_CODE_FLOAT, should_blank_float),
+    ):
+        for iUniqueIndex in np.flatnonzero(objUniqueTypes == iTypeCode):
+            if objShouldBlank(objUniqueValues[iUniqueIndex]):
+                objUniqueZeroTypes[iUniqueIndex] = iTypeCode
+
+    objTypeCodes: np.ndarray = objUniqueTypes[objCodes].reshape(objTable.shape)
+    objZeroTypeCodes: np.ndarray = objUniqueZeroTypes[objCodes].reshape(objTable.shape)
+    return objTypeCodes, objZeroTypeCodes
+
+
+def determine_unit_scores(objTypeCodes: np.ndarray, iAxis: int) -> Tuple[np.ndarray, List[float]]:
+    """Per-unit (axis 0: column, axis 1: row) representative type codes and scores.
+
+    The representative is the most frequent of time / int / float
+    (ties go to the earlier one); units with no typed value get TYPE_CODE_NONE
+    and no score.
+    """
+    objNonBlankCounts: np.ndarray = (objTypeCodes != TYPE_CODE_BLANK).sum(axis=iAxis)
+    objTypeCounts: np.ndarray = np.stack(
+        [(objTypeCodes == iTypeCode).sum(axis=iAxis) for iTypeCode in (TYPE_CODE_TIME, TYPE_CODE_INT, TYPE_CODE_FLOAT)],
+        axis=1,
+    )
+    if objTypeCounts.shape[0] == 0:
+        return np.zeros(0, dtype=np.int8), []
+    objMaxCounts: np.ndarray = objTypeCounts.max(axis=1)
+    objRepresentatives: np.ndarray = np.where(
+        objMaxCounts > 0,
+        objTypeCounts.argmax(axis=1) + TYPE_CODE_TIME,
+        TYPE_CODE_NONE,
+    ).astype(np.int8)
+    objScoresList: List[float] = [
+        iMaxCount / float(iNonBlankCount)
+        for iMaxCount, iNonBlankCount in zip(objMaxCounts.tolist(), objNonBlankCounts.tolist())
+        if iMaxCount > 0
+    ]
+    return objRepresentatives, objScoresList
+
+
+def evaluate_direction(objColumnScoresList: List[float], objRowScoresList: List[float]) -> str:
     fColumnScore: float = sum(objColumnScoresList) / len(objColumnScoresList) if objColumnScoresList else 0.0
     fRowScore: float = sum(objRowScoresList) / len(objRowScoresList) if objRowScoresList else 0.0
 
@@ -153,26 +175,6 @@ def evaluate_direction(objRowsList: List[List[str]]) -> str:
     return "row"
 
 
-def determine_representatives(objRowsList: List[List[str]], pszDirection: str) -> List[Optional[str]]:
-    objRepresentativesList: List[Optional[str]] = []
-    if pszDirection == "column":
-        iMaxColumns: int = get_max_columns(objRowsList)
-        for iCol in range(iMaxColumns):
-            objValuesList: List[str] = []
-            for objRow in objRowsList:
-                if iCol < len(objRow):
-                    objValuesList.append(objRow[iCol])
-                else:
-                    objValuesList.append("")
-            pszRepresentative, _ = determine_unit_score(objValuesList)
-            objRepresentativesList.append(pszRepresentative)
-    else:
-        for objRow in objRowsList:
-            pszRepresentative, _ = determine_unit_score(objRow)
-            objRepresentativesList.append(pszRepresentative)
-    return objRepresentativesList
-
-
 def should_blank_time(pszValue: str) -> bool:
     pszNormalized: str = normalize_value(pszValue)
     return pszNormalized in {"0:00:00", "00:00:00"}
@@ -200,63 +202,39 @@ def should_blank_float(pszValue: str) -> bool:
     return fNumber == 0.0
 
 
-def convert_cells(objRowsList: List[List[str]], pszDirection: str, objRepresentativesList: List[Optional[str]]) -> Tuple[List[List[str]], int, int]:
-    objResultRowsList: List[List[str]] = []
-    iBlankedCount: int = 0
-    iUnchangedCount: int = 0
+def convert_cells(
+    objRowsList: List[List[str]],
+    objTable: np.ndarray,
+    objZeroTypeCodes: np.ndarray,
+    pszDirection: str,
+    objRepresentatives: np.ndarray,
+) -> Tuple[List[List[str]], int, int]:
+    # 代表の種類の 0 (0:00:00 / 0 / 0.0 など) だけを空欄にする
+    if pszDirection == "column":
+        objBlankMask: np.ndarray = (objZeroTypeCodes == objRepresentatives[np.newaxis, :]) & (
+            objRepresentatives[np.newaxis, :] != TYPE_CODE_NONE
+        )
+    else:
+        objBlankMask = (objZeroTypeCodes == objRepresentatives[:, np.newaxis]) & (
+            objRepresentatives[:, np.newaxis] != TYPE_CODE_NONE
+        )
+
+    objResultTable: np.ndarray = objTable.copy()
+    objResultTable[objBlankMask] = ""
+    iBlankedCount: int = int(objBlankMask.sum())
 
     if pszDirection == "column":
-        iMaxColumns: int = get_max_columns(objRowsList)
-        for objRow in objRowsList:
-            objNewRow: List[str] = []
-            for iCol in range(iMaxColumns):
-                pszValue: str = objRow[iCol] if iCol < len(objRow) else ""
-                pszRepresentative: Optional[str] = objRepresentativesList[iCol] if iCol < len(objRepresentativesList) else None
-                if is_blank(pszValue) or pszRepresentative is None:
-                    objNewRow.append(pszValue)
-                    iUnchangedCount += 1
-                    continue
-                if pszRepresentative == "time" and should_blank_time(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                if pszRepresentative == "int" and should_blank_int(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                if pszRepresentative == "float" and should_blank_float(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                objNewRow.append(pszValue)
-                iUnchangedCount += 1
-            objResultRowsList.append(objNewRow)
+        # column の場合は、列数の足りない行も "" で埋めて出力する
+        objResultRowsList: List[List[str]] = objResultTable.tolist()
+        iCellCount: int = objResultTable.size
     else:
-        for iRow, objRow in enumerate(objRowsList):
-            pszRepresentative: Optional[str] = objRepresentativesList[iRow] if iRow < len(objRepresentativesList) else None
-            objNewRow: List[str] = []
-            for pszValue in objRow:
-                if is_blank(pszValue) or pszRepresentative is None:
-                    objNewRow.append(pszValue)
-                    iUnchangedCount += 1
-                    continue
-                if pszRepresentative == "time" and should_blank_time(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                if pszRepresentative == "int" and should_blank_int(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                if pszRepresentative == "float" and should_blank_float(pszValue):
-                    objNewRow.append("")
-                    iBlankedCount += 1
-                    continue
-                objNewRow.append(pszValue)
-                iUnchangedCount += 1
-            objResultRowsList.append(objNewRow)
-
-    return objResultRowsList, iBlankedCount, iUnchangedCount
+        objResultRowsList = [
+            objRow[: len(objSourceRow)]
+            for objRow, objSourceRow in zip(objResultTable.tolist(), objRowsList)
+        ]
+        iCellCount = sum(len(objSourceRow) for objSourceRow in objRowsList)
+
+    return objResultRowsList, iBlankedCount, iCellCount - iBlankedCount
 
 
 def write_output(pszOutputPath: str, pszDelimiter: str, objRowsList: List[List[str]]) -> None:
@@ -266,6 +244,12 @@ def write_output(pszOutputPath: str, pszDelimiter: str, objRowsList: List[List[s
 
 
 def main(objArgvList: List[str]) -> int:
+    pszManifestPath: Optional[str]
+    try:
+        objArgvList, pszManifestPath = extract_manifest_option(objArgvList)
+    except ValueError as objExc:
+        print(objExc)
+        return 1
     objParsed = parse_arguments(objArgvList)
     if objParsed is None:
         return 1
@@ -291,10 +275,24 @@ def main(objArgvList: List[str]) -> int:
         print(f"Failed to read input: {objExc}")
         return 1
 
-    pszDirection: str = evaluate_direction(objRowsList)
-    objRepresentativesList: List[Optional[str]] = determine_representatives(objRowsList, pszDirection)
-
-    objConvertedRowsList, iBlankedCount, iUnchangedCount = convert_cells(objRowsList, pszDirection, objRepresentativesList)
+    # 1 回の分類で、列ごと・行ごとの種類の集計と変換をすべて行う
+    objTable: np.ndarray = pad_rows(objRowsList, get_max_columns(objRowsList))
+    objTypeCodes, objZeroTypeCodes = classify_cells(objTable)
+    objColumnRepresentatives, objColumnScoresList = determine_unit_scores(objTypeCodes, 0)
+    objRowRepresentatives, objRowScoresList = determine_unit_scores(objTypeCodes, 1)
+
+    pszDirection: str = evaluate_direction(objColumnScoresList, objRowScoresList)
+    objRepresentatives: np.ndarray = (
+        objColumnRepresentatives if pszDirection == "column" else objRowRepresentatives
+    )
+
+    objConvertedRowsList, iBlankedCount, iUnchangedCount = convert_cells(
+        objRowsList,
+        objTable,
+        objZeroTypeCodes,
+        pszDirection,
+        objRepresentatives,
+    )
 
     try:
         write_output(pszOutputPath, pszDelimiter, objConvertedRowsList)
@@ -303,6 +301,10 @@ def main(objArgvList: List[str]) -> int:
         return 1
 
     print(f"direction={pszDirection}, blanked={iBlankedCount}, unchanged={iUnchangedCount}, output={pszOutputPath}")
+    if pszManifestPath is not None:
+        objManifest: OutputManifest = OutputManifest("FillZeroToBlank_Cmd.py")
+        objManifest.add(pszOutputPath)
+        objManifest.write(pszManifestPath)
     return 0
 
 
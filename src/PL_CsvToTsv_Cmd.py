@@ -4,6 +4,28 @@ import re
 import sys
 from typing import List, Tuple
 
+from atomic_tsv_writer import write_csv_rows_atomic, write_text_atomic
+from output_manifest import OutputManifest, extract_manifest_option
+from project_name_normalizer import (
+    normalize_pl_project_name_cached,
+    normalize_values_batch,
+)
+from parsed_input_cache import (
+    ParsedInputCache,
+    extract_parsed_input_cache_option,
+    load_or_parse_with_optional_cache,
+)
+from text_encoding_loader import read_csv_rows_with_encoding_detection
+
+
+# 作成したファイルの一覧 (--manifest 指定時に JSON として書き出す)
+_OBJ_OUTPUT_MANIFEST: OutputManifest = OutputManifest("PL_CsvToTsv_Cmd.py")
+
+# 解析結果キャッシュ (--parsed-cache-dir) の解析処理名とバージョン。
+# read_csv_rows の結果が変わる修正をした場合はバージョンを上げる。
+PL_CSV_ROWS_PARSER_NAME: str = "pl_csv_rows"
+PL_CSV_ROWS_PARSER_VERSION: int = 1
+
 
 def get_target_year_month_from_filename(pszInputFilePath: str) -> Tuple[int, int]:
     pszBaseName: str = os.path.basename(pszInputFilePath)
@@ -29,31 +51,30 @@ def get_target_year_month_from_period_row(pszRowA: str) -> Tuple[int, int]:
     return iYear, iMonth
 
 
-def read_csv_rows(pszInputFilePath: str) -> List[List[str]]:
-    objRows: List[List[str]] = []
-    try:
-        with open(pszInputFilePath, mode="r", encoding="utf-8-sig", errors="strict", newline="") as objFile:
-            objReader: csv.reader = csv.reader(objFile)
-            for objRow in objReader:
-                objRows.append(objRow)
-        append_debug_log("input decoded as utf-8-sig")
-        return objRows
-    except UnicodeDecodeError:
-        append_debug_log("utf-8-sig decode failed; retrying with cp932")
-
-    with open(pszInputFilePath, mode="r", encoding="cp932", errors="strict", newline="") as objFile:
-        objReader = csv.reader(objFile)
-        for objRow in objReader:
-            objRows.append(objRow)
-    append_debug_log("input decoded as cp932")
+def read_csv_rows(
+    pszInputFilePath: str,
+    objParsedInputCache: ParsedInputCache | None = None,
+) -> List[List[str]]:
+    # ファイルを 1 回だけ読み込み、BOM とデコードの結果から
+    # utf-8-sig / cp932 を判定して解析する
+    # (キャッシュがあれば、同じ内容のファイルの解析結果を再利用する)
+    objRows: List[List[str]]
+    pszEncoding: str
+    objRows, pszEncoding = load_or_parse_with_optional_cache(
+        objParsedInputCache,
+        pszInputFilePath,
+        PL_CSV_ROWS_PARSER_NAME,
+        PL_CSV_ROWS_PARSER_VERSION,
+        read_csv_rows_with_encoding_detection,
+    )
+    append_debug_log(f"input decoded as {pszEncoding}")
     return objRows
 
 
 def write_tsv_rows(pszOutputFilePath: str, objRows: List[List[str]]) -> None:
-    with open(pszOutputFilePath, mode="w", encoding="utf-8", newline="") as objFile:
-        objWriter: csv.writer = csv.writer(objFile, delimiter="\t", lineterminator="\n")
-        for objRow in objRows:
-            objWriter.writerow(objRow)
+    # 一時ファイルへまとめて書いてから置き換える (書きかけのファイルを残さない)
+    write_csv_rows_atomic(pszOutputFilePath, objRows, "\t", "\n")
+    _OBJ_OUTPUT_MANIFEST.add(pszOutputFilePath)
 
 
 def read_tsv_rows(pszInputFilePath: str) -> List[List[str]]:
@@ -166,84 +187,15 @@ def transpose_rows(objRows: List[List[str]]) -> List[List[str]]:
 
 
 def normalize_project_name(pszProjectName: str) -> str:
-    if pszProjectName == "":
-        return pszProjectName
-    normalized = pszProjectName.replace("\t", "_")
-    normalized = re.sub(r"(P\d{5})(?![ _\t　【])", r"\1_", normalized)
-    normalized = re.sub(r"([A-OQ-Z]\d{3})(?![ _\t　【])", r"\1_", normalized)
-    normalized = re.sub(r"^(J\d{3}) +", r"\1_", normalized)
-    normalized = re.sub(r"([A-OQ-Z]\d{3})[ 　]+", r"\1_", normalized)
-    normalized = re.sub(r"(P\d{5})[ 　]+", r"\1_", normalized)
-
-    if normalized.startswith("【廃番】"):
-        try:
-            pszCode: str | None = None
-            iCodeIndex: int = -1
-            for pszPrefix in ["J", "A", "C", "H", "M", "P"]:
-                iSearchFrom: int = 0
-                iCodeLength: int = 4
-                if pszPrefix == "P":
-                    iCodeLength = 6
-                while True:
-                    iFoundIndex: int = normalized.find(pszPrefix, iSearchFrom)
-                    if iFoundIndex == -1:
-                        break
-                    if iFoundIndex + iCodeLength <= len(normalized):
-                        pszCode = normalized[iFoundIndex:iFoundIndex + iCodeLength]
-                        iCodeIndex = iFoundIndex
-                        break
-                    iSearchFrom = iFoundIndex + 1
-                if pszCode is not None:
-                    break
-            if pszCode is None or iCodeIndex == -1:
-                return normalized
-            pszHead: str = normalized[:iCodeIndex]
-            pszTail: str = normalized[iCodeIndex + len(pszCode):]
-            return pszCode + "_" + pszHead + pszTail
-        except Exception:
-            return normalized
-
-    if normalized.startswith("【"):
-        iBracketEndIndex: int = normalized.find("】")
-        if iBracketEndIndex != -1:
-            pszAfterBracket: str = normalized[iBracketEndIndex + 1:]
-            objMatch = re.search(r"(P\d{5}|[A-OQ-Z]\d{3})", pszAfterBracket)
-            if objMatch is not None:
-                pszCode = objMatch.group(1)
-                pszBeforeCode: str = pszAfterBracket[:objMatch.start()]
-                pszAfterCode: str = pszAfterBracket[objMatch.end():]
-                if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
-                    pszAfterCode = pszAfterCode[1:]
-                pszRest: str = normalized[: iBracketEndIndex + 1] + pszBeforeCode + pszAfterCode
-                return pszCode + "_" + pszRest
-
-    if len(normalized) >= 1 and normalized[0] in ["J", "A", "C", "H", "M"]:
-        if len(normalized) >= 5:
-            pszNextChar: str = normalized[4]
-            if pszNextChar == "【":
-                return normalized[:4] + "_" + normalized[4:]
-            if pszNextChar == " " or pszNextChar == "　":
-                return normalized[:4] + "_" + normalized[5:]
-        return normalized
-
-    if len(normalized) >= 1 and normalized[0] == "P":
-        if len(normalized) >= 7:
-            pszNextCharP: str = normalized[6]
-            if pszNextCharP == "【":
-                return normalized[:6] + "_" + normalized[6:]
-            if pszNextCharP == " " or pszNextCharP == "　":
-                return normalized[:6] + "_" + normalized[7:]
-        return normalized
-
-    return normalized
+    # 正規化は共通モジュール (project_name_normalizer) のメモ化版で行う
+    return normalize_pl_project_name_cached(pszProjectName)
 
 
 def normalize_project_names_in_row(objRows: List[List[str]], iRowIndex: int) -> None:
     if iRowIndex < 0 or iRowIndex >= len(objRows):
         return
     objTargetRow = objRows[iRowIndex]
-    for iIndex, pszProjectName in enumerate(objTargetRow):
-        objTargetRow[iIndex] = normalize_project_name(pszProjectName)
+    objTargetRow[:] = normalize_values_batch(objTargetRow, normalize_project_name)
 
 
 def find_row_index_with_subject_tab(objRows: List[List[str]], iStartIndex: int) -> int | None:
@@ -286,8 +238,8 @@ def write_first_row_tabs_to_newlines(pszInputFilePath: str, pszOutputFilePath: s
     with open(pszInputFilePath, mode="r", encoding="utf-8", newline="") as objInputFile:
         pszFirstLine: str = objInputFile.readline()
     pszConverted: str = pszFirstLine.replace("\t", "\n")
-    with open(pszOutputFilePath, mode="w", encoding="utf-8", newline="") as objOutputFile:
-        objOutputFile.write(pszConverted)
+    write_text_atomic(pszOutputFilePath, pszConverted)
+    _OBJ_OUTPUT_MANIFEST.add(pszOutputFilePath)
 
 
 def insert_company_expense_columns(objRows: List[List[str]]) -> None:
@@ -371,16 +323,32 @@ def insert_allocated_sga_row(objRows: List[List[str]]) -> None:
 
 
 def main() -> int:
-    if len(sys.argv) < 2:
-        print("usage: python src/PL_CsvToTsv_Cmd.py <csv_file> [<csv_file> ...]")
+    objArgv: List[str]
+    pszManifestPath: str | None
+    pszParsedInputCacheDirectoryPath: str | None
+    try:
+        objArgv, pszManifestPath = extract_manifest_option(sys.argv)
+        objArgv, pszParsedInputCacheDirectoryPath = extract_parsed_input_cache_option(objArgv)
+    except ValueError as objException:
+        print(objException)
+        return 1
+    if len(objArgv) < 2:
+        print(
+            "usage: python src/PL_CsvToTsv_Cmd.py <csv_file> [<csv_file> ...]"
+            " [--manifest <json_path>] [--parsed-cache-dir <dir>]"
+        )
         return 1
+    _OBJ_OUTPUT_MANIFEST.clear()
+    objParsedInputCache: ParsedInputCache | None = None
+    if pszParsedInputCacheDirectoryPath is not None:
+        objParsedInputCache = ParsedInputCache(pszParsedInputCacheDirectoryPath)
 
     iExitCode: int = 0
     objCostReportVerticalFilePaths: List[str] = []
     objCostReportProjectNameVerticalFilePaths: List[str] = []
     objProfitLossProjectNameVerticalFilePaths: List[str] = []
     objProfitLossVerticalFilePaths: List[str] = []
-    for pszInputFilePath in sys.argv[1:]:
+    for pszInputFilePath in objArgv[1:]:
         try:
             append_debug_log("start")
             iFileYear: int
@@ -391,7 +359,7 @@ def main() -> int:
             if not os.path.isfile(pszInputFilePath):
                 raise FileNotFoundError(f"入力ファイルが存在しません: {pszInputFilePath}")
 
-            objRows: List[List[str]] = read_csv_rows(pszInputFilePath)
+            objRows: List[List[str]] = read_csv_rows(pszInputFilePath, objParsedInputCache)
             if len(objRows) < 2:
                 raise ValueError("集計期間の取得に必要な行が存在しません。")
             append_debug_log(f"rows read: {len(objRows)}")
@@ -499,6 +467,7 @@ def main() -> int:
                 pszErrorFilePath = f"{pszBaseName}_error.txt"
             with open(pszErrorFilePath, mode="w", encoding="utf-8", newline="") as objErrorFile:
                 objErrorFile.write(str(objException))
+            _OBJ_OUTPUT_MANIFEST.add(pszErrorFilePath, "error")
 
     create_union_subject_vertical_tsvs(objCostReportVerticalFilePaths)
     create_union_subject_vertical_tsvs(objProfitLossVerticalFilePaths)
@@ -518,6 +487,8 @@ def main() -> int:
         objProfitLossProjectNameVerticalFilePaths,
         bWriteHorizontal=True,
     )
+    if pszManifestPath is not None:
+        _OBJ_OUTPUT_MANIFEST.write(pszManifestPath)
     return iExitCode
 
 
@@ -1,69 +1,143 @@
 import os
 import sys
-from typing import Any
+from typing import List
 
+import numpy as np
 import pandas as pd
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
+from parsed_input_cache import (
+    ParsedInputCache,
+    extract_parsed_input_cache_option,
+    load_or_parse_with_optional_cache,
+)
 
-def b_is_blank_value(objValue: Any) -> bool:
-    """Check whether the provided value should be treated as blank."""
-    bIsNaN: bool = False
-    try:
-        bIsNaN = bool(pd.isna(objValue))
-    except Exception:
-        bIsNaN = False
-    if bIsNaN:
-        return True
-    if objValue is None:
-        return True
-    if isinstance(objValue, str):
-        if objValue.strip() == "":
-            return True
-    return False
 
+# 解析結果キャッシュ (--parsed-cache-dir) の解析処理名とバージョン
+RAW_DATA_TSV_PARSER_NAME: str = "raw_data_tsv"
+RAW_DATA_TSV_PARSER_VERSION: int = 1
 
-def main() -> None:
-    pszInputFilePath: str = os.path.join("input", "Raw_Data.tsv")
-    pszOutputFilePath: str = os.path.join("input", "Raw_Data_remove_blank_rows.tsv")
+# --streaming 指定時に 1 回で読み込む行数
+RAW_DATA_STREAMING_CHUNK_ROWS: int = 10000
 
-    if not os.path.isfile(pszInputFilePath):
-        print("入力ファイルが見つかりません: Raw_Data.tsv")
-        sys.exit(1)
+STAFF_CODE_COLUMN_NAME: str = "スタッフコード"
+STAFF_NAME_COLUMN_NAME: str = "処理関数1(スタッフ名)"
 
-    try:
-        objDataFrame: DataFrame = pd.read_csv(
+
+def build_blank_value_mask(objSeries: Series) -> np.ndarray:
+    """Return a mask that is True for NaN/None and whitespace-only strings."""
+    objMissingMask: np.ndarray = objSeries.isna().to_numpy(dtype=bool)
+    objBlankStringMask: np.ndarray = (
+        objSeries.astype("str").str.strip().eq("").to_numpy(dtype=bool, na_value=False)
+    )
+    return objMissingMask | objBlankStringMask
+
+
+def find_cut_index(objDataFrame: DataFrame) -> int:
+    """Return the position of the first row whose staff code and name are both blank (-1 if none)."""
+    objBothBlankMask: np.ndarray = build_blank_value_mask(
+        objDataFrame[STAFF_CODE_COLUMN_NAME]
+    ) & build_blank_value_mask(objDataFrame[STAFF_NAME_COLUMN_NAME])
+    if not objBothBlankMask.any():
+        return -1
+    return int(np.argmax(objBothBlankMask))
+
+
+def read_raw_data_tsv(pszInputFilePath: str) -> DataFrame:
+    return pd.read_csv(
+        pszInputFilePath,
+        sep="\t",
+        dtype=str,
+        keep_default_na=True,
+    )
+
+
+def validate_required_columns(objDataFrame: DataFrame) -> None:
+    for pszColumnName in (STAFF_CODE_COLUMN_NAME, STAFF_NAME_COLUMN_NAME):
+        if pszColumnName not in objDataFrame.columns:
+            print(f"列が見つかりません: {pszColumnName}")
+            sys.exit(1)
+
+
+def read_raw_data_tsv_until_blank_row(pszInputFilePath: str) -> DataFrame:
+    """Read chunk by chunk and stop at the first row whose staff code and name are both blank."""
+    objKeptFrames: List[DataFrame] = []
+    with pd.read_csv(
+        pszInputFilePath,
+        sep="\t",
+        dtype=str,
+        keep_default_na=True,
+        chunksize=RAW_DATA_STREAMING_CHUNK_ROWS,
+    ) as objReader:
+        for objChunk in objReader:
+            validate_required_columns(objChunk)
+            iCutIndex: int = find_cut_index(objChunk)
+            if iCutIndex != -1:
+                objKeptFrames.append(objChunk.iloc[:iCutIndex])
+                break
+            objKeptFrames.append(objChunk)
+    if not objKeptFrames:
+        # ヘッダ行だけのファイル
+        objHeaderOnly: DataFrame = pd.read_csv(
             pszInputFilePath,
             sep="\t",
             dtype=str,
             keep_default_na=True,
+            nrows=0,
         )
-    except Exception as objException:
-        print(f"読み込みに失敗しました: {objException}")
-        sys.exit(1)
+        validate_required_columns(objHeaderOnly)
+        return objHeaderOnly
+    return pd.concat(objKeptFrames)
 
-    if "スタッフコード" not in objDataFrame.columns:
-        print("列が見つかりません: スタッフコード")
-        sys.exit(1)
-    if "処理関数1(スタッフ名)" not in objDataFrame.columns:
-        print("列が見つかりません: 処理関数1(スタッフ名)")
+
+def main() -> None:
+    # --streaming: 先頭から少しずつ読み込み、空行が見つかった時点で読み込みをやめる
+    # (Excel から貼り付けた末尾の大量の空行を読み込まずに済む。
+    #  ファイル全体を解析しないため、解析結果キャッシュは使わない)
+    objArgv: List[str]
+    pszParsedInputCacheDirectoryPath: str | None
+    try:
+        objArgv, pszParsedInputCacheDirectoryPath = extract_parsed_input_cache_option(sys.argv[1:])
+    except ValueError as objException:
+        print(objException)
         sys.exit(1)
+    bStreaming: bool = "--streaming" in objArgv
+    objParsedInputCache: ParsedInputCache | None = None
+    if pszParsedInputCacheDirectoryPath is not None and not bStreaming:
+        objParsedInputCache = ParsedInputCache(pszParsedInputCacheDirectoryPath)
+
+    pszInputFilePath: str = os.path.join("input", "Raw_Data.tsv")
+    pszOutputFilePath: str = os.path.join("input", "Raw_Data_remove_blank_rows.tsv")
 
-    iCutIndex: int = -1
-    for iRowIndex in range(len(objDataFrame)):
-        objRow: Any = objDataFrame.iloc[iRowIndex]
-        objStaffCode: Any = objRow["スタッフコード"]
-        objStaffName: Any = objRow["処理関数1(スタッフ名)"]
+    if not os.path.isfile(pszInputFilePath):
+        print("入力ファイルが見つかりません: Raw_Data.tsv")
+        sys.exit(1)
 
-        bStaffCodeBlank: bool = b_is_blank_value(objStaffCode)
-        bStaffNameBlank: bool = b_is_blank_value(objStaffName)
+    objDataFrame: DataFrame
+    if bStreaming:
+        try:
+            objDataFrame = read_raw_data_tsv_until_blank_row(pszInputFilePath)
+        except Exception as objException:
+            print(f"読み込みに失敗しました: {objException}")
+            sys.exit(1)
+    else:
+        try:
+            objDataFrame = load_or_parse_with_optional_cache(
+                objParsedInputCache,
+                pszInputFilePath,
+                RAW_DATA_TSV_PARSER_NAME,
+                RAW_DATA_TSV_PARSER_VERSION,
+                read_raw_data_tsv,
+            )
+        except Exception as objException:
+            print(f"読み込みに失敗しました: {objException}")
+            sys.exit(1)
 
-        if bStaffCodeBlank and bStaffNameBlank:
-            iCutIndex = iRowIndex
-            break
+        validate_required_columns(objDataFrame)
 
-    if iCutIndex != -1:
-        objDataFrame = objDataFrame.iloc[:iCutIndex]
+        iCutIndex: int = find_cut_index(objDataFrame)
+        if iCutIndex != -1:
+            objDataFrame = objDataFrame.iloc[:iCutIndex]
 
     try:
         objDataFrame.to_csv(pszOutputFilePath, sep="\t", index=False)
@@ -25,7 +25,32 @@ import os
 import shutil
 import re
 import sys
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from atomic_tsv_writer import BackgroundTsvWriter, write_tsv_rows_atomic
+from manhour_time_kernel import (
+    TIME_PARSE_MODE_HMS_ONLY,
+    format_number_text,
+    format_number_values,
+    parse_time_text_to_seconds_cached,
+    parse_time_values_to_seconds,
+)
+from output_manifest import OutputManifest, extract_manifest_option
+
+
+# 作成したファイルの一覧 (--manifest 指定時に JSON として書き出す)
+_OBJ_OUTPUT_MANIFEST: OutputManifest = OutputManifest("SellGeneralAdminCost_Allocation_Cmd.py")
+
+# 途中段階 (販管費配賦の step0001〜step0010・PJサマリの stepNNNN) の TSV も書き出す
+# (指定しない場合はメモリ上だけで処理する)
+KEEP_STEPS_OPTION: str = "--keep-steps"
+
+# 複数の組を並列に配賦するプロセス数 (既定は 1 で、このプロセス内で順に配賦する)
+JOBS_OPTION: str = "--jobs"
 
 
 def print_usage() -> None:
@@ -35,7 +60,10 @@ def print_usage() -> None:
         "   or: python SellGeneralAdminCost_Allocation_Cmd.py "
         "<manhour_tsv_path> <pl_tsv_path> <manhour_tsv_path> <pl_tsv_path> ...\n"
         "   or: python SellGeneralAdminCost_Allocation_Cmd.py "
-        "<manhour_tsv_path> ... <pl_tsv_path> ..."
+        "<manhour_tsv_path> ... <pl_tsv_path> ...\n"
+        "Options: --manifest <json_path>  作成したファイルの一覧を JSON で書き出す\n"
+        "         --keep-steps            途中段階 (販管費配賦・PJサマリの stepNNNN) の TSV も書き出す\n"
+        "         --jobs <n>              複数の組を n プロセスで並列に配賦する"
     )
     print(pszUsage)
 
@@ -142,8 +170,56 @@ def extract_project_key(pszProjectName: str) -> Optional[str]:
     return None
 
 
-def load_manhour_map(pszManhourPath: str) -> Dict[str, List[str]]:
-    objManhourMap: Dict[str, List[str]] = {}
+# ///////////////////////////////////////////////////////////////
+#
+# 工数 TSV (工数_yyyy年mm月_step11_…) の読み込み
+#
+#   1 回の読み込みで、プロジェクトごとに
+#     ・プロジェクトキー (extract_project_key の結果)
+#     ・計上カンパニー (2 列目)
+#     ・末尾 6 列の工数の文字列
+#   を ProjectManhourTable にまとめる。
+#   同じキーが複数ある場合は、後の行で上書きする。
+#
+#   読み込んだ表は、ファイルのパス・サイズ・更新日時ごとに保持し、
+#   同じ月の工数 TSV を使う複数の損益計算書では読み直さない。
+#
+# ///////////////////////////////////////////////////////////////
+PROJECT_MANHOUR_COLUMN_COUNT: int = 6
+
+
+class ProjectManhourTable:
+    def __init__(
+        self,
+        objProjectKeys: List[str],
+        objCompanies: List[str],
+        objManhourTexts: List[List[str]],
+    ) -> None:
+        self.objProjectKeys: List[str] = objProjectKeys
+        self.objCompanies: List[str] = objCompanies
+        self.objManhourTexts: List[List[str]] = objManhourTexts
+        self.objIndexByKey: Dict[str, int] = {
+            pszKey: iIndex for iIndex, pszKey in enumerate(objProjectKeys)
+        }
+
+    def get_manhour_texts(self, pszKey: str) -> List[str]:
+        iIndex: Optional[int] = self.objIndexByKey.get(pszKey)
+        if iIndex is None:
+            return []
+        return list(self.objManhourTexts[iIndex])
+
+    def get_company(self, pszKey: str) -> str:
+        iIndex: Optional[int] = self.objIndexByKey.get(pszKey)
+        if iIndex is None:
+            return ""
+        return self.objCompanies[iIndex]
+
+
+def parse_project_manhour_table(pszManhourPath: str) -> ProjectManhourTable:
+    objIndexByKey: Dict[str, int] = {}
+    objProjectKeys: List[str] = []
+    objCompanies: List[str] = []
+    objManhourTexts: List[List[str]] = []
     with open(pszManhourPath, "r", encoding="utf-8", newline="") as objInputFile:
         for pszLine in objInputFile:
             pszLineText: str = pszLine.rstrip("\n").rstrip("\r")
@@ -151,36 +227,41 @@ def load_manhour_map(pszManhourPath: str) -> Dict[str, List[str]]:
                 continue
 
             objParts: List[str] = pszLineText.split("\t")
-            pszFirstColumn: str = objParts[0] if objParts else ""
-
-            pszKey: Optional[str] = extract_project_key(pszFirstColumn)
+            pszKey: Optional[str] = extract_project_key(objParts[0])
             if pszKey is None:
                 continue
 
-            objManhourValues: List[str] = objParts[-6:] if len(objParts) >= 7 else []
-            if len(objManhourValues) < 6:
-                objManhourValues.extend([""] * (6 - len(objManhourValues)))
-            objManhourMap[pszKey] = objManhourValues
+            pszCompany: str = objParts[1] if len(objParts) >= 2 else ""
+            objManhourValues: List[str] = (
+                objParts[-PROJECT_MANHOUR_COLUMN_COUNT:]
+                if len(objParts) > PROJECT_MANHOUR_COLUMN_COUNT
+                else [""] * PROJECT_MANHOUR_COLUMN_COUNT
+            )
+            iIndex: Optional[int] = objIndexByKey.get(pszKey)
+            if iIndex is None:
+                objIndexByKey[pszKey] = len(objProjectKeys)
+                objProjectKeys.append(pszKey)
+                objCompanies.append(pszCompany)
+                objManhourTexts.append(objManhourValues)
+            else:
+                objCompanies[iIndex] = pszCompany
+                objManhourTexts[iIndex] = objManhourValues
 
-    return objManhourMap
+    return ProjectManhourTable(objProjectKeys, objCompanies, objManhourTexts)
 
 
-def load_company_map(pszManhourPath: str) -> Dict[str, str]:
-    objCompanyMap: Dict[str, str] = {}
-    with open(pszManhourPath, "r", encoding="utf-8", newline="") as objInputFile:
-        for pszLine in objInputFile:
-            pszLineText: str = pszLine.rstrip("\n").rstrip("\r")
-            if pszLineText == "":
-                continue
-            objParts: List[str] = pszLineText.split("\t")
-            if not objParts:
-                continue
-            pszKey: Optional[str] = extract_project_key(objParts[0])
-            if pszKey is None:
-                continue
-            pszCompany: str = objParts[1] if len(objParts) >= 2 else ""
-            objCompanyMap[pszKey] = pszCompany
-    return objCompanyMap
+_OBJ_PROJECT_MANHOUR_TABLE_CACHE: Dict[Tuple[str, int, int], ProjectManhourTable] = {}
+
+
+def load_project_manhour_table(pszManhourPath: str) -> ProjectManhourTable:
+    pszRealPath: str = os.path.realpath(pszManhourPath)
+    objStat: os.stat_result = os.stat(pszRealPath)
+    objCacheKey: Tuple[str, int, int] = (pszRealPath, objStat.st_size, objStat.st_mtime_ns)
+    objTable: Optional[ProjectManhourTable] = _OBJ_PROJECT_MANHOUR_TABLE_CACHE.get(objCacheKey)
+    if objTable is None:
+        objTable = parse_project_manhour_table(pszRealPath)
+        _OBJ_PROJECT_MANHOUR_TABLE_CACHE[objCacheKey] = objTable
+    return objTable
 
 
 def parse_number(pszText: str) -> float:
@@ -194,29 +275,80 @@ def parse_number(pszText: str) -> float:
 
 
 def parse_time_to_seconds(pszTimeText: str) -> float:
-    pszValue: str = (pszTimeText or "").strip()
-    if pszValue == "":
-        return 0.0
-
-    objParts: List[str] = pszValue.split(":")
-    if len(objParts) != 3:
-        return 0.0
-    try:
-        iHours: int = int(objParts[0])
-        iMinutes: int = int(objParts[1])
-        iSeconds: int = int(objParts[2])
-    except ValueError:
+    # H:MM:SS のみを受け付ける変換を共通カーネルで行う (不正値は 0 秒)。
+    objSeconds: Optional[int] = parse_time_text_to_seconds_cached(
+        pszTimeText or "",
+        TIME_PARSE_MODE_HMS_ONLY,
+    )
+    if objSeconds is None:
         return 0.0
-
-    return float(iHours * 3600 + iMinutes * 60 + iSeconds)
+    return float(objSeconds)
 
 
 def format_number(fValue: float) -> str:
-    if abs(fValue - round(fValue)) < 0.0000001:
-        return str(int(round(fValue)))
-    pszText: str = f"{fValue:.6f}"
-    pszText = pszText.rstrip("0").rstrip(".")
-    return pszText
+    # 数値の文字列化は共通カーネルで行う。
+    return format_number_text(fValue)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 販管費配賦の対象行の判定
+#
+#   行番号を固定せず、1 列目の値と見出しから判定する。
+#     ・合計行: 1 列目が「合計」の行 (無ければ 2 行目)
+#     ・配賦済みの行: カンパニー販管費の行 (Cnnn_) のうち、
+#       「<名称>の工数」列が見出しにある行
+#       (1C〜4C・事業開発カンパニー販管費)
+#     ・プロジェクト行: カンパニー以外のプロジェクト行 (A/J/P で始まる行) のうち、
+#       工数の列がある行 (行数の上限なし)
+#
+# ///////////////////////////////////////////////////////////////
+def detect_allocation_rows(
+    objRows: List[List[str]],
+    iManhourColumnIndex: int,
+) -> Tuple[int, List[int], List[int]]:
+    objHeaderNames: set[str] = set(objRows[0]) if objRows else set()
+    iTotalRowIndex: int = 1
+    for iRowIndex, objRow in enumerate(objRows):
+        if iRowIndex > 0 and objRow and objRow[0] == "合計":
+            iTotalRowIndex = iRowIndex
+            break
+
+    objAllocatedRowIndices: List[int] = []
+    objProjectRowIndices: List[int] = []
+    for iRowIndex, objRow in enumerate(objRows):
+        if iRowIndex == 0 or not objRow:
+            continue
+        pszName: str = objRow[0]
+        if extract_project_key(pszName) is None:
+            continue
+        if is_company_project(pszName):
+            if pszName.split("_", 1)[1] + "の工数" in objHeaderNames:
+                objAllocatedRowIndices.append(iRowIndex)
+            continue
+        if iManhourColumnIndex < len(objRow):
+            objProjectRowIndices.append(iRowIndex)
+    return iTotalRowIndex, objAllocatedRowIndices, objProjectRowIndices
+
+
+def allocate_by_largest_remainder(iTotal: int, arrWeights: np.ndarray) -> np.ndarray:
+    # iTotal を重み (整数) の比で整数に分け、合計を iTotal に一致させる。
+    # 切り捨てた端数は、余りの大きい順 (同じなら上の行から) に 1 ずつ配る。
+    iWeightTotal: int = int(arrWeights.sum())
+    objDtype: object = np.int64
+    if iTotal != 0 and int(np.abs(arrWeights).max()) > np.iinfo(np.int64).max // abs(iTotal):
+        objDtype = object
+    # object 型では np.divmod が使えないため、商と余りを別に求める
+    arrProducts: np.ndarray = arrWeights.astype(objDtype) * iTotal
+    arrQuotients: np.ndarray = arrProducts // iWeightTotal
+    arrRemainders: np.ndarray = arrProducts % iWeightTotal
+    iResidue: int = iTotal - int(arrQuotients.sum())
+    if iResidue > 0:
+        arrOrder: np.ndarray = np.lexsort(
+            (np.arange(len(arrWeights)), -arrRemainders.astype(np.float64))
+        )
+        arrQuotients[arrOrder[:iResidue]] += 1
+    return arrQuotients.astype(np.int64)
 
 
 def calculate_allocation(
@@ -225,11 +357,13 @@ def calculate_allocation(
     iAllocationColumnIndex: int,
     iManhourColumnIndex: int,
 ) -> None:
-    iRowIndexTotal: int = 1
-    iRowIndexAllocationStart: int = 3
-    iRowIndexAllocationEnd: int = 7
-    iRowIndexProjectStart: int = 10
-    iRowIndexProjectEnd: int = 123
+    iRowIndexTotal: int
+    objAllocatedRowIndices: List[int]
+    objProjectRowIndices: List[int]
+    iRowIndexTotal, objAllocatedRowIndices, objProjectRowIndices = detect_allocation_rows(
+        objRows,
+        iManhourColumnIndex,
+    )
 
     fSellGeneralAdminCostTotal: float = 0.0
     if iRowIndexTotal < len(objRows) and iSellGeneralAdminCostColumnIndex >= 0:
@@ -238,202 +372,246 @@ def calculate_allocation(
             fSellGeneralAdminCostTotal = parse_number(objRowTotal[iSellGeneralAdminCostColumnIndex])
 
     fAllocatedSum: float = 0.0
-    for iRowIndex in range(iRowIndexAllocationStart, iRowIndexAllocationEnd + 1):
-        if iRowIndex >= len(objRows):
-            break
+    for iRowIndex in objAllocatedRowIndices:
         objRow: List[str] = objRows[iRowIndex]
         if iAllocationColumnIndex < len(objRow):
             fAllocatedSum += parse_number(objRow[iAllocationColumnIndex])
 
     fSellGeneralAdminCostAllocation: float = fSellGeneralAdminCostTotal - fAllocatedSum
 
-    fTotalManhours: float = 0.0
-    for iRowIndex in range(iRowIndexProjectStart, iRowIndexProjectEnd + 1):
-        if iRowIndex >= len(objRows):
-            break
-        objRow: List[str] = objRows[iRowIndex]
-        if iManhourColumnIndex < len(objRow):
-            fTotalManhours += parse_time_to_seconds(objRow[iManhourColumnIndex])
-
-    if fTotalManhours <= 0.0:
+    # 工数は 1 回だけ秒数の配列に変換する (不正値は 0 秒)
+    arrManhourSeconds: np.ndarray
+    arrManhourSeconds, _ = parse_time_values_to_seconds(
+        [objRows[iRowIndex][iManhourColumnIndex] for iRowIndex in objProjectRowIndices],
+        TIME_PARSE_MODE_HMS_ONLY,
+    )
+    if arrManhourSeconds.size == 0 or int(arrManhourSeconds.sum()) <= 0:
         return
 
-    for iRowIndex in range(iRowIndexProjectStart, iRowIndexProjectEnd + 1):
-        if iRowIndex >= len(objRows):
-            break
+    arrAllocations: np.ndarray = allocate_by_largest_remainder(
+        int(round(fSellGeneralAdminCostAllocation)),
+        arrManhourSeconds,
+    )
+    for iRowIndex, iAllocation in zip(objProjectRowIndices, arrAllocations.tolist()):
         objRow = objRows[iRowIndex]
-        if iManhourColumnIndex >= len(objRow):
-            continue
-        fManhourSeconds: float = parse_time_to_seconds(objRow[iManhourColumnIndex])
-        fAllocation: float = fSellGeneralAdminCostAllocation * fManhourSeconds / fTotalManhours
-        fAllocation = float(int(round(fAllocation)))
-
         if iAllocationColumnIndex >= len(objRow):
             iAppendCount: int = iAllocationColumnIndex + 1 - len(objRow)
             objRow.extend([""] * iAppendCount)
-        objRow[iAllocationColumnIndex] = format_number(fAllocation)
+        objRow[iAllocationColumnIndex] = format_number(float(iAllocation))
         objRows[iRowIndex] = objRow
 
 
-def recalculate_operating_profit(
-    objRows: List[List[str]],
-    iGrossProfitColumnIndex: int,
-    iOperatingProfitColumnIndex: int,
-) -> None:
-    if iGrossProfitColumnIndex < 0 or iOperatingProfitColumnIndex < 0:
-        return
-    if iOperatingProfitColumnIndex <= iGrossProfitColumnIndex:
-        return
-
-    for iRowIndex in range(1, len(objRows)):
-        objRow: List[str] = objRows[iRowIndex]
-        if iGrossProfitColumnIndex >= len(objRow):
-            continue
-
-        fGrossProfit: float = parse_number(objRow[iGrossProfitColumnIndex])
-        fDeductionSum: float = 0.0
-        for iColumnIndex in range(iGrossProfitColumnIndex + 1, iOperatingProfitColumnIndex):
-            if iColumnIndex >= len(objRow):
-                continue
-            fDeductionSum += parse_number(objRow[iColumnIndex])
-
-        fOperatingProfit: float = fGrossProfit - fDeductionSum
-        if iOperatingProfitColumnIndex >= len(objRow):
-            iAppendCount: int = iOperatingProfitColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iOperatingProfitColumnIndex] = format_number(fOperatingProfit)
-        objRows[iRowIndex] = objRow
+# ///////////////////////////////////////////////////////////////
+#
+# 利益の再計算 (段階利益のカスケード)
+#
+#   「小計の列 = 基準の列 ± 列 (または列の範囲) の合計」を
+#   データ (PROFIT_CASCADE_STAGES) として定義し、
+#   表全体を 1 つの数値行列にしてから、段階ごとに列の範囲の合計を
+#   行方向にまとめて計算する。
+#
+#   ・各段階は、見出しに必要な列が無い場合や、列の並びが
+#     objAscendingColumns の順でない場合は行わない。
+#   ・各段階の対象は、pszRowColumn の列まである行 (見出し行を除く)。
+#   ・範囲の合計は左の列から順に足す (従来の 1 セルずつの合計と同じ順序)。
+#   ・各段階の結果は文字列に 1 回だけ変換し、次の段階では
+#     その文字列を数値に戻した値を使う (従来の再読み込みと同じ値)。
+#
+# ///////////////////////////////////////////////////////////////
+class ProfitCascadeTerm(NamedTuple):
+    # pszToColumn が None なら pszFromColumn の列だけ、
+    # そうでなければ 2 つの列の間 (両端を含まない) の合計
+    iSign: int
+    pszFromColumn: str
+    pszToColumn: Optional[str] = None
+
+
+class ProfitCascadeRule(NamedTuple):
+    pszTargetColumn: str
+    pszBaseColumn: Optional[str]
+    objTerms: Tuple[ProfitCascadeTerm, ...]
+
+
+class ProfitCascadeStage(NamedTuple):
+    pszRowColumn: str
+    objRules: Tuple[ProfitCascadeRule, ...]
+    objAscendingColumns: Tuple[str, ...] = ()
+
+
+PROFIT_CASCADE_STAGES: Tuple[ProfitCascadeStage, ...] = (
+    # 営業利益 = 売上総利益 − (売上総利益と営業利益の間の列の合計)
+    ProfitCascadeStage(
+        "売上総利益",
+        (
+            ProfitCascadeRule(
+                "営業利益",
+                "売上総利益",
+                (ProfitCascadeTerm(-1, "売上総利益", "営業利益"),),
+            ),
+        ),
+        ("売上総利益", "営業利益"),
+    ),
+    # 営業外収益・営業外費用 = それぞれの内訳の合計
+    # 経常利益 = 営業利益 + 営業外収益 − 営業外費用
+    ProfitCascadeStage(
+        "営業利益",
+        (
+            ProfitCascadeRule(
+                "営業外収益",
+                None,
+                (ProfitCascadeTerm(1, "営業利益", "営業外収益"),),
+            ),
+            ProfitCascadeRule(
+                "営業外費用",
+                None,
+                (ProfitCascadeTerm(1, "営業外収益", "営業外費用"),),
+            ),
+            ProfitCascadeRule(
+                "経常利益",
+                "営業利益",
+                (ProfitCascadeTerm(1, "営業外収益"), ProfitCascadeTerm(-1, "営業外費用")),
+            ),
+        ),
+        ("営業利益", "営業外収益", "営業外費用", "経常利益"),
+    ),
+    # 税引前当期純利益 = 経常利益 + 特別利益 − 特別損失
+    ProfitCascadeStage(
+        "経常利益",
+        (
+            ProfitCascadeRule(
+                "税引前当期純利益",
+                "経常利益",
+                (ProfitCascadeTerm(1, "特別利益"), ProfitCascadeTerm(-1, "特別損失")),
+            ),
+        ),
+    ),
+    # 法人税等 = 法人税、住民税及び事業税
+    # 当期純利益 = 税引前当期純利益 − 法人税、住民税及び事業税
+    ProfitCascadeStage(
+        "法人税、住民税及び事業税",
+        (
+            ProfitCascadeRule("法人税等", "法人税、住民税及び事業税", ()),
+            ProfitCascadeRule(
+                "当期純利益",
+                "税引前当期純利益",
+                (ProfitCascadeTerm(-1, "法人税、住民税及び事業税"),),
+            ),
+        ),
+    ),
+)
+
+
+# 1 段階分の書き込み: (列, 行番号の配列, 文字列) の並び
+ProfitCascadeWrites = List[Tuple[int, List[int], List[str]]]
+
+
+def collect_cascade_column_names(objStage: ProfitCascadeStage) -> List[str]:
+    objNames: List[str] = [objStage.pszRowColumn]
+    for objRule in objStage.objRules:
+        objNames.append(objRule.pszTargetColumn)
+        if objRule.pszBaseColumn is not None:
+            objNames.append(objRule.pszBaseColumn)
+        for objTerm in objRule.objTerms:
+            objNames.append(objTerm.pszFromColumn)
+            if objTerm.pszToColumn is not None:
+                objNames.append(objTerm.pszToColumn)
+    return objNames
 
 
-def recalculate_ordinary_profit(
+def evaluate_profit_cascade(
     objRows: List[List[str]],
-    iOperatingProfitColumnIndex: int,
-    iNonOperatingIncomeColumnIndex: int,
-    iNonOperatingExpenseColumnIndex: int,
-    iOrdinaryProfitColumnIndex: int,
-) -> None:
-    if (
-        iOperatingProfitColumnIndex < 0
-        or iNonOperatingIncomeColumnIndex < 0
-        or iNonOperatingExpenseColumnIndex < 0
-        or iOrdinaryProfitColumnIndex < 0
-    ):
-        return
-    if iOperatingProfitColumnIndex >= iNonOperatingIncomeColumnIndex:
-        return
-    if iNonOperatingIncomeColumnIndex >= iNonOperatingExpenseColumnIndex:
-        return
-    if iNonOperatingExpenseColumnIndex >= iOrdinaryProfitColumnIndex:
-        return
-
-    for iRowIndex in range(1, len(objRows)):
+    objStages: Tuple[ProfitCascadeStage, ...] = PROFIT_CASCADE_STAGES,
+) -> List[ProfitCascadeWrites]:
+    objStageWrites: List[ProfitCascadeWrites] = [[] for _ in objStages]
+    if not objRows:
+        return objStageWrites
+
+    # 同じ見出しが複数ある場合は、従来どおり右側の列を使う
+    objColumnIndices: Dict[str, int] = {
+        pszColumnName: iColumnIndex for iColumnIndex, pszColumnName in enumerate(objRows[0])
+    }
+    iColumnCount: int = max(len(objRow) for objRow in objRows)
+    for objStage in objStages:
+        for pszColumnName in collect_cascade_column_names(objStage):
+            iColumnCount = max(iColumnCount, objColumnIndices.get(pszColumnName, -1) + 1)
+
+    # 表全体を数値の行列にする (空欄・文字列・行の外は 0)
+    iRowCount: int = len(objRows)
+    arrValues: np.ndarray = np.zeros((iRowCount, iColumnCount), dtype=np.float64)
+    arrRowLengths: np.ndarray = np.array([len(objRow) for objRow in objRows], dtype=np.int64)
+    objNumbersByText: Dict[str, float] = {}
+    for iRowIndex in range(1, iRowCount):
         objRow: List[str] = objRows[iRowIndex]
-        if iOperatingProfitColumnIndex >= len(objRow):
+        for iColumnIndex, pszValue in enumerate(objRow):
+            fValue: Optional[float] = objNumbersByText.get(pszValue)
+            if fValue is None:
+                fValue = parse_number(pszValue)
+                objNumbersByText[pszValue] = fValue
+            arrValues[iRowIndex, iColumnIndex] = fValue
+
+    for iStageIndex, objStage in enumerate(objStages):
+        if any(
+            pszColumnName not in objColumnIndices
+            for pszColumnName in collect_cascade_column_names(objStage)
+        ):
+            continue
+        objAscendingIndices: List[int] = [
+            objColumnIndices[pszColumnName] for pszColumnName in objStage.objAscendingColumns
+        ]
+        if any(
+            iLeft >= iRight for iLeft, iRight in zip(objAscendingIndices, objAscendingIndices[1:])
+        ):
             continue
 
-        fNonOperatingIncome: float = 0.0
-        for iColumnIndex in range(iOperatingProfitColumnIndex + 1, iNonOperatingIncomeColumnIndex):
-            if iColumnIndex >= len(objRow):
-                continue
-            fNonOperatingIncome += parse_number(objRow[iColumnIndex])
-
-        fNonOperatingExpense: float = 0.0
-        for iColumnIndex in range(iNonOperatingIncomeColumnIndex + 1, iNonOperatingExpenseColumnIndex):
-            if iColumnIndex >= len(objRow):
-                continue
-            fNonOperatingExpense += parse_number(objRow[iColumnIndex])
-
-        if iNonOperatingIncomeColumnIndex >= len(objRow):
-            iAppendCount = iNonOperatingIncomeColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iNonOperatingIncomeColumnIndex] = format_number(fNonOperatingIncome)
-
-        if iNonOperatingExpenseColumnIndex >= len(objRow):
-            iAppendCount = iNonOperatingExpenseColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iNonOperatingExpenseColumnIndex] = format_number(fNonOperatingExpense)
-
-        fOperatingProfit: float = parse_number(objRow[iOperatingProfitColumnIndex])
-        fOrdinaryProfit: float = fOperatingProfit + fNonOperatingIncome - fNonOperatingExpense
-        if iOrdinaryProfitColumnIndex >= len(objRow):
-            iAppendCount = iOrdinaryProfitColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iOrdinaryProfitColumnIndex] = format_number(fOrdinaryProfit)
-        objRows[iRowIndex] = objRow
-
-
-def recalculate_pre_tax_profit(
-    objRows: List[List[str]],
-    iOrdinaryProfitColumnIndex: int,
-    iExtraordinaryIncomeColumnIndex: int,
-    iExtraordinaryLossColumnIndex: int,
-    iPreTaxProfitColumnIndex: int,
-) -> None:
-    if (
-        iOrdinaryProfitColumnIndex < 0
-        or iExtraordinaryIncomeColumnIndex < 0
-        or iExtraordinaryLossColumnIndex < 0
-        or iPreTaxProfitColumnIndex < 0
-    ):
-        return
-
-    for iRowIndex in range(1, len(objRows)):
-        objRow: List[str] = objRows[iRowIndex]
-        if iOrdinaryProfitColumnIndex >= len(objRow):
+        arrTargetRows: np.ndarray = np.flatnonzero(
+            arrRowLengths > objColumnIndices[objStage.pszRowColumn]
+        )
+        arrTargetRows = arrTargetRows[arrTargetRows > 0]
+        if arrTargetRows.size == 0:
             continue
 
-        fOrdinaryProfit: float = parse_number(objRow[iOrdinaryProfitColumnIndex])
-        fExtraordinaryIncome: float = 0.0
-        if iExtraordinaryIncomeColumnIndex < len(objRow):
-            fExtraordinaryIncome = parse_number(objRow[iExtraordinaryIncomeColumnIndex])
-        fExtraordinaryLoss: float = 0.0
-        if iExtraordinaryLossColumnIndex < len(objRow):
-            fExtraordinaryLoss = parse_number(objRow[iExtraordinaryLossColumnIndex])
-
-        fPreTaxProfit: float = fOrdinaryProfit + fExtraordinaryIncome - fExtraordinaryLoss
-        if iPreTaxProfitColumnIndex >= len(objRow):
-            iAppendCount: int = iPreTaxProfitColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iPreTaxProfitColumnIndex] = format_number(fPreTaxProfit)
-        objRows[iRowIndex] = objRow
+        objTargetColumns: List[int] = []
+        for objRule in objStage.objRules:
+            arrResult: np.ndarray = np.zeros(arrTargetRows.size, dtype=np.float64)
+            if objRule.pszBaseColumn is not None:
+                arrResult = arrValues[arrTargetRows, objColumnIndices[objRule.pszBaseColumn]].copy()
+            for objTerm in objRule.objTerms:
+                iFromColumn: int = objColumnIndices[objTerm.pszFromColumn]
+                if objTerm.pszToColumn is None:
+                    arrTerm: np.ndarray = arrValues[arrTargetRows, iFromColumn]
+                else:
+                    arrTerm = np.zeros(arrTargetRows.size, dtype=np.float64)
+                    for iColumnIndex in range(iFromColumn + 1, objColumnIndices[objTerm.pszToColumn]):
+                        arrTerm = arrTerm + arrValues[arrTargetRows, iColumnIndex]
+                arrResult = arrResult + arrTerm if objTerm.iSign > 0 else arrResult - arrTerm
+            iTargetColumn: int = objColumnIndices[objRule.pszTargetColumn]
+            arrValues[arrTargetRows, iTargetColumn] = arrResult
+            arrRowLengths[arrTargetRows] = np.maximum(arrRowLengths[arrTargetRows], iTargetColumn + 1)
+            objTargetColumns.append(iTargetColumn)
+
+        # 段階の結果を文字列にし、次の段階は文字列から戻した値を使う
+        objTargetRowList: List[int] = arrTargetRows.tolist()
+        for iTargetColumn in objTargetColumns:
+            objFormatted: List[str] = [
+                format_number(fValue) for fValue in arrValues[arrTargetRows, iTargetColumn].tolist()
+            ]
+            arrValues[arrTargetRows, iTargetColumn] = [
+                parse_number(pszValue) for pszValue in objFormatted
+            ]
+            objStageWrites[iStageIndex].append((iTargetColumn, objTargetRowList, objFormatted))
+    return objStageWrites
 
 
-def recalculate_net_profit(
+def apply_profit_cascade_writes(
     objRows: List[List[str]],
-    iCorporateTaxColumnIndex: int,
-    iCorporateTaxTotalColumnIndex: int,
-    iPreTaxProfitColumnIndex: int,
-    iNetProfitColumnIndex: int,
+    objWrites: ProfitCascadeWrites,
 ) -> None:
-    if (
-        iCorporateTaxColumnIndex < 0
-        or iCorporateTaxTotalColumnIndex < 0
-        or iPreTaxProfitColumnIndex < 0
-        or iNetProfitColumnIndex < 0
-    ):
-        return
-
-    for iRowIndex in range(1, len(objRows)):
-        objRow: List[str] = objRows[iRowIndex]
-        if iCorporateTaxColumnIndex >= len(objRow):
-            continue
-
-        fCorporateTax: float = parse_number(objRow[iCorporateTaxColumnIndex])
-        if iCorporateTaxTotalColumnIndex >= len(objRow):
-            iAppendCount: int = iCorporateTaxTotalColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iCorporateTaxTotalColumnIndex] = format_number(fCorporateTax)
-
-        fPreTaxProfit: float = 0.0
-        if iPreTaxProfitColumnIndex < len(objRow):
-            fPreTaxProfit = parse_number(objRow[iPreTaxProfitColumnIndex])
-
-        fNetProfit: float = fPreTaxProfit - fCorporateTax
-        if iNetProfitColumnIndex >= len(objRow):
-            iAppendCount = iNetProfitColumnIndex + 1 - len(objRow)
-            objRow.extend([""] * iAppendCount)
-        objRow[iNetProfitColumnIndex] = format_number(fNetProfit)
-        objRows[iRowIndex] = objRow
+    for iColumnIndex, objRowIndices, objValues in objWrites:
+        for iRowIndex, pszValue in zip(objRowIndices, objValues):
+            objRow: List[str] = objRows[iRowIndex]
+            if iColumnIndex >= len(objRow):
+                objRow.extend([""] * (iColumnIndex + 1 - len(objRow)))
+            objRow[iColumnIndex] = pszValue
 
 
 def process_pl_tsv(
@@ -447,9 +625,10 @@ def process_pl_tsv(
     pszOutputStep0005Path: str,
     pszOutputStep0006Path: str,
     pszOutputFinalPath: str,
-    objManhourMap: Dict[str, List[str]],
-    objCompanyMap: Dict[str, str],
+    objManhourTable: ProjectManhourTable,
+    objStepWriter: Optional[BackgroundTsvWriter] = None,
 ) -> None:
+    # objStepWriter を渡した場合だけ途中段階の TSV を書き出す
     objRows: List[List[str]] = []
     with open(pszPlPath, "r", encoding="utf-8", newline="") as objInputFile:
         for pszLine in objInputFile:
@@ -478,16 +657,14 @@ def process_pl_tsv(
         if pszKey is None:
             continue
 
-        objManhours: List[str] = objManhourMap.get(pszKey, [])
+        objManhours: List[str] = objManhourTable.get_manhour_texts(pszKey)
         if len(objManhours) < 6:
             objManhours = objManhours + ["0:00:00"] * (6 - len(objManhours))
 
         objRow.extend(objManhours[:6])
         objRows[iRowIndex] = objRow
 
-    with open(pszOutputStep0001Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
+    write_step_rows(objStepWriter, pszOutputStep0001Path, objRows)
 
     iSellGeneralAdminCostColumnIndex: int = -1
     iAllocationColumnIndex: int = -1
@@ -510,12 +687,57 @@ def process_pl_tsv(
             iManhourColumnIndex,
         )
 
-    with open(pszOutputStep0002Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
+    write_step_rows(objStepWriter, pszOutputStep0002Path, objRows)
 
-    # step0004の処理
-    # ここから
+    if objStepWriter is not None:
+        write_company_manhour_steps(
+            objRows,
+            objManhourTable,
+            pszOutputStep0003ZeroPath,
+            objStepWriter,
+        )
+
+    # 営業利益〜当期純利益を 1 回の計算でまとめて求め、
+    # 段階ごとの途中結果は --keep-steps 指定時だけ step ファイルへ書き出す
+    objStageWrites: List[ProfitCascadeWrites] = evaluate_profit_cascade(objRows)
+    for objWrites, pszStepPath in zip(
+        objStageWrites,
+        [
+            pszOutputStep0003Path,
+            pszOutputStep0004Path,
+            pszOutputStep0005Path,
+            pszOutputStep0006Path,
+        ],
+    ):
+        apply_profit_cascade_writes(objRows, objWrites)
+        write_step_rows(objStepWriter, pszStepPath, objRows)
+
+    write_tsv_rows(pszOutputFinalPath, objRows)
+    write_transposed_rows(pszOutputFinalPath, objRows)
+
+
+def write_step_rows(
+    objStepWriter: Optional[BackgroundTsvWriter],
+    pszPath: str,
+    objRows: List[List[str]],
+) -> None:
+    # 途中段階の TSV は別スレッドで書き出す (計算を書き込みの完了で待たせない)。
+    # 以降の段階で行が書き換わるため、書き込み用に複製を渡す。
+    if objStepWriter is None:
+        return
+    objSnapshotRows: List[List[str]] = [list(objRow) for objRow in objRows]
+    _OBJ_OUTPUT_MANIFEST.add(pszPath, bReported=False)
+    objStepWriter.submit(lambda: write_tsv_rows_atomic(pszPath, objSnapshotRows))
+
+
+def write_company_manhour_steps(
+    objRows: List[List[str]],
+    objManhourTable: ProjectManhourTable,
+    pszOutputStep0003ZeroPath: str,
+    objStepWriter: BackgroundTsvWriter,
+) -> None:
+    # カンパニー販管費の工数の振り分け (step0003〜step0005)。
+    # 確認用の途中段階のみで、最終結果には使わない。
     objZeroRows: List[List[str]] = [list(objRow) for objRow in objRows]
     if objZeroRows:
         objHeaderZero: List[str] = objZeroRows[0]
@@ -537,9 +759,7 @@ def process_pl_tsv(
                     objRow[iColumnIndex] = "0:00:00"
             objZeroRows[iRowIndex] = objRow
 
-    with open(pszOutputStep0003ZeroPath, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objZeroRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
+    write_step_rows(objStepWriter, pszOutputStep0003ZeroPath, objZeroRows)
 
     pszOutputStep0004Path: str = pszOutputStep0003ZeroPath.replace("step0003_", "step0004_", 1)
     iManhourColumnIndexZero: int = find_column_index(objZeroRows[0], "工数") if objZeroRows else -1
@@ -572,7 +792,7 @@ def process_pl_tsv(
         pszKey: Optional[str] = extract_project_key(pszName)
         if pszKey is None:
             continue
-        pszCompany: str = objCompanyMap.get(pszKey, "")
+        pszCompany: str = objManhourTable.get_company(pszKey)
         iTargetColumn: int = -1
         if pszCompany == "第一インキュ":
             iTargetColumn = objTargetIndicesZero[0] if len(objTargetIndicesZero) > 0 else -1
@@ -600,9 +820,7 @@ def process_pl_tsv(
                     objRow[iColumnIndex] = "0:00:00"
         objZeroRows[iRowIndex] = objRow
 
-    with open(pszOutputStep0004Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objZeroRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
+    write_step_rows(objStepWriter, pszOutputStep0004Path, objZeroRows)
     # step0004の処理
     # ここまで
 
@@ -661,128 +879,7 @@ def process_pl_tsv(
         objRowsStep0005[iRowIndex] = objRow
 
     pszOutputStep0005ActualPath: str = pszOutputStep0003ZeroPath.replace("step0003_", "step0005_", 1)
-    with open(pszOutputStep0005ActualPath, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRowsStep0005:
-            objOutputFile.write("\t".join(objRow) + "\n")
-
-    iGrossProfitColumnIndex: int = -1
-    iOperatingProfitColumnIndex: int = -1
-    if objRows:
-        objHeaderRow = objRows[0]
-        for iColumnIndex, pszColumnName in enumerate(objHeaderRow):
-            if pszColumnName == "売上総利益":
-                iGrossProfitColumnIndex = iColumnIndex
-            elif pszColumnName == "営業利益":
-                iOperatingProfitColumnIndex = iColumnIndex
-
-    if iGrossProfitColumnIndex >= 0 and iOperatingProfitColumnIndex >= 0:
-        recalculate_operating_profit(
-            objRows,
-            iGrossProfitColumnIndex,
-            iOperatingProfitColumnIndex,
-        )
-
-    with open(pszOutputStep0003Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
-
-    iNonOperatingIncomeColumnIndex: int = -1
-    iNonOperatingExpenseColumnIndex: int = -1
-    iOrdinaryProfitColumnIndex: int = -1
-    if objRows:
-        objHeaderRow = objRows[0]
-        for iColumnIndex, pszColumnName in enumerate(objHeaderRow):
-            if pszColumnName == "営業外収益":
-                iNonOperatingIncomeColumnIndex = iColumnIndex
-            elif pszColumnName == "営業外費用":
-                iNonOperatingExpenseColumnIndex = iColumnIndex
-            elif pszColumnName == "経常利益":
-                iOrdinaryProfitColumnIndex = iColumnIndex
-
-    if (
-        iOperatingProfitColumnIndex >= 0
-        and iNonOperatingIncomeColumnIndex >= 0
-        and iNonOperatingExpenseColumnIndex >= 0
-        and iOrdinaryProfitColumnIndex >= 0
-    ):
-        recalculate_ordinary_profit(
-            objRows,
-            iOperatingProfitColumnIndex,
-            iNonOperatingIncomeColumnIndex,
-            iNonOperatingExpenseColumnIndex,
-            iOrdinaryProfitColumnIndex,
-        )
-
-    with open(pszOutputStep0004Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
-
-    iExtraordinaryIncomeColumnIndex: int = -1
-    iExtraordinaryLossColumnIndex: int = -1
-    iPreTaxProfitColumnIndex: int = -1
-    if objRows:
-        objHeaderRow = objRows[0]
-        for iColumnIndex, pszColumnName in enumerate(objHeaderRow):
-            if pszColumnName == "特別利益":
-                iExtraordinaryIncomeColumnIndex = iColumnIndex
-            elif pszColumnName == "特別損失":
-                iExtraordinaryLossColumnIndex = iColumnIndex
-            elif pszColumnName == "税引前当期純利益":
-                iPreTaxProfitColumnIndex = iColumnIndex
-
-    if (
-        iOrdinaryProfitColumnIndex >= 0
-        and iExtraordinaryIncomeColumnIndex >= 0
-        and iExtraordinaryLossColumnIndex >= 0
-        and iPreTaxProfitColumnIndex >= 0
-    ):
-        recalculate_pre_tax_profit(
-            objRows,
-            iOrdinaryProfitColumnIndex,
-            iExtraordinaryIncomeColumnIndex,
-            iExtraordinaryLossColumnIndex,
-            iPreTaxProfitColumnIndex,
-        )
-
-    with open(pszOutputStep0005Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
-
-    iCorporateTaxColumnIndex: int = -1
-    iCorporateTaxTotalColumnIndex: int = -1
-    iNetProfitColumnIndex: int = -1
-    if objRows:
-        objHeaderRow = objRows[0]
-        for iColumnIndex, pszColumnName in enumerate(objHeaderRow):
-            if pszColumnName == "法人税、住民税及び事業税":
-                iCorporateTaxColumnIndex = iColumnIndex
-            elif pszColumnName == "法人税等":
-                iCorporateTaxTotalColumnIndex = iColumnIndex
-            elif pszColumnName == "当期純利益":
-                iNetProfitColumnIndex = iColumnIndex
-
-    if (
-        iCorporateTaxColumnIndex >= 0
-        and iCorporateTaxTotalColumnIndex >= 0
-        and iPreTaxProfitColumnIndex >= 0
-        and iNetProfitColumnIndex >= 0
-    ):
-        recalculate_net_profit(
-            objRows,
-            iCorporateTaxColumnIndex,
-            iCorporateTaxTotalColumnIndex,
-            iPreTaxProfitColumnIndex,
-            iNetProfitColumnIndex,
-        )
-
-    with open(pszOutputStep0006Path, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
-
-    with open(pszOutputFinalPath, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objRows:
-            objOutputFile.write("\t".join(objRow) + "\n")
-    write_transposed_tsv(pszOutputFinalPath)
+    write_step_rows(objStepWriter, pszOutputStep0005ActualPath, objRowsStep0005)
 
 
 def transpose_rows(objRows: List[List[str]]) -> List[List[str]]:
@@ -799,23 +896,13 @@ def transpose_rows(objRows: List[List[str]]) -> List[List[str]]:
     return objTransposed
 
 
-def write_transposed_tsv(pszInputPath: str) -> None:
+def write_transposed_rows(pszInputPath: str, objRows: List[List[str]]) -> None:
+    # 縦持ちの TSV (…_vertical.tsv) を転置した TSV を、ファイルを読み直さずに書き出す
     pszDirectory: str
     pszFileName: str
     pszDirectory, pszFileName = os.path.split(pszInputPath)
-    pszOutputFileName: str = pszFileName.replace("_vertical", "")
-    pszOutputPath: str = os.path.join(pszDirectory, pszOutputFileName)
-
-    objRows: List[List[str]] = []
-    with open(pszInputPath, "r", encoding="utf-8", newline="") as objInputFile:
-        for pszLine in objInputFile:
-            pszLineText: str = pszLine.rstrip("\n").rstrip("\r")
-            objRows.append(pszLineText.split("\t"))
-
-    objTransposed = transpose_rows(objRows)
-    with open(pszOutputPath, "w", encoding="utf-8", newline="") as objOutputFile:
-        for objRow in objTransposed:
-            objOutputFile.write("\t".join(objRow) + "\n")
+    pszOutputPath: str = os.path.join(pszDirectory, pszFileName.replace("_vertical", ""))
+    write_tsv_rows(pszOutputPath, transpose_rows(objRows))
 
 
 def find_selected_range_path(pszBaseDirectory: str) -> Optional[str]:
@@ -911,111 +998,224 @@ def read_tsv_rows(pszPath: str) -> List[List[str]]:
     return objRows
 
 
-def sum_tsv_rows(objBaseRows: List[List[str]], objAddRows: List[List[str]]) -> List[List[str]]:
-    if not objBaseRows:
-        return [list(objRow) for objRow in objAddRows]
-    if not objAddRows:
-        return objBaseRows
-
-    objBaseKeyIndices: Dict[str, List[int]] = {}
-    for iRowIndex, objRow in enumerate(objBaseRows):
-        pszKey: str = objRow[0] if objRow else ""
-        objBaseKeyIndices.setdefault(pszKey, []).append(iRowIndex)
+# ///////////////////////////////////////////////////////////////
+#
+# 行・列の見出しで位置を合わせた TSV の合計 (数値行列版)
+#
+#   各シートを 1 回だけ解析し、数値の行列 (float) と
+#   行ラベル (1 列目のキー) ・列ラベル (1 行目の見出し) の索引を作る。
+#   合計は行ラベル・列ラベルが一致するセルどうしで行い
+#   (同じラベルが複数ある場合は出現順で対応させる)、
+#   文字列への変換は最後に 1 回だけ行う。
+#
+#   セルの規則は従来の 1 セルずつの合計と同じ。
+#     ・最初に空欄でなくなったシートの値が文字列なら、その文字列
+#     ・数値なら、すべてのシートの数値の合計
+#       (行が最初に現れたシートの数値だけなら、元の文字列のまま)
+#     ・すべて空欄なら、行が最初に現れたシートの値
+#   どのシートにも無い行・列は、最初に現れた順に末尾へ追加する。
+#
+# ///////////////////////////////////////////////////////////////
+SHEET_CELL_BLANK: int = 0
+SHEET_CELL_NUMBER: int = 1
+SHEET_CELL_TEXT: int = 2
+
+
+class LabeledNumericSheet:
+    def __init__(self, objRows: List[List[str]]) -> None:
+        objHeader: List[str] = objRows[0] if objRows else []
+        self.objHeader: List[str] = list(objHeader)
+        self.objRowLengths: List[int] = [len(objRow) for objRow in objRows]
+        iColumnCount: int = max(self.objRowLengths, default=0)
+
+        # 行ラベル: (1 列目の値, 同じ値の出現順)
+        objRowOccurrences: Dict[str, int] = {}
+        self.objRowLabels: List[Tuple[str, int]] = []
+        for objRow in objRows[1:]:
+            pszKey: str = objRow[0] if objRow else ""
+            iOccurrence: int = objRowOccurrences.get(pszKey, 0)
+            objRowOccurrences[pszKey] = iOccurrence + 1
+            self.objRowLabels.append((pszKey, iOccurrence))
+
+        # 列ラベル: (見出し, 同じ見出しの出現順)。見出しより右の列は位置で対応させる
+        objColumnOccurrences: Dict[str, int] = {}
+        self.objColumnLabels: List[Tuple[Optional[str], int]] = []
+        for iColumnIndex in range(1, iColumnCount):
+            if iColumnIndex >= len(objHeader):
+                self.objColumnLabels.append((None, iColumnIndex))
+                continue
+            pszLabel: str = objHeader[iColumnIndex]
+            iOccurrence = objColumnOccurrences.get(pszLabel, 0)
+            objColumnOccurrences[pszLabel] = iOccurrence + 1
+            self.objColumnLabels.append((pszLabel, iOccurrence))
+
+        # データ部分 (見出し行・キー列を除く) の文字列・種類・数値
+        iDataRowCount: int = max(len(objRows) - 1, 0)
+        iDataColumnCount: int = max(iColumnCount - 1, 0)
+        self.arrTexts: np.ndarray = np.full((iDataRowCount, iDataColumnCount), "", dtype=object)
+        for iRowIndex, objRow in enumerate(objRows[1:]):
+            if len(objRow) > 1:
+                self.arrTexts[iRowIndex, : len(objRow) - 1] = objRow[1:]
+
+        objKindsByText: Dict[str, Tuple[int, float]] = {}
+        for pszText in set(self.arrTexts.ravel().tolist()):
+            fValue: Optional[float] = try_parse_float(pszText)
+            if fValue is not None:
+                objKindsByText[pszText] = (SHEET_CELL_NUMBER, fValue)
+            elif pszText.strip() == "":
+                objKindsByText[pszText] = (SHEET_CELL_BLANK, 0.0)
+            else:
+                objKindsByText[pszText] = (SHEET_CELL_TEXT, 0.0)
+        objFlatTexts: List[str] = self.arrTexts.ravel().tolist()
+        self.arrKinds: np.ndarray = np.array(
+            [objKindsByText[pszText][0] for pszText in objFlatTexts],
+            dtype=np.int8,
+        ).reshape(self.arrTexts.shape)
+        self.arrValues: np.ndarray = np.array(
+            [objKindsByText[pszText][1] for pszText in objFlatTexts],
+            dtype=np.float64,
+        ).reshape(self.arrTexts.shape)
+
+
+def sum_labeled_sheets(objSheets: List[LabeledNumericSheet]) -> List[List[str]]:
+    if not objSheets:
+        return []
 
-    objBaseKeyCursor: Dict[str, int] = {pszKey: 0 for pszKey in objBaseKeyIndices}
+    # 出力する行・列の位置 (最初に現れた順)
+    objOutputRowIndices: Dict[Tuple[str, int], int] = {}
+    objOutputColumnIndices: Dict[Tuple[Optional[str], int], int] = {}
+    objSheetRowMaps: List[np.ndarray] = []
+    objSheetColumnMaps: List[np.ndarray] = []
+    for objSheet in objSheets:
+        objSheetRowMaps.append(
+            np.array(
+                [objOutputRowIndices.setdefault(objLabel, len(objOutputRowIndices)) for objLabel in objSheet.objRowLabels],
+                dtype=np.int64,
+            )
+        )
+        objSheetColumnMaps.append(
+            np.array(
+                [
+                    objOutputColumnIndices.setdefault(objLabel, len(objOutputColumnIndices))
+                    for objLabel in objSheet.objColumnLabels
+                ],
+                dtype=np.int64,
+            )
+        )
+    iSheetCount: int = len(objSheets)
+    iRowCount: int = len(objOutputRowIndices)
+    iColumnCount: int = len(objOutputColumnIndices)
+
+    arrKinds: np.ndarray = np.zeros((iSheetCount, iRowCount, iColumnCount), dtype=np.int8)
+    arrValues: np.ndarray = np.zeros((iSheetCount, iRowCount, iColumnCount), dtype=np.float64)
+    arrTexts: np.ndarray = np.full((iSheetCount, iRowCount, iColumnCount), "", dtype=object)
+    arrRowPresent: np.ndarray = np.zeros((iSheetCount, iRowCount), dtype=bool)
+    # 各行の長さ (出力側の列位置 + 1 の最大値)
+    arrRowLengths: np.ndarray = np.zeros(iRowCount, dtype=np.int64)
+    for iSheetIndex, objSheet in enumerate(objSheets):
+        arrRowMap: np.ndarray = objSheetRowMaps[iSheetIndex]
+        arrColumnMap: np.ndarray = objSheetColumnMaps[iSheetIndex]
+        objIndex = np.ix_(arrRowMap, arrColumnMap)
+        arrKinds[iSheetIndex][objIndex] = objSheet.arrKinds
+        arrValues[iSheetIndex][objIndex] = objSheet.arrValues
+        arrTexts[iSheetIndex][objIndex] = objSheet.arrTexts
+        arrRowPresent[iSheetIndex, arrRowMap] = True
+        arrColumnEnds: np.ndarray = np.concatenate(
+            [np.ones(1, dtype=np.int64), np.maximum.accumulate(arrColumnMap + 2)]
+        )
+        for iRowIndex, iOutputRowIndex in enumerate(arrRowMap.tolist()):
+            iLength: int = objSheet.objRowLengths[iRowIndex + 1]
+            if iLength > 0:
+                arrRowLengths[iOutputRowIndex] = max(
+                    arrRowLengths[iOutputRowIndex],
+                    arrColumnEnds[iLength - 1],
+                )
 
-    for iRowIndex, objAddRow in enumerate(objAddRows):
-        if iRowIndex == 0:
-            objBaseHeader: List[str] = objBaseRows[0]
-            iColumnCount: int = max(len(objBaseHeader), len(objAddRow))
-            if len(objBaseHeader) < iColumnCount:
-                objBaseHeader.extend([""] * (iColumnCount - len(objBaseHeader)))
-            if len(objAddRow) < iColumnCount:
-                objAddRow = objAddRow + [""] * (iColumnCount - len(objAddRow))
-            for iColumnIndex in range(iColumnCount):
-                if objBaseHeader[iColumnIndex].strip() == "" and objAddRow[iColumnIndex].strip() != "":
-                    objBaseHeader[iColumnIndex] = objAddRow[iColumnIndex]
-            objBaseRows[0] = objBaseHeader
-            continue
+    arrNonBlank: np.ndarray = arrKinds != SHEET_CELL_BLANK
+    arrFirstSheets: np.ndarray = np.argmax(arrNonBlank, axis=0)
+    arrHasNonBlank: np.ndarray = arrNonBlank.any(axis=0)
+    arrFirstKinds: np.ndarray = np.take_along_axis(arrKinds, arrFirstSheets[None], axis=0)[0]
+    arrFirstTexts: np.ndarray = np.take_along_axis(arrTexts, arrFirstSheets[None], axis=0)[0]
+    arrIsNumber: np.ndarray = arrKinds == SHEET_CELL_NUMBER
+    arrNumberCounts: np.ndarray = arrIsNumber.sum(axis=0)
+    arrTotals: np.ndarray = np.where(arrIsNumber, arrValues, 0.0).sum(axis=0)
+    arrBaseSheets: np.ndarray = np.broadcast_to(
+        np.argmax(arrRowPresent, axis=0)[:, None],
+        (iRowCount, iColumnCount),
+    )
+    arrBaseTexts: np.ndarray = np.take_along_axis(arrTexts, arrBaseSheets[None], axis=0)[0]
 
-        pszKey = objAddRow[0] if objAddRow else ""
-        objIndices: List[int] = objBaseKeyIndices.get(pszKey, [])
-        iCursor: int = objBaseKeyCursor.get(pszKey, 0)
-        if iCursor < len(objIndices):
-            iTargetIndex = objIndices[iCursor]
-            objBaseKeyCursor[pszKey] = iCursor + 1
-        else:
-            iTargetIndex = len(objBaseRows)
-            objBaseRows.append(list(objAddRow))
-            objBaseKeyIndices.setdefault(pszKey, []).append(iTargetIndex)
-            objBaseKeyCursor[pszKey] = objBaseKeyCursor.get(pszKey, 0) + 1
+    # 既定は行が最初に現れたシートの値。文字列・数値 1 つだけのセルは元の文字列
+    arrOutputTexts: np.ndarray = arrBaseTexts.copy()
+    arrUseFirstText: np.ndarray = arrHasNonBlank & (
+        (arrFirstKinds == SHEET_CELL_TEXT)
+        | ((arrFirstSheets == arrBaseSheets) & (arrNumberCounts == 1))
+    )
+    arrOutputTexts[arrUseFirstText] = arrFirstTexts[arrUseFirstText]
+    arrFormat: np.ndarray = arrHasNonBlank & (arrFirstKinds == SHEET_CELL_NUMBER) & ~arrUseFirstText
+    if arrFormat.any():
+        # 数値から文字列への変換は最後に 1 回だけ (小数 6 桁に丸めてから行う)
+        objFormattedByValue: Dict[float, str] = {}
+        objFormatted: List[str] = []
+        for fValue in np.round(arrTotals[arrFormat], 6).tolist():
+            pszText: Optional[str] = objFormattedByValue.get(fValue)
+            if pszText is None:
+                pszText = format_number(fValue)
+                objFormattedByValue[fValue] = pszText
+            objFormatted.append(pszText)
+        arrOutputTexts[arrFormat] = np.array(objFormatted, dtype=object)
+
+    # 見出し行: 1 列目は最初の空欄でない見出し、以降は列ラベル
+    pszFirstHeader: str = objSheets[0].objHeader[0] if objSheets[0].objHeader else ""
+    if pszFirstHeader.strip() == "":
+        for objSheet in objSheets:
+            if objSheet.objHeader and objSheet.objHeader[0].strip() != "":
+                pszFirstHeader = objSheet.objHeader[0]
+                break
+    iHeaderLength: int = 0
+    for iSheetIndex, objSheet in enumerate(objSheets):
+        if len(objSheet.objHeader) > 1:
+            iHeaderLength = max(
+                iHeaderLength,
+                int(objSheetColumnMaps[iSheetIndex][: len(objSheet.objHeader) - 1].max()) + 2,
+            )
+        elif objSheet.objHeader:
+            iHeaderLength = max(iHeaderLength, 1)
+    objHeader: List[str] = [pszFirstHeader] + [""] * max(iHeaderLength - 1, 0)
+    for objLabel, iOutputColumnIndex in objOutputColumnIndices.items():
+        if objLabel[0] is not None and iOutputColumnIndex + 1 < iHeaderLength:
+            objHeader[iOutputColumnIndex + 1] = objLabel[0]
+
+    objOutputRows: List[List[str]] = [objHeader]
+    objOutputTextRows: List[List[str]] = arrOutputTexts.tolist()
+    for objLabel, iOutputRowIndex in objOutputRowIndices.items():
+        iLength = int(arrRowLengths[iOutputRowIndex])
+        if iLength == 0:
+            objOutputRows.append([])
             continue
+        objOutputRows.append([objLabel[0]] + objOutputTextRows[iOutputRowIndex][: iLength - 1])
+    return objOutputRows
 
-        objBaseRow = objBaseRows[iTargetIndex]
-        iColumnCount = max(len(objBaseRow), len(objAddRow))
-        if len(objBaseRow) < iColumnCount:
-            objBaseRow.extend([""] * (iColumnCount - len(objBaseRow)))
-        if len(objAddRow) < iColumnCount:
-            objAddRow = objAddRow + [""] * (iColumnCount - len(objAddRow))
-
-        for iColumnIndex in range(1, iColumnCount):
-            pszBaseValue = objBaseRow[iColumnIndex]
-            pszAddValue = objAddRow[iColumnIndex]
-            fBase = try_parse_float(pszBaseValue)
-            fAdd = try_parse_float(pszAddValue)
 
-            if fBase is not None and fAdd is not None:
-                objBaseRow[iColumnIndex] = format_number(fBase + fAdd)
-            elif fBase is None and pszBaseValue.strip() == "" and fAdd is not None:
-                objBaseRow[iColumnIndex] = format_number(fAdd)
-            elif fBase is None and pszBaseValue.strip() == "" and pszAddValue.strip() != "":
-                objBaseRow[iColumnIndex] = pszAddValue
+def sum_tsv_sheets(objSheetRowsList: List[List[List[str]]]) -> List[List[str]]:
+    objSheets: List[LabeledNumericSheet] = [
+        LabeledNumericSheet(objRows) for objRows in objSheetRowsList if objRows
+    ]
+    return sum_labeled_sheets(objSheets)
 
-        objBaseRows[iTargetIndex] = objBaseRow
 
-    return objBaseRows
+def sum_tsv_rows(objBaseRows: List[List[str]], objAddRows: List[List[str]]) -> List[List[str]]:
+    if not objBaseRows:
+        return [list(objRow) for objRow in objAddRows]
+    if not objAddRows:
+        return objBaseRows
+    return sum_tsv_sheets([objBaseRows, objAddRows])
 
 
 def write_tsv_rows(pszPath: str, objRows: List[List[str]]) -> None:
-    with open(pszPath, "w", encoding="utf-8", newline="") as objFile:
-        for objRow in objRows:
-            objFile.write("\t".join(objRow) + "\n")
-
-
-def append_gross_margin_column(objRows: List[List[str]]) -> List[List[str]]:
-    if not objRows:
-        return []
-    objHeader: List[str] = objRows[0]
-    iSalesIndex: int = find_column_index(objHeader, "純売上高")
-    iGrossProfitIndex: int = find_column_index(objHeader, "売上総利益")
-    objOutputRows: List[List[str]] = []
-
-    for iRowIndex, objRow in enumerate(objRows):
-        objNewRow: List[str] = list(objRow)
-        if iRowIndex == 0:
-            objNewRow.append("粗利益率")
-            objOutputRows.append(objNewRow)
-            continue
-
-        fSales: float = 0.0
-        fGrossProfit: float = 0.0
-        if 0 <= iSalesIndex < len(objRow):
-            fSales = parse_number(objRow[iSalesIndex])
-        if 0 <= iGrossProfitIndex < len(objRow):
-            fGrossProfit = parse_number(objRow[iGrossProfitIndex])
-
-        if abs(fSales) < 0.0000001:
-            if fGrossProfit > 0:
-                objNewRow.append("'＋∞")
-            elif fGrossProfit < 0:
-                objNewRow.append("'－∞")
-            else:
-                objNewRow.append("0")
-        else:
-            objNewRow.append(format_number(fGrossProfit / fSales))
-
-        objOutputRows.append(objNewRow)
-    return objOutputRows
+    # 一時ファイルへまとめて書いてから置き換える (書きかけのファイルを残さない)
+    write_tsv_rows_atomic(pszPath, objRows)
+    _OBJ_OUTPUT_MANIFEST.add(pszPath, bReported=False)
 
 
 def build_report_file_path(
@@ -1086,262 +1286,185 @@ def is_company_project(pszProjectName: str) -> bool:
     return re.match(r"^C\d{3}_", pszProjectName) is not None
 
 
-def is_summary_project(pszProjectName: str) -> bool:
-    return pszProjectName.startswith("合計")
-
-
-def is_project_code(pszProjectName: str, pszPrefix: str, iDigits: int) -> bool:
-    return re.match(rf"^{pszPrefix}\d{{{iDigits}}}_", pszProjectName) is not None
+# ///////////////////////////////////////////////////////////////
+#
+# PJサマリ (プロジェクト × 科目の表による計算)
+#
+#   単月・累計の損益計算書 (縦持ち) から合計行とカンパニー行 (C…) を除き、
+#   プロジェクト × 科目 の文字列の表 (ProjectMeasureTable) として 1 回だけ持つ。
+#   列の抽出・粗利益率・粗利金額ランキングは表全体に対してまとめて求め、
+#   途中段階のファイルを書いて読み直すことはしない。
+#
+#   既定で書き出すのは最終結果の 2 ファイルのみ。
+#     0001_PJサマリ_単月・累計_損益計算書.tsv
+#     0002_PJサマリ_単月・累計_粗利金額ランキング.tsv
+#   途中段階 (0001〜0003_PJサマリ_stepNNNN_…) は --keep-steps 指定時だけ書き出す。
+#   内容は従来の 1 段階ずつの処理と同じ。
+#
+# ///////////////////////////////////////////////////////////////
+PJ_SUMMARY_COLUMNS: List[str] = ["科目名", "純売上高", "売上原価", "売上総利益", "配賦販管費"]
+PJ_SUMMARY_TRANSPOSED_NAMES: List[str] = ["科目名", "純売上高", "売上総利益", "配賦販管費", "営業利益"]
+PJ_SUMMARY_RANKING_COLUMNS: List[str] = ["科目名", "売上総利益", "純売上高"]
+PJ_SUMMARY_RANKING_HEADER: List[str] = ["0", "プロジェクト名", "売上総利益", "純売上高", "利益率"]
+PJ_SUMMARY_RANKING_TITLE_ROW: List[str] = [
+    "",
+    "粗利金額ランキング",
+    "粗利金額",
+    "",
+    "単月",
+    "",
+    "",
+    "粗利金額ランキング",
+    "粗利金額",
+    "",
+    "累計",
+]
+
+
+class ProjectMeasureTable:
+    # 1 行目が見出し (科目名)、2 行目以降がプロジェクトの表。
+    # 行の長さが足りないセルは空欄とする。
+    def __init__(self, objRows: List[List[str]]) -> None:
+        self.objRows: List[List[str]] = objRows
+        iColumnCount: int = max((len(objRow) for objRow in objRows), default=0)
+        self.arrCells: np.ndarray = np.full((len(objRows), iColumnCount), "", dtype=object)
+        for iRowIndex, objRow in enumerate(objRows):
+            self.arrCells[iRowIndex, : len(objRow)] = objRow
+        self.objColumnIndexByName: Dict[str, int] = {}
+        if objRows:
+            for iColumnIndex, pszColumnName in enumerate(objRows[0]):
+                self.objColumnIndexByName.setdefault(pszColumnName, iColumnIndex)
+
+    def select_columns(self, objColumnNames: List[str]) -> np.ndarray:
+        # 見出しの名前で列を抜き出す (見出しに無い列は、見出しも含めて空欄)
+        arrSelected: np.ndarray = np.full((self.arrCells.shape[0], len(objColumnNames)), "", dtype=object)
+        for iOutputIndex, pszColumnName in enumerate(objColumnNames):
+            iColumnIndex: Optional[int] = self.objColumnIndexByName.get(pszColumnName)
+            if iColumnIndex is not None:
+                arrSelected[:, iOutputIndex] = self.arrCells[:, iColumnIndex]
+        return arrSelected
+
+
+def filter_pj_summary_rows(objRows: List[List[str]]) -> List[List[str]]:
+    # 合計行とカンパニー行 (1 列目が C で始まる行) を除く
+    arrFirstColumn: np.ndarray = np.array([objRow[0] if objRow else "" for objRow in objRows], dtype=str)
+    arrKeep: np.ndarray = (arrFirstColumn != "合計") & ~np.char.startswith(arrFirstColumn, "C")
+    return [objRows[iRowIndex] for iRowIndex in np.flatnonzero(arrKeep)]
+
+
+def map_unique_texts(arrTexts: np.ndarray, objConvert: Callable[[str], float]) -> np.ndarray:
+    # 同じ文字列は 1 回だけ変換する
+    if arrTexts.size == 0:
+        return np.zeros(0, dtype=np.float64)
+    arrUniqueTexts: np.ndarray
+    arrInverse: np.ndarray
+    arrUniqueTexts, arrInverse = np.unique(arrTexts.astype(str), return_inverse=True)
+    arrUniqueValues: np.ndarray = np.array(
+        [objConvert(pszText) for pszText in arrUniqueTexts.tolist()],
+        dtype=np.float64,
+    )
+    return arrUniqueValues[arrInverse.reshape(-1)]
+
+
+def build_gross_margin_texts(arrGrossProfitTexts: np.ndarray, arrSalesTexts: np.ndarray) -> np.ndarray:
+    # 粗利益率 = 売上総利益 / 純売上高 (純売上高が 0 の場合は '＋∞ / '－∞ / 0)
+    arrGrossProfit: np.ndarray = map_unique_texts(arrGrossProfitTexts, parse_number)
+    arrSales: np.ndarray = map_unique_texts(arrSalesTexts, parse_number)
+    arrTexts: np.ndarray = np.full(arrGrossProfit.size, "0", dtype=object)
+    arrZeroSales: np.ndarray = np.abs(arrSales) < 0.0000001
+    arrTexts[arrZeroSales & (arrGrossProfit > 0)] = "'＋∞"
+    arrTexts[arrZeroSales & (arrGrossProfit < 0)] = "'－∞"
+    if (~arrZeroSales).any():
+        arrTexts[~arrZeroSales] = format_number_values(
+            arrGrossProfit[~arrZeroSales] / arrSales[~arrZeroSales]
+        )
+    return arrTexts
 
 
-def collect_project_rows(
-    objRows: List[List[str]],
-    iProjectNameColumnIndex: int,
-) -> List[List[str]]:
-    if not objRows:
-        return []
-    iStartIndex: int = 1
-    for iIndex, objRow in enumerate(objRows[1:], start=1):
-        pszName: str = ""
-        if 0 <= iProjectNameColumnIndex < len(objRow):
-            pszName = objRow[iProjectNameColumnIndex]
-        if pszName.startswith("本部"):
-            iStartIndex = iIndex
-            break
-    return objRows[iStartIndex:]
+def append_gross_margin_texts(arrRows: np.ndarray) -> np.ndarray:
+    # 見出しの「純売上高」「売上総利益」から粗利益率の列を末尾に追加する
+    if arrRows.shape[0] == 0:
+        return arrRows
+    objHeader: List[str] = arrRows[0].tolist()
+    iSalesIndex: int = find_column_index(objHeader, "純売上高")
+    iGrossProfitIndex: int = find_column_index(objHeader, "売上総利益")
+    iBodyCount: int = arrRows.shape[0] - 1
+    arrEmpty: np.ndarray = np.full(iBodyCount, "", dtype=object)
+    arrMargins: np.ndarray = build_gross_margin_texts(
+        arrRows[1:, iGrossProfitIndex] if iGrossProfitIndex >= 0 else arrEmpty,
+        arrRows[1:, iSalesIndex] if iSalesIndex >= 0 else arrEmpty,
+    )
+    arrMarginColumn: np.ndarray = np.concatenate([np.array(["粗利益率"], dtype=object), arrMargins])
+    return np.column_stack([arrRows, arrMarginColumn])
 
 
-def build_project_rows_for_summary(
-    objRows: List[List[str]],
-    iProjectNameColumnIndex: int,
-) -> List[List[str]]:
-    objCandidateRows: List[List[str]] = collect_project_rows(objRows, iProjectNameColumnIndex)
-    objOrderedRows: List[List[str]] = []
-    objRules: List[Tuple[str, int]] = [("J", 3), ("P", 5)]
-    for pszPrefix, iDigits in objRules:
-        for objRow in objCandidateRows:
-            pszName: str = ""
-            if 0 <= iProjectNameColumnIndex < len(objRow):
-                pszName = objRow[iProjectNameColumnIndex]
-            if pszName == "" or is_company_project(pszName) or is_summary_project(pszName):
-                continue
-            if is_project_code(pszName, pszPrefix, iDigits):
-                objOrderedRows.append(objRow)
-    return objOrderedRows
+def sort_rows_by_gross_profit(arrRows: np.ndarray) -> np.ndarray:
+    # 見出しを除き、2 列目 (売上総利益) の降順に並べる (同じ値は元の順)
+    arrKeys: np.ndarray = map_unique_texts(
+        arrRows[1:, 1],
+        lambda pszText: try_parse_float(pszText) or 0.0,
+    )
+    arrOrder: np.ndarray = np.argsort(-arrKeys, kind="stable")
+    return np.concatenate([arrRows[:1], arrRows[1:][arrOrder]])
 
 
-def extract_project_values(
-    objRows: List[List[str]],
-    iProjectNameColumnIndex: int,
-    iValueColumnIndex: int,
-) -> List[str]:
-    objValues: List[str] = []
-    for objRow in build_project_rows_for_summary(objRows, iProjectNameColumnIndex):
-        if iValueColumnIndex < 0 or iValueColumnIndex >= len(objRow):
-            objValues.append("")
-        else:
-            objValues.append(objRow[iValueColumnIndex])
-    return objValues
+def build_gross_profit_rank_rows(arrSortedRows: np.ndarray) -> np.ndarray:
+    # 順位・プロジェクト名・売上総利益・純売上高・利益率
+    iBodyCount: int = arrSortedRows.shape[0] - 1
+    arrRankRows: np.ndarray = np.empty((iBodyCount + 1, 5), dtype=object)
+    arrRankRows[0] = PJ_SUMMARY_RANKING_HEADER
+    arrRankRows[1:, 0] = [str(iRank) for iRank in range(1, iBodyCount + 1)]
+    arrRankRows[1:, 1:4] = arrSortedRows[1:, 0:3]
+    arrRankRows[1:, 4] = build_gross_margin_texts(arrSortedRows[1:, 1], arrSortedRows[1:, 2])
+    return arrRankRows
 
 
-def extract_project_names(
-    objRows: List[List[str]],
-    iProjectNameColumnIndex: int,
-) -> List[str]:
-    objNames: List[str] = []
-    for objRow in build_project_rows_for_summary(objRows, iProjectNameColumnIndex):
-        pszName: str = ""
-        if 0 <= iProjectNameColumnIndex < len(objRow):
-            pszName = objRow[iProjectNameColumnIndex]
-        objNames.append(pszName)
-    return objNames
+def select_rows_by_first_column(arrRows: np.ndarray, objNames: List[str]) -> List[List[str]]:
+    # 1 列目が objNames のいずれかである行だけを残す
+    if arrRows.shape[1] == 0:
+        return []
+    return arrRows[np.isin(arrRows[:, 0], objNames)].tolist()
 
 
-def build_gross_margin_values(
+def write_pj_summary_step(
+    bKeepSteps: bool,
+    pszDirectory: str,
+    pszFileName: str,
     objRows: List[List[str]],
-    iProjectNameColumnIndex: int,
-    iGrossProfitColumnIndex: int,
-    iSalesColumnIndex: int,
-) -> List[str]:
-    objValues: List[str] = []
-    for objRow in build_project_rows_for_summary(objRows, iProjectNameColumnIndex):
-        fGrossProfit: float = 0.0
-        fSales: float = 0.0
-        if 0 <= iGrossProfitColumnIndex < len(objRow):
-            fGrossProfit = parse_number(objRow[iGrossProfitColumnIndex])
-        if 0 <= iSalesColumnIndex < len(objRow):
-            fSales = parse_number(objRow[iSalesColumnIndex])
-        if abs(fSales) < 0.0000001:
-            if fGrossProfit > 0:
-                objValues.append("'＋∞")
-            elif fGrossProfit < 0:
-                objValues.append("'－∞")
-            else:
-                objValues.append("0")
-        else:
-            objValues.append(format_number(fGrossProfit / fSales))
-    return objValues
-
-
-def write_pj_summary(
-    pszOutputPath: str,
-    objSingleRows: List[List[str]],
-    objCumulativeRows: List[List[str]],
 ) -> None:
-    if not objSingleRows or not objCumulativeRows:
-        return
-    objSingleHeader: List[str] = objSingleRows[0]
-    objCumulativeHeader: List[str] = objCumulativeRows[0]
-
-    iProjectNameColumnIndex: int = 0
-    iSingleSalesIndex: int = 2
-    iCumulativeSalesIndex: int = 2
-    iSingleCostIndex: int = find_column_index(objSingleHeader, "売上原価")
-    iCumulativeCostIndex: int = find_column_index(objCumulativeHeader, "売上原価")
-    iSingleGrossIndex: int = find_column_index(objSingleHeader, "売上総利益")
-    iCumulativeGrossIndex: int = find_column_index(objCumulativeHeader, "売上総利益")
-    iSingleAllocationIndex: int = find_column_index(objSingleHeader, "配賦販管費")
-    iCumulativeAllocationIndex: int = find_column_index(objCumulativeHeader, "配賦販管費")
-
-    objProjectNames: List[str] = extract_project_names(objSingleRows, iProjectNameColumnIndex)
-    objSingleSales: List[str] = extract_project_values(
-        objSingleRows,
-        iProjectNameColumnIndex,
-        iSingleSalesIndex,
-    )
-    objCumulativeSales: List[str] = extract_project_values(
-        objCumulativeRows,
-        iProjectNameColumnIndex,
-        iCumulativeSalesIndex,
-    )
-    objSingleCost: List[str] = extract_project_values(
-        objSingleRows,
-        iProjectNameColumnIndex,
-        iSingleCostIndex,
-    )
-    objCumulativeCost: List[str] = extract_project_values(
-        objCumulativeRows,
-        iProjectNameColumnIndex,
-        iCumulativeCostIndex,
-    )
-    objSingleGross: List[str] = extract_project_values(
-        objSingleRows,
-        iProjectNameColumnIndex,
-        iSingleGrossIndex,
-    )
-    objCumulativeGross: List[str] = extract_project_values(
-        objCumulativeRows,
-        iProjectNameColumnIndex,
-        iCumulativeGrossIndex,
-    )
-    objSingleAllocation: List[str] = extract_project_values(
-        objSingleRows,
-        iProjectNameColumnIndex,
-        iSingleAllocationIndex,
-    )
-    objCumulativeAllocation: List[str] = extract_project_values(
-        objCumulativeRows,
-        iProjectNameColumnIndex,
-        iCumulativeAllocationIndex,
-    )
-    objSingleMargin: List[str] = build_gross_margin_values(
-        objSingleRows,
-        iProjectNameColumnIndex,
-        iSingleGrossIndex,
-        iSingleSalesIndex,
-    )
-    objCumulativeMargin: List[str] = build_gross_margin_values(
-        objCumulativeRows,
-        iProjectNameColumnIndex,
-        iCumulativeGrossIndex,
-        iCumulativeSalesIndex,
-    )
-
-    objRows: List[List[str]] = []
-    objRows.append(
-        [
-            "1",
-            "PJ名称",
-            "単月_純売上高",
-            "累計_純売上高",
-            "単月_売上原価",
-            "累計_売上原価",
-            "単月_売上総利益",
-            "累計_売上総利益",
-            "単月_カンパニー販管費",
-            "累計_カンパニー販管費",
-            "単月_配賦販管費",
-            "累計_配賦販管費",
-            "粗利益率",
-            "粗利益率",
-        ]
-    )
+    if bKeepSteps:
+        write_tsv_rows(os.path.join(pszDirectory, pszFileName), objRows)
 
-    for iIndex, pszProjectName in enumerate(objProjectNames):
-        objRows.append(
-            [
-                str(iIndex + 2),
-                pszProjectName,
-                objSingleSales[iIndex] if iIndex < len(objSingleSales) else "",
-                objCumulativeSales[iIndex] if iIndex < len(objCumulativeSales) else "",
-                objSingleCost[iIndex] if iIndex < len(objSingleCost) else "",
-                objCumulativeCost[iIndex] if iIndex < len(objCumulativeCost) else "",
-                objSingleGross[iIndex] if iIndex < len(objSingleGross) else "",
-                objCumulativeGross[iIndex] if iIndex < len(objCumulativeGross) else "",
-                "0",
-                "0",
-                objSingleAllocation[iIndex] if iIndex < len(objSingleAllocation) else "",
-                objCumulativeAllocation[iIndex] if iIndex < len(objCumulativeAllocation) else "",
-                objSingleMargin[iIndex] if iIndex < len(objSingleMargin) else "",
-                objCumulativeMargin[iIndex] if iIndex < len(objCumulativeMargin) else "",
-            ]
-        )
 
-    write_tsv_rows(pszOutputPath, objRows)
-
-
-def filter_rows_by_columns(
-    objRows: List[List[str]],
-    objTargetColumns: List[str],
-) -> List[List[str]]:
-    if not objRows:
-        return []
-    objHeader: List[str] = objRows[0]
-    objColumnIndices: List[int] = [
-        find_column_index(objHeader, pszColumn)
-        for pszColumn in objTargetColumns
-    ]
-    objFilteredRows: List[List[str]] = []
-    for objRow in objRows:
-        objFilteredRow: List[str] = []
-        for iColumnIndex in objColumnIndices:
-            if 0 <= iColumnIndex < len(objRow):
-                objFilteredRow.append(objRow[iColumnIndex])
-            else:
-                objFilteredRow.append("")
-        objFilteredRows.append(objFilteredRow)
-    return objFilteredRows
+def copy_pj_summary_step(
+    pszDirectory: str,
+    pszFileName: str,
+    pszSourcePath: str,
+) -> None:
+    if os.path.isfile(pszSourcePath):
+        shutil.copy2(pszSourcePath, os.path.join(pszDirectory, pszFileName))
 
 
-def filter_rows_by_names(
+def write_pj_summary_final(
+    bKeepSteps: bool,
+    pszDirectory: str,
+    pszFileName: str,
+    pszStepFileName: str,
     objRows: List[List[str]],
-    objTargetNames: List[str],
-) -> List[List[str]]:
-    if not objRows:
-        return []
-    objTargetSet = set(objTargetNames)
-    objFilteredRows: List[List[str]] = []
-    for objRow in objRows:
-        if not objRow:
-            continue
-        if objRow[0] in objTargetSet:
-            objFilteredRows.append(objRow)
-    return objFilteredRows
+) -> None:
+    # 完成した表は 1 回だけ書き出し、--keep-steps 指定時は最後の段階のファイルとして複製する
+    pszFinalPath: str = os.path.join(pszDirectory, pszFileName)
+    write_tsv_rows(pszFinalPath, objRows)
+    if bKeepSteps:
+        pszStepPath: str = os.path.join(pszDirectory, pszStepFileName)
+        shutil.copy2(pszFinalPath, pszStepPath)
+        _OBJ_OUTPUT_MANIFEST.add(pszStepPath, bReported=False)
 
 
 def create_pj_summary(
     pszPlPath: str,
     objRange: Tuple[Tuple[int, int], Tuple[int, int]],
+    bKeepSteps: bool = False,
 ) -> None:
     objStart, objEnd = objRange
     pszDirectory: str = os.path.dirname(pszPlPath)
@@ -1361,34 +1484,14 @@ def create_pj_summary(
     if not os.path.isfile(pszSinglePlPath) or not os.path.isfile(pszCumulativePlPath):
         return
 
-    objSingleRows: List[List[str]] = read_tsv_rows(pszSinglePlPath)
-    objCumulativeRows: List[List[str]] = read_tsv_rows(pszCumulativePlPath)
-
-    objSingleOutputRows: List[List[str]] = []
-    for objRow in objSingleRows:
-        pszName: str = objRow[0] if objRow else ""
-        if pszName == "合計" or pszName.startswith("C"):
-            continue
-        objSingleOutputRows.append(objRow)
-
-    objCumulativeOutputRows: List[List[str]] = []
-    for objRow in objCumulativeRows:
-        pszName: str = objRow[0] if objRow else ""
-        if pszName == "合計" or pszName.startswith("C"):
-            continue
-        objCumulativeOutputRows.append(objRow)
-
-    pszSingleOutputPath: str = os.path.join(
-        pszDirectory,
-        "0001_PJサマリ_step0001_単月_損益計算書.tsv",
+    objSingleTable: ProjectMeasureTable = ProjectMeasureTable(
+        filter_pj_summary_rows(read_tsv_rows(pszSinglePlPath))
     )
-    pszCumulativeOutputPath: str = os.path.join(
-        pszDirectory,
-        "0001_PJサマリ_step0001_累計_損益計算書.tsv",
+    objCumulativeTable: ProjectMeasureTable = ProjectMeasureTable(
+        filter_pj_summary_rows(read_tsv_rows(pszCumulativePlPath))
     )
-    write_tsv_rows(pszSingleOutputPath, objSingleOutputRows)
-    write_tsv_rows(pszCumulativeOutputPath, objCumulativeOutputRows)
 
+    # 0001 / 0003: 損益計算書・製造原価報告書の途中段階 (--keep-steps 指定時のみ)
     pszSingleCostReportPath: str = os.path.join(
         pszDirectory,
         f"製造原価報告書_{iEndYear}年{pszEndMonth}月_A∪B_プロジェクト名_C∪D.tsv",
@@ -1399,429 +1502,589 @@ def create_pj_summary(
         objStart,
         objEnd,
     )
-    if os.path.isfile(pszSingleCostReportPath):
-        objCostReportSingleRows: List[List[str]] = read_tsv_rows(pszSingleCostReportPath)
-        pszCostReportSingleOutputPath: str = os.path.join(
-            pszDirectory,
-            "0001_PJサマリ_step0001_単月_製造原価報告書.tsv",
+    if bKeepSteps:
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0001_PJサマリ_step0001_単月_損益計算書.tsv"),
+            objSingleTable.objRows,
         )
-        write_tsv_rows(pszCostReportSingleOutputPath, objCostReportSingleRows)
-    if os.path.isfile(pszCumulativeCostReportPath):
-        objCostReportCumulativeRows: List[List[str]] = read_tsv_rows(pszCumulativeCostReportPath)
-        pszCostReportCumulativeOutputPath: str = os.path.join(
-            pszDirectory,
-            "0001_PJサマリ_step0001_累計_製造原価報告書.tsv",
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0001_PJサマリ_step0001_累計_損益計算書.tsv"),
+            objCumulativeTable.objRows,
         )
-        write_tsv_rows(pszCostReportCumulativeOutputPath, objCostReportCumulativeRows)
-
-    objSingleOutputVerticalRows = transpose_rows(objSingleOutputRows)
-    pszSingleOutputVerticalPath: str = os.path.join(
-        pszDirectory,
-        "0003_PJサマリ_step0001_単月_損益計算書.tsv",
-    )
-    write_tsv_rows(pszSingleOutputVerticalPath, objSingleOutputVerticalRows)
-
-    objCumulativeOutputVerticalRows = transpose_rows(objCumulativeOutputRows)
-    pszCumulativeOutputVerticalPath: str = os.path.join(
-        pszDirectory,
-        "0003_PJサマリ_step0001_累計_損益計算書.tsv",
-    )
-    write_tsv_rows(pszCumulativeOutputVerticalPath, objCumulativeOutputVerticalRows)
+        if os.path.isfile(pszSingleCostReportPath):
+            write_tsv_rows(
+                os.path.join(pszDirectory, "0001_PJサマリ_step0001_単月_製造原価報告書.tsv"),
+                read_tsv_rows(pszSingleCostReportPath),
+            )
+        if os.path.isfile(pszCumulativeCostReportPath):
+            write_tsv_rows(
+                os.path.join(pszDirectory, "0001_PJサマリ_step0001_累計_製造原価報告書.tsv"),
+                read_tsv_rows(pszCumulativeCostReportPath),
+            )
 
-    if os.path.isfile(pszSingleCostReportPath):
-        pszCostReportSingleOutputPath: str = os.path.join(
+        arrSingleVertical: np.ndarray = objSingleTable.arrCells.T
+        arrCumulativeVertical: np.ndarray = objCumulativeTable.arrCells.T
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0003_PJサマリ_step0001_単月_損益計算書.tsv"),
+            arrSingleVertical.tolist(),
+        )
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0003_PJサマリ_step0001_累計_損益計算書.tsv"),
+            arrCumulativeVertical.tolist(),
+        )
+        copy_pj_summary_step(
             pszDirectory,
             "0003_PJサマリ_step0001_単月_製造原価報告書.tsv",
+            pszSingleCostReportPath,
         )
-        shutil.copy2(pszSingleCostReportPath, pszCostReportSingleOutputPath)
-    if os.path.isfile(pszCumulativeCostReportPath):
-        pszCostReportCumulativeOutputPath: str = os.path.join(
+        copy_pj_summary_step(
             pszDirectory,
             "0003_PJサマリ_step0001_累計_製造原価報告書.tsv",
+            pszCumulativeCostReportPath,
         )
-        shutil.copy2(pszCumulativeCostReportPath, pszCostReportCumulativeOutputPath)
 
-    objTargetNames: List[str] = [
-        "科目名",
-        "純売上高",
-        "売上総利益",
-        "配賦販管費",
-        "営業利益",
-    ]
-    objSingleStep0002Rows = filter_rows_by_names(
-        objSingleOutputVerticalRows,
-        objTargetNames,
-    )
-    objCumulativeStep0002Rows = filter_rows_by_names(
-        objCumulativeOutputVerticalRows,
-        objTargetNames,
-    )
-    pszSingleStep0002Path: str = os.path.join(
-        pszDirectory,
-        "0003_PJサマリ_step0002_単月_損益計算書.tsv",
-    )
-    pszCumulativeStep0002Path: str = os.path.join(
-        pszDirectory,
-        "0003_PJサマリ_step0002_累計_損益計算書.tsv",
-    )
-    write_tsv_rows(pszSingleStep0002Path, objSingleStep0002Rows)
-    write_tsv_rows(pszCumulativeStep0002Path, objCumulativeStep0002Rows)
-
-    if os.path.isfile(pszSingleCostReportPath):
-        pszCostReportSingleStep0002Path: str = os.path.join(
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0003_PJサマリ_step0002_単月_損益計算書.tsv"),
+            select_rows_by_first_column(arrSingleVertical, PJ_SUMMARY_TRANSPOSED_NAMES),
+        )
+        write_tsv_rows(
+            os.path.join(pszDirectory, "0003_PJサマリ_step0002_累計_損益計算書.tsv"),
+            select_rows_by_first_column(arrCumulativeVertical, PJ_SUMMARY_TRANSPOSED_NAMES),
+        )
+        copy_pj_summary_step(
             pszDirectory,
             "0003_PJサマリ_step0002_単月_製造原価報告書.tsv",
+            pszSingleCostReportPath,
         )
-        shutil.copy2(pszSingleCostReportPath, pszCostReportSingleStep0002Path)
-    if os.path.isfile(pszCumulativeCostReportPath):
-        pszCostReportCumulativeStep0002Path: str = os.path.join(
+        copy_pj_summary_step(
             pszDirectory,
             "0003_PJサマリ_step0002_累計_製造原価報告書.tsv",
+            pszCumulativeCostReportPath,
         )
-        shutil.copy2(pszCumulativeCostReportPath, pszCostReportCumulativeStep0002Path)
 
-    objTargetColumns: List[str] = [
-        "科目名",
-        "純売上高",
-        "売上原価",
-        "売上総利益",
-        "配賦販管費",
-    ]
-    objSingleStep0002Rows: List[List[str]] = filter_rows_by_columns(
-        objSingleOutputRows,
-        objTargetColumns,
-    )
-    objCumulativeStep0002Rows: List[List[str]] = filter_rows_by_columns(
-        objCumulativeOutputRows,
-        objTargetColumns,
-    )
-    pszSingleStep0002Path: str = os.path.join(
+    # 0001: 単月・累計の損益計算書 (科目の抽出 → 粗利益率 → 単月・累計を交互に並べる)
+    arrSingleSelected: np.ndarray = objSingleTable.select_columns(PJ_SUMMARY_COLUMNS)
+    arrCumulativeSelected: np.ndarray = objCumulativeTable.select_columns(PJ_SUMMARY_COLUMNS)
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0001_PJサマリ_step0002_単月_損益計算書.tsv",
+        arrSingleSelected.tolist(),
     )
-    pszCumulativeStep0002Path: str = os.path.join(
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0001_PJサマリ_step0002_累計_損益計算書.tsv",
+        arrCumulativeSelected.tolist(),
     )
-    write_tsv_rows(pszSingleStep0002Path, objSingleStep0002Rows)
-    write_tsv_rows(pszCumulativeStep0002Path, objCumulativeStep0002Rows)
 
-    objSingleStep0003Rows: List[List[str]] = append_gross_margin_column(objSingleStep0002Rows)
-    objCumulativeStep0003Rows: List[List[str]] = append_gross_margin_column(
-        objCumulativeStep0002Rows
-    )
-    pszSingleStep0003Path: str = os.path.join(
+    arrSingleWithMargin: np.ndarray = append_gross_margin_texts(arrSingleSelected)
+    arrCumulativeWithMargin: np.ndarray = append_gross_margin_texts(arrCumulativeSelected)
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0001_PJサマリ_step0007_単月_損益計算書.tsv",
+        arrSingleWithMargin.tolist(),
     )
-    pszCumulativeStep0003Path: str = os.path.join(
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0001_PJサマリ_step0007_累計_損益計算書.tsv",
+        arrCumulativeWithMargin.tolist(),
     )
-    write_tsv_rows(pszSingleStep0003Path, objSingleStep0003Rows)
-    write_tsv_rows(pszCumulativeStep0003Path, objCumulativeStep0003Rows)
 
-    if len(objSingleStep0003Rows) != len(objCumulativeStep0003Rows):
+    if arrSingleWithMargin.shape[0] != arrCumulativeWithMargin.shape[0]:
         print("Error: step0007 row count mismatch between single and cumulative.")
         return
 
-    for iRowIndex, objRow in enumerate(objSingleStep0003Rows):
-        pszSingleKey: str = objRow[0] if objRow else ""
-        objCumulativeRow: List[str] = objCumulativeStep0003Rows[iRowIndex]
-        pszCumulativeKey: str = objCumulativeRow[0] if objCumulativeRow else ""
-        if pszSingleKey != pszCumulativeKey:
-            print(
-                "Error: step0007 first-column mismatch at row "
-                + str(iRowIndex)
-                + ". single="
-                + pszSingleKey
-                + " cumulative="
-                + pszCumulativeKey
-            )
-            return
-
-    objStep0004Rows: List[List[str]] = []
-    for iRowIndex, objRow in enumerate(objSingleStep0003Rows):
-        objCumulativeRow = objCumulativeStep0003Rows[iRowIndex]
-        if iRowIndex == 0:
-            objHeader: List[str] = [objRow[0] if objRow else ""]
-            iMaxColumns: int = max(len(objRow), len(objCumulativeRow))
-            for iColumnIndex in range(1, iMaxColumns):
-                pszSingleHeader: str = objRow[iColumnIndex] if iColumnIndex < len(objRow) else ""
-                pszCumulativeHeader: str = (
-                    objCumulativeRow[iColumnIndex] if iColumnIndex < len(objCumulativeRow) else ""
-                )
-                objHeader.append(pszSingleHeader)
-                objHeader.append(pszCumulativeHeader)
-            objStep0004Rows.append(objHeader)
-            continue
-
-        objOutputRow: List[str] = [objRow[0] if objRow else ""]
-        iMaxColumns = max(len(objRow), len(objCumulativeRow))
-        for iColumnIndex in range(1, iMaxColumns):
-            objOutputRow.append(objRow[iColumnIndex] if iColumnIndex < len(objRow) else "")
-            objOutputRow.append(
-                objCumulativeRow[iColumnIndex] if iColumnIndex < len(objCumulativeRow) else ""
-            )
-        objStep0004Rows.append(objOutputRow)
+    arrKeyMismatches: np.ndarray = np.flatnonzero(arrSingleWithMargin[:, 0] != arrCumulativeWithMargin[:, 0])
+    if arrKeyMismatches.size > 0:
+        iRowIndex: int = int(arrKeyMismatches[0])
+        print(
+            "Error: step0007 first-column mismatch at row "
+            + str(iRowIndex)
+            + ". single="
+            + arrSingleWithMargin[iRowIndex, 0]
+            + " cumulative="
+            + arrCumulativeWithMargin[iRowIndex, 0]
+        )
+        return
 
-    pszStep0004Path: str = os.path.join(
+    iRowCount: int = arrSingleWithMargin.shape[0]
+    iMeasureCount: int = arrSingleWithMargin.shape[1] - 1 if iRowCount > 0 else 0
+    arrCombined: np.ndarray = np.empty((iRowCount, 1 + 2 * iMeasureCount), dtype=object)
+    if iRowCount > 0:
+        arrCombined[:, 0] = arrSingleWithMargin[:, 0]
+        arrCombined[:, 1::2] = arrSingleWithMargin[:, 1:]
+        arrCombined[:, 2::2] = arrCumulativeWithMargin[:, 1:]
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0001_PJサマリ_step0008_単月・累計_損益計算書.tsv",
+        arrCombined.tolist(),
     )
-    write_tsv_rows(pszStep0004Path, objStep0004Rows)
 
-    if not objStep0004Rows:
+    if iRowCount == 0:
         return
 
-    iStep0004ColumnCount: int = max(len(objRow) for objRow in objStep0004Rows)
-    objStep0005Rows: List[List[str]] = []
-    objHeaderRow: List[str] = ["単／累"]
-    for iColumnIndex in range(1, iStep0004ColumnCount):
-        if iColumnIndex % 2 == 1:
-            objHeaderRow.append("単月")
-        else:
-            objHeaderRow.append("累計")
-    objStep0005Rows.append(objHeaderRow)
-    objStep0005Rows.extend(objStep0004Rows)
-
-    pszStep0005Path: str = os.path.join(
+    objCombinedRows: List[List[str]] = [
+        ["単／累"] + ["単月", "累計"] * iMeasureCount
+    ] + arrCombined.tolist()
+    write_pj_summary_final(
+        bKeepSteps,
         pszDirectory,
+        "0001_PJサマリ_単月・累計_損益計算書.tsv",
         "0001_PJサマリ_step0009_単月・累計_損益計算書.tsv",
+        objCombinedRows,
     )
-    write_tsv_rows(pszStep0005Path, objStep0005Rows)
 
-    objGrossProfitColumns: List[str] = ["科目名", "売上総利益", "純売上高"]
-    objGrossProfitSingleRows: List[List[str]] = filter_rows_by_columns(
-        objSingleOutputRows,
-        objGrossProfitColumns,
-    )
-    objGrossProfitCumulativeRows: List[List[str]] = filter_rows_by_columns(
-        objCumulativeOutputRows,
-        objGrossProfitColumns,
-    )
-    pszGrossProfitSinglePath: str = os.path.join(
+    # 0002: 粗利金額ランキング (単月・累計それぞれを売上総利益の降順に並べる)
+    arrSingleRanking: np.ndarray = objSingleTable.select_columns(PJ_SUMMARY_RANKING_COLUMNS)
+    arrCumulativeRanking: np.ndarray = objCumulativeTable.select_columns(PJ_SUMMARY_RANKING_COLUMNS)
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0002_PJサマリ_step0001_単月_粗利金額ランキング.tsv",
+        arrSingleRanking.tolist(),
     )
-    pszGrossProfitCumulativePath: str = os.path.join(
+    write_pj_summary_step(
+        bKeepSteps,
         pszDirectory,
         "0002_PJサマリ_step0001_累計_粗利金額ランキング.tsv",
+        arrCumulativeRanking.tolist(),
     )
-    write_tsv_rows(pszGrossProfitSinglePath, objGrossProfitSingleRows)
-    write_tsv_rows(pszGrossProfitCumulativePath, objGrossProfitCumulativeRows)
-
-    # 単月_粗利金額ランキング
-    objGrossProfitSingleSortedRows: List[List[str]] = []
-    objGrossProfitCumulativeSortedRows: List[List[str]] = []
-
-    if objGrossProfitSingleRows:
-        objSingleHeader: List[str] = objGrossProfitSingleRows[0]
-        objSingleBody: List[List[str]] = objGrossProfitSingleRows[1:]
-        objSingleBody.sort(
-            key=lambda objRow: try_parse_float(objRow[1] if len(objRow) > 1 else "") or 0.0,
-            reverse=True,
-        )
-        objGrossProfitSingleSortedRows = [objSingleHeader] + objSingleBody
-        pszGrossProfitSingleSortedPath: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0002_単月_粗利金額ランキング.tsv",
-        )
-        write_tsv_rows(pszGrossProfitSingleSortedPath, objGrossProfitSingleSortedRows)
-
-    # 累計_粗利金額ランキング
-    if objGrossProfitCumulativeRows:
-        objCumulativeHeader: List[str] = objGrossProfitCumulativeRows[0]
-        objCumulativeBody: List[List[str]] = objGrossProfitCumulativeRows[1:]
-        objCumulativeBody.sort(
-            key=lambda objRow: try_parse_float(objRow[1] if len(objRow) > 1 else "") or 0.0,
-            reverse=True,
-        )
-        objGrossProfitCumulativeSortedRows = [objCumulativeHeader] + objCumulativeBody
-        pszGrossProfitCumulativeSortedPath: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0002_累計_粗利金額ランキング.tsv",
-        )
-        write_tsv_rows(
-            pszGrossProfitCumulativeSortedPath,
-            objGrossProfitCumulativeSortedRows,
-        )
 
-    if objGrossProfitSingleSortedRows and objGrossProfitCumulativeSortedRows:
-        if len(objGrossProfitSingleSortedRows) != len(objGrossProfitCumulativeSortedRows):
-            print("Error: gross profit ranking row count mismatch.")
-            return
+    arrSingleSorted: np.ndarray = sort_rows_by_gross_profit(arrSingleRanking)
+    arrCumulativeSorted: np.ndarray = sort_rows_by_gross_profit(arrCumulativeRanking)
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0002_単月_粗利金額ランキング.tsv",
+        arrSingleSorted.tolist(),
+    )
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0002_累計_粗利金額ランキング.tsv",
+        arrCumulativeSorted.tolist(),
+    )
 
-        objGrossProfitCombinedRows = [list(objRow) for objRow in objGrossProfitSingleSortedRows]
-        for objRow in objGrossProfitCombinedRows:
-            objRow.append("")
+    if arrSingleSorted.shape[0] != arrCumulativeSorted.shape[0]:
+        print("Error: gross profit ranking row count mismatch.")
+        return
 
-        for iRowIndex, objCumulativeRow in enumerate(objGrossProfitCumulativeSortedRows):
-            if len(objGrossProfitCombinedRows[iRowIndex]) < 3:
-                objGrossProfitCombinedRows[iRowIndex].extend(
-                    [""] * (3 - len(objGrossProfitCombinedRows[iRowIndex]))
-                )
-            pszCumulativeProject: str = objCumulativeRow[0] if objCumulativeRow else ""
-            pszCumulativeValue: str = objCumulativeRow[1] if len(objCumulativeRow) > 1 else ""
-            objGrossProfitCombinedRows[iRowIndex].append(pszCumulativeProject)
-            objGrossProfitCombinedRows[iRowIndex].append(pszCumulativeValue)
+    arrSortedPair: np.ndarray = np.column_stack(
+        [
+            arrSingleSorted,
+            np.full(arrSingleSorted.shape[0], "", dtype=object),
+            arrCumulativeSorted[:, 0:2],
+        ]
+    )
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0007_単月・累計_粗利金額ランキング.tsv",
+        arrSortedPair.tolist(),
+    )
 
-        pszGrossProfitCombinedPath: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0007_単月・累計_粗利金額ランキング.tsv",
+    arrSingleRank: np.ndarray = build_gross_profit_rank_rows(arrSingleSorted)
+    arrCumulativeRank: np.ndarray = build_gross_profit_rank_rows(arrCumulativeSorted)
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0007_単月_粗利金額ランキング.tsv",
+        arrSingleRank.tolist(),
+    )
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0007_累計_粗利金額ランキング.tsv",
+        arrCumulativeRank.tolist(),
+    )
+
+    arrRankPair: np.ndarray = np.column_stack(
+        [
+            arrSingleRank,
+            np.full(arrSingleRank.shape[0], "", dtype=object),
+            arrCumulativeRank,
+        ]
+    )
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0008_単月・累計_粗利金額ランキング.tsv",
+        arrRankPair.tolist(),
+    )
+
+    arrRankTable: np.ndarray = np.vstack([np.array(PJ_SUMMARY_RANKING_TITLE_ROW, dtype=object), arrRankPair])
+    write_pj_summary_step(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_step0009_単月・累計_粗利金額ランキング.tsv",
+        arrRankTable.tolist(),
+    )
+
+    # 順位の列 (単月・累計) の "0" は空欄にする
+    for iColumnIndex in (0, arrSingleRank.shape[1] + 1):
+        arrRankColumn: np.ndarray = arrRankTable[:, iColumnIndex]
+        arrRankColumn[arrRankColumn == "0"] = ""
+    write_pj_summary_final(
+        bKeepSteps,
+        pszDirectory,
+        "0002_PJサマリ_単月・累計_粗利金額ランキング.tsv",
+        "0002_PJサマリ_step0010_単月・累計_粗利金額ランキング.tsv",
+        arrRankTable.tolist(),
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 月別レポートの累積和キューブ
+#
+#   累計_ ファイルの作成では、会計期間の区切り (3月 / 8月) ごとに
+#   範囲が重なるため、同じ月の TSV を何度も読み込み、
+#   1 か月ずつ足し直していた。
+#
+#   ・各月の TSV はフォルダ・入力プレフィックスごとに 1 回だけ読み込み、
+#     sum_tsv_sheets と同じ LabeledNumericSheet として 1 回だけ解析する。
+#   ・数値は 100 万倍した整数として、月 × 行 × 列 の int64 配列に
+#     np.cumsum で月方向の累積和を持ち、どの範囲も
+#     「終了月の累積和 − 開始月の前月の累積和」で求める。
+#   ・空欄 / 文字列のセルは、sum_tsv_sheets と同じ結果になるように
+#     「範囲内で最初に空欄でなくなる月」と範囲内の数値の個数から決める。
+#   ・100 万倍した整数で表せない値 (小数 7 桁以上・-0 ・大きすぎる値など) があるセルや、
+#     小数を含み絶対値の合計が大きく float の誤差が丸めに影響し得るセルは、
+#     sum_tsv_sheets と同じ float の足し算をそのまま行う。
+#   ・範囲内の月で列見出し・行キー・行の長さが一致しない場合は、
+#     キューブを作らずに sum_tsv_sheets と同じく行・列の見出しを合わせて足し合わせる。
+#
+# ///////////////////////////////////////////////////////////////
+CUBE_VALUE_SCALE: int = 1000000
+# 整数の値は、絶対値がこの値未満なら 100 万倍しても int64 に収まる
+CUBE_INTEGER_ABS_LIMIT: float = float(2 ** 43)
+# 小数を含む値は、100 万倍した値の絶対値がこの値未満なら float で正確に扱える
+CUBE_FRACTION_MICRO_ABS_LIMIT: float = float(2 ** 53)
+# 全月の絶対値の合計 (100 万倍) がこの値以上のセルは、累積和 (int64) があふれないよう float で足す
+CUBE_PREFIX_ABS_LIMIT: float = float(2 ** 62)
+# 小数を含むセルは「範囲内の絶対値の合計 (100 万倍) × (月数 + 1)」がこの値未満なら、
+# float で足した誤差が 100 万分の 0.5 未満となり、小数 6 桁に丸めた結果が一致する
+CUBE_FRACTION_ERROR_LIMIT: float = float(2 ** 51)
+
+
+def convert_to_micro_values(arrValues: np.ndarray, arrIsNumber: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # float の値を 100 万倍した整数にする。
+    # 戻り値: (100 万倍した整数, 正確に表せたか)
+    #   値 f が「小数 6 桁までの数 d に最も近い float」(f == fl(d)) の場合だけ正確とし、
+    #   d を 100 万倍した整数を返す。f == fl(d) なら float の足し算は d を足した場合と同じ。
+    with np.errstate(invalid="ignore", over="ignore"):
+        arrFinite: np.ndarray = arrIsNumber & np.isfinite(arrValues)
+        arrNegativeZero: np.ndarray = (arrValues == 0) & np.signbit(arrValues)
+        arrIntegral: np.ndarray = (
+            arrFinite
+            & ~arrNegativeZero
+            & (arrValues == np.trunc(arrValues))
+            & (np.abs(arrValues) < CUBE_INTEGER_ABS_LIMIT)
         )
-        write_tsv_rows(pszGrossProfitCombinedPath, objGrossProfitCombinedRows)
-
-    if objGrossProfitSingleSortedRows:
-        objGrossProfitSingleRankRows: List[List[str]] = []
-        for iRowIndex, objRow in enumerate(objGrossProfitSingleSortedRows):
-            if iRowIndex == 0:
-                objGrossProfitSingleRankRows.append(
-                    ["0", "プロジェクト名", "売上総利益", "純売上高", "利益率"]
-                )
-                continue
-            pszGrossProfit: str = objRow[1] if len(objRow) > 1 else ""
-            pszSales: str = objRow[2] if len(objRow) > 2 else ""
-            fGrossProfit: float = parse_number(pszGrossProfit)
-            fSales: float = parse_number(pszSales)
-            if abs(fSales) < 0.0000001:
-                if fGrossProfit > 0:
-                    pszMargin = "'＋∞"
-                elif fGrossProfit < 0:
-                    pszMargin = "'－∞"
-                else:
-                    pszMargin = "0"
-            else:
-                pszMargin = format_number(fGrossProfit / fSales)
-            objGrossProfitSingleRankRows.append(
-                [
-                    str(iRowIndex),
-                    objRow[0] if objRow else "",
-                    pszGrossProfit,
-                    pszSales,
-                    pszMargin,
-                ]
-            )
-        pszGrossProfitSingleRankPath: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0007_単月_粗利金額ランキング.tsv",
+        arrScaled: np.ndarray = np.rint(arrValues * CUBE_VALUE_SCALE)
+        arrFraction: np.ndarray = (
+            arrFinite
+            & ~arrIntegral
+            & ~arrNegativeZero
+            & (np.abs(arrScaled) < CUBE_FRACTION_MICRO_ABS_LIMIT)
+            & (arrScaled / CUBE_VALUE_SCALE == arrValues)
         )
-        write_tsv_rows(pszGrossProfitSingleRankPath, objGrossProfitSingleRankRows)
-
-    if objGrossProfitCumulativeSortedRows:
-        objGrossProfitCumulativeRankRows: List[List[str]] = []
-        for iRowIndex, objRow in enumerate(objGrossProfitCumulativeSortedRows):
-            if iRowIndex == 0:
-                objGrossProfitCumulativeRankRows.append(
-                    ["0", "プロジェクト名", "売上総利益", "純売上高", "利益率"]
+    arrMicroValues: np.ndarray = np.zeros(arrValues.shape, dtype=np.int64)
+    arrMicroValues[arrIntegral] = arrValues[arrIntegral].astype(np.int64) * CUBE_VALUE_SCALE
+    arrMicroValues[arrFraction] = arrScaled[arrFraction].astype(np.int64)
+    return arrMicroValues, arrIntegral | arrFraction
+
+
+def build_report_layout_signature(objRows: List[List[str]]) -> Tuple[object, ...]:
+    # 列見出し・行キー・行の長さが同じ月どうしは、行と列の位置がそのまま対応する
+    return (
+        tuple(objRows[0]) if objRows else (),
+        tuple(objRow[0] if objRow else "" for objRow in objRows),
+        tuple(len(objRow) for objRow in objRows),
+    )
+
+
+def build_prefix_sums(arrValues: np.ndarray, objDtype: object) -> np.ndarray:
+    # 先頭に 0 の月を加えた、月方向 (axis 0) の累積和
+    arrPrefix: np.ndarray = np.zeros((arrValues.shape[0] + 1,) + arrValues.shape[1:], dtype=objDtype)
+    np.cumsum(arrValues, axis=0, dtype=objDtype, out=arrPrefix[1:])
+    return arrPrefix
+
+
+def format_cube_values(objValues: List[float], objFormattedByValue: Dict[float, str]) -> np.ndarray:
+    # 同じ値の文字列化は 1 回だけ行う
+    objTexts: List[str] = []
+    for fValue in objValues:
+        pszText: Optional[str] = objFormattedByValue.get(fValue)
+        if pszText is None:
+            pszText = format_number(fValue)
+            objFormattedByValue[fValue] = pszText
+        objTexts.append(pszText)
+    return np.array(objTexts, dtype=object)
+
+
+class MonthlyReportCube:
+    def __init__(
+        self,
+        pszDirectory: str,
+        pszInputPrefix: str,
+        objMonths: List[Tuple[int, int]],
+    ) -> None:
+        self.pszDirectory: str = pszDirectory
+        self.pszInputPrefix: str = pszInputPrefix
+        self.objMonths: List[Tuple[int, int]] = list(objMonths)
+        self.objMonthIndices: Dict[Tuple[int, int], int] = {
+            objMonth: iIndex for iIndex, objMonth in enumerate(self.objMonths)
+        }
+        self.objMonthRows: Dict[Tuple[int, int], Optional[List[List[str]]]] = {}
+        self.objMonthSheets: Dict[Tuple[int, int], LabeledNumericSheet] = {}
+        self.objSignatures: Dict[Tuple[int, int], Tuple[object, ...]] = {}
+        self.bBuilt: bool = False
+
+    # -----------------------------------------------------------
+    # 各月の読み込み・解析 (1 回だけ)
+    # -----------------------------------------------------------
+    def load_month_rows(self, objMonth: Tuple[int, int]) -> Optional[List[List[str]]]:
+        if objMonth not in self.objMonthRows:
+            pszHorizontalPath: str = build_report_file_path(
+                self.pszDirectory,
+                self.pszInputPrefix,
+                objMonth,
+            )
+            pszVerticalPath: str = build_report_vertical_file_path(
+                self.pszDirectory,
+                self.pszInputPrefix,
+                objMonth,
+            )
+            if os.path.isfile(pszHorizontalPath) or os.path.isfile(pszVerticalPath):
+                self.objMonthRows[objMonth] = read_report_rows(
+                    self.pszDirectory,
+                    self.pszInputPrefix,
+                    objMonth,
                 )
-                continue
-            pszGrossProfit = objRow[1] if len(objRow) > 1 else ""
-            pszSales = objRow[2] if len(objRow) > 2 else ""
-            fGrossProfit = parse_number(pszGrossProfit)
-            fSales = parse_number(pszSales)
-            if abs(fSales) < 0.0000001:
-                if fGrossProfit > 0:
-                    pszMargin = "'＋∞"
-                elif fGrossProfit < 0:
-                    pszMargin = "'－∞"
-                else:
-                    pszMargin = "0"
             else:
-                pszMargin = format_number(fGrossProfit / fSales)
-            objGrossProfitCumulativeRankRows.append(
-                [
-                    str(iRowIndex),
-                    objRow[0] if objRow else "",
-                    pszGrossProfit,
-                    pszSales,
-                    pszMargin,
-                ]
+                self.objMonthRows[objMonth] = None
+        return self.objMonthRows[objMonth]
+
+    def get_month_sheet(self, objMonth: Tuple[int, int]) -> LabeledNumericSheet:
+        if objMonth not in self.objMonthSheets:
+            self.objMonthSheets[objMonth] = LabeledNumericSheet(self.load_month_rows(objMonth) or [])
+        return self.objMonthSheets[objMonth]
+
+    def get_layout_signature(self, objMonth: Tuple[int, int]) -> Tuple[object, ...]:
+        if objMonth not in self.objSignatures:
+            self.objSignatures[objMonth] = build_report_layout_signature(
+                self.load_month_rows(objMonth) or []
             )
-        pszGrossProfitCumulativeRankPath: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0007_累計_粗利金額ランキング.tsv",
+        return self.objSignatures[objMonth]
+
+    def has_same_layout(self, objRangeMonths: List[Tuple[int, int]]) -> bool:
+        # 範囲内の月の列見出し・行キー・行の長さが一致すれば、キューブで求められる
+        objSignature: Tuple[object, ...] = self.get_layout_signature(objRangeMonths[0])
+        return all(
+            self.get_layout_signature(objMonth) == objSignature for objMonth in objRangeMonths[1:]
         )
-        write_tsv_rows(pszGrossProfitCumulativeRankPath, objGrossProfitCumulativeRankRows)
 
-    if objGrossProfitSingleRankRows and objGrossProfitCumulativeRankRows:
-        if len(objGrossProfitSingleRankRows) != len(objGrossProfitCumulativeRankRows):
-            print("Error: gross profit ranking step0008 row count mismatch.")
+    # -----------------------------------------------------------
+    # 累積和の作成
+    # -----------------------------------------------------------
+    def build(self) -> None:
+        if self.bBuilt:
             return
+        self.bBuilt = True
+
+        # 月 × データ行 × データ列 (見出し行・キー列を除く。足りない部分は空欄)
+        objSheets: List[LabeledNumericSheet] = [self.get_month_sheet(objMonth) for objMonth in self.objMonths]
+        iMonthCount: int = len(objSheets)
+        iRowCount: int = max((objSheet.arrKinds.shape[0] for objSheet in objSheets), default=0)
+        iColumnCount: int = max((objSheet.arrKinds.shape[1] for objSheet in objSheets), default=0)
+        self.arrKinds: np.ndarray = np.zeros((iMonthCount, iRowCount, iColumnCount), dtype=np.int8)
+        self.arrValues: np.ndarray = np.zeros((iMonthCount, iRowCount, iColumnCount), dtype=np.float64)
+        self.arrTexts: np.ndarray = np.full((iMonthCount, iRowCount, iColumnCount), "", dtype=object)
+        for iMonthIndex, objSheet in enumerate(objSheets):
+            iSheetRowCount: int
+            iSheetColumnCount: int
+            iSheetRowCount, iSheetColumnCount = objSheet.arrKinds.shape
+            self.arrKinds[iMonthIndex, :iSheetRowCount, :iSheetColumnCount] = objSheet.arrKinds
+            self.arrValues[iMonthIndex, :iSheetRowCount, :iSheetColumnCount] = objSheet.arrValues
+            self.arrTexts[iMonthIndex, :iSheetRowCount, :iSheetColumnCount] = objSheet.arrTexts
+
+        arrIsNumber: np.ndarray = self.arrKinds == SHEET_CELL_NUMBER
+        arrMicroValues: np.ndarray
+        arrExact: np.ndarray
+        arrMicroValues, arrExact = convert_to_micro_values(self.arrValues, arrIsNumber)
+
+        # 全月の絶対値の合計が int64 の累積和に収まらないセルは、常に float で足す
+        arrAbsMicroValues: np.ndarray = np.abs(arrMicroValues)
+        self.arrPrefixOverflow: np.ndarray = (
+            arrAbsMicroValues.astype(np.float64).sum(axis=0) >= CUBE_PREFIX_ABS_LIMIT
+        )
+        arrMicroValues[:, self.arrPrefixOverflow] = 0
+        arrAbsMicroValues[:, self.arrPrefixOverflow] = 0
+
+        self.arrPrefixValues: np.ndarray = build_prefix_sums(arrMicroValues, np.int64)
+        self.arrPrefixAbsValues: np.ndarray = build_prefix_sums(arrAbsMicroValues, np.int64)
+        self.arrPrefixNumberCounts: np.ndarray = build_prefix_sums(arrIsNumber, np.int32)
+        self.arrPrefixFractionCounts: np.ndarray = build_prefix_sums(
+            arrMicroValues % CUBE_VALUE_SCALE != 0,
+            np.int32,
+        )
+        self.arrPrefixInexactCounts: np.ndarray = build_prefix_sums(arrIsNumber & ~arrExact, np.int32)
 
-        objGrossProfitStep0004Rows: List[List[str]] = []
-        for iRowIndex, objSingleRow in enumerate(objGrossProfitSingleRankRows):
-            objCumulativeRow = objGrossProfitCumulativeRankRows[iRowIndex]
-            objOutputRow: List[str] = list(objSingleRow)
-            objOutputRow.append("")
-            objOutputRow.extend(objCumulativeRow)
-            objGrossProfitStep0004Rows.append(objOutputRow)
+        # 各月以降で最初に空欄でなくなる月 (無ければ iMonthCount)
+        arrNonBlankMonths: np.ndarray = np.where(
+            self.arrKinds != SHEET_CELL_BLANK,
+            np.arange(iMonthCount, dtype=np.int64)[:, None, None],
+            iMonthCount,
+        )
+        self.arrNextNonBlankMonths: np.ndarray = np.minimum.accumulate(
+            arrNonBlankMonths[::-1],
+            axis=0,
+        )[::-1]
+
+    # -----------------------------------------------------------
+    # 範囲の合計
+    # -----------------------------------------------------------
+    def sum_range(
+        self,
+        objStart: Tuple[int, int],
+        objEnd: Tuple[int, int],
+    ) -> Optional[List[List[str]]]:
+        objRangeMonths: List[Tuple[int, int]] = build_month_sequence(objStart, objEnd)
+        for objMonth in objRangeMonths:
+            if self.load_month_rows(objMonth) is None:
+                # 従来どおり、最初に見つからなかった月を表示して終了する
+                print(
+                    "Input file not found: "
+                    + build_report_file_path(self.pszDirectory, self.pszInputPrefix, objMonth)
+                )
+                print(
+                    "Input file not found: "
+                    + build_report_vertical_file_path(self.pszDirectory, self.pszInputPrefix, objMonth)
+                )
+                return None
 
-        pszGrossProfitStep0004Path: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0008_単月・累計_粗利金額ランキング.tsv",
+        objTotalRows: Optional[List[List[str]]] = self.sum_range_with_prefix(objRangeMonths)
+        if objTotalRows is not None:
+            return objTotalRows
+
+        # sum_tsv_sheets と同じ (解析済みのシートを使う)
+        return sum_labeled_sheets(
+            [self.get_month_sheet(objMonth) for objMonth in objRangeMonths if self.objMonthRows[objMonth]]
         )
-        write_tsv_rows(pszGrossProfitStep0004Path, objGrossProfitStep0004Rows)
-
-        objGrossProfitStep0005Rows: List[List[str]] = [
-            [
-                "",
-                "粗利金額ランキング",
-                "粗利金額",
-                "",
-                "単月",
-                "",
-                "",
-                "粗利金額ランキング",
-                "粗利金額",
-                "",
-                "累計",
-            ]
-        ]
-        objGrossProfitStep0005Rows.extend(objGrossProfitStep0004Rows)
-        pszGrossProfitStep0005Path: str = os.path.join(
-            pszDirectory,
-            "0002_PJサマリ_step0009_単月・累計_粗利金額ランキング.tsv",
+
+    def sum_range_with_prefix(
+        self,
+        objRangeMonths: List[Tuple[int, int]],
+    ) -> Optional[List[List[str]]]:
+        # 累積和で求められない範囲は None を返す (呼び出し側で行・列の見出しを合わせて足す)。
+        # 判定は読み込んだ行だけで行い、キューブは求められる範囲があるときだけ作る。
+        if any(objMonth not in self.objMonthIndices for objMonth in objRangeMonths):
+            return None
+        if not self.has_same_layout(objRangeMonths):
+            return None
+        self.build()
+
+        iStartIndex: int = self.objMonthIndices[objRangeMonths[0]]
+        iEndIndex: int = self.objMonthIndices[objRangeMonths[-1]]
+        objBaseRows: List[List[str]] = self.objMonthRows[self.objMonths[iStartIndex]] or []
+
+        arrFirstMonths: np.ndarray = self.arrNextNonBlankMonths[iStartIndex]
+        arrHasNonBlank: np.ndarray = arrFirstMonths <= iEndIndex
+        arrFirstKinds: np.ndarray = np.take_along_axis(
+            self.arrKinds,
+            np.minimum(arrFirstMonths, iEndIndex)[None],
+            axis=0,
+        )[0]
+        arrNumberCounts: np.ndarray = (
+            self.arrPrefixNumberCounts[iEndIndex + 1] - self.arrPrefixNumberCounts[iStartIndex]
         )
-        write_tsv_rows(pszGrossProfitStep0005Path, objGrossProfitStep0005Rows)
-
-        if objGrossProfitStep0005Rows:
-            objGrossProfitStep0006Rows: List[List[str]] = []
-            objSalesIndices: List[int] = []
-            objNumberColumnIndices: List[int] = []
-            objHeaderRow: List[str] = objGrossProfitStep0005Rows[0]
-            for iColumnIndex, pszColumnName in enumerate(objHeaderRow):
-                if pszColumnName == "純売上高":
-                    objSalesIndices.append(iColumnIndex)
-
-            if objGrossProfitSingleRankRows:
-                iSingleColumnCount = len(objGrossProfitSingleRankRows[0])
-                objNumberColumnIndices = [0, iSingleColumnCount + 1]
-
-            objSalesIndexSet = set(objSalesIndices)
-            objNumberIndexSet = set(objNumberColumnIndices)
-            for objRow in objGrossProfitStep0005Rows:
-                objFilteredRow: List[str] = []
-                for iColumnIndex, pszValue in enumerate(objRow):
-                    if iColumnIndex in objSalesIndexSet:
-                        continue
-                    if iColumnIndex in objNumberIndexSet and pszValue == "0":
-                        objFilteredRow.append("")
-                    else:
-                        objFilteredRow.append(pszValue)
-                objGrossProfitStep0006Rows.append(objFilteredRow)
-
-            pszGrossProfitStep0006Path: str = os.path.join(
-                pszDirectory,
-                "0002_PJサマリ_step0010_単月・累計_粗利金額ランキング.tsv",
-            )
-            write_tsv_rows(pszGrossProfitStep0006Path, objGrossProfitStep0006Rows)
 
-            pszGrossProfitFinalPath: str = os.path.join(
-                pszDirectory,
-                "0002_PJサマリ_単月・累計_粗利金額ランキング.tsv",
+        # 最初に空欄でなくなった月の値が文字列なら、その文字列
+        arrUseFirstText: np.ndarray = arrHasNonBlank & (arrFirstKinds == SHEET_CELL_TEXT)
+        # 開始月の数値 1 つだけのセルは元の文字列のまま。それ以外の数値は合計を文字列化する
+        arrFormat: np.ndarray = (
+            arrHasNonBlank
+            & (arrFirstKinds == SHEET_CELL_NUMBER)
+            & ~((arrFirstMonths == iStartIndex) & (arrNumberCounts == 1))
+        )
+        arrHasFraction: np.ndarray = (
+            self.arrPrefixFractionCounts[iEndIndex + 1] != self.arrPrefixFractionCounts[iStartIndex]
+        )
+        arrAbsValues: np.ndarray = (
+            self.arrPrefixAbsValues[iEndIndex + 1] - self.arrPrefixAbsValues[iStartIndex]
+        )
+        arrReplay: np.ndarray = arrFormat & (
+            self.arrPrefixOverflow
+            | (self.arrPrefixInexactCounts[iEndIndex + 1] != self.arrPrefixInexactCounts[iStartIndex])
+            | (
+                arrHasFraction
+                & (
+                    arrAbsValues.astype(np.float64) * (iEndIndex - iStartIndex + 2)
+                    >= CUBE_FRACTION_ERROR_LIMIT
+                )
+            )
+        )
+        arrExact: np.ndarray = arrFormat & ~arrReplay
+
+        arrOutputTexts: np.ndarray = self.arrTexts[iStartIndex].copy()
+        arrRowIndices: np.ndarray
+        arrColumnIndices: np.ndarray
+        arrRowIndices, arrColumnIndices = np.nonzero(arrUseFirstText)
+        arrOutputTexts[arrRowIndices, arrColumnIndices] = self.arrTexts[
+            arrFirstMonths[arrRowIndices, arrColumnIndices],
+            arrRowIndices,
+            arrColumnIndices,
+        ]
+        objFormattedByValue: Dict[float, str] = {}
+        if arrExact.any():
+            arrMicroValues: np.ndarray = (
+                self.arrPrefixValues[iEndIndex + 1][arrExact] - self.arrPrefixValues[iStartIndex][arrExact]
+            )
+            # sum_tsv_sheets と同じく np.round を通す
+            # (絶対値が大きい値では、np.round の結果が元の値と異なる場合がある)
+            arrOutputTexts[arrExact] = format_cube_values(
+                np.round(
+                    np.array(
+                        [iMicroValue / CUBE_VALUE_SCALE for iMicroValue in arrMicroValues.tolist()],
+                        dtype=np.float64,
+                    ),
+                    6,
+                ).tolist(),
+                objFormattedByValue,
+            )
+        if arrReplay.any():
+            arrFloatTotals: np.ndarray = self.replay_float_sums(iStartIndex, iEndIndex)
+            arrOutputTexts[arrReplay] = format_cube_values(
+                np.round(arrFloatTotals[arrReplay], 6).tolist(),
+                objFormattedByValue,
             )
-            write_tsv_rows(pszGrossProfitFinalPath, objGrossProfitStep0006Rows)
+
+        objOutputRows: List[List[str]] = [list(objBaseRows[0])] if objBaseRows else []
+        objOutputTextRows: List[List[str]] = arrOutputTexts.tolist()
+        for iRowIndex, objRow in enumerate(objBaseRows[1:]):
+            if not objRow:
+                objOutputRows.append([])
+                continue
+            objOutputRows.append([objRow[0]] + objOutputTextRows[iRowIndex][: len(objRow) - 1])
+        return objOutputRows
+
+    def replay_float_sums(self, iStartIndex: int, iEndIndex: int) -> np.ndarray:
+        # sum_labeled_sheets と同じ形 (月 × データ行 × データ列) の配列を
+        # 同じ順に足し、float の結果 (丸めの誤差を含む) をそのまま再現する
+        objSheet: LabeledNumericSheet = self.get_month_sheet(self.objMonths[iStartIndex])
+        iRowCount: int
+        iColumnCount: int
+        iRowCount, iColumnCount = objSheet.arrKinds.shape
+        arrTotals: np.ndarray = np.zeros(self.arrValues.shape[1:], dtype=np.float64)
+        arrTotals[:iRowCount, :iColumnCount] = np.ascontiguousarray(
+            self.arrValues[iStartIndex : iEndIndex + 1, :iRowCount, :iColumnCount]
+        ).sum(axis=0)
+        return arrTotals
 
 
 def create_cumulative_report(
@@ -1829,6 +2092,7 @@ def create_cumulative_report(
     pszPrefix: str,
     objRange: Tuple[Tuple[int, int], Tuple[int, int]],
     pszInputPrefix: Optional[str] = None,
+    objCube: Optional[MonthlyReportCube] = None,
 ) -> None:
     objStart, objEnd = objRange
     objMonths = build_month_sequence(objStart, objEnd)
@@ -1837,30 +2101,19 @@ def create_cumulative_report(
 
     if pszInputPrefix is None:
         pszInputPrefix = pszPrefix
+    if objCube is None:
+        objCube = MonthlyReportCube(pszDirectory, pszInputPrefix, objMonths)
 
-    objTotalRows: Optional[List[List[str]]] = None
-    for objMonth in objMonths:
-        objRows: Optional[List[List[str]]] = read_report_rows(
-            pszDirectory,
-            pszInputPrefix,
-            objMonth,
-        )
-        if objRows is None:
-            return
-        if objTotalRows is None:
-            objTotalRows = objRows
-        else:
-            objTotalRows = sum_tsv_rows(objTotalRows, objRows)
-
+    objTotalRows: Optional[List[List[str]]] = objCube.sum_range(objStart, objEnd)
     if objTotalRows is None:
         return
     pszOutputPath: str = build_cumulative_file_path(pszDirectory, pszPrefix, objStart, objEnd)
     write_tsv_rows(pszOutputPath, objTotalRows)
-    print(f"Output: {pszOutputPath}")
+    _OBJ_OUTPUT_MANIFEST.report(pszOutputPath)
     pszVerticalOutputPath: str = pszOutputPath.replace(".tsv", "_vertical.tsv")
     objVerticalRows: List[List[str]] = transpose_rows(objTotalRows)
     write_tsv_rows(pszVerticalOutputPath, objVerticalRows)
-    print(f"Output: {pszVerticalOutputPath}")
+    _OBJ_OUTPUT_MANIFEST.report(pszVerticalOutputPath)
 
 
 def build_pj_summary_range(
@@ -1875,7 +2128,7 @@ def build_pj_summary_range(
     return (iStartYear, 4), (iEndYear, iEndMonth)
 
 
-def create_cumulative_reports(pszPlPath: str) -> None:
+def create_cumulative_reports(pszPlPath: str, bKeepSteps: bool = False) -> None:
     pszDirectory: str = os.path.dirname(pszPlPath)
     pszRangePath: Optional[str] = find_selected_range_path(pszDirectory)
     if pszRangePath is None:
@@ -1890,19 +2143,68 @@ def create_cumulative_reports(pszPlPath: str) -> None:
     objFiscalBRanges = split_by_fiscal_boundary(objStart, objEnd, 8)
     objAllRanges = objFiscalARanges + objFiscalBRanges
 
+    # 各月の TSV は 1 回だけ読み込み、重なる範囲は累積和の差で求める
+    objMonths: List[Tuple[int, int]] = build_month_sequence(objStart, objEnd)
+    objPlCube: MonthlyReportCube = MonthlyReportCube(
+        pszDirectory,
+        "損益計算書_販管費配賦",
+        objMonths,
+    )
+    objCostReportCube: MonthlyReportCube = MonthlyReportCube(
+        pszDirectory,
+        "製造原価報告書",
+        objMonths,
+    )
     for objRangeItem in objAllRanges:
         create_cumulative_report(
             pszDirectory,
             "損益計算書",
             objRangeItem,
             pszInputPrefix="損益計算書_販管費配賦",
+            objCube=objPlCube,
+        )
+        create_cumulative_report(
+            pszDirectory,
+            "製造原価報告書",
+            objRangeItem,
+            objCube=objCostReportCube,
         )
-        create_cumulative_report(pszDirectory, "製造原価報告書", objRangeItem)
     objPjSummaryRange = build_pj_summary_range(objRange)
-    create_pj_summary(pszPlPath, objPjSummaryRange)
+    create_pj_summary(pszPlPath, objPjSummaryRange, bKeepSteps)
 
 
 def main(argv: list[str]) -> int:
+    _OBJ_OUTPUT_MANIFEST.clear()
+    pszManifestPath: Optional[str]
+    try:
+        argv, pszManifestPath = extract_manifest_option(list(argv))
+    except ValueError as objException:
+        print(objException)
+        print_usage()
+        return 1
+    bKeepSteps: bool = KEEP_STEPS_OPTION in argv
+    argv = [pszArg for pszArg in argv if pszArg != KEEP_STEPS_OPTION]
+    iJobs: int = 1
+    if JOBS_OPTION in argv:
+        iJobsIndex: int = argv.index(JOBS_OPTION)
+        pszJobs: str = argv[iJobsIndex + 1] if iJobsIndex + 1 < len(argv) else ""
+        if not pszJobs.isdigit() or int(pszJobs) < 1:
+            print(f"{JOBS_OPTION} requires a positive integer.")
+            print_usage()
+            return 1
+        iJobs = int(pszJobs)
+        argv = argv[:iJobsIndex] + argv[iJobsIndex + 2:]
+    iExitCode: int = run_allocation(argv, bKeepSteps, iJobs)
+    if pszManifestPath is not None:
+        _OBJ_OUTPUT_MANIFEST.write(pszManifestPath)
+    return iExitCode
+
+
+def run_allocation(
+    argv: list[str],
+    bKeepSteps: bool = False,
+    iJobs: int = 1,
+) -> int:
     if len(argv) < 3:
         print_usage()
         return 1
@@ -1974,60 +2276,156 @@ def main(argv: list[str]) -> int:
                     return 1
                 objPairs.append([objArgv[iIndex], objArgv[iIndex + 1]])
 
-    for objPair in objPairs:
-        pszManhourPath: str = objPair[0]
-        pszPlPath: str = objPair[1]
-        pszOutputPath: str
-        if len(objPair) == 3:
-            pszOutputPath = objPair[2]
-        else:
-            pszOutputPath = build_default_output_path(pszPlPath)
-        pszOutputFinalPath: str = build_output_path_with_step(pszPlPath, "販管費配賦_")
-        pszOutputStep0001Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0001_")
-        pszOutputStep0002Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0002_")
-        pszOutputStep0003ZeroPath: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0003_")
-        pszOutputStep0003Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0007_")
-        pszOutputStep0004Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0008_")
-        pszOutputStep0005Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0009_")
-        pszOutputStep0006Path: str = build_output_path_with_step(pszPlPath, "販管費配賦_step0010_")
-
-        if not os.path.exists(pszManhourPath):
-            print(f"Input file not found: {pszManhourPath}")
-            return 1
-        if not os.path.exists(pszPlPath):
-            print(f"Input file not found: {pszPlPath}")
-            return 1
+    objAllocationPairs: List[AllocationPair] = [
+        AllocationPair(
+            objPair[0],
+            objPair[1],
+            objPair[2] if len(objPair) == 3 else build_default_output_path(objPair[1]),
+        )
+        for objPair in objPairs
+    ]
+    return run_allocation_batch(objAllocationPairs, bKeepSteps, iJobs)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 複数の組 (工数 TSV + 損益計算書 TSV) の一括配賦
+#
+#   ・既定 (iJobs が 1) では、このプロセス内で組の順に配賦する。
+#     同じ工数 TSV の読み込み結果 (_OBJ_PROJECT_MANHOUR_TABLE_CACHE) を組の間で共有し、
+#     Python と numpy の起動・読み込みも 1 回で済む。
+#   ・iJobs (--jobs) に 2 以上を指定した場合だけ、プロセスプールで並列に行う。
+#     各プロセスは起動時にモジュールを読み込み直し、工数 TSV の読み込み結果も共有しない
+#     (Windows では spawn で新しい Python を起動する) ため、組が多い場合に指定する。
+#   ・"Output:" の表示と出力マニフェストへの記録は、組の順に行う。
+#   ・累計の損益計算書・製造原価報告書と PJサマリは、
+#     すべての組の配賦が終わった後に 1 回だけ作成する。
+#   ・入力ファイルが見つからない組があった場合は、その前の組までを配賦し、
+#     累計は作成せずに 1 を返す (従来の 1 組ずつの処理と同じ)。
+#
+#   SellGeneralAdminCost_Allocation_DnD.py からは、
+#   Python を起動し直さずにこの関数を直接呼び出す。
+#
+# ///////////////////////////////////////////////////////////////
+class AllocationPair(NamedTuple):
+    pszManhourPath: str
+    pszPlPath: str
+    pszOutputPath: str
+
+
+class AllocationOutputPaths(NamedTuple):
+    pszFinalPath: str
+    objStepPaths: Tuple[str, ...]
+
+
+def build_allocation_output_paths(pszPlPath: str) -> AllocationOutputPaths:
+    return AllocationOutputPaths(
+        build_output_path_with_step(pszPlPath, "販管費配賦_"),
+        tuple(
+            build_output_path_with_step(pszPlPath, "販管費配賦_" + pszStep + "_")
+            for pszStep in (
+                "step0001",
+                "step0002",
+                "step0003",
+                "step0007",
+                "step0008",
+                "step0009",
+                "step0010",
+            )
+        ),
+    )
 
-        objManhourMap: Dict[str, str] = load_manhour_map(pszManhourPath)
-        objCompanyMap: Dict[str, str] = load_company_map(pszManhourPath)
+
+def allocate_pair(objPair: AllocationPair, bKeepSteps: bool) -> List[str]:
+    # 1 組の配賦。出力マニフェストに追加したファイルを追加した順に返す
+    # (プロセスプールで実行した場合は、呼び出し元のマニフェストへ記録し直す)
+    objPathsBefore: set[str] = set(_OBJ_OUTPUT_MANIFEST.objStagesByPath)
+    objOutputPaths: AllocationOutputPaths = build_allocation_output_paths(objPair.pszPlPath)
+    # 途中段階の TSV は --keep-steps 指定時だけ、別スレッドで書き出す
+    # (with ブロック内で例外が起きた場合は、書き込みの失敗よりその例外を優先して送出する)
+    objStepWriterContext: ContextManager[Optional[BackgroundTsvWriter]] = (
+        BackgroundTsvWriter() if bKeepSteps else nullcontext()
+    )
+    with objStepWriterContext as objStepWriter:
+        # 同じ工数 TSV は 1 回だけ読み込む (複数の損益計算書で共有する)
+        objManhourTable: ProjectManhourTable = load_project_manhour_table(objPair.pszManhourPath)
         process_pl_tsv(
-            pszPlPath,
-            pszOutputPath,
-            pszOutputStep0001Path,
-            pszOutputStep0002Path,
-            pszOutputStep0003ZeroPath,
-            pszOutputStep0003Path,
-            pszOutputStep0004Path,
-            pszOutputStep0005Path,
-            pszOutputStep0006Path,
-            pszOutputFinalPath,
-            objManhourMap,
-            objCompanyMap,
+            objPair.pszPlPath,
+            objPair.pszOutputPath,
+            *objOutputPaths.objStepPaths,
+            objOutputPaths.pszFinalPath,
+            objManhourTable,
+            objStepWriter,
         )
+    return [
+        pszPath for pszPath in _OBJ_OUTPUT_MANIFEST.objStagesByPath if pszPath not in objPathsBefore
+    ]
+
+
+def run_allocation_batch(
+    objPairs: List[AllocationPair],
+    bKeepSteps: bool = False,
+    iJobs: int = 1,
+) -> int:
+    iAvailableCount: int = len(objPairs)
+    pszMissingPath: Optional[str] = None
+    for iIndex, objPair in enumerate(objPairs):
+        for pszInputPath in (objPair.pszManhourPath, objPair.pszPlPath):
+            if not os.path.exists(pszInputPath):
+                pszMissingPath = pszInputPath
+                break
+        if pszMissingPath is not None:
+            iAvailableCount = iIndex
+            break
+    objAvailablePairs: List[AllocationPair] = objPairs[:iAvailableCount]
+
+    iWorkerCount: int = max(1, min(iJobs, len(objAvailablePairs)))
+    objAddedPathsList: List[List[str]]
+    if iWorkerCount == 1:
+        objAddedPathsList = [allocate_pair(objPair, bKeepSteps) for objPair in objAvailablePairs]
+    else:
+        with ProcessPoolExecutor(max_workers=iWorkerCount) as objExecutor:
+            objAddedPathsList = list(
+                objExecutor.map(
+                    allocate_pair,
+                    objAvailablePairs,
+                    [bKeepSteps] * len(objAvailablePairs),
+                )
+            )
 
-        print(f"Output: {pszOutputStep0001Path}")
-        print(f"Output: {pszOutputStep0002Path}")
-        print(f"Output: {pszOutputStep0003ZeroPath}")
-        print(f"Output: {pszOutputStep0003Path}")
-        print(f"Output: {pszOutputStep0004Path}")
-        print(f"Output: {pszOutputStep0005Path}")
-        print(f"Output: {pszOutputStep0006Path}")
-        print(f"Output: {pszOutputFinalPath}")
-
-    if objPairs:
-        create_cumulative_reports(objPairs[0][1])
+    for objPair, objAddedPaths in zip(objAvailablePairs, objAddedPathsList):
+        for pszAddedPath in objAddedPaths:
+            _OBJ_OUTPUT_MANIFEST.add(pszAddedPath, bReported=False)
+        objOutputPaths: AllocationOutputPaths = build_allocation_output_paths(objPair.pszPlPath)
+        if bKeepSteps:
+            for pszStepPath in objOutputPaths.objStepPaths:
+                _OBJ_OUTPUT_MANIFEST.report(pszStepPath)
+        _OBJ_OUTPUT_MANIFEST.report(objOutputPaths.pszFinalPath)
+
+    if pszMissingPath is not None:
+        print(f"Input file not found: {pszMissingPath}")
+        return 1
+
+    if objAvailablePairs:
+        create_cumulative_reports(objAvailablePairs[0].pszPlPath, bKeepSteps)
     return 0
 
 
+def run_allocation_batch_and_list_outputs(
+    objPairs: List[AllocationPair],
+    bKeepSteps: bool = False,
+    iJobs: int = 1,
+) -> Tuple[int, List[str]]:
+    # 他のスクリプトから直接呼び出す場合の入口。
+    # 戻り値: (終了コード, 成果物として "Output:" を表示したファイル (記録した順))
+    _OBJ_OUTPUT_MANIFEST.clear()
+    iExitCode: int = run_allocation_batch(objPairs, bKeepSteps, iJobs)
+    objReportedPaths: List[str] = [
+        pszPath
+        for pszPath in _OBJ_OUTPUT_MANIFEST.list_paths()
+        if pszPath in _OBJ_OUTPUT_MANIFEST.objReportedPaths
+    ]
+    return iExitCode, objReportedPaths
+
 if __name__ == "__main__":
     sys.exit(main(sys.argv))
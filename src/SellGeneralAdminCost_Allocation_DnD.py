@@ -18,10 +18,14 @@ SellGeneralAdminCost_Allocation_Cmd.py を実行するGUI。
   - 採用された連続範囲はテキストファイルに記録する。
     (例: 採用範囲: 2025年07月〜2025年10月)
   - 有効な組み合わせのみを Cmd 版に渡して実行する。
+    (配賦は Python を起動し直さずに Cmd 版の run_allocation_batch を直接呼び出し、
+     このプロセス内で各月を順に配賦してから累計と PJサマリを 1 回だけ作成する)
 """
 
 from __future__ import annotations
 
+import contextlib
+import io
 import os
 import re
 import shutil
@@ -34,6 +38,13 @@ import win32api
 import win32con
 import win32gui
 
+from output_manifest import OUTPUT_MANIFEST_OPTION, read_manifest_output_paths
+from SellGeneralAdminCost_Allocation_Cmd import (
+    AllocationPair,
+    build_default_output_path,
+    run_allocation_batch_and_list_outputs,
+)
+
 
 def show_message_box(
     pszMessage: str,
@@ -83,17 +94,46 @@ def build_unique_temp_path(pszDirectory: str, pszFileName: str) -> str:
     return os.path.join(pszDirectory, pszFileName)
 
 
-def move_output_files_to_temp(pszStdOut: str) -> List[str]:
-    if pszStdOut.strip() == "":
-        return []
-    pszTempDirectory: str = get_temp_output_directory()
-    pszCmdDirectory: str = os.path.dirname(__file__)
-    objMoved: List[str] = []
+def create_manifest_path() -> str:
+    # Cmd 版に --manifest で渡す JSON のパス (読み終えたら remove_manifest_file で消す)
+    iFileDescriptor, pszManifestPath = tempfile.mkstemp(
+        prefix="output_manifest_",
+        suffix=".json",
+        dir=get_temp_output_directory(),
+    )
+    os.close(iFileDescriptor)
+    os.remove(pszManifestPath)
+    return pszManifestPath
+
+
+def remove_manifest_file(pszManifestPath: str) -> None:
+    if os.path.isfile(pszManifestPath):
+        os.remove(pszManifestPath)
+
+
+def parse_output_paths_from_stdout(pszStdOut: str) -> List[str]:
+    # マニフェストが得られない場合の従来方式 ("Output: <path>" 行の解析)
+    objOutputPaths: List[str] = []
     for pszLine in pszStdOut.splitlines():
         pszLineText: str = pszLine.strip()
         if not pszLineText.startswith("Output:"):
             continue
-        pszOutputPath: str = pszLineText.replace("Output:", "", 1).strip()
+        objOutputPaths.append(pszLineText.replace("Output:", "", 1).strip())
+    return objOutputPaths
+
+
+def move_output_files_to_temp(
+    pszStdOut: str,
+    objOutputPaths: Optional[List[str]] = None,
+) -> List[str]:
+    if objOutputPaths is None:
+        if pszStdOut.strip() == "":
+            return []
+        objOutputPaths = parse_output_paths_from_stdout(pszStdOut)
+    pszTempDirectory: str = get_temp_output_directory()
+    pszCmdDirectory: str = os.path.dirname(__file__)
+    objMoved: List[str] = []
+    for pszOutputPath in objOutputPaths:
         if pszOutputPath == "" or not os.path.isfile(pszOutputPath):
             continue
         pszTargetPath: str = build_unique_temp_path(pszTempDirectory, os.path.basename(pszOutputPath))
@@ -125,7 +165,31 @@ def parse_year_month_from_pl_csv(pszFilePath: str) -> Optional[Tuple[int, int]]:
     return iYear, iMonth
 
 
-def move_pl_outputs_to_temp(pszCsvPath: str) -> None:
+def list_source_entries(
+    pszSourceDirectory: str,
+    objOutputPaths: Optional[List[str]],
+) -> Optional[List[Tuple[str, str]]]:
+    # (ファイル名, パス) の一覧。マニフェストがあればその一覧を使い、
+    # 無ければ従来どおり入力ファイルのフォルダを走査する。
+    if objOutputPaths is not None:
+        return [
+            (os.path.basename(pszOutputPath), pszOutputPath)
+            for pszOutputPath in objOutputPaths
+        ]
+    try:
+        objEntries: List[str] = os.listdir(pszSourceDirectory)
+    except OSError:
+        return None
+    return [
+        (pszEntry, os.path.join(pszSourceDirectory, pszEntry))
+        for pszEntry in objEntries
+    ]
+
+
+def move_pl_outputs_to_temp(
+    pszCsvPath: str,
+    objOutputPaths: Optional[List[str]] = None,
+) -> None:
     objYearMonth = parse_year_month_from_pl_csv(pszCsvPath)
     if objYearMonth is None:
         return
@@ -138,16 +202,17 @@ def move_pl_outputs_to_temp(pszCsvPath: str) -> None:
     pszSourceDirectory: str = os.path.dirname(pszCsvPath)
     pszTempDirectory: str = get_temp_output_directory()
     pszCmdDirectory: str = os.path.dirname(__file__)
-    try:
-        objEntries: List[str] = os.listdir(pszSourceDirectory)
-    except OSError:
+    objEntries: Optional[List[Tuple[str, str]]] = list_source_entries(
+        pszSourceDirectory,
+        objOutputPaths,
+    )
+    if objEntries is None:
         return
-    for pszEntry in objEntries:
+    for pszEntry, pszSourcePath in objEntries:
         if not pszEntry.endswith(".tsv"):
             continue
         if not any(pszEntry.startswith(pszPrefix) for pszPrefix in objPrefixes):
             continue
-        pszSourcePath: str = os.path.join(pszSourceDirectory, pszEntry)
         if not os.path.isfile(pszSourcePath):
             continue
         pszTargetPath: str = build_unique_temp_path(pszTempDirectory, pszEntry)
@@ -163,7 +228,10 @@ def move_pl_outputs_to_temp(pszCsvPath: str) -> None:
             shutil.copy2(pszTargetPath, pszCopyPath)
 
 
-def move_manhour_outputs_to_temp(pszCsvPath: str) -> None:
+def move_manhour_outputs_to_temp(
+    pszCsvPath: str,
+    objOutputPaths: Optional[List[str]] = None,
+) -> None:
     objYearMonth = parse_year_month_from_pl_csv(pszCsvPath)
     if objYearMonth is None:
         return
@@ -173,16 +241,17 @@ def move_manhour_outputs_to_temp(pszCsvPath: str) -> None:
     pszSourceDirectory: str = os.path.dirname(pszCsvPath)
     pszTempDirectory: str = get_temp_output_directory()
     pszCmdDirectory: str = os.path.dirname(__file__)
-    try:
-        objEntries: List[str] = os.listdir(pszSourceDirectory)
-    except OSError:
+    objEntries: Optional[List[Tuple[str, str]]] = list_source_entries(
+        pszSourceDirectory,
+        objOutputPaths,
+    )
+    if objEntries is None:
         return
-    for pszEntry in objEntries:
+    for pszEntry, pszSourcePath in objEntries:
         if not pszEntry.endswith(".tsv"):
             continue
         if not pszEntry.startswith(pszPrefix):
             continue
-        pszSourcePath: str = os.path.join(pszSourceDirectory, pszEntry)
         if not os.path.isfile(pszSourcePath):
             continue
         pszTargetPath: str = build_unique_temp_path(pszTempDirectory, pszEntry)
@@ -333,13 +402,13 @@ def select_consecutive_pairs(
     return objPairsSorted
 
 
-def build_cmd_args(objPairs: List[Tuple[str, str, Tuple[int, int], str]]) -> List[str]:
-    objManhourFiles: List[str] = [objItem[0] for objItem in objPairs]
-    objPlFiles: List[str] = [objItem[1] for objItem in objPairs]
-    objArgs: List[str] = []
-    objArgs.extend(objManhourFiles)
-    objArgs.extend(objPlFiles)
-    return objArgs
+def build_allocation_pairs(
+    objPairs: List[Tuple[str, str, Tuple[int, int], str]],
+) -> List[AllocationPair]:
+    return [
+        AllocationPair(objItem[0], objItem[1], build_default_output_path(objItem[1]))
+        for objItem in objPairs
+    ]
 
 
 def write_selected_range_file(
@@ -364,18 +433,14 @@ def run_allocation_with_pairs(
         return 1
 
     pszRangePath: Optional[str] = write_selected_range_file(objPairs)
-    objArgs: List[str] = build_cmd_args(objPairs)
-    pszScriptPath: str = os.path.join(os.path.dirname(__file__), "SellGeneralAdminCost_Allocation_Cmd.py")
-    objCommand: List[str] = [sys.executable, pszScriptPath]
-    objCommand.extend(objArgs)
-
+    objStdOutBuffer: io.StringIO = io.StringIO()
     try:
-        objResult = subprocess.run(
-            objCommand,
-            check=False,
-            capture_output=True,
-            text=True,
-        )
+        with contextlib.redirect_stdout(objStdOutBuffer):
+            iExitCode: int
+            objOutputPaths: List[str]
+            iExitCode, objOutputPaths = run_allocation_batch_and_list_outputs(
+                build_allocation_pairs(objPairs),
+            )
     except Exception as exc:  # noqa: BLE001
         pszErrorMessage: str = (
             "Error: unexpected exception while running SellGeneralAdminCost_Allocation_Cmd.py. Detail = "
@@ -384,23 +449,23 @@ def run_allocation_with_pairs(
         show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
         return 1
 
-    if objResult.returncode != 0:
-        pszStdErr: str = objResult.stderr
-        if pszStdErr.strip() == "":
-            pszStdErr = "Process exited with non-zero return code and no stderr output."
+    pszStdOut: str = objStdOutBuffer.getvalue()
+    if iExitCode != 0:
+        pszMessage: str = pszStdOut
+        if pszMessage.strip() == "":
+            pszMessage = "Process exited with non-zero return code and no output."
         pszErrorMessage = (
             "Error: SellGeneralAdminCost_Allocation_Cmd.py exited with non-zero return code.\n\n"
             + "Return code = "
-            + str(objResult.returncode)
+            + str(iExitCode)
             + "\n\n"
-            + "stderr:\n"
-            + pszStdErr
+            + "stdout:\n"
+            + pszMessage
         )
         show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
-        return objResult.returncode
+        return iExitCode
 
-    pszStdOut: str = objResult.stdout
-    move_output_files_to_temp(pszStdOut)
+    move_output_files_to_temp(pszStdOut, objOutputPaths)
     if pszStdOut.strip() != "":
         print(pszStdOut)
     pszStdOut = "成功しました！"
@@ -421,7 +486,9 @@ def run_pl_csv_to_tsv(
         show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
         return 1
 
+    pszManifestPath: str = create_manifest_path()
     objCommand: List[str] = [sys.executable, pszScriptPath] + objCsvFiles
+    objCommand.extend([OUTPUT_MANIFEST_OPTION, pszManifestPath])
     append_error_log("Running: " + " ".join(objCommand))
     try:
         objResult = subprocess.run(
@@ -451,15 +518,19 @@ def run_pl_csv_to_tsv(
             + pszStdErr
         )
         show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
+        remove_manifest_file(pszManifestPath)
         return objResult.returncode
 
     pszStdOut: str = objResult.stdout.strip()
+    objOutputPaths: Optional[List[str]] = read_manifest_output_paths(pszManifestPath)
+    remove_manifest_file(pszManifestPath)
     if pszStdOut != "":
         print(pszStdOut)
-        move_output_files_to_temp(pszStdOut)
+        if objOutputPaths is None:
+            move_output_files_to_temp(pszStdOut)
 
     for pszCsvPath in objCsvFiles:
-        move_pl_outputs_to_temp(pszCsvPath)
+        move_pl_outputs_to_temp(pszCsvPath, objOutputPaths)
 
     pszMessage: str = "PL_CsvToTsv_Cmd.py finished successfully."
     if pszStdOut != "":
@@ -486,7 +557,14 @@ def run_manhour_csv_to_sheet(
 
     objMessages: List[str] = []
     for pszCsvPath in objCsvFiles:
-        objCommand: List[str] = [sys.executable, pszScriptPath, pszCsvPath]
+        pszManifestPath: str = create_manifest_path()
+        objCommand: List[str] = [
+            sys.executable,
+            pszScriptPath,
+            pszCsvPath,
+            OUTPUT_MANIFEST_OPTION,
+            pszManifestPath,
+        ]
         try:
             objResult = subprocess.run(
                 objCommand,
@@ -517,13 +595,17 @@ def run_manhour_csv_to_sheet(
             )
             append_error_log(pszErrorMessage)
             show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
+            remove_manifest_file(pszManifestPath)
             return objResult.returncode
 
         pszStdOut: str = objResult.stdout.strip()
+        objOutputPaths: Optional[List[str]] = read_manifest_output_paths(pszManifestPath)
+        remove_manifest_file(pszManifestPath)
         if pszStdOut != "":
             print(pszStdOut)
-            move_output_files_to_temp(pszStdOut)
-        move_manhour_outputs_to_temp(pszCsvPath)
+            if objOutputPaths is None:
+                move_output_files_to_temp(pszStdOut)
+        move_manhour_outputs_to_temp(pszCsvPath, objOutputPaths)
 
     pszMessage: str = "make_manhour_to_sheet8_01_0001.py finished successfully."
     show_message_box(pszMessage, "SellGeneralAdminCost_Allocation_DnD")
@@ -548,7 +630,14 @@ def run_step10_tsv_only(
 
     iExitCode: int = 0
     for pszStep10Path in objStep10Files:
-        objCommand: List[str] = [sys.executable, pszScriptPath, pszStep10Path]
+        pszManifestPath: str = create_manifest_path()
+        objCommand: List[str] = [
+            sys.executable,
+            pszScriptPath,
+            pszStep10Path,
+            OUTPUT_MANIFEST_OPTION,
+            pszManifestPath,
+        ]
         try:
             objResult = subprocess.run(
                 objCommand,
@@ -580,14 +669,18 @@ def run_step10_tsv_only(
             )
             append_error_log(pszErrorMessage)
             show_error_message_box(pszErrorMessage, "SellGeneralAdminCost_Allocation_DnD")
+            remove_manifest_file(pszManifestPath)
             iExitCode = 1
             continue
 
         pszStdOut: str = objResult.stdout.strip()
+        objOutputPaths: Optional[List[str]] = read_manifest_output_paths(pszManifestPath)
+        remove_manifest_file(pszManifestPath)
         if pszStdOut != "":
             print(pszStdOut)
-            move_output_files_to_temp(pszStdOut)
-        move_manhour_outputs_to_temp(pszStep10Path)
+            if objOutputPaths is None:
+                move_output_files_to_temp(pszStdOut)
+        move_manhour_outputs_to_temp(pszStep10Path, objOutputPaths)
 
     if iExitCode == 0:
         pszMessage: str = "Step10 TSV only flow finished successfully."
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+SellGeneralAdminCost_Scenario_Cmd.py
+
+販管費の配賦基準を変えた場合 (what-if) の、プロジェクトごとの営業利益を
+複数のシナリオについてまとめて求め、比較表の TSV を作成する。
+
+入力:
+  1) シナリオ定義 TSV (1 行 1 シナリオ。# で始まる行と空行は無視する)
+       シナリオ名 <TAB> 配賦基準 <TAB> 配賦済みとして扱わない行 (省略可)
+     配賦基準:
+       工数 / <名称>の工数   工数 (H:MM:SS) の比で配賦する (従来の配賦と同じ)
+       均等                  プロジェクトごとに同じ重みで配賦する
+       file:<path>           <path> の TSV (プロジェクト <TAB> 重み) の比で配賦する
+                             (人数など、損益計算書に無い基準に使う)
+       <列名>                損益計算書の列 (純売上高 など) の値の比で配賦する
+                             (整数に丸め、負の値は 0 とする)
+     配賦済みとして扱わない行:
+       カンパニー販管費の行のコード (C001 など) をカンマ区切りで指定する。
+       指定した行の配賦販管費は配賦済みから外し、配賦の総額に戻す。
+  2) 損益計算書_販管費配賦_yyyy年mm月_A∪B_プロジェクト名_C∪D_vertical.tsv (1 か月以上)
+     (SellGeneralAdminCost_Allocation_Cmd.py の出力)
+
+出力:
+  <シナリオ定義のファイル名>_営業利益比較.tsv (1 つ目の損益計算書と同じフォルダ)
+    行: プロジェクト, 列: シナリオ, 値: 指定した月の営業利益の合計
+
+処理:
+  各月の損益計算書は 1 回だけ読み込み、配賦の対象行の判定・総額・
+  配賦販管費を除いた営業利益は SellGeneralAdminCost_Allocation_Cmd.py と同じ規則で求める。
+  配賦はシナリオ × プロジェクトの行列にまとめ、最大剰余法 (allocate_by_largest_remainder と
+  同じ端数の配り方) で全シナリオを一度に計算する。
+  重みの合計が 0 以下のシナリオでは、従来どおり配賦販管費を変更しない。
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from atomic_tsv_writer import write_tsv_rows_atomic
+from manhour_time_kernel import (
+    TIME_PARSE_MODE_HMS_ONLY,
+    format_number_values,
+    parse_time_values_to_seconds,
+)
+from output_manifest import OutputManifest, extract_manifest_option
+from SellGeneralAdminCost_Allocation_Cmd import (
+    allocate_by_largest_remainder,
+    detect_allocation_rows,
+    extract_project_key,
+    parse_number,
+    read_tsv_rows,
+)
+
+
+# 作成したファイルの一覧 (--manifest 指定時に JSON として書き出す)
+_OBJ_OUTPUT_MANIFEST: OutputManifest = OutputManifest("SellGeneralAdminCost_Scenario_Cmd.py")
+
+SCENARIO_BASIS_EQUAL: str = "均等"
+SCENARIO_BASIS_FILE_PREFIX: str = "file:"
+SCENARIO_OUTPUT_SUFFIX: str = "_営業利益比較.tsv"
+
+SCENARIO_REQUIRED_COLUMNS: Tuple[str, ...] = (
+    "販売費及び一般管理費計",
+    "配賦販管費",
+    "売上総利益",
+    "営業利益",
+    "工数",
+)
+
+
+def print_usage() -> None:
+    pszUsage: str = (
+        "Usage: python SellGeneralAdminCost_Scenario_Cmd.py "
+        "<scenario_tsv_path> <allocated_pl_tsv_path> [<allocated_pl_tsv_path> ...]\n"
+        "Options: --manifest <json_path>  作成したファイルの一覧を JSON で書き出す"
+    )
+    print(pszUsage)
+
+
+class AllocationScenario(NamedTuple):
+    pszName: str
+    pszBasis: str
+    objReleasedKeys: Tuple[str, ...]
+
+
+def read_allocation_scenarios(pszScenarioPath: str) -> List[AllocationScenario]:
+    objScenarios: List[AllocationScenario] = []
+    for objRow in read_tsv_rows(pszScenarioPath):
+        pszName: str = objRow[0].strip()
+        if pszName == "" or pszName.startswith("#"):
+            continue
+        pszBasis: str = objRow[1].strip() if len(objRow) >= 2 else ""
+        if pszBasis == "":
+            raise ValueError(f"Allocation basis is empty: {pszName}")
+        pszReleased: str = objRow[2] if len(objRow) >= 3 else ""
+        objReleasedKeys: Tuple[str, ...] = tuple(
+            pszKey.strip() for pszKey in pszReleased.split(",") if pszKey.strip() != ""
+        )
+        objScenarios.append(AllocationScenario(pszName, pszBasis, objReleasedKeys))
+    return objScenarios
+
+
+def is_manhour_basis(pszBasis: str) -> bool:
+    return pszBasis == "工数" or pszBasis.endswith("の工数")
+
+
+def read_basis_weight_file(pszWeightPath: str) -> Dict[str, float]:
+    # プロジェクト <TAB> 重み (プロジェクトは extract_project_key のキーで照合する)
+    objWeights: Dict[str, float] = {}
+    for objRow in read_tsv_rows(pszWeightPath):
+        pszKey: Optional[str] = extract_project_key(objRow[0])
+        if pszKey is None or len(objRow) < 2:
+            continue
+        objWeights[pszKey] = parse_number(objRow[1])
+    return objWeights
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 1 か月分の損益計算書 (配賦に必要な値だけを配列で持つ)
+#
+# ///////////////////////////////////////////////////////////////
+class ScenarioMonth:
+    def __init__(self, pszPlPath: str, objRows: List[List[str]]) -> None:
+        self.pszPlPath: str = pszPlPath
+        self.objRows: List[List[str]] = objRows
+        # 同じ見出しが複数ある場合は、配賦・利益の再計算と同じく右側の列を使う
+        self.objColumnIndices: Dict[str, int] = {
+            pszColumnName: iColumnIndex for iColumnIndex, pszColumnName in enumerate(objRows[0])
+        }
+        iRowIndexTotal: int
+        objPreAllocatedRowIndices: List[int]
+        iRowIndexTotal, objPreAllocatedRowIndices, self.objProjectRowIndices = detect_allocation_rows(
+            objRows,
+            self.objColumnIndices["工数"],
+        )
+        self.objProjectNames: List[str] = [
+            objRows[iRowIndex][0] for iRowIndex in self.objProjectRowIndices
+        ]
+
+        self.fSellGeneralAdminCostTotal: float = 0.0
+        if iRowIndexTotal < len(objRows):
+            self.fSellGeneralAdminCostTotal = float(
+                self.get_number_values([iRowIndexTotal], "販売費及び一般管理費計")[0]
+            )
+        self.objPreAllocatedKeys: List[str] = [
+            extract_project_key(objRows[iRowIndex][0]) or "" for iRowIndex in objPreAllocatedRowIndices
+        ]
+        self.arrPreAllocatedAmounts: np.ndarray = self.get_number_values(
+            objPreAllocatedRowIndices,
+            "配賦販管費",
+        )
+        self.arrCurrentAllocations: np.ndarray = self.get_number_values(
+            self.objProjectRowIndices,
+            "配賦販管費",
+        )
+
+        # 営業利益 = 売上総利益 − (売上総利益と営業利益の間の列の合計) のうち、
+        # 配賦販管費以外の部分
+        iGrossProfitColumn: int = self.objColumnIndices["売上総利益"]
+        iAllocationColumn: int = self.objColumnIndices["配賦販管費"]
+        self.arrProfitBeforeAllocation: np.ndarray = self.get_number_values(
+            self.objProjectRowIndices,
+            "売上総利益",
+        )
+        for iColumnIndex in range(iGrossProfitColumn + 1, self.objColumnIndices["営業利益"]):
+            if iColumnIndex != iAllocationColumn:
+                self.arrProfitBeforeAllocation = self.arrProfitBeforeAllocation - self.get_column_values(
+                    self.objProjectRowIndices,
+                    iColumnIndex,
+                )
+
+    def get_column_texts(self, objRowIndices: List[int], iColumnIndex: int) -> List[str]:
+        return [
+            self.objRows[iRowIndex][iColumnIndex] if iColumnIndex < len(self.objRows[iRowIndex]) else ""
+            for iRowIndex in objRowIndices
+        ]
+
+    def get_column_values(self, objRowIndices: List[int], iColumnIndex: int) -> np.ndarray:
+        return np.array(
+            [parse_number(pszText) for pszText in self.get_column_texts(objRowIndices, iColumnIndex)],
+            dtype=np.float64,
+        )
+
+    def get_number_values(self, objRowIndices: List[int], pszColumnName: str) -> np.ndarray:
+        return self.get_column_values(objRowIndices, self.objColumnIndices[pszColumnName])
+
+    def build_basis_weights(
+        self,
+        pszBasis: str,
+        objFileWeights: Dict[str, Dict[str, float]],
+    ) -> np.ndarray:
+        # 配賦基準の重み (プロジェクト行ごとの整数)
+        if pszBasis == SCENARIO_BASIS_EQUAL:
+            return np.ones(len(self.objProjectRowIndices), dtype=np.int64)
+        if pszBasis.startswith(SCENARIO_BASIS_FILE_PREFIX):
+            objWeights: Dict[str, float] = objFileWeights[pszBasis]
+            arrValues: np.ndarray = np.array(
+                [objWeights.get(extract_project_key(pszName) or "", 0.0) for pszName in self.objProjectNames],
+                dtype=np.float64,
+            )
+        elif pszBasis not in self.objColumnIndices:
+            raise ValueError(f"Unknown allocation basis: {pszBasis} ({self.pszPlPath})")
+        elif is_manhour_basis(pszBasis):
+            arrSeconds: np.ndarray
+            arrSeconds, _ = parse_time_values_to_seconds(
+                self.get_column_texts(self.objProjectRowIndices, self.objColumnIndices[pszBasis]),
+                TIME_PARSE_MODE_HMS_ONLY,
+            )
+            return arrSeconds.astype(np.int64)
+        else:
+            arrValues = self.get_number_values(self.objProjectRowIndices, pszBasis)
+        return np.maximum(np.rint(arrValues), 0).astype(np.int64)
+
+
+def load_scenario_month(pszPlPath: str) -> ScenarioMonth:
+    objRows: List[List[str]] = read_tsv_rows(pszPlPath)
+    objHeader: List[str] = objRows[0] if objRows else []
+    objMissingColumns: List[str] = [
+        pszColumnName for pszColumnName in SCENARIO_REQUIRED_COLUMNS if pszColumnName not in objHeader
+    ]
+    if objMissingColumns:
+        raise ValueError(f"Required columns not found: {', '.join(objMissingColumns)} ({pszPlPath})")
+    return ScenarioMonth(pszPlPath, objRows)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# シナリオ × プロジェクトの最大剰余法
+#
+#   arrWeights の各行 (シナリオ) について、arrTotals の金額を重みの比で
+#   整数に分ける。結果は allocate_by_largest_remainder を 1 行ずつ
+#   呼び出した場合と同じ (端数は余りの大きい順、同じなら上の行から 1 ずつ)。
+#   重みの合計が 0 以下の行は arrValid を False とする。
+#
+# ///////////////////////////////////////////////////////////////
+def allocate_stacked_by_largest_remainder(
+    arrTotals: np.ndarray,
+    arrWeights: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    iScenarioCount: int
+    iProjectCount: int
+    iScenarioCount, iProjectCount = arrWeights.shape
+    arrWeightTotals: np.ndarray = arrWeights.sum(axis=1)
+    arrValid: np.ndarray = arrWeightTotals > 0
+    if iProjectCount == 0:
+        return np.zeros((iScenarioCount, 0), dtype=np.int64), arrValid
+
+    # 重み × 総額が int64 に収まらない場合は、1 行ずつ従来の計算を行う
+    iMaxTotal: int = int(np.abs(arrTotals).max()) if iScenarioCount > 0 else 0
+    if iMaxTotal != 0 and int(np.abs(arrWeights).max()) > np.iinfo(np.int64).max // iMaxTotal:
+        arrResults: np.ndarray = np.zeros((iScenarioCount, iProjectCount), dtype=np.int64)
+        for iScenarioIndex in np.flatnonzero(arrValid):
+            arrResults[iScenarioIndex] = allocate_by_largest_remainder(
+                int(arrTotals[iScenarioIndex]),
+                arrWeights[iScenarioIndex],
+            )
+        return arrResults, arrValid
+
+    arrDivisors: np.ndarray = np.where(arrValid, arrWeightTotals, 1)[:, None]
+    arrQuotients: np.ndarray
+    arrRemainders: np.ndarray
+    arrQuotients, arrRemainders = np.divmod(arrWeights * arrTotals[:, None], arrDivisors)
+    arrResidues: np.ndarray = arrTotals - arrQuotients.sum(axis=1)
+
+    arrPositions: np.ndarray = np.broadcast_to(np.arange(iProjectCount), (iScenarioCount, iProjectCount))
+    arrOrder: np.ndarray = np.lexsort((arrPositions, -arrRemainders.astype(np.float64)), axis=-1)
+    arrRanks: np.ndarray = np.empty((iScenarioCount, iProjectCount), dtype=np.int64)
+    np.put_along_axis(arrRanks, arrOrder, arrPositions, axis=1)
+    arrQuotients += arrRanks < arrResidues[:, None]
+    arrQuotients[~arrValid] = 0
+    return arrQuotients, arrValid
+
+
+def evaluate_allocation_scenarios(
+    objMonths: List[ScenarioMonth],
+    objScenarios: List[AllocationScenario],
+) -> Tuple[List[str], np.ndarray]:
+    # 戻り値: (プロジェクト名 (最初に現れた順), 営業利益 [シナリオ × 月 × プロジェクト])
+    objProjectIndices: Dict[str, int] = {}
+    for objMonth in objMonths:
+        for pszName in objMonth.objProjectNames:
+            objProjectIndices.setdefault(pszName, len(objProjectIndices))
+    objProjectNames: List[str] = list(objProjectIndices)
+
+    objFileWeights: Dict[str, Dict[str, float]] = {
+        objScenario.pszBasis: read_basis_weight_file(objScenario.pszBasis[len(SCENARIO_BASIS_FILE_PREFIX):])
+        for objScenario in objScenarios
+        if objScenario.pszBasis.startswith(SCENARIO_BASIS_FILE_PREFIX)
+    }
+    # 同じ配賦基準のシナリオは、重みを 1 回だけ求める
+    objBases: List[str] = list(dict.fromkeys(objScenario.pszBasis for objScenario in objScenarios))
+    arrBasisIndices: np.ndarray = np.array(
+        [objBases.index(objScenario.pszBasis) for objScenario in objScenarios],
+        dtype=np.int64,
+    )
+
+    arrOperatingProfits: np.ndarray = np.zeros(
+        (len(objScenarios), len(objMonths), len(objProjectNames)),
+        dtype=np.float64,
+    )
+    for iMonthIndex, objMonth in enumerate(objMonths):
+        arrBasisWeights: np.ndarray = np.stack(
+            [objMonth.build_basis_weights(pszBasis, objFileWeights) for pszBasis in objBases]
+        ).reshape(len(objBases), len(objMonth.objProjectNames))
+        arrWeights: np.ndarray = arrBasisWeights[arrBasisIndices]
+
+        # 配賦の総額 = 販管費の合計 − 配賦済みとして扱う行の配賦販管費
+        arrKeptPreAllocated: np.ndarray = np.array(
+            [
+                [pszKey not in objScenario.objReleasedKeys for pszKey in objMonth.objPreAllocatedKeys]
+                for objScenario in objScenarios
+            ],
+            dtype=np.float64,
+        ).reshape(len(objScenarios), len(objMonth.objPreAllocatedKeys))
+        arrPools: np.ndarray = objMonth.fSellGeneralAdminCostTotal - arrKeptPreAllocated @ objMonth.arrPreAllocatedAmounts
+        arrAllocations: np.ndarray
+        arrValid: np.ndarray
+        arrAllocations, arrValid = allocate_stacked_by_largest_remainder(
+            np.round(arrPools).astype(np.int64),
+            arrWeights,
+        )
+        arrAllocationValues: np.ndarray = np.where(
+            arrValid[:, None],
+            arrAllocations.astype(np.float64),
+            objMonth.arrCurrentAllocations[None, :],
+        )
+
+        arrColumns: np.ndarray = np.array(
+            [objProjectIndices[pszName] for pszName in objMonth.objProjectNames],
+            dtype=np.int64,
+        )
+        arrOperatingProfits[:, iMonthIndex, arrColumns] = (
+            objMonth.arrProfitBeforeAllocation[None, :] - arrAllocationValues
+        )
+    return objProjectNames, arrOperatingProfits
+
+
+def build_scenario_comparison_rows(
+    objScenarios: List[AllocationScenario],
+    objProjectNames: List[str],
+    arrOperatingProfits: np.ndarray,
+) -> List[List[str]]:
+    # 行: プロジェクト, 列: シナリオ (月の合計)
+    arrTotals: np.ndarray = arrOperatingProfits.sum(axis=1)
+    arrTexts: np.ndarray = format_number_values(arrTotals.T.reshape(-1)).reshape(
+        len(objProjectNames),
+        len(objScenarios),
+    )
+    objRows: List[List[str]] = [["PJ名称"] + [objScenario.pszName for objScenario in objScenarios]]
+    for pszName, arrRowTexts in zip(objProjectNames, arrTexts):
+        objRows.append([pszName] + arrRowTexts.tolist())
+    return objRows
+
+
+def build_scenario_output_path(pszScenarioPath: str, pszPlPath: str) -> str:
+    pszBaseName: str = os.path.splitext(os.path.basename(pszScenarioPath))[0]
+    return os.path.join(os.path.dirname(pszPlPath), pszBaseName + SCENARIO_OUTPUT_SUFFIX)
+
+
+def main(argv: List[str]) -> int:
+    pszManifestPath: Optional[str]
+    try:
+        argv, pszManifestPath = extract_manifest_option(list(argv))
+    except ValueError as objException:
+        print(objException)
+        print_usage()
+        return 1
+    if len(argv) < 3:
+        print_usage()
+        return 1
+
+    pszScenarioPath: str = argv[1]
+    objPlPaths: List[str] = argv[2:]
+    for pszInputPath in [pszScenarioPath] + objPlPaths:
+        if not os.path.exists(pszInputPath):
+            print(f"Input file not found: {pszInputPath}")
+            return 1
+
+    try:
+        objScenarios: List[AllocationScenario] = read_allocation_scenarios(pszScenarioPath)
+        if not objScenarios:
+            print(f"Error: no scenarios in {pszScenarioPath}")
+            return 1
+        objMonths: List[ScenarioMonth] = [load_scenario_month(pszPlPath) for pszPlPath in objPlPaths]
+        objProjectNames: List[str]
+        arrOperatingProfits: np.ndarray
+        objProjectNames, arrOperatingProfits = evaluate_allocation_scenarios(objMonths, objScenarios)
+    except (OSError, ValueError, KeyError) as objException:
+        print(f"Error: {objException}")
+        return 1
+
+    pszOutputPath: str = build_scenario_output_path(pszScenarioPath, objPlPaths[0])
+    write_tsv_rows_atomic(
+        pszOutputPath,
+        build_scenario_comparison_rows(objScenarios, objProjectNames, arrOperatingProfits),
+    )
+    _OBJ_OUTPUT_MANIFEST.report(pszOutputPath)
+    if pszManifestPath is not None:
+        _OBJ_OUTPUT_MANIFEST.write(pszManifestPath)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
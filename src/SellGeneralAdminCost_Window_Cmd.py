@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+SellGeneralAdminCost_Window_Cmd.py
+
+販管費配賦後の月次の損益計算書・製造原価報告書から、
+任意の期間 (ウィンドウ) の累計 TSV を作成する。
+
+入力 (フォルダ内の各月のファイル):
+  損益計算書_販管費配賦_yyyy年mm月_A∪B_プロジェクト名_C∪D(.tsv / _vertical.tsv)
+  製造原価報告書_yyyy年mm月_A∪B_プロジェクト名_C∪D(.tsv / _vertical.tsv)
+
+出力 (SellGeneralAdminCost_Allocation_Cmd.py の累計と同じ形式):
+  累計_損益計算書_yyyy年mm月_yyyy年mm月(.tsv / _vertical.tsv)
+  累計_製造原価報告書_yyyy年mm月_yyyy年mm月(.tsv / _vertical.tsv)
+
+ウィンドウの指定 (複数指定できる):
+  yyyy-mm:yyyy-mm      開始月〜終了月
+  rollingN:yyyy-mm     終了月までの直近 N か月 (例: rolling12:2025-09)
+  qtd:yyyy-mm          四半期 (1〜3月 / 4〜6月 / 7〜9月 / 10〜12月) の初月〜指定月
+  ytd:yyyy-mm[:m]      期首 (m 月。既定は 4 月) 〜指定月
+
+処理:
+  重なる・隣り合うウィンドウを 1 つの月の範囲にまとめ、範囲ごとに
+  各月のファイルを 1 回だけ読み込む (どのウィンドウにも含まれない月は読み込まない)。
+  月方向の累積和 (MonthlyReportCube) から、各ウィンドウを
+  「終了月の累積和 − 開始月の前月の累積和」で求める。
+  採用範囲のファイル (SellGeneralAdminCost_Allocation_DnD_SelectedRange.txt) は使わない。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from atomic_tsv_writer import write_tsv_rows_atomic
+from output_manifest import OutputManifest, extract_manifest_option
+from SellGeneralAdminCost_Allocation_Cmd import (
+    MonthlyReportCube,
+    build_cumulative_file_path,
+    build_month_sequence,
+    transpose_rows,
+)
+
+
+# 作成したファイルの一覧 (--manifest 指定時に JSON として書き出す)
+_OBJ_OUTPUT_MANIFEST: OutputManifest = OutputManifest("SellGeneralAdminCost_Window_Cmd.py")
+
+# 入力フォルダ (指定しない場合はカレントフォルダ)
+DIRECTORY_OPTION: str = "--dir"
+
+# (出力プレフィックス, 入力プレフィックス)
+WINDOW_REPORT_PREFIXES: Tuple[Tuple[str, str], ...] = (
+    ("損益計算書", "損益計算書_販管費配賦"),
+    ("製造原価報告書", "製造原価報告書"),
+)
+
+YEAR_TO_DATE_DEFAULT_START_MONTH: int = 4
+
+_PSZ_YEAR_MONTH_PATTERN: str = r"(\d{4})-(\d{1,2})"
+_OBJ_RANGE_WINDOW_PATTERN: re.Pattern[str] = re.compile(
+    rf"^{_PSZ_YEAR_MONTH_PATTERN}:{_PSZ_YEAR_MONTH_PATTERN}$"
+)
+_OBJ_ROLLING_WINDOW_PATTERN: re.Pattern[str] = re.compile(rf"^rolling(\d+):{_PSZ_YEAR_MONTH_PATTERN}$")
+_OBJ_QUARTER_TO_DATE_PATTERN: re.Pattern[str] = re.compile(rf"^qtd:{_PSZ_YEAR_MONTH_PATTERN}$")
+_OBJ_YEAR_TO_DATE_PATTERN: re.Pattern[str] = re.compile(
+    rf"^ytd:{_PSZ_YEAR_MONTH_PATTERN}(?::(\d{{1,2}}))?$"
+)
+
+YearMonth = Tuple[int, int]
+ReportWindow = Tuple[YearMonth, YearMonth]
+
+
+def print_usage() -> None:
+    pszUsage: str = (
+        "Usage: python SellGeneralAdminCost_Window_Cmd.py [--dir <folder>] <window> [<window> ...]\n"
+        "Windows: yyyy-mm:yyyy-mm     開始月〜終了月\n"
+        "         rollingN:yyyy-mm    終了月までの直近 N か月\n"
+        "         qtd:yyyy-mm         四半期の初月〜指定月\n"
+        "         ytd:yyyy-mm[:m]     期首 (m 月。既定は 4 月) 〜指定月\n"
+        "Options: --manifest <json_path>  作成したファイルの一覧を JSON で書き出す"
+    )
+    print(pszUsage)
+
+
+def add_months(objYearMonth: YearMonth, iMonthCount: int) -> YearMonth:
+    iYear, iMonth = objYearMonth
+    iMonthIndex: int = iYear * 12 + (iMonth - 1) + iMonthCount
+    return iMonthIndex // 12, iMonthIndex % 12 + 1
+
+
+def parse_year_month(pszYear: str, pszMonth: str) -> YearMonth:
+    iMonth: int = int(pszMonth)
+    if not 1 <= iMonth <= 12:
+        raise ValueError(f"Invalid month: {pszYear}-{pszMonth}")
+    return int(pszYear), iMonth
+
+
+def parse_window(pszWindow: str) -> ReportWindow:
+    objMatch: Optional[re.Match[str]] = _OBJ_RANGE_WINDOW_PATTERN.match(pszWindow)
+    if objMatch is not None:
+        objStart: YearMonth = parse_year_month(objMatch.group(1), objMatch.group(2))
+        objEnd: YearMonth = parse_year_month(objMatch.group(3), objMatch.group(4))
+        if objStart > objEnd:
+            raise ValueError(f"Window start is after end: {pszWindow}")
+        return objStart, objEnd
+
+    objMatch = _OBJ_ROLLING_WINDOW_PATTERN.match(pszWindow)
+    if objMatch is not None:
+        iMonthCount: int = int(objMatch.group(1))
+        if iMonthCount < 1:
+            raise ValueError(f"Rolling window needs at least 1 month: {pszWindow}")
+        objEnd = parse_year_month(objMatch.group(2), objMatch.group(3))
+        return add_months(objEnd, 1 - iMonthCount), objEnd
+
+    objMatch = _OBJ_QUARTER_TO_DATE_PATTERN.match(pszWindow)
+    if objMatch is not None:
+        objEnd = parse_year_month(objMatch.group(1), objMatch.group(2))
+        iEndYear, iEndMonth = objEnd
+        return (iEndYear, (iEndMonth - 1) // 3 * 3 + 1), objEnd
+
+    objMatch = _OBJ_YEAR_TO_DATE_PATTERN.match(pszWindow)
+    if objMatch is not None:
+        objEnd = parse_year_month(objMatch.group(1), objMatch.group(2))
+        iStartMonth: int = (
+            int(objMatch.group(3)) if objMatch.group(3) is not None else YEAR_TO_DATE_DEFAULT_START_MONTH
+        )
+        if not 1 <= iStartMonth <= 12:
+            raise ValueError(f"Invalid fiscal start month: {pszWindow}")
+        iEndYear, iEndMonth = objEnd
+        iStartYear: int = iEndYear if iEndMonth >= iStartMonth else iEndYear - 1
+        return (iStartYear, iStartMonth), objEnd
+
+    raise ValueError(f"Unknown window: {pszWindow}")
+
+
+def write_window_report(
+    pszDirectory: str,
+    pszPrefix: str,
+    objWindow: ReportWindow,
+    objCube: MonthlyReportCube,
+) -> bool:
+    # create_cumulative_report と同じ形式 (横持ち + _vertical) で書き出す
+    objStart, objEnd = objWindow
+    objTotalRows: Optional[List[List[str]]] = objCube.sum_range(objStart, objEnd)
+    if objTotalRows is None:
+        return False
+    pszOutputPath: str = build_cumulative_file_path(pszDirectory, pszPrefix, objStart, objEnd)
+    write_tsv_rows_atomic(pszOutputPath, objTotalRows)
+    _OBJ_OUTPUT_MANIFEST.report(pszOutputPath)
+    pszVerticalOutputPath: str = pszOutputPath.replace(".tsv", "_vertical.tsv")
+    write_tsv_rows_atomic(pszVerticalOutputPath, transpose_rows(objTotalRows))
+    _OBJ_OUTPUT_MANIFEST.report(pszVerticalOutputPath)
+    return True
+
+
+def group_windows_into_month_runs(
+    objWindows: List[ReportWindow],
+) -> List[Tuple[ReportWindow, List[ReportWindow]]]:
+    # 重なる・隣り合うウィンドウを 1 つの月の範囲 (ラン) にまとめる
+    # 戻り値: [((ランの開始月, ランの終了月), [ランに含まれるウィンドウ]), ...] (開始月の順)
+    objRuns: List[Tuple[ReportWindow, List[ReportWindow]]] = []
+    for objWindow in sorted(objWindows):
+        objStart, objEnd = objWindow
+        if objRuns:
+            (objRunStart, objRunEnd), objRunWindows = objRuns[-1]
+            if objStart <= add_months(objRunEnd, 1):
+                objRuns[-1] = ((objRunStart, max(objRunEnd, objEnd)), objRunWindows + [objWindow])
+                continue
+        objRuns.append(((objStart, objEnd), [objWindow]))
+    return objRuns
+
+
+def create_window_reports(pszDirectory: str, objWindows: List[ReportWindow]) -> int:
+    # 同じウィンドウは 1 回だけ作成する (指定した順)
+    objUniqueWindows: List[ReportWindow] = list(dict.fromkeys(objWindows))
+    if not objUniqueWindows:
+        return 0
+
+    # 重なる・隣り合うウィンドウのランごとに、レポートごとの累積和を 1 回だけ作る
+    # (離れたウィンドウの間の、どのウィンドウにも含まれない月は読み込まない)
+    objRuns: List[Tuple[ReportWindow, List[ReportWindow]]] = group_windows_into_month_runs(
+        objUniqueWindows
+    )
+    iExitCode: int = 0
+    for pszPrefix, pszInputPrefix in WINDOW_REPORT_PREFIXES:
+        objCubesByWindow: Dict[ReportWindow, MonthlyReportCube] = {}
+        for (objRunStart, objRunEnd), objRunWindows in objRuns:
+            objCube: MonthlyReportCube = MonthlyReportCube(
+                pszDirectory,
+                pszInputPrefix,
+                build_month_sequence(objRunStart, objRunEnd),
+            )
+            for objWindow in objRunWindows:
+                objCubesByWindow[objWindow] = objCube
+        for objWindow in objUniqueWindows:
+            if not write_window_report(pszDirectory, pszPrefix, objWindow, objCubesByWindow[objWindow]):
+                iExitCode = 1
+    return iExitCode
+
+
+def main(argv: List[str]) -> int:
+    pszManifestPath: Optional[str]
+    try:
+        argv, pszManifestPath = extract_manifest_option(list(argv))
+    except ValueError as objException:
+        print(objException)
+        print_usage()
+        return 1
+
+    pszDirectory: str = os.getcwd()
+    objWindowTexts: List[str] = []
+    iIndex: int = 1
+    while iIndex < len(argv):
+        pszArg: str = argv[iIndex]
+        if pszArg == DIRECTORY_OPTION:
+            if iIndex + 1 >= len(argv):
+                print(f"{DIRECTORY_OPTION} requires a value.")
+                print_usage()
+                return 1
+            pszDirectory = argv[iIndex + 1]
+            iIndex += 2
+            continue
+        objWindowTexts.append(pszArg)
+        iIndex += 1
+
+    if not objWindowTexts:
+        print_usage()
+        return 1
+    if not os.path.isdir(pszDirectory):
+        print(f"Input folder not found: {pszDirectory}")
+        return 1
+
+    objWindows: List[ReportWindow] = []
+    for pszWindowText in objWindowTexts:
+        try:
+            objWindows.append(parse_window(pszWindowText))
+        except ValueError as objException:
+            print(f"Error: {objException}")
+            print_usage()
+            return 1
+
+    iExitCode: int = create_window_reports(pszDirectory, objWindows)
+    if pszManifestPath is not None:
+        _OBJ_OUTPUT_MANIFEST.write(pszManifestPath)
+    return iExitCode
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -13,9 +13,19 @@
 #
 ###############################################################
 
-import re
 import sys
 
+from manhour_time_kernel import (
+    TIME_PARSE_MODE_STRICT,
+    format_seconds_to_time_text_cached,
+    parse_time_text_to_seconds_cached,
+)
+from output_manifest import OutputManifest, extract_manifest_option
+from project_name_normalizer import (
+    normalize_project_name_cached,
+    preprocess_manhour_line_spaces_only_cached,
+)
+
 
 iProjectNameColumnIndex: int = 0
 iRemoveColumnIndex: int = 1
@@ -35,93 +45,38 @@ def is_blank(value: str | None) -> bool:
 
 
 def normalize_project_name(pszSource: str) -> str:
-    if pszSource.startswith("【廃番】"):
-        try:
-            code: str | None = None
-            code_index: int = -1
-            for prefix in ["J", "A", "C", "H", "M", "P"]:
-                search_from: int = 0
-                code_length: int = 4
-                if prefix == "P":
-                    code_length = 6
-                while True:
-                    found_index: int = pszSource.find(prefix, search_from)
-                    if found_index == -1:
-                        break
-                    if found_index + code_length <= len(pszSource):
-                        code = pszSource[found_index:found_index + code_length]
-                        code_index = found_index
-                        break
-                    search_from = found_index + 1
-                if code is not None:
-                    break
-            if code is None or code_index == -1:
-                return pszSource
-            head: str = pszSource[:code_index]
-            tail: str = pszSource[code_index + len(code):]
-            return code + "_" + head + tail
-        except Exception:
-            return pszSource
-
-    if len(pszSource) >= 1 and pszSource[0] in ["J", "A", "C", "H", "M"]:
-        if len(pszSource) >= 5:
-            next_char: str = pszSource[4]
-            if next_char == "【":
-                return pszSource[:4] + "_" + pszSource[4:]
-            if next_char == " " or next_char == "　":
-                return pszSource[:4] + "_" + pszSource[5:]
-        return pszSource
-
-    if len(pszSource) >= 1 and pszSource[0] == "P":
-        if len(pszSource) >= 7:
-            next_char_p: str = pszSource[6]
-            if next_char_p == "【":
-                return pszSource[:6] + "_" + pszSource[6:]
-            if next_char_p == " " or next_char_p == "　":
-                return pszSource[:6] + "_" + pszSource[7:]
-        return pszSource
-
-    return pszSource
+    # 正規化規則は共通モジュール (project_name_normalizer) のメモ化版を使う。
+    # このスクリプトでは「【...】」の後ろのコードを先頭へ移す規則は適用しない。
+    return normalize_project_name_cached(pszSource, False)
 
 
 def preprocess_line_content(line_content: str) -> str:
-    line_content = re.sub(
-        r'^"([^"]*)\t([^"]*)"([^\r\n]*)',
-        r"\1_\2\3",
-        line_content,
-    )
-    line_content = re.sub(r"^(J\d\d\d) +", r"\1_", line_content)
-    line_content = re.sub(r"([A-OQ-Z]\d\d\d)[ 　]+", r"\1_", line_content)
-    line_content = re.sub(r"(P\d\d\d\d\d)[ 　]+", r"\1_", line_content)
-    line_content = re.sub(r"\t[0-9]+\t", "\t", line_content)
-    return line_content
+    return preprocess_manhour_line_spaces_only_cached(line_content)
 
 
 def parse_manhour_to_seconds(manhour: str) -> int:
-    match = re.match(r"^(\d+):([0-5]\d):([0-5]\d)$", manhour)
-    if not match:
+    # 変換は共通カーネル (manhour_time_kernel) の厳密モードで行う。
+    seconds = parse_time_text_to_seconds_cached(manhour, TIME_PARSE_MODE_STRICT)
+    if seconds is None:
         raise ValueError(f"Invalid manhour format: {manhour}")
-    hours = int(match.group(1))
-    minutes = int(match.group(2))
-    seconds = int(match.group(3))
-    return hours * 3600 + minutes * 60 + seconds
+    return seconds
 
 
 def format_seconds_to_manhour(total_seconds: int) -> str:
-    if total_seconds < 0:
-        raise ValueError("Total seconds must not be negative.")
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return format_seconds_to_time_text_cached(total_seconds)
 
 
 def main() -> None:
-    if len(sys.argv) < 2:
-        print("Usage: python Sheet7ToSheet10_NormalizeProjectName_Cmd.py <input.tsv>")
+    try:
+        argv, manifest_path = extract_manifest_option(sys.argv)
+    except ValueError as exc:
+        print(str(exc))
+        sys.exit(1)
+    if len(argv) < 2:
+        print("Usage: python Sheet7ToSheet10_NormalizeProjectName_Cmd.py <input.tsv> [--manifest <json_path>]")
         sys.exit(1)
 
-    input_path: str = sys.argv[1]
+    input_path: str = argv[1]
     output_path: str = "Sheet10.tsv"
     sheet11_path: str = "Sheet11.tsv"
     sheet12_path: str = "Sheet12.tsv"
@@ -205,6 +160,12 @@ def main() -> None:
         print(str(exc))
         sys.exit(1)
 
+    if manifest_path is not None:
+        manifest: OutputManifest = OutputManifest("Sheet7ToSheet10_NormalizeProjectName_Cmd.py")
+        for created_path in [output_path, sheet11_path, sheet12_path, sheet13_path]:
+            manifest.add(created_path)
+        manifest.write(manifest_path)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# atomic_tsv_writer.py
+#
+# 役割:
+#   TSV などの出力ファイルを、各スクリプトで共通の方法で書き出す。
+#
+#   ・一時ファイルへ書いてから os.replace で置き換える。
+#     途中で異常終了しても、書きかけのファイルが本来の名前で残らない
+#     (前回のファイルがあればそのまま残る)。
+#   ・大きな書き込みバッファ (ATOMIC_TSV_WRITER_BUFFER_SIZE) を使い、
+#     1 行ごとの書き込みでもシステムコールの回数を抑える。
+#   ・BackgroundTsvWriter を使うと、文字列化と書き込みを別スレッドで行い、
+#     次の段階の計算と重ねて実行できる。
+#     書き込みは依頼した順に 1 つずつ行う。
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import queue
+import secrets
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+
+ATOMIC_TSV_WRITER_BUFFER_SIZE: int = 1024 * 1024
+
+# 一時ファイルは通常の open と同じく 0666 を指定して作成し、
+# 権限は OS がプロセスの umask を適用して決める
+# (umask を読むために os.umask を呼ぶと、他のスレッドの作成にも影響するため)
+_I_TEMPORARY_FILE_FLAGS: int = (
+    os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0)
+)
+_I_TEMPORARY_FILE_MODE: int = 0o666
+_I_TEMPORARY_FILE_MAX_ATTEMPTS: int = 100
+
+
+def create_temporary_file(pszOutputPath: str) -> Tuple[int, str]:
+    # pszOutputPath と同じフォルダに、重複しない名前の一時ファイルを作成する
+    # 戻り値: (ファイルディスクリプタ, 一時ファイルのパス)
+    pszDirectoryPath: str = os.path.dirname(os.path.abspath(pszOutputPath))
+    pszPrefix: str = "." + os.path.basename(pszOutputPath) + "."
+    for _ in range(_I_TEMPORARY_FILE_MAX_ATTEMPTS):
+        pszTemporaryPath: str = os.path.join(
+            pszDirectoryPath,
+            pszPrefix + secrets.token_hex(8) + ".tmp",
+        )
+        try:
+            iFileDescriptor: int = os.open(
+                pszTemporaryPath,
+                _I_TEMPORARY_FILE_FLAGS,
+                _I_TEMPORARY_FILE_MODE,
+            )
+        except FileExistsError:
+            continue
+        return iFileDescriptor, pszTemporaryPath
+    raise FileExistsError(f"No usable temporary file name for: {pszOutputPath}")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 一時ファイル + 置き換えによる書き込み
+#
+#   with open_atomic_text_file(pszPath) as objFile:
+#       objFile.write(...)
+#
+#   with ブロックを正常に抜けたときだけ pszPath を置き換える。
+#   例外が起きた場合は一時ファイルを削除し、例外をそのまま送出する。
+#
+# ///////////////////////////////////////////////////////////////
+@contextmanager
+def open_atomic_text_file(
+    pszOutputPath: str,
+    pszEncoding: str = "utf-8",
+    pszNewline: Optional[str] = "",
+) -> Iterator[TextIO]:
+    iFileDescriptor: int
+    pszTemporaryPath: str
+    iFileDescriptor, pszTemporaryPath = create_temporary_file(pszOutputPath)
+    try:
+        # open(iFileDescriptor, ...) と同じ構成で開く。
+        # 失敗した場合 (不明なエンコーディングなど) もディスクリプタを必ず 1 回だけ閉じる
+        # (開いたままでは、Windows で一時ファイルを削除できない)
+        try:
+            objRawFile: io.FileIO = io.FileIO(iFileDescriptor, "w")
+        except BaseException:
+            os.close(iFileDescriptor)
+            raise
+        try:
+            objFile: TextIO = io.TextIOWrapper(
+                io.BufferedWriter(objRawFile, ATOMIC_TSV_WRITER_BUFFER_SIZE),
+                encoding=pszEncoding,
+                newline=pszNewline,
+            )
+        except BaseException:
+            objRawFile.close()
+            raise
+        with objFile:
+            yield objFile
+        os.replace(pszTemporaryPath, pszOutputPath)
+    except BaseException:
+        if os.path.exists(pszTemporaryPath):
+            os.remove(pszTemporaryPath)
+        raise
+
+
+def write_text_atomic(
+    pszOutputPath: str,
+    pszText: str,
+    pszEncoding: str = "utf-8",
+    pszNewline: Optional[str] = "",
+) -> None:
+    with open_atomic_text_file(pszOutputPath, pszEncoding, pszNewline) as objFile:
+        objFile.write(pszText)
+
+
+def join_tsv_rows(objRows: Sequence[Sequence[str]]) -> str:
+    # 各行をタブで連結し、"\n" で終端する (引用符付けは行わない)
+    return "".join(["\t".join(objRow) + "\n" for objRow in objRows])
+
+
+def write_tsv_rows_atomic(
+    pszOutputPath: str,
+    objRows: Sequence[Sequence[str]],
+    pszEncoding: str = "utf-8",
+) -> None:
+    write_text_atomic(pszOutputPath, join_tsv_rows(objRows), pszEncoding)
+
+
+def write_csv_rows_atomic(
+    pszOutputPath: str,
+    objRows: Sequence[Sequence[str]],
+    pszDelimiter: str = "\t",
+    pszLineTerminator: str = "\n",
+    pszEncoding: str = "utf-8",
+) -> None:
+    # csv.writer による書き込み (区切り文字などを含むセルは引用符で囲む)
+    with open_atomic_text_file(pszOutputPath, pszEncoding) as objFile:
+        objWriter = csv.writer(objFile, delimiter=pszDelimiter, lineterminator=pszLineTerminator)
+        objWriter.writerows(objRows)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# バックグラウンド書き込み
+#
+#   submit_text に「文字列を作る関数」を渡すと、文字列化と書き込みを
+#   作業スレッドで行う。渡した関数が参照するデータは、
+#   書き込みが終わるまで呼び出し側で変更しないこと。
+#
+#   close() で未処理の書き込みをすべて待ち、作業スレッドで起きた
+#   最初の例外を呼び出し側へ送出する。
+#   with 文で使うと、ブロック内で例外が起きた場合も作業スレッドを止める。
+#   bEnabled=False の場合は、その場で同期して書き込む。
+#
+# ///////////////////////////////////////////////////////////////
+class BackgroundTsvWriter:
+    def __init__(self, bEnabled: bool = True) -> None:
+        self.bEnabled: bool = bEnabled
+        self.objQueue: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+        self.objErrors: List[BaseException] = []
+        self.objThread: Optional[threading.Thread] = None
+        if bEnabled:
+            self.objThread = threading.Thread(
+                target=self.run_worker,
+                name="BackgroundTsvWriter",
+                daemon=True,
+            )
+            self.objThread.start()
+
+    def __enter__(self) -> "BackgroundTsvWriter":
+        return self
+
+    def __exit__(self, objExcType: object, objExc: object, objTraceback: object) -> None:
+        if objExcType is None:
+            self.close()
+            return
+        # with ブロック内の例外を優先して送出する。
+        # 依頼済みの書き込みを終えてから作業スレッドを終了し、書き込みの失敗は表示だけ行う。
+        try:
+            self.close()
+        except BaseException as objWriteException:
+            print(f"Error: background write failed. Detail = {objWriteException}")
+
+    def run_worker(self) -> None:
+        while True:
+            objTask: Optional[Callable[[], None]] = self.objQueue.get()
+            if objTask is None:
+                return
+            try:
+                objTask()
+            except BaseException as objException:
+                self.objErrors.append(objException)
+
+    def submit(self, objTask: Callable[[], None]) -> None:
+        if self.objThread is None:
+            objTask()
+            return
+        self.objQueue.put(objTask)
+
+    def submit_text(
+        self,
+        pszOutputPath: str,
+        objTextProducer: Callable[[], str],
+        pszEncoding: str = "utf-8",
+        pszNewline: Optional[str] = "",
+    ) -> None:
+        self.submit(
+            lambda: write_text_atomic(
+                pszOutputPath,
+                objTextProducer(),
+                pszEncoding,
+                pszNewline,
+            ),
+        )
+
+    def close(self) -> None:
+        if self.objThread is not None:
+            self.objQueue.put(None)
+            self.objThread.join()
+            self.objThread = None
+        if self.objErrors:
+            raise self.objErrors[0]
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# benchmark_atomic_tsv_writer.py
+#
+# 役割:
+#   共通 TSV 書き込み層 (atomic_tsv_writer) と、
+#   従来の open(..., "w") で 1 行ずつ書き込む実装との
+#   書き込み速度 (MB/s) を比較する。
+#
+#   サンプルとして expected/Sheet4.tsv と
+#   expected/answer_損益計算書25.4.tsv を読み込み、
+#   指定回数だけ繰り返し書き出して計測する。
+#   バックグラウンド書き込みについては、書き出しと同じ時間だけ
+#   次の段階の計算を模した処理を行い、重ねて実行した場合の
+#   合計時間を比べる。
+#   書き出したファイルの内容が従来実装と一致することも確認する。
+#
+# 実行例:
+#   python src/benchmark_atomic_tsv_writer.py
+#   python src/benchmark_atomic_tsv_writer.py 50
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from atomic_tsv_writer import (
+    BackgroundTsvWriter,
+    join_tsv_rows,
+    write_csv_rows_atomic,
+    write_tsv_rows_atomic,
+)
+
+
+# ///////////////////////////////////////////////////////////////
+# 従来実装 (比較用にそのまま写したもの)
+# ///////////////////////////////////////////////////////////////
+def legacy_write_tsv_rows(pszPath: str, objRows: List[List[str]]) -> None:
+    with open(pszPath, "w", encoding="utf-8", newline="") as objFile:
+        for objRow in objRows:
+            objFile.write("\t".join(objRow) + "\n")
+
+
+def legacy_write_csv_rows(pszPath: str, objRows: List[List[str]]) -> None:
+    with open(pszPath, mode="w", encoding="utf-8", newline="") as objFile:
+        objWriter = csv.writer(objFile, delimiter="\t", lineterminator="\n")
+        for objRow in objRows:
+            objWriter.writerow(objRow)
+
+
+# ///////////////////////////////////////////////////////////////
+# 計測用ヘルパー
+# ///////////////////////////////////////////////////////////////
+def measure_seconds(objFunction: Callable[[], object], iRepeatCount: int = 3) -> float:
+    fBestSeconds: float = float("inf")
+    for _ in range(iRepeatCount):
+        fStart: float = time.perf_counter()
+        objFunction()
+        fBestSeconds = min(fBestSeconds, time.perf_counter() - fStart)
+    return fBestSeconds
+
+
+def print_result_line(
+    pszLabel: str,
+    fLegacySeconds: float,
+    fNewSeconds: float,
+    iTotalBytes: int,
+) -> None:
+    fRatio: float = fLegacySeconds / fNewSeconds if fNewSeconds > 0 else float("inf")
+    fLegacyMegabytes: float = iTotalBytes / fLegacySeconds / 1000000 if fLegacySeconds > 0 else 0.0
+    fNewMegabytes: float = iTotalBytes / fNewSeconds / 1000000 if fNewSeconds > 0 else 0.0
+    print(
+        f"{pszLabel:<36} legacy={fLegacySeconds * 1000:8.1f} ms ({fLegacyMegabytes:6.1f} MB/s)  "
+        f"new={fNewSeconds * 1000:8.1f} ms ({fNewMegabytes:6.1f} MB/s)  x{fRatio:5.2f}"
+    )
+
+
+def read_sample_rows(pszFileName: str) -> List[List[str]]:
+    pszScriptDirectory: str = os.path.dirname(os.path.abspath(__file__))
+    pszSamplePath: str = os.path.join(pszScriptDirectory, "..", "expected", pszFileName)
+    with open(pszSamplePath, "r", encoding="utf-8", newline="") as objFile:
+        return [pszLine.rstrip("\r\n").split("\t") for pszLine in objFile]
+
+
+def read_file_bytes(pszPath: str) -> bytes:
+    with open(pszPath, "rb") as objFile:
+        return objFile.read()
+
+
+def simulate_next_stage(objRows: List[List[str]]) -> int:
+    # 次の段階の計算を模した処理 (各セルの長さを合計する)
+    iTotal: int = 0
+    for objRow in objRows:
+        for pszCell in objRow:
+            iTotal += len(pszCell)
+    return iTotal
+
+
+def main() -> int:
+    iRepeat: int = int(sys.argv[1]) if len(sys.argv) >= 2 else 20
+    objSampleFiles: List[str] = ["Sheet4.tsv", "answer_損益計算書25.4.tsv"]
+    pszWorkDirectory: str = tempfile.mkdtemp(prefix="benchmark_atomic_tsv_writer_")
+    try:
+        for pszSampleFile in objSampleFiles:
+            objRows: List[List[str]] = read_sample_rows(pszSampleFile) * iRepeat
+            iTotalBytes: int = len(join_tsv_rows(objRows).encode("utf-8"))
+            print(f"{pszSampleFile}: rows={len(objRows)} bytes={iTotalBytes}")
+
+            pszLegacyPath: str = os.path.join(pszWorkDirectory, "legacy.tsv")
+            pszNewPath: str = os.path.join(pszWorkDirectory, "new.tsv")
+
+            # ----------------------------------------------------------------
+            # "\t".join による書き込み (SellGeneralAdminCost_Allocation_Cmd 相当)
+            # ----------------------------------------------------------------
+            legacy_write_tsv_rows(pszLegacyPath, objRows)
+            write_tsv_rows_atomic(pszNewPath, objRows)
+            if read_file_bytes(pszLegacyPath) != read_file_bytes(pszNewPath):
+                print("Error: tsv rows output mismatch")
+                return 1
+            print_result_line(
+                "join rows (atomic)",
+                measure_seconds(lambda: legacy_write_tsv_rows(pszLegacyPath, objRows)),
+                measure_seconds(lambda: write_tsv_rows_atomic(pszNewPath, objRows)),
+                iTotalBytes,
+            )
+
+            # ----------------------------------------------------------------
+            # csv.writer による書き込み (PL_CsvToTsv_Cmd 相当)
+            # ----------------------------------------------------------------
+            legacy_write_csv_rows(pszLegacyPath, objRows)
+            write_csv_rows_atomic(pszNewPath, objRows)
+            if read_file_bytes(pszLegacyPath) != read_file_bytes(pszNewPath):
+                print("Error: csv rows output mismatch")
+                return 1
+            print_result_line(
+                "csv.writer rows (atomic)",
+                measure_seconds(lambda: legacy_write_csv_rows(pszLegacyPath, objRows)),
+                measure_seconds(lambda: write_csv_rows_atomic(pszNewPath, objRows)),
+                iTotalBytes,
+            )
+
+            # ----------------------------------------------------------------
+            # 書き出し + 次の段階の計算 (バックグラウンド書き込みで重ねる)
+            # ----------------------------------------------------------------
+            def run_legacy_stages() -> None:
+                legacy_write_tsv_rows(pszLegacyPath, objRows)
+                simulate_next_stage(objRows)
+
+            def run_background_stages() -> None:
+                with BackgroundTsvWriter() as objWriter:
+                    objWriter.submit_text(pszNewPath, lambda: join_tsv_rows(objRows))
+                    simulate_next_stage(objRows)
+
+            run_legacy_stages()
+            run_background_stages()
+            if read_file_bytes(pszLegacyPath) != read_file_bytes(pszNewPath):
+                print("Error: background output mismatch")
+                return 1
+            print_result_line(
+                "write + next stage (background)",
+                measure_seconds(run_legacy_stages),
+                measure_seconds(run_background_stages),
+                iTotalBytes,
+            )
+    finally:
+        shutil.rmtree(pszWorkDirectory, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# benchmark_manhour_time_kernel.py
+#
+# 役割:
+#   共通時間カーネル (manhour_time_kernel) と、
+#   従来の 1 行ずつ split / 正規表現で変換する実装との
+#   処理時間を比較する。
+#
+#   サンプルとして expected/Sheet4.tsv の「工数」列を読み込み、
+#   指定件数になるまで繰り返して計測用データを作る。
+#   変換結果が従来実装と一致することも同時に確認する。
+#
+# 実行例:
+#   python src/benchmark_manhour_time_kernel.py
+#   python src/benchmark_manhour_time_kernel.py 1000000
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from manhour_time_kernel import (
+    TIME_PARSE_MODE_LENIENT,
+    TIME_PARSE_MODE_STRICT,
+    format_number_text,
+    format_number_values,
+    format_seconds_to_time_text_cached,
+    format_seconds_values_to_time_text,
+    parse_time_text_to_seconds_cached,
+    parse_time_values_to_seconds,
+)
+
+
+# ///////////////////////////////////////////////////////////////
+# 従来実装 (比較用にそのまま写したもの)
+# ///////////////////////////////////////////////////////////////
+def legacy_convert_time_string_to_seconds(pszTimeText: str) -> int:
+    if pszTimeText is None:
+        return 0
+    pszWork: str = str(pszTimeText).strip()
+    if len(pszWork) == 0:
+        return 0
+    objParts: List[str] = pszWork.split(":")
+    try:
+        if len(objParts) == 3:
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60 + int(objParts[2])
+        if len(objParts) == 2:
+            return int(objParts[0]) * 3600 + int(objParts[1]) * 60
+    except ValueError:
+        return 0
+    return 0
+
+
+def legacy_parse_manhour_to_seconds_sheet11(pszManhour: str) -> int:
+    objMatch = re.match(r"^(\d+):([0-5]\d):([0-5]\d)$", pszManhour)
+    if not objMatch:
+        raise ValueError(f"Invalid manhour format: {pszManhour}")
+    return int(objMatch.group(1)) * 3600 + int(objMatch.group(2)) * 60 + int(objMatch.group(3))
+
+
+def legacy_format_seconds_to_manhour_sheet11(iTotalSeconds: int) -> str:
+    if iTotalSeconds < 0:
+        raise ValueError("Total seconds must not be negative.")
+    iHours: int = iTotalSeconds // 3600
+    iMinutes: int = (iTotalSeconds % 3600) // 60
+    iSeconds: int = iTotalSeconds % 60
+    return f"{iHours}:{iMinutes:02d}:{iSeconds:02d}"
+
+
+def legacy_format_number(fValue: float) -> str:
+    if abs(fValue - round(fValue)) < 0.0000001:
+        return str(int(round(fValue)))
+    pszText: str = f"{fValue:.6f}"
+    return pszText.rstrip("0").rstrip(".")
+
+
+# ///////////////////////////////////////////////////////////////
+# 計測用ヘルパー
+# ///////////////////////////////////////////////////////////////
+def measure_seconds(objFunction: Callable[[], object], iRepeatCount: int = 3) -> float:
+    fBestSeconds: float = float("inf")
+    for _ in range(iRepeatCount):
+        fStart: float = time.perf_counter()
+        objFunction()
+        fBestSeconds = min(fBestSeconds, time.perf_counter() - fStart)
+    return fBestSeconds
+
+
+def print_result_line(pszLabel: str, fLegacySeconds: float, fKernelSeconds: float) -> None:
+    fRatio: float = fLegacySeconds / fKernelSeconds if fKernelSeconds > 0 else float("inf")
+    print(
+        f"{pszLabel:<40} legacy={fLegacySeconds * 1000:9.1f} ms  "
+        f"kernel={fKernelSeconds * 1000:9.1f} ms  x{fRatio:6.1f}"
+    )
+
+
+def load_sample_time_texts(iTargetCount: int) -> List[str]:
+    pszScriptDirectory: str = os.path.dirname(os.path.abspath(__file__))
+    pszSamplePath: str = os.path.join(pszScriptDirectory, "..", "expected", "Sheet4.tsv")
+    objSampleTexts: List[str] = (
+        pd.read_csv(pszSamplePath, sep="\t", dtype=str)["工数"].fillna("").tolist()
+    )
+    iRepeat: int = iTargetCount // len(objSampleTexts) + 1
+    return (objSampleTexts * iRepeat)[:iTargetCount]
+
+
+def main() -> int:
+    iTargetCount: int = int(sys.argv[1]) if len(sys.argv) >= 2 else 200000
+    objTimeTexts: List[str] = load_sample_time_texts(iTargetCount)
+    objStrictTexts: List[str] = [pszText for pszText in objTimeTexts if pszText != ""]
+    print(f"rows={len(objTimeTexts)} unique={len(set(objTimeTexts))}")
+
+    # ----------------------------------------------------------------
+    # 時間文字列 → 秒数
+    # ----------------------------------------------------------------
+    objLegacySeconds: List[int] = [legacy_convert_time_string_to_seconds(p) for p in objTimeTexts]
+    objKernelSeconds: np.ndarray
+    objKernelSeconds, _ = parse_time_values_to_seconds(objTimeTexts, TIME_PARSE_MODE_LENIENT)
+    if objKernelSeconds.tolist() != objLegacySeconds:
+        print("Error: lenient parse result mismatch")
+        return 1
+    print_result_line(
+        "parse lenient (vectorized)",
+        measure_seconds(lambda: [legacy_convert_time_string_to_seconds(p) for p in objTimeTexts]),
+        measure_seconds(lambda: parse_time_values_to_seconds(objTimeTexts, TIME_PARSE_MODE_LENIENT)),
+    )
+    print_result_line(
+        "parse lenient (scalar lru)",
+        measure_seconds(lambda: [legacy_convert_time_string_to_seconds(p) for p in objTimeTexts]),
+        measure_seconds(
+            lambda: [parse_time_text_to_seconds_cached(p, TIME_PARSE_MODE_LENIENT) for p in objTimeTexts]
+        ),
+    )
+    print_result_line(
+        "parse strict (vectorized)",
+        measure_seconds(lambda: [legacy_parse_manhour_to_seconds_sheet11(p) for p in objStrictTexts]),
+        measure_seconds(lambda: parse_time_values_to_seconds(objStrictTexts, TIME_PARSE_MODE_STRICT)),
+    )
+
+    # ----------------------------------------------------------------
+    # 秒数 → 時間文字列
+    # ----------------------------------------------------------------
+    objSecondsList: List[int] = objLegacySeconds
+    objLegacyTexts: List[str] = [legacy_format_seconds_to_manhour_sheet11(i) for i in objSecondsList]
+    if format_seconds_values_to_time_text(objSecondsList).tolist() != objLegacyTexts:
+        print("Error: time format result mismatch")
+        return 1
+    print_result_line(
+        "format H:MM:SS (vectorized)",
+        measure_seconds(lambda: [legacy_format_seconds_to_manhour_sheet11(i) for i in objSecondsList]),
+        measure_seconds(lambda: format_seconds_values_to_time_text(objSecondsList)),
+    )
+    print_result_line(
+        "format H:MM:SS (scalar lru)",
+        measure_seconds(lambda: [legacy_format_seconds_to_manhour_sheet11(i) for i in objSecondsList]),
+        measure_seconds(lambda: [format_seconds_to_time_text_cached(i) for i in objSecondsList]),
+    )
+
+    # ----------------------------------------------------------------
+    # 数値 → 文字列 (format_number)
+    # ----------------------------------------------------------------
+    objRandom: np.random.Generator = np.random.default_rng(0)
+    objAmounts: np.ndarray = np.round(objRandom.normal(0.0, 1000000.0, len(objTimeTexts)))
+    objAmounts[::10] = objAmounts[::10] / 7.0
+    objAmountList: List[float] = objAmounts.tolist()
+    if format_number_values(objAmounts).tolist() != [legacy_format_number(f) for f in objAmountList]:
+        print("Error: number format result mismatch")
+        return 1
+    print_result_line(
+        "format_number (vectorized)",
+        measure_seconds(lambda: [legacy_format_number(f) for f in objAmountList]),
+        measure_seconds(lambda: format_number_values(objAmounts)),
+    )
+    print_result_line(
+        "format_number (scalar)",
+        measure_seconds(lambda: [legacy_format_number(f) for f in objAmountList]),
+        measure_seconds(lambda: [format_number_text(f) for f in objAmountList]),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,15 @@
 import os
 import sys
-from typing import Any, List
+from typing import Any, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 
+KEY_COLUMNS_OPTION: str = "--key-columns"
+SUMMARY_TOP_COLUMN_COUNT: int = 10
+
+
 def normalize_value(objValue: Any) -> Any:
     pszText: str
     if objValue is None:
@@ -39,39 +44,282 @@ def write_error_file(pszFileName: str, arrMessages: List[str]) -> None:
         objFile.write(pszJoinedMessage)
 
 
-def compare_rows(arrLeftRows: List[List[Any]], arrRightRows: List[List[Any]]) -> List[str]:
+# ///////////////////////////////////////////////////////////////
+#
+# 正規化した値の配列
+#
+#   normalize_value を「異なる値ごとに 1 回だけ」呼び、各セルには
+#   数値 (arrNumbers, bIsNumber) と正規化後の文字列のコード (arrTextCodes) を持たせる。
+#   両方が数値ならば数値で、どちらかが文字列ならば str() の結果で比較する
+#   (compare_rows で行っていた比較と同じ規則)。
+#
+# ///////////////////////////////////////////////////////////////
+class NormalizedArrays:
+    def __init__(
+        self,
+        arrNumbers: np.ndarray,
+        arrIsNumber: np.ndarray,
+        arrTextCodes: np.ndarray,
+        arrNormalizedTexts: np.ndarray,
+    ) -> None:
+        self.arrNumbers: np.ndarray = arrNumbers
+        self.arrIsNumber: np.ndarray = arrIsNumber
+        self.arrTextCodes: np.ndarray = arrTextCodes
+        self.arrNormalizedTexts: np.ndarray = arrNormalizedTexts
+
+    def slice_rows(self, iStartRow: int) -> "NormalizedArrays":
+        return NormalizedArrays(
+            self.arrNumbers[iStartRow:],
+            self.arrIsNumber[iStartRow:],
+            self.arrTextCodes[iStartRow:],
+            self.arrNormalizedTexts[iStartRow:],
+        )
+
+
+def normalize_value_arrays(
+    arrLeftValues: np.ndarray,
+    arrRightValues: np.ndarray,
+) -> Tuple[NormalizedArrays, NormalizedArrays]:
+    arrAllValues: np.ndarray = np.concatenate([arrLeftValues.ravel(), arrRightValues.ravel()])
+    arrCodes: np.ndarray
+    arrUniqueValues: np.ndarray
+    arrCodes, arrUniqueValues = pd.factorize(arrAllValues, use_na_sentinel=False)
+
+    iUniqueCount: int = len(arrUniqueValues)
+    arrUniqueNumbers: np.ndarray = np.zeros(iUniqueCount, dtype=np.float64)
+    arrUniqueIsNumber: np.ndarray = np.zeros(iUniqueCount, dtype=bool)
+    arrUniqueTexts: List[str] = []
+    for iUniqueIndex, objValue in enumerate(arrUniqueValues):
+        objNormalized: Any = normalize_value(objValue)
+        if isinstance(objNormalized, str):
+            arrUniqueTexts.append(objNormalized)
+        else:
+            arrUniqueNumbers[iUniqueIndex] = objNormalized
+            arrUniqueIsNumber[iUniqueIndex] = True
+            arrUniqueTexts.append(str(objNormalized))
+    arrUniqueTextCodes: np.ndarray
+    arrUniqueTextCodes, _ = pd.factorize(np.array(arrUniqueTexts, dtype=object))
+    arrUniqueNormalizedTexts: np.ndarray = np.array(arrUniqueTexts, dtype=object)
+
+    iLeftSize: int = arrLeftValues.size
+    objResults: List[NormalizedArrays] = []
+    for arrPartCodes, objShape in (
+        (arrCodes[:iLeftSize], arrLeftValues.shape),
+        (arrCodes[iLeftSize:], arrRightValues.shape),
+    ):
+        objResults.append(
+            NormalizedArrays(
+                arrUniqueNumbers[arrPartCodes].reshape(objShape),
+                arrUniqueIsNumber[arrPartCodes].reshape(objShape),
+                arrUniqueTextCodes[arrPartCodes].reshape(objShape),
+                arrUniqueNormalizedTexts[arrPartCodes].reshape(objShape),
+            )
+        )
+    return objResults[0], objResults[1]
+
+
+def build_mismatch_mask(
+    objLeft: NormalizedArrays,
+    objRight: NormalizedArrays,
+    arrLeftRowIndexes: np.ndarray,
+    arrRightRowIndexes: np.ndarray,
+) -> np.ndarray:
+    # 対応付けた行どうしを比較し、一致しないセルを True とする
+    arrBothNumber: np.ndarray = (
+        objLeft.arrIsNumber[arrLeftRowIndexes] & objRight.arrIsNumber[arrRightRowIndexes]
+    )
+    arrNumberMatch: np.ndarray = (
+        objLeft.arrNumbers[arrLeftRowIndexes] == objRight.arrNumbers[arrRightRowIndexes]
+    )
+    arrTextMatch: np.ndarray = (
+        objLeft.arrTextCodes[arrLeftRowIndexes] == objRight.arrTextCodes[arrRightRowIndexes]
+    )
+    return ~np.where(arrBothNumber, arrNumberMatch, arrTextMatch)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 行の対応付け
+#
+#   キー列を指定しない場合は、従来どおり位置 (行番号) で対応付ける。
+#   キー列を指定した場合は、キー列の正規化後の値から作ったキーで
+#   ハッシュ結合する。同じキーが複数ある場合は、出現順に対応付ける。
+#   対応する行が無い行は、片方にだけある行として報告する。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_key_columns(pszKeyColumns: str, arrHeader: List[str]) -> List[int]:
+    # 列名 または 1 始まりの列番号をカンマ区切りで指定する
+    arrKeyColumnIndexes: List[int] = []
+    for pszToken in pszKeyColumns.split(","):
+        pszKey: str = pszToken.strip()
+        if pszKey == "":
+            continue
+        if pszKey in arrHeader:
+            arrKeyColumnIndexes.append(arrHeader.index(pszKey))
+            continue
+        if pszKey.isdigit() and 1 <= int(pszKey) <= len(arrHeader):
+            arrKeyColumnIndexes.append(int(pszKey) - 1)
+            continue
+        raise ValueError(f"key column not found: {pszKey}")
+    if len(arrKeyColumnIndexes) == 0:
+        raise ValueError("key columns are empty.")
+    return arrKeyColumnIndexes
+
+
+def build_row_keys(objNormalized: NormalizedArrays, arrKeyColumnIndexes: List[int]) -> pd.DataFrame:
+    objKeyFrame: pd.DataFrame = pd.DataFrame(
+        {
+            f"k{iPosition}": objNormalized.arrTextCodes[:, iColumnIndex]
+            for iPosition, iColumnIndex in enumerate(arrKeyColumnIndexes)
+        }
+    )
+    objKeyFrame["row"] = np.arange(len(objKeyFrame))
+    # 同じキーの何番目の行か
+    objKeyFrame["occurrence"] = objKeyFrame.groupby(
+        [f"k{iPosition}" for iPosition in range(len(arrKeyColumnIndexes))],
+        sort=False,
+    ).cumcount()
+    return objKeyFrame
+
+
+def align_rows_by_key(
+    objLeft: NormalizedArrays,
+    objRight: NormalizedArrays,
+    arrKeyColumnIndexes: List[int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    arrJoinColumns: List[str] = [f"k{iPosition}" for iPosition in range(len(arrKeyColumnIndexes))]
+    arrJoinColumns.append("occurrence")
+    objMerged: pd.DataFrame = pd.merge(
+        build_row_keys(objLeft, arrKeyColumnIndexes),
+        build_row_keys(objRight, arrKeyColumnIndexes),
+        on=arrJoinColumns,
+        how="outer",
+        suffixes=("_left", "_right"),
+        indicator=True,
+    )
+    objBoth: pd.DataFrame = objMerged[objMerged["_merge"] == "both"].sort_values("row_left")
+    arrLeftRowIndexes: np.ndarray = objBoth["row_left"].to_numpy(dtype=np.int64)
+    arrRightRowIndexes: np.ndarray = objBoth["row_right"].to_numpy(dtype=np.int64)
+    arrLeftOnlyRows: np.ndarray = np.sort(
+        objMerged.loc[objMerged["_merge"] == "left_only", "row_left"].to_numpy(dtype=np.int64)
+    )
+    arrRightOnlyRows: np.ndarray = np.sort(
+        objMerged.loc[objMerged["_merge"] == "right_only", "row_right"].to_numpy(dtype=np.int64)
+    )
+    return arrLeftRowIndexes, arrRightRowIndexes, arrLeftOnlyRows, arrRightOnlyRows
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 差分の行と要約
+#
+# ///////////////////////////////////////////////////////////////
+def build_diff_lines(
+    arrLeftValues: np.ndarray,
+    arrRightValues: np.ndarray,
+    objLeft: NormalizedArrays,
+    objRight: NormalizedArrays,
+    arrLeftRowIndexes: np.ndarray,
+    arrRightRowIndexes: np.ndarray,
+    arrMismatchMask: np.ndarray,
+    bShowRightRow: bool,
+) -> List[str]:
     arrDiffLines: List[str] = []
-    for iRowIndex, arrLeftRow in enumerate(arrLeftRows):
-        arrRightRow: List[Any] = arrRightRows[iRowIndex]
-        for iColIndex, objLeftValue in enumerate(arrLeftRow):
-            objRightValue: Any = arrRightRow[iColIndex]
-            objNormLeft: Any = normalize_value(objLeftValue)
-            objNormRight: Any = normalize_value(objRightValue)
-            bIsStringComparison: bool = isinstance(objNormLeft, str) or isinstance(objNormRight, str)
-            bIsMatch: bool
-            if bIsStringComparison:
-                bIsMatch = str(objNormLeft) == str(objNormRight)
-            else:
-                bIsMatch = objNormLeft == objNormRight
-            if not bIsMatch:
-                iReportRow: int = iRowIndex + 1
-                iReportCol: int = iColIndex + 1
-                pszLeftDisplay: str = to_output_value(objLeftValue)
-                pszRightDisplay: str = to_output_value(objRightValue)
-                pszNormLeftDisplay: str = str(objNormLeft)
-                pszNormRightDisplay: str = str(objNormRight)
-                pszLine: str = (
-                    f"R{iReportRow} C{iReportCol}\tLEFT={pszLeftDisplay}\tRIGHT={pszRightDisplay}"
-                    f"\tNORM_LEFT={pszNormLeftDisplay}\tNORM_RIGHT={pszNormRightDisplay}"
-                )
-                arrDiffLines.append(pszLine)
+    arrPairIndexes: np.ndarray
+    arrColumnIndexes: np.ndarray
+    arrPairIndexes, arrColumnIndexes = np.nonzero(arrMismatchMask)
+    for iPairIndex, iColIndex in zip(arrPairIndexes.tolist(), arrColumnIndexes.tolist()):
+        iLeftRow: int = int(arrLeftRowIndexes[iPairIndex])
+        iRightRow: int = int(arrRightRowIndexes[iPairIndex])
+        # 行番号はファイルの行番号 (見出し行が R1)
+        pszRowLabel: str = f"R{iLeftRow + 1}"
+        if bShowRightRow:
+            pszRowLabel = f"R{iLeftRow + 1}/{iRightRow + 1}"
+        pszLine: str = (
+            f"{pszRowLabel} C{iColIndex + 1}"
+            f"\tLEFT={to_output_value(arrLeftValues[iLeftRow, iColIndex])}"
+            f"\tRIGHT={to_output_value(arrRightValues[iRightRow, iColIndex])}"
+            f"\tNORM_LEFT={objLeft.arrNormalizedTexts[iLeftRow, iColIndex]}"
+            f"\tNORM_RIGHT={objRight.arrNormalizedTexts[iRightRow, iColIndex]}"
+        )
+        arrDiffLines.append(pszLine)
     return arrDiffLines
 
 
+def build_only_row_lines(arrValues: np.ndarray, arrRowIndexes: np.ndarray, pszSide: str) -> List[str]:
+    arrLines: List[str] = []
+    for iRowIndex in arrRowIndexes.tolist():
+        pszCells: str = "\t".join(to_output_value(objValue) for objValue in arrValues[iRowIndex])
+        arrLines.append(f"R{iRowIndex + 1} ONLY_{pszSide}\t{pszCells}")
+    return arrLines
+
+
+def build_summary_lines(
+    arrHeader: List[str],
+    arrMismatchMask: np.ndarray,
+    iComparedRowCount: int,
+    iLeftOnlyCount: int,
+    iRightOnlyCount: int,
+) -> List[str]:
+    iDiffCellCount: int = int(arrMismatchMask.sum())
+    iDiffRowCount: int = int(arrMismatchMask.any(axis=1).sum()) if arrMismatchMask.size > 0 else 0
+    arrSummaryLines: List[str] = [
+        f"Summary: compared rows = {iComparedRowCount}, differing rows = {iDiffRowCount}, "
+        f"differing cells = {iDiffCellCount}, left only rows = {iLeftOnlyCount}, "
+        f"right only rows = {iRightOnlyCount}"
+    ]
+    if iDiffCellCount == 0:
+        return arrSummaryLines
+    arrColumnCounts: np.ndarray = arrMismatchMask.sum(axis=0)
+    arrTopColumns: np.ndarray = np.argsort(-arrColumnCounts, kind="stable")[:SUMMARY_TOP_COLUMN_COUNT]
+    for iColIndex in arrTopColumns.tolist():
+        if arrColumnCounts[iColIndex] == 0:
+            break
+        arrSummaryLines.append(
+            f"Summary: C{iColIndex + 1} {arrHeader[iColIndex]} = {int(arrColumnCounts[iColIndex])}"
+        )
+    return arrSummaryLines
+
+
+def load_tsv_as_string_array(pszPath: str) -> Tuple[List[str], np.ndarray]:
+    # 見出し行 (pandas が付けた列名) を 1 行目とした 2 次元配列を返す
+    objDataFrame: pd.DataFrame = pd.read_csv(pszPath, sep="\t", dtype=str, encoding="utf-8")
+    arrHeader: List[str] = [str(objColumn) for objColumn in objDataFrame.columns]
+    arrValues: np.ndarray = np.empty((len(objDataFrame) + 1, len(arrHeader)), dtype=object)
+    arrValues[0, :] = arrHeader
+    arrValues[1:, :] = objDataFrame.to_numpy(dtype=object)
+    return arrHeader, arrValues
+
+
+def parse_arguments(arrArgv: List[str]) -> Tuple[List[str], Optional[str]]:
+    arrPositional: List[str] = []
+    pszKeyColumns: Optional[str] = None
+    iIndex: int = 1
+    while iIndex < len(arrArgv):
+        pszArg: str = arrArgv[iIndex]
+        if pszArg == KEY_COLUMNS_OPTION and iIndex + 1 < len(arrArgv):
+            pszKeyColumns = arrArgv[iIndex + 1]
+            iIndex += 2
+            continue
+        if pszArg.startswith(KEY_COLUMNS_OPTION + "="):
+            pszKeyColumns = pszArg[len(KEY_COLUMNS_OPTION) + 1:]
+            iIndex += 1
+            continue
+        arrPositional.append(pszArg)
+        iIndex += 1
+    return arrPositional, pszKeyColumns
+
+
 def main() -> int:
-    if len(sys.argv) < 3:
+    arrPositional: List[str]
+    pszKeyColumns: Optional[str]
+    arrPositional, pszKeyColumns = parse_arguments(sys.argv)
+    if len(arrPositional) < 2:
         pszError1: str = "Error: input TSV file paths are not specified (insufficient arguments)."
-        pszError2: str = "Usage: python compare_tsv_with_blank_zero.py <left_tsv_path> <right_tsv_path>"
+        pszError2: str = (
+            "Usage: python compare_tsv_with_blank_zero.py <left_tsv_path> <right_tsv_path>"
+            " [--key-columns <name_or_number>[,...]]"
+        )
         pszError3: str = "Example: python compare_tsv_with_blank_zero.py C:\\Data\\A.tsv C:\\Data\\B.tsv"
         arrErrors: List[str] = [pszError1, pszError2, pszError3]
         for pszLine in arrErrors:
@@ -79,8 +327,8 @@ def main() -> int:
         write_error_file("compare_tsv_with_blank_zero_error_argument.tsv", arrErrors)
         return 2
 
-    pszLeftPath: str = sys.argv[1]
-    pszRightPath: str = sys.argv[2]
+    pszLeftPath: str = arrPositional[0]
+    pszRightPath: str = arrPositional[1]
 
     arrMissingMessages: List[str] = []
     if not os.path.exists(pszLeftPath):
@@ -95,31 +343,87 @@ def main() -> int:
         return 2
 
     try:
-        objLeftDf: pd.DataFrame = pd.read_csv(
-            pszLeftPath, sep="\t", dtype=str, encoding="utf-8", engine="python"
-        )
-        objRightDf: pd.DataFrame = pd.read_csv(
-            pszRightPath, sep="\t", dtype=str, encoding="utf-8", engine="python"
-        )
+        arrLeftHeader: List[str]
+        arrLeftValues: np.ndarray
+        arrLeftHeader, arrLeftValues = load_tsv_as_string_array(pszLeftPath)
+        arrRightHeader: List[str]
+        arrRightValues: np.ndarray
+        arrRightHeader, arrRightValues = load_tsv_as_string_array(pszRightPath)
+        arrKeyColumnIndexes: Optional[List[int]] = None
+        if pszKeyColumns is not None:
+            arrKeyColumnIndexes = parse_key_columns(pszKeyColumns, arrLeftHeader)
     except Exception as objException:  # noqa: BLE001
         pszMessage: str = f"Error: unexpected exception. Detail = {objException}"
         print(pszMessage)
         write_error_file("compare_tsv_with_blank_zero_error.tsv", [pszMessage])
         return 2
 
-    if objLeftDf.shape != objRightDf.shape:
+    # 位置で対応付ける場合は行数も、キーで対応付ける場合は列数だけをそろえる
+    bShapeMismatch: bool = arrLeftValues.shape[1] != arrRightValues.shape[1]
+    if arrKeyColumnIndexes is None:
+        bShapeMismatch = bShapeMismatch or arrLeftValues.shape[0] != arrRightValues.shape[0]
+    if bShapeMismatch:
         pszShapeMessage: str = (
-            f"Error: TSV shape mismatch. Left = {objLeftDf.shape[0]}x{objLeftDf.shape[1]}, "
-            f"Right = {objRightDf.shape[0]}x{objRightDf.shape[1]}"
+            f"Error: TSV shape mismatch. Left = {arrLeftValues.shape[0] - 1}x{arrLeftValues.shape[1]}, "
+            f"Right = {arrRightValues.shape[0] - 1}x{arrRightValues.shape[1]}"
         )
         print(pszShapeMessage)
         write_error_file("compare_tsv_with_blank_zero_error.tsv", [pszShapeMessage])
         return 2
 
-    arrLeftRows: List[List[Any]] = [list(objLeftDf.columns)] + objLeftDf.astype(object).values.tolist()
-    arrRightRows: List[List[Any]] = [list(objRightDf.columns)] + objRightDf.astype(object).values.tolist()
+    objLeft: NormalizedArrays
+    objRight: NormalizedArrays
+    objLeft, objRight = normalize_value_arrays(arrLeftValues, arrRightValues)
 
-    arrDifferences: List[str] = compare_rows(arrLeftRows, arrRightRows)
+    arrLeftRowIndexes: np.ndarray
+    arrRightRowIndexes: np.ndarray
+    arrLeftOnlyRows: np.ndarray = np.zeros(0, dtype=np.int64)
+    arrRightOnlyRows: np.ndarray = np.zeros(0, dtype=np.int64)
+    if arrKeyColumnIndexes is None:
+        arrLeftRowIndexes = np.arange(arrLeftValues.shape[0])
+        arrRightRowIndexes = arrLeftRowIndexes
+    else:
+        # 見出し行は位置で、データ行はキーで対応付ける
+        arrDataLeftRows: np.ndarray
+        arrDataRightRows: np.ndarray
+        arrDataLeftRows, arrDataRightRows, arrLeftOnlyRows, arrRightOnlyRows = align_rows_by_key(
+            objLeft.slice_rows(1),
+            objRight.slice_rows(1),
+            arrKeyColumnIndexes,
+        )
+        arrLeftRowIndexes = np.concatenate([[0], arrDataLeftRows + 1])
+        arrRightRowIndexes = np.concatenate([[0], arrDataRightRows + 1])
+        arrLeftOnlyRows = arrLeftOnlyRows + 1
+        arrRightOnlyRows = arrRightOnlyRows + 1
+
+    arrMismatchMask: np.ndarray = build_mismatch_mask(
+        objLeft,
+        objRight,
+        arrLeftRowIndexes,
+        arrRightRowIndexes,
+    )
+    arrDifferences: List[str] = build_diff_lines(
+        arrLeftValues,
+        arrRightValues,
+        objLeft,
+        objRight,
+        arrLeftRowIndexes,
+        arrRightRowIndexes,
+        arrMismatchMask,
+        arrKeyColumnIndexes is not None,
+    )
+    arrDifferences.extend(build_only_row_lines(arrLeftValues, arrLeftOnlyRows, "LEFT"))
+    arrDifferences.extend(build_only_row_lines(arrRightValues, arrRightOnlyRows, "RIGHT"))
+
+    arrSummaryLines: List[str] = build_summary_lines(
+        arrLeftHeader,
+        arrMismatchMask,
+        len(arrLeftRowIndexes),
+        len(arrLeftOnlyRows),
+        len(arrRightOnlyRows),
+    )
+    for pszLine in arrSummaryLines:
+        print(pszLine)
 
     pszReportFile: str = "compare_tsv_with_blank_zero_report.txt"
     if len(arrDifferences) == 0:
@@ -132,6 +436,8 @@ def main() -> int:
         objReport.write(f"NG: differences found. Count = {iDiffCount}\n")
         for pszLine in arrDifferences:
             objReport.write(f"{pszLine}\n")
+        for pszLine in arrSummaryLines:
+            objReport.write(f"{pszLine}\n")
     return 1
 
 
@@ -26,15 +26,43 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
+import io
 import os
+import pickle
 import re
-import shutil
 import tkinter as tk
 from tkinter import messagebox
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
+from atomic_tsv_writer import BackgroundTsvWriter, open_atomic_text_file, write_text_atomic
+from manhour_artifact_store import ManhourArtifactStore, build_artifact_store_path
+from output_manifest import OutputManifest
+from parsed_input_cache import ParsedInputCache, load_or_parse_with_optional_cache
+from text_encoding_loader import (
+    DecodedText,
+    open_text_buffer,
+    read_csv_rows_with_encoding_detection,
+    read_text_with_encoding_detection,
+)
+from manhour_time_kernel import (
+    TIME_PARSE_MODE_LENIENT,
+    TIME_PARSE_MODE_STRICT,
+    format_seconds_to_time_text_cached,
+    format_seconds_values_to_time_text,
+    parse_time_text_to_seconds_cached,
+    parse_time_values_to_seconds,
+)
+from project_name_normalizer import (
+    normalize_project_name_cached,
+    normalize_values_batch,
+    preprocess_manhour_line_cached,
+)
+
 
 def write_debug_error(pszMessage: str, objBaseDirectoryPath: Path | None = None) -> None:
     pszFileName: str = "make_manhour_to_sheet8_01_0001_error.txt"
@@ -57,88 +85,13 @@ def get_target_year_month_from_filename(pszInputFilePath: str) -> Tuple[int, int
 
 
 def normalize_project_name_sheet10(pszSource: str) -> str:
-    if pszSource.startswith("【廃番】"):
-        try:
-            code: str | None = None
-            code_index: int = -1
-            for prefix in ["J", "A", "C", "H", "M", "P"]:
-                search_from: int = 0
-                code_length: int = 4
-                if prefix == "P":
-                    code_length = 6
-                while True:
-                    found_index: int = pszSource.find(prefix, search_from)
-                    if found_index == -1:
-                        break
-                    if found_index + code_length <= len(pszSource):
-                        code = pszSource[found_index:found_index + code_length]
-                        code_index = found_index
-                        break
-                    search_from = found_index + 1
-                if code is not None:
-                    break
-            if code is None or code_index == -1:
-                return pszSource
-            head: str = pszSource[:code_index]
-            tail: str = pszSource[code_index + len(code):]
-            return code + "_" + head + tail
-        except Exception:
-            return pszSource
-
-    if pszSource.startswith("【"):
-        iBracketEndIndex: int = pszSource.find("】")
-        if iBracketEndIndex != -1:
-            pszAfterBracket: str = pszSource[iBracketEndIndex + 1:]
-            objMatch = re.search(r"(P\d{5}|[A-OQ-Z]\d{3})", pszAfterBracket)
-            if objMatch is not None:
-                pszCode: str = objMatch.group(1)
-                pszBeforeCode: str = pszAfterBracket[:objMatch.start()]
-                pszAfterCode: str = pszAfterBracket[objMatch.end():]
-                if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
-                    pszAfterCode = pszAfterCode[1:]
-                pszRest: str = pszSource[: iBracketEndIndex + 1] + pszBeforeCode + pszAfterCode
-                return pszCode + "_" + pszRest
-
-    if len(pszSource) >= 1 and pszSource[0] in ["J", "A", "C", "H", "M"]:
-        if len(pszSource) >= 5:
-            next_char: str = pszSource[4]
-            if next_char == "【":
-                return pszSource[:4] + "_" + pszSource[4:]
-            if next_char == " " or next_char == "　":
-                return pszSource[:4] + "_" + pszSource[5:]
-        return pszSource
-
-    if len(pszSource) >= 1 and pszSource[0] == "P":
-        if len(pszSource) >= 7:
-            next_char_p: str = pszSource[6]
-            if next_char_p == "【":
-                return pszSource[:6] + "_" + pszSource[6:]
-            if next_char_p == " " or next_char_p == "　":
-                return pszSource[:6] + "_" + pszSource[7:]
-        return pszSource
-
-    return pszSource
+    # 正規化規則は共通モジュール (project_name_normalizer) のメモ化版を使う
+    return normalize_project_name_cached(pszSource)
 
 
 def preprocess_line_content_sheet10(pszLineContent: str) -> str:
-    if pszLineContent.startswith('"'):
-        iSecondQuoteIndex: int = pszLineContent.find('"', 1)
-        if iSecondQuoteIndex != -1:
-            if iSecondQuoteIndex + 1 < len(pszLineContent) and pszLineContent[iSecondQuoteIndex + 1] == "\t":
-                pszQuotedContent: str = pszLineContent[1:iSecondQuoteIndex].replace("\t", "_")
-                pszLineContent = pszQuotedContent + pszLineContent[iSecondQuoteIndex + 1:]
-    pszLineContent = re.sub(
-        r'^"([^"]*)\t([^"]*)"([^\r\n]*)',
-        r"\1_\2\3",
-        pszLineContent,
-    )
-    pszLineContent = re.sub(r"(P\d\d\d\d\d)(?![ _\t　【])", r"\1_", pszLineContent)
-    pszLineContent = re.sub(r"([A-OQ-Z]\d\d\d)(?![ _\t　【])", r"\1_", pszLineContent)
-    pszLineContent = re.sub(r"^(J\d\d\d) +", r"\1_", pszLineContent)
-    pszLineContent = re.sub(r"([A-OQ-Z]\d\d\d)[ 　]+", r"\1_", pszLineContent)
-    pszLineContent = re.sub(r"(P\d\d\d\d\d)[ 　]+", r"\1_", pszLineContent)
-    pszLineContent = re.sub(r"\t[0-9]+\t", "\t", pszLineContent)
-    return pszLineContent
+    # 区切り補正の 5 つの置換は共通モジュールで 1 回の走査にまとめてある
+    return preprocess_manhour_line_cached(pszLineContent)
 
 
 def normalize_org_table_field_step0002(pszValue: str) -> str:
@@ -197,108 +150,274 @@ def add_project_code_prefix_step0003(
 # ●●add_project_code_prefix_step0003の処理ここまで
 
 
-def convert_org_table_tsv(objBaseDirectoryPath: Path) -> None:
-    objOrgTableCsvPath: Path = Path(__file__).resolve().parent / "管轄PJ表.csv"
-    objOrgTableStep0001Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0001.tsv")
-    objOrgTableStep0002Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0002.tsv")
-    objOrgTableStep0003Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0003.tsv")
-    objOrgTableTsvPath: Path = objOrgTableCsvPath.with_suffix(".tsv")
-    objOrgTableStep0004Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0004.tsv")
-    if objOrgTableCsvPath.exists():
-        with open(objOrgTableCsvPath, "r", encoding="utf-8") as objOrgTableCsvFile:
-            objOrgTableReader = csv.reader(objOrgTableCsvFile)
-            with open(objOrgTableStep0001Path, "w", encoding="utf-8") as objStep0001File:
-                objStep0001Writer = csv.writer(
-                    objStep0001File,
-                    delimiter="\t",
-                    lineterminator="\n",
-                )
-                for objRow in objOrgTableReader:
-                    objStep0001Writer.writerow(objRow)
-        with open(objOrgTableStep0001Path, "r", encoding="utf-8") as objStep0001File:
-            objStep0001Reader = csv.reader(objStep0001File, delimiter="\t")
-            with open(objOrgTableStep0002Path, "w", encoding="utf-8") as objStep0002File:
-                objStep0002Writer = csv.writer(
-                    objStep0002File,
-                    delimiter="\t",
-                    lineterminator="\n",
-                )
-                # ●●の処理ここから
-                # 管轄PJ表_step0001.tsv を読み込み、各行の 2 列目 / 3 列目に含まれる
-                # 半角・全角スペースをアンダースコアに置換して正規化し、
-                # 管轄PJ表_step0002.tsv に書き出す。
-                # 正規化仕様 (normalize_org_table_field_step0002):
-                # 1) スペース・全角スペースを "_" に置換する。
-                # 2) PJ コードが先頭にある場合、後続が「【」で始まっていれば
-                #    「コード_」の形式に整形する。
-                # 3) その他の英大文字 + 数字 3 桁のコードについても同様に
-                #    「コード_」の形式に整形する。
-                # ●●の処理ここまで
-                for objRow in objStep0001Reader:
-                    if len(objRow) >= 2:
-                        objRow[1] = normalize_org_table_field_step0002(objRow[1])
-                    if len(objRow) >= 3:
-                        objRow[2] = normalize_org_table_field_step0002(objRow[2])
-                    objStep0002Writer.writerow(objRow)
-        with open(objOrgTableStep0002Path, "r", encoding="utf-8") as objStep0002File:
-            # ●●の処理ここから
-            # 管轄PJ表_step0002.tsv を読み込み、1 行目から順に 2 列目(PJ 名称) へ
-            # add_project_code_prefix_step0003 の「コード付加」判定を行い、結果を
-            # 管轄PJ表_step0003.tsv に書き出す（中間ファイル）。
-            # 判定条件 (add_project_code_prefix_step0003):
-            # 1) PJ コードが空なら何もしない。
-            # 2) PJ 名称が空なら、PJ コードを 2 列目に書き込む。
-            # 3) PJ 名称が「英大文字 + 数字複数 + '_'」で始まっていれば付加済みとみなす。
-            # 4) それ以外は、PJ コードの先頭(_ より前)を「コード_」として付加する
-            #    （既に同じ接頭辞で始まっていれば付け足さない）。
-            # 「3 列目が存在する場合のみ」という条件は廃止し、各行で 2 列目に対して
-            # 無条件でコード付加判定を行う。
-            objStep0002Reader = csv.reader(objStep0002File, delimiter="\t")
-            with open(objOrgTableStep0003Path, "w", encoding="utf-8") as objOrgTableStep0003File:
-                objOrgTableWriter = csv.writer(
-                    objOrgTableStep0003File,
-                    delimiter="\t",
-                    lineterminator="\n",
+# ///////////////////////////////////////////////////////////////
+#
+# 管轄PJ表 (OrgTable)
+#
+#   管轄PJ表.csv を 1 回だけ解析し、各段階の表 (step0001〜step0005) と
+#   接頭辞 → 計上カンパニー / 計上グループ の辞書をメモリ上に保持する。
+#
+#   ・解析結果は 管轄PJ表_cache.pickle に保存し、次回以降は
+#     CSV の更新日時・サイズが同じならそのまま、
+#     異なる場合も内容のハッシュ (SHA-256) が同じなら再解析せずに使う。
+#   ・同一プロセス内では、同じ CSV に対して 1 つの OrgTable を使い回す。
+#   ・管轄PJ表.tsv 以下の中間ファイルは、メモリ上の表から直接書き出す
+#     (書き出したファイルを再度読み込むことはしない)。
+#
+# ///////////////////////////////////////////////////////////////
+ORG_TABLE_CACHE_FILE_NAME: str = "管轄PJ表_cache.pickle"
+# 解析処理を変更したときは値を上げ、古いキャッシュを使わないようにする
+ORG_TABLE_PARSER_VERSION: int = 1
+_OBJ_ORG_TABLE_PREFIX_PATTERN: re.Pattern[str] = re.compile(r"^(P\d{5}_|[A-OQ-Z]\d{3}_)")
+
+
+def remove_trailing_empty_cells_org_table(objRow: List[str]) -> List[str]:
+    while objRow and objRow[-1] == "":
+        objRow.pop()
+    return objRow
+
+
+def build_org_table_step_rows(
+    objCsvRows: List[List[str]],
+) -> Dict[str, List[List[str]]]:
+    # step0001: CSV をそのままタブ区切りにした表
+    objRowsStep0001: List[List[str]] = [list(objRow) for objRow in objCsvRows]
+
+    # step0002: 2 列目 / 3 列目のスペースを "_" にして正規化
+    objRowsStep0002: List[List[str]] = []
+    for objRow in objRowsStep0001:
+        objRowStep0002: List[str] = list(objRow)
+        if len(objRowStep0002) >= 2:
+            objRowStep0002[1] = normalize_org_table_field_step0002(objRowStep0002[1])
+        if len(objRowStep0002) >= 3:
+            objRowStep0002[2] = normalize_org_table_field_step0002(objRowStep0002[2])
+        objRowsStep0002.append(objRowStep0002)
+
+    # step0003: 2 列目 (PJ 名称) へコード接頭辞を付加 (管轄PJ表.tsv と同一内容)
+    objRowsStep0003: List[List[str]] = []
+    for objRow in objRowsStep0002:
+        objRowStep0003: List[str] = list(objRow)
+        if len(objRowStep0003) >= 2:
+            pszProjectCode: str = objRowStep0003[2] if len(objRowStep0003) >= 3 else ""
+            objRowStep0003[1] = add_project_code_prefix_step0003(
+                objRowStep0003[1],
+                pszProjectCode,
+            )
+        objRowsStep0003.append(objRowStep0003)
+
+    # step0004: CSV から =match' を除去し、PJ コード / PJ 名称を正規化
+    objRowsStep0004: List[List[str]] = []
+    for objRow in objCsvRows:
+        objRowStep0004: List[str] = remove_trailing_empty_cells_org_table(
+            [objCell.replace("=match'", "") for objCell in objRow],
+        )
+        if objRowStep0004 and objRowStep0004[0] != "No":
+            if len(objRowStep0004) >= 3:
+                objRowStep0004[2] = normalize_org_table_project_code(objRowStep0004[2])
+            if len(objRowStep0004) >= 2:
+                pszProjectCodePrefix: str = ""
+                if len(objRowStep0004) >= 3 and objRowStep0004[2]:
+                    pszProjectCodePrefix = objRowStep0004[2].split("_", 1)[0]
+                pszProjectNameRaw: str = objRowStep0004[1]
+                pszProjectNameTrimmed: str = pszProjectNameRaw.strip()
+                if pszProjectCodePrefix and pszProjectNameTrimmed != pszProjectCodePrefix:
+                    if not pszProjectNameTrimmed.startswith(f"{pszProjectCodePrefix}_"):
+                        objRowStep0004[1] = f"{pszProjectCodePrefix}_{pszProjectNameRaw}"
+                objRowStep0004[1] = normalize_org_table_project_code(objRowStep0004[1])
+        objRowsStep0004.append(remove_trailing_empty_cells_org_table(objRowStep0004))
+
+    # step0005: step0003 から 2 列目 (PJ 名称) を除き、=match' を除去
+    objRowsStep0005: List[List[str]] = []
+    for objRow in objRowsStep0003:
+        objRowStep0005: List[str] = list(objRow)
+        if len(objRowStep0005) > 1:
+            objRowStep0005 = [objRowStep0005[0]] + objRowStep0005[2:]
+        objRowsStep0005.append(
+            remove_trailing_empty_cells_org_table(
+                [objCell.replace("=match'", "") for objCell in objRowStep0005],
+            )
+        )
+
+    return {
+        "step0001": objRowsStep0001,
+        "step0002": objRowsStep0002,
+        "step0003": objRowsStep0003,
+        "step0004": objRowsStep0004,
+        "step0005": objRowsStep0005,
+    }
+
+
+class OrgTable:
+    # -----------------------------------------------------------
+    # objStepRows には "step0001"〜"step0005" をキーとした表を渡す
+    # -----------------------------------------------------------
+    def __init__(
+        self,
+        objCsvPath: Path,
+        objStepRows: Dict[str, List[List[str]]],
+    ) -> None:
+        self.objCsvPath: Path = objCsvPath
+        self.objStepRows: Dict[str, List[List[str]]] = objStepRows
+        self.objPrefixToCompany: Dict[str, str] = {}
+        self.objPrefixToGroup: Dict[str, str] = {}
+        self.objBillingMapForStep11: Dict[str, str] = {}
+        self.build_indexes()
+
+    # -----------------------------------------------------------
+    # 管轄PJ表.tsv (= step0003) の 3〜5 列目から
+    # 接頭辞 → 計上カンパニー / 計上グループ を 1 回の走査で作る
+    # -----------------------------------------------------------
+    def build_indexes(self) -> None:
+        objBillingMapExact: Dict[str, str] = {}
+        objBillingMapPrefix: Dict[str, str] = {}
+        for objRow in self.objStepRows["step0003"]:
+            if len(objRow) < 4:
+                continue
+            pszProjectCodeOrg: str = objRow[2].strip()
+            pszBillingCompany: str = objRow[3].strip()
+            pszBillingGroup: str = objRow[4].strip() if len(objRow) >= 5 else ""
+            if not pszProjectCodeOrg:
+                continue
+            objPrefixMatch: re.Match[str] | None = _OBJ_ORG_TABLE_PREFIX_PATTERN.match(
+                pszProjectCodeOrg,
+            )
+            pszProjectCodePrefix: str = objPrefixMatch.group(1) if objPrefixMatch is not None else ""
+            if pszBillingCompany:
+                objBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
+                if pszProjectCodePrefix:
+                    objBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
+                    self.objPrefixToCompany.setdefault(pszProjectCodePrefix, pszBillingCompany)
+            if pszBillingGroup and pszProjectCodePrefix:
+                self.objPrefixToGroup.setdefault(pszProjectCodePrefix, pszBillingGroup)
+        self.objBillingMapForStep11 = {**objBillingMapPrefix, **objBillingMapExact}
+
+    # -----------------------------------------------------------
+    # 指定段階の表をタブ区切りで書き出す
+    # -----------------------------------------------------------
+    def write_step_rows(self, pszStepName: str, objOutputPath: Path) -> None:
+        with open_atomic_text_file(str(objOutputPath), "utf-8", None) as objOutputFile:
+            objWriter = csv.writer(objOutputFile, delimiter="\t", lineterminator="\n")
+            objWriter.writerows(self.objStepRows[pszStepName])
+
+    # -----------------------------------------------------------
+    # 管轄PJ表.csv を読み込んで OrgTable を得る
+    #   (プロセス内の再利用 → 保存済みキャッシュ → 解析 の順に試す)
+    #   CSV が無い場合は None を返す。
+    # -----------------------------------------------------------
+    @classmethod
+    def load(cls, objCsvPath: Path) -> "OrgTable | None":
+        if not objCsvPath.exists():
+            return None
+        objStat: os.stat_result = objCsvPath.stat()
+        objMemoKey: Tuple[str, int, int] = (
+            str(objCsvPath.resolve()),
+            objStat.st_mtime_ns,
+            objStat.st_size,
+        )
+        objMemoTable: OrgTable | None = _OBJ_ORG_TABLE_MEMO.get(objMemoKey)
+        if objMemoTable is not None:
+            return objMemoTable
+
+        objCachePath: Path = objCsvPath.with_name(ORG_TABLE_CACHE_FILE_NAME)
+        objCache: Dict[str, Any] | None = read_org_table_cache(objCachePath)
+        objStepRows: Dict[str, List[List[str]]] | None = None
+        pszContentHash: str = ""
+        if objCache is not None and (
+            objCache.get("mtime_ns") == objStat.st_mtime_ns
+            and objCache.get("size") == objStat.st_size
+        ):
+            objStepRows = objCache.get("step_rows")
+
+        if objStepRows is None:
+            bytesContent: bytes = objCsvPath.read_bytes()
+            pszContentHash = hashlib.sha256(bytesContent).hexdigest()
+            if objCache is not None and objCache.get("sha256") == pszContentHash:
+                objStepRows = objCache.get("step_rows")
+            if objStepRows is None:
+                pszCsvText: str = bytesContent.decode("utf-8")
+                objCsvRows: List[List[str]] = list(
+                    csv.reader(io.StringIO(pszCsvText, newline=None)),
                 )
-                for objRow in objStep0002Reader:
-                    if len(objRow) >= 2:
-                        pszProjectCode: str = objRow[2] if len(objRow) >= 3 else ""
-                        objRow[1] = add_project_code_prefix_step0003(
-                            objRow[1],
-                            pszProjectCode,
-                        )
-                    objOrgTableWriter.writerow(objRow)
-            # ●●の処理ここまで
-        with open(objOrgTableStep0003Path, "r", encoding="utf-8") as objOrgTableStep0003File:
-            # 管轄PJ表_step0003.tsv を読み込み、PJ 名称の重複接頭辞を除去して
-            # 管轄PJ表.tsv を生成する処理（再度 add_project_code_prefix_step0003 を通す）が
-            # ここに実装されていたが、仕様変更により不要となったためコメントアウト。
-            # objOrgTableStep0003Reader = csv.reader(objOrgTableStep0003File, delimiter="\t")
-            # with open(objOrgTableTsvPath, "w", encoding="utf-8") as objOrgTableTsvFile:
-            #     objOrgTableTsvWriter = csv.writer(
-            #         objOrgTableTsvFile,
-            #         delimiter="\t",
-            #         lineterminator="\n",
-            #     )
-            #     for objRow in objOrgTableStep0003Reader:
-            #         if len(objRow) >= 2:
-            #             objName = objRow[1]
-            #             objMatchP: re.Match[str] | None = re.match(r"^(P\d{5})_\1_(.*)$", objName)
-            #             objMatchOther: re.Match[str] | None = re.match(r"^([A-Z]\d{3})_\1_(.*)$", objName)
-            #             if objMatchP is not None:
-            #                 objRow[1] = f"{objMatchP.group(1)}_{objMatchP.group(2)}"
-            #             elif objMatchOther is not None:
-            #                 objRow[1] = f"{objMatchOther.group(1)}_{objMatchOther.group(2)}"
-            #         objOrgTableTsvWriter.writerow(objRow)
-            # ●●の処理ここから
-            # 管轄PJ表_step0003.tsv を読み込み、同一内容をそのまま
-            # 管轄PJ表.tsv の名前で保存する。
-            # 仕様:
-            #   - 管轄PJ表.tsv は 管轄PJ表_step0003.tsv と完全に同一内容。
-            #   - 追加の正規化処理や add_project_code_prefix_step0003 の再適用は行わない。
-            # ●●の処理ここまで
-            if objOrgTableStep0003Path != objOrgTableTsvPath:
-                shutil.copyfile(objOrgTableStep0003Path, objOrgTableTsvPath)
+                objStepRows = build_org_table_step_rows(objCsvRows)
+            write_org_table_cache(
+                objCachePath,
+                {
+                    "parser_version": ORG_TABLE_PARSER_VERSION,
+                    "mtime_ns": objStat.st_mtime_ns,
+                    "size": objStat.st_size,
+                    "sha256": pszContentHash,
+                    "step_rows": objStepRows,
+                },
+            )
+
+        objOrgTable: OrgTable = cls(objCsvPath, objStepRows)
+        _OBJ_ORG_TABLE_MEMO[objMemoKey] = objOrgTable
+        return objOrgTable
+
+
+_OBJ_ORG_TABLE_MEMO: Dict[Tuple[str, int, int], OrgTable] = {}
+
+
+def read_org_table_cache(objCachePath: Path) -> Dict[str, Any] | None:
+    # 壊れている・形式が古いキャッシュは無いものとして扱う
+    if not objCachePath.exists():
+        return None
+    try:
+        with open(objCachePath, "rb") as objCacheFile:
+            objCache: Any = pickle.load(objCacheFile)
+    except Exception:
+        return None
+    if not isinstance(objCache, dict):
+        return None
+    if objCache.get("parser_version") != ORG_TABLE_PARSER_VERSION:
+        return None
+    return objCache
+
+
+def write_org_table_cache(objCachePath: Path, objCache: Dict[str, Any]) -> None:
+    # キャッシュの保存に失敗しても処理自体は続ける
+    try:
+        pszTemporaryPath: str = str(objCachePath) + ".tmp"
+        with open(pszTemporaryPath, "wb") as objCacheFile:
+            pickle.dump(objCache, objCacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(pszTemporaryPath, objCachePath)
+    except OSError:
+        pass
+
+
+def get_org_table_csv_path() -> Path:
+    return Path(__file__).resolve().parent / "管轄PJ表.csv"
+
+
+def load_org_table() -> OrgTable | None:
+    # 管轄PJ表.csv が無い場合は、以前に生成された 管轄PJ表.tsv があれば
+    # その内容 (step0003 相当) だけで辞書を作る
+    objOrgTableCsvPath: Path = get_org_table_csv_path()
+    objOrgTable: OrgTable | None = OrgTable.load(objOrgTableCsvPath)
+    if objOrgTable is not None:
+        return objOrgTable
+    objOrgTableTsvPath: Path = objOrgTableCsvPath.with_suffix(".tsv")
+    if not objOrgTableTsvPath.exists():
+        return None
+    with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
+        objRowsStep0003: List[List[str]] = list(csv.reader(objOrgTableFile, delimiter="\t"))
+    return OrgTable(objOrgTableCsvPath, {"step0003": objRowsStep0003})
+
+
+def convert_org_table_tsv(objBaseDirectoryPath: Path) -> None:
+    objOrgTableCsvPath: Path = get_org_table_csv_path()
+    objOrgTable: OrgTable | None = OrgTable.load(objOrgTableCsvPath)
+    if objOrgTable is not None:
+        # 管轄PJ表.csv の解析結果 (メモリ上の表) から各段階のファイルを書き出す。
+        #   step0001: CSV をそのままタブ区切りにしたもの
+        #   step0002: 2 列目 / 3 列目を normalize_org_table_field_step0002 で正規化
+        #   step0003: 2 列目へ add_project_code_prefix_step0003 でコードを付加
+        #   管轄PJ表.tsv: step0003 と完全に同一内容
+        #     (追加の正規化処理や add_project_code_prefix_step0003 の再適用は行わない)
+        objOrgTable.write_step_rows("step0001", objOrgTableCsvPath.with_name("管轄PJ表_step0001.tsv"))
+        objOrgTable.write_step_rows("step0002", objOrgTableCsvPath.with_name("管轄PJ表_step0002.tsv"))
+        objOrgTable.write_step_rows("step0003", objOrgTableCsvPath.with_name("管轄PJ表_step0003.tsv"))
+        objOrgTable.write_step_rows("step0003", objOrgTableCsvPath.with_suffix(".tsv"))
     else:
         pszOrgTableError = f"Error: 管轄PJ表.csv が見つかりません。Path = {objOrgTableCsvPath}"
         print(pszOrgTableError)
@@ -2726,6 +2845,141 @@ def create_module_from_source(
     return objGlobals
 
 
+# ///////////////////////////////////////////////////////////////
+#
+# 埋め込みスクリプト (make_sheet789_from_sheet4) の時間変換関数を
+# 共通カーネル (manhour_time_kernel) で置き換えるための関数
+#
+#   埋め込みソースは変更せず、create_module_from_source で得た
+#   名前空間の関数だけを差し替える。
+#   挙動は元の convert_time_string_to_seconds /
+#   convert_seconds_to_time_string と同一で、
+#   同じ時間文字列・秒数は LRU キャッシュにより再計算しない。
+#
+# ///////////////////////////////////////////////////////////////
+def convert_time_string_to_seconds_with_kernel(
+    pszTimeText: str,
+) -> int:
+    if pszTimeText is None:
+        return 0
+    objSeconds: Optional[int] = parse_time_text_to_seconds_cached(
+        str(pszTimeText),
+        TIME_PARSE_MODE_LENIENT,
+    )
+    if objSeconds is None:
+        return 0
+    return objSeconds
+
+
+def convert_seconds_to_time_string_with_kernel(
+    iTotalSeconds: int,
+) -> str:
+    if iTotalSeconds <= 0:
+        return "0:00:00"
+    return format_seconds_to_time_text_cached(int(iTotalSeconds))
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 埋め込みスクリプトの「utf-8-sig → cp932 で読み直す」読み込みを、
+# ファイルを 1 回だけ読む共通ローダー (text_encoding_loader) で置き換える関数
+#
+#   read_tsv_with_encoding_detection は make_sheet789_from_sheet4 の
+#   read_tsv_with_encoding_candidates と差し替える。
+#   convert_csv_to_tsv_file_with_encoding_detection は
+#   csv_to_tsv_h_mm_ss の convert_csv_to_tsv_file と同じ TSV を作る
+#   (時刻の補正などは埋め込みスクリプトの関数をそのまま使う)。
+#   判定したエンコーディングは標準出力に表示する。
+#   --parsed-cache-dir を指定した場合は、時刻を補正した後の行を
+#   解析結果キャッシュ (parsed_input_cache) に保存して再利用する。
+#
+# ///////////////////////////////////////////////////////////////
+# 解析結果キャッシュの解析処理名とバージョン。
+# parse_jobcan_csv_rows の結果が変わる修正をした場合はバージョンを上げる。
+JOBCAN_CSV_ROWS_PARSER_NAME: str = "jobcan_csv_rows"
+JOBCAN_CSV_ROWS_PARSER_VERSION: int = 1
+
+
+def read_tsv_with_encoding_detection(
+    pszInputFileFullPath: str,
+    bHasHeader: bool,
+) -> pd.DataFrame:
+    objDecoded: DecodedText = read_text_with_encoding_detection(pszInputFileFullPath)
+    return pd.read_csv(
+        open_text_buffer(objDecoded.pszText),
+        sep="\t",
+        dtype=str,
+        header="infer" if bHasHeader else None,
+        engine="python",
+    )
+
+
+def parse_jobcan_csv_rows(
+    objModuleCsvToTsv: Dict[str, Any],
+    pszInputCsvPath: str,
+) -> Tuple[List[List[str]], str]:
+    objRows: List[List[str]]
+    pszEncoding: str
+    objRows, pszEncoding = read_csv_rows_with_encoding_detection(pszInputCsvPath)
+
+    # 2 行目以降の F 列 (index 5)・K 列 (index 10) の "h:mm" を "h:mm:ss" にそろえる
+    objNormalizeTime = objModuleCsvToTsv["normalize_time_h_mm_to_h_mm_ss"]
+    if len(objRows) > 1:
+        for objRow in objRows[1:]:
+            for iTimeColumnIndex in (5, 10):
+                if iTimeColumnIndex < len(objRow):
+                    objRow[iTimeColumnIndex] = objNormalizeTime(objRow[iTimeColumnIndex])
+
+        # ヘッダ先頭セルの BOM と外側の " を取り除く (埋め込みスクリプトと同じ規則)
+        if len(objRows[0]) >= 1:
+            pszHeaderFirstCell: str = objRows[0][0]
+            if pszHeaderFirstCell.startswith("\ufeff"):
+                pszHeaderFirstCell = pszHeaderFirstCell.lstrip("\ufeff")
+            if (
+                len(pszHeaderFirstCell) >= 2
+                and pszHeaderFirstCell.startswith('"')
+                and pszHeaderFirstCell.endswith('"')
+            ):
+                pszHeaderFirstCell = pszHeaderFirstCell[1:-1].replace('""', '"')
+            if (
+                len(pszHeaderFirstCell) >= 2
+                and pszHeaderFirstCell.startswith('"')
+                and pszHeaderFirstCell.endswith('"')
+            ):
+                pszHeaderFirstCell = pszHeaderFirstCell[1:-1]
+            objRows[0][0] = pszHeaderFirstCell
+    return objRows, pszEncoding
+
+
+def convert_csv_to_tsv_file_with_encoding_detection(
+    objModuleCsvToTsv: Dict[str, Any],
+    pszInputCsvPath: str,
+    objParsedInputCache: ParsedInputCache | None = None,
+) -> str:
+    if not os.path.exists(pszInputCsvPath):
+        raise FileNotFoundError(f"Input CSV not found: {pszInputCsvPath}")
+
+    pszOutputTsvPath: str = objModuleCsvToTsv["build_output_file_full_path"](
+        pszInputCsvPath,
+        ".tsv",
+    )
+    objRows: List[List[str]]
+    pszEncoding: str
+    objRows, pszEncoding = load_or_parse_with_optional_cache(
+        objParsedInputCache,
+        pszInputCsvPath,
+        JOBCAN_CSV_ROWS_PARSER_NAME,
+        JOBCAN_CSV_ROWS_PARSER_VERSION,
+        lambda pszPath: parse_jobcan_csv_rows(objModuleCsvToTsv, pszPath),
+    )
+    print(f"Input encoding: {pszEncoding} ({pszInputCsvPath})")
+
+    with open(pszOutputTsvPath, mode="w", encoding="utf-8", newline="") as objOutputFile:
+        objWriter = csv.writer(objOutputFile, delimiter="\t")
+        objWriter.writerows(objRows)
+    return pszOutputTsvPath
+
+
 # ///////////////////////////////////////////////////////////////
 #
 # エラー内容を UTF-8 テキストとして書き出す関数
@@ -2754,36 +3008,20 @@ def write_error_text_utf8(
 #
 # ///////////////////////////////////////////////////////////////
 def convert_time_text_to_seconds_for_project_list(pszTimeText: str) -> int:
-    pszText: str = str(pszTimeText or "").strip()
-    if len(pszText) == 0:
-        return 0
-
-    objParts: List[str] = pszText.split(":")
-    try:
-        if len(objParts) == 2:
-            iHours: int = int(objParts[0])
-            iMinutes: int = int(objParts[1])
-            return iHours * 3600 + iMinutes * 60
-
-        if len(objParts) == 3:
-            iHours: int = int(objParts[0])
-            iMinutes: int = int(objParts[1])
-            iSeconds: int = int(objParts[2])
-            return iHours * 3600 + iMinutes * 60 + iSeconds
-    except ValueError:
+    objSeconds: Optional[int] = parse_time_text_to_seconds_cached(
+        str(pszTimeText or ""),
+        TIME_PARSE_MODE_LENIENT,
+    )
+    if objSeconds is None:
         return 0
-
-    return 0
+    return objSeconds
 
 
 def format_seconds_to_h_mm_ss(iTotalSeconds: int) -> str:
     iSecondsSafe: int = max(int(iTotalSeconds or 0), 0)
     if iSecondsSafe == 0:
         return ""
-    iHours: int = iSecondsSafe // 3600
-    iMinutes: int = (iSecondsSafe % 3600) // 60
-    iSeconds: int = iSecondsSafe % 60
-    return f"{iHours}:{iMinutes:02}:{iSeconds:02}"
+    return format_seconds_to_time_text_cached(iSecondsSafe)
 
 
 def _replace_raw_data_column_ranges(
@@ -3392,12 +3630,426 @@ def make_project_list_tsv_from_raw_data(
             )
 
 
+# ///////////////////////////////////////////////////////////////
+#
+# Sheet10/11/12 (step07〜step11) 列指向集計エンジン
+#
+#   Sheet7 とカンパニー別 TSV を 1 回ずつ読み込んで DataFrame にし、
+#   正規化・集計・並べ替えをすべてメモリ上のフレームで行う。
+#   書き出す step07〜step11 の内容は、従来の 1 行ずつの処理と同一。
+#
+# ///////////////////////////////////////////////////////////////
+SHEET10_COLUMN_PROJECT: str = "プロジェクト名"
+SHEET10_COLUMN_COMPANY: str = "計上カンパニー名"
+SHEET10_COLUMN_MANHOUR: str = "工数"
+SHEET10_COLUMN_SECONDS: str = "秒数"
+
+
+def read_text_lines_sheet10(pszTsvPath: str) -> pd.Series:
+    # readlines() と同じ行分割 (改行のみを除去) を 1 回の読み込みで行う
+    with open(pszTsvPath, "r", encoding="utf-8") as objFile:
+        pszText: str = objFile.read()
+    objLines: List[str] = pszText.split("\n")
+    if objLines and objLines[-1] == "":
+        objLines.pop()
+    return pd.Series(objLines, dtype=object)
+
+
+def split_tab_columns_sheet10(
+    objLines: pd.Series,
+    iColumnCount: int,
+) -> Tuple[List[pd.Series], pd.Series]:
+    # 先頭 iColumnCount 列を取り出す (足りない列は空文字)。
+    # あわせて各行の列数 (タブ数 + 1) を返す。
+    objColumnCounts: pd.Series = objLines.str.count("\t") + 1
+    objParts: pd.DataFrame = objLines.str.split("\t", n=iColumnCount, expand=True)
+    objColumns: List[pd.Series] = []
+    for iColumnIndex in range(iColumnCount):
+        if iColumnIndex in objParts.columns:
+            objColumns.append(objParts[iColumnIndex].fillna("").astype(object))
+        else:
+            objColumns.append(pd.Series([""] * len(objLines), index=objLines.index, dtype=object))
+    return objColumns, objColumnCounts
+
+
+def normalize_project_column_sheet10(objProjectNames: pd.Series) -> pd.Series:
+    # 空白のみ・"nan" の名称は空文字、それ以外は正規化する
+    objBlankMask: pd.Series = (
+        objProjectNames.str.strip().eq("") | objProjectNames.str.lower().eq("nan")
+    )
+    objNormalized: pd.Series = pd.Series(
+        normalize_values_batch(objProjectNames.tolist(), normalize_project_name_sheet10),
+        index=objProjectNames.index,
+        dtype=object,
+    )
+    return objNormalized.mask(objBlankMask, "")
+
+
+def build_sheet10_project_frame(pszSheet7TsvPath: str) -> pd.DataFrame:
+    # Sheet7 (プロジェクト名 / スタッフコード / 工数) から step07 プロジェクト別の表を作る
+    objLines: pd.Series = read_text_lines_sheet10(pszSheet7TsvPath)
+    objBlankLineMask: pd.Series = objLines.eq("")
+    objProcessed: pd.Series = pd.Series(
+        normalize_values_batch(objLines.tolist(), preprocess_line_content_sheet10),
+        index=objLines.index,
+        dtype=object,
+    ).mask(objBlankLineMask, "")
+    objColumns: List[pd.Series]
+    objColumnCounts: pd.Series
+    objColumns, objColumnCounts = split_tab_columns_sheet10(objProcessed, 3)
+    objManhours: pd.Series = objColumns[2].where(
+        objColumnCounts > 2,
+        objColumns[1].where(objColumnCounts > 1, ""),
+    )
+    return pd.DataFrame(
+        {
+            SHEET10_COLUMN_PROJECT: normalize_project_column_sheet10(objColumns[0]),
+            SHEET10_COLUMN_MANHOUR: objManhours,
+        },
+    )
+
+
+def build_sheet10_company_frame(pszCompanyTaskTsvPath: str) -> pd.DataFrame:
+    # カンパニー別 TSV (プロジェクト名 / 計上カンパニー名 / タスク / 工数) から
+    # step07 カンパニー別の表を作る
+    objLines: pd.Series = read_text_lines_sheet10(pszCompanyTaskTsvPath)
+    objBlankLineMask: pd.Series = objLines.eq("")
+    objProcessed: pd.Series = pd.Series(
+        normalize_values_batch(objLines.tolist(), preprocess_line_content_sheet10),
+        index=objLines.index,
+        dtype=object,
+    ).mask(objBlankLineMask, "")
+    objColumns: List[pd.Series]
+    objColumnCounts: pd.Series
+    objColumns, objColumnCounts = split_tab_columns_sheet10(objProcessed, 4)
+    objManhours: pd.Series = objColumns[3].where(
+        objColumnCounts > 3,
+        objColumns[2].where(
+            objColumnCounts > 2,
+            objColumns[1].where(objColumnCounts > 1, ""),
+        ),
+    )
+    return pd.DataFrame(
+        {
+            SHEET10_COLUMN_PROJECT: normalize_project_column_sheet10(objColumns[0]),
+            SHEET10_COLUMN_COMPANY: objColumns[1],
+            SHEET10_COLUMN_MANHOUR: objManhours,
+        },
+    )
+
+
+def join_frame_columns_as_tsv_text(
+    objFrame: pd.DataFrame,
+    objColumnNames: List[str],
+) -> str:
+    # 指定列をタブで連結し、各行を改行で終端した 1 つの文字列にする
+    if len(objFrame) == 0:
+        return ""
+    objJoined: pd.Series = objFrame[objColumnNames[0]].astype(object)
+    for pszColumnName in objColumnNames[1:]:
+        objJoined = objJoined + "\t" + objFrame[pszColumnName].astype(object)
+    return "\n".join(objJoined.tolist()) + "\n"
+
+
+def write_frame_columns_tsv_sheet10(
+    objFrame: pd.DataFrame,
+    objColumnNames: List[str],
+    pszOutputPath: str,
+    objArtifactStore: ManhourArtifactStore | None = None,
+    objBackgroundWriter: BackgroundTsvWriter | None = None,
+) -> None:
+    # objArtifactStore を渡した場合は、ファイルを作らずに
+    # 同じ内容をファイル名の表としてストアへ保存する。
+    # objBackgroundWriter を渡した場合は、指定列だけを取り出した表を渡し、
+    # 文字列化と書き込みを作業スレッドで行う。
+    if objArtifactStore is not None:
+        objArtifactStore.put_text(
+            os.path.basename(pszOutputPath),
+            join_frame_columns_as_tsv_text(objFrame, objColumnNames),
+            None,
+        )
+        return
+    if objBackgroundWriter is not None:
+        objFrameSnapshot: pd.DataFrame = objFrame[objColumnNames].copy()
+        objBackgroundWriter.submit_text(
+            pszOutputPath,
+            lambda: join_frame_columns_as_tsv_text(objFrameSnapshot, objColumnNames),
+            "utf-8",
+            None,
+        )
+        return
+    write_text_atomic(
+        pszOutputPath,
+        join_frame_columns_as_tsv_text(objFrame, objColumnNames),
+        "utf-8",
+        None,
+    )
+
+
+def aggregate_manhour_seconds_sheet11(
+    objFrame: pd.DataFrame,
+    objValueColumnNames: List[str],
+) -> pd.DataFrame:
+    # 全列が空の行を除き、工数を厳密形式 (H:MM:SS) で秒数化して
+    # プロジェクト名ごとに初出順のまま合計する。
+    # 不正な工数があれば、最初に現れた値で ValueError とする。
+    objAllBlankMask: pd.Series = objFrame[SHEET10_COLUMN_PROJECT].eq("")
+    for pszColumnName in objValueColumnNames:
+        objAllBlankMask = objAllBlankMask & objFrame[pszColumnName].eq("")
+    objTargetFrame: pd.DataFrame = objFrame.loc[~objAllBlankMask]
+
+    objSeconds: np.ndarray
+    objValidMask: np.ndarray
+    objSeconds, objValidMask = parse_time_values_to_seconds(
+        objTargetFrame[SHEET10_COLUMN_MANHOUR].to_numpy(dtype=object),
+        TIME_PARSE_MODE_STRICT,
+    )
+    if not objValidMask.all():
+        pszInvalidManhour: str = objTargetFrame[SHEET10_COLUMN_MANHOUR].iloc[
+            int(np.flatnonzero(~objValidMask)[0])
+        ]
+        raise ValueError(f"Invalid manhour format: {pszInvalidManhour}")
+
+    objSecondsFrame: pd.DataFrame = pd.DataFrame(
+        {
+            SHEET10_COLUMN_PROJECT: objTargetFrame[SHEET10_COLUMN_PROJECT].to_numpy(dtype=object),
+            SHEET10_COLUMN_SECONDS: objSeconds,
+        },
+    )
+    objAggregated: pd.DataFrame = (
+        objSecondsFrame.groupby(SHEET10_COLUMN_PROJECT, sort=False)[SHEET10_COLUMN_SECONDS]
+        .sum()
+        .reset_index()
+    )
+    objAggregated[SHEET10_COLUMN_MANHOUR] = format_seconds_values_to_time_text(
+        objAggregated[SHEET10_COLUMN_SECONDS].to_numpy(),
+    )
+    return objAggregated
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 計上カンパニー名の決定 (step08)
+#
+#   ・カンパニー名の表記ゆれは、接頭辞の木 (トライ) を 1 回たどって正規化する。
+#   ・インキュの優先順位は、名前 → 順位 の辞書で引く。
+#   ・全プロジェクトの計上カンパニー名を、表の列演算でまとめて決定する。
+#   ・インキュが複数かぶっているプロジェクトは、表 (TSV) として書き出す。
+#
+# ///////////////////////////////////////////////////////////////
+SHEET10_COLUMN_RANK: str = "順位"
+
+# カンパニー名の先頭がこの表記なら、右側の名前に置き換える (上から順に優先)
+COMPANY_NAME_PREFIX_REPLACEMENTS: List[Tuple[str, str]] = [
+    ("本部", "本部"),
+    ("事業開発", "事業開発"),
+    ("子会社", "子会社"),
+    ("投資先", "投資先"),
+    ("第１インキュ", "第一インキュ"),
+    ("第２インキュ", "第二インキュ"),
+    ("第３インキュ", "第三インキュ"),
+    ("第４インキュ", "第四インキュ"),
+    ("第1インキュ", "第一インキュ"),
+    ("第2インキュ", "第二インキュ"),
+    ("第3インキュ", "第三インキュ"),
+    ("第4インキュ", "第四インキュ"),
+]
+
+# インキュの優先順位 (値が小さいほど優先)
+INCUBATION_COMPANY_RANKS: Dict[str, int] = {
+    "第一インキュ": 0,
+    "第二インキュ": 1,
+    "第三インキュ": 2,
+    "第四インキュ": 3,
+}
+
+# インキュ重複プロジェクト表の列名
+INCUBATION_CONFLICT_COLUMNS: List[str] = [
+    "プロジェクト名",
+    "インキュ数",
+    "採用した計上カンパニー名",
+    "計上カンパニー名一覧",
+]
+
+
+def build_company_name_prefix_trie(
+    objReplacements: List[Tuple[str, str]],
+) -> Dict[str, Any]:
+    # 1 文字ずつの入れ子の辞書を作り、接頭辞の終端には
+    # キー "" で (優先順位, 置換後の名前) を持たせる
+    objTrie: Dict[str, Any] = {}
+    for iPriority, (pszPrefix, pszReplacement) in enumerate(objReplacements):
+        objNode: Dict[str, Any] = objTrie
+        for pszChar in pszPrefix:
+            objNode = objNode.setdefault(pszChar, {})
+        objNode.setdefault("", (iPriority, pszReplacement))
+    return objTrie
+
+
+_OBJ_COMPANY_NAME_PREFIX_TRIE: Dict[str, Any] = build_company_name_prefix_trie(
+    COMPANY_NAME_PREFIX_REPLACEMENTS,
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize_company_name_sheet10(pszCompanyName: str) -> str:
+    # 木をたどりながら一致した接頭辞のうち、表の上位にあるものを採用する
+    # (上から順に startswith を試す従来の処理と同じ結果になる)
+    objBest: Tuple[int, str] | None = None
+    objNode: Dict[str, Any] | None = _OBJ_COMPANY_NAME_PREFIX_TRIE
+    for pszChar in pszCompanyName:
+        objNode = objNode.get(pszChar)
+        if objNode is None:
+            break
+        objTerminal: Tuple[int, str] | None = objNode.get("")
+        if objTerminal is not None and (objBest is None or objTerminal[0] < objBest[0]):
+            objBest = objTerminal
+    if objBest is None:
+        return pszCompanyName
+    return objBest[1]
+
+
+def build_company_candidates_sheet11(objCompanyFrame: pd.DataFrame) -> pd.DataFrame:
+    # プロジェクトごとに、計上カンパニー名を初出順・重複なしで並べた表を作り、
+    # インキュの場合は優先順位を付ける (インキュ以外は NaN)
+    objAllBlankMask: pd.Series = (
+        objCompanyFrame[SHEET10_COLUMN_PROJECT].eq("")
+        & objCompanyFrame[SHEET10_COLUMN_COMPANY].eq("")
+        & objCompanyFrame[SHEET10_COLUMN_MANHOUR].eq("")
+    )
+    objCandidates: pd.DataFrame = (
+        objCompanyFrame.loc[
+            ~objAllBlankMask,
+            [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY],
+        ]
+        .drop_duplicates()
+        .reset_index(drop=True)
+    )
+    objCandidates[SHEET10_COLUMN_RANK] = objCandidates[SHEET10_COLUMN_COMPANY].map(
+        INCUBATION_COMPANY_RANKS,
+    )
+    return objCandidates
+
+
+def assign_company_names_step08(
+    objProjectNames: pd.Series,
+    objCandidates: pd.DataFrame,
+    objPrefixToCompany: Dict[str, str],
+) -> Tuple[pd.Series, pd.DataFrame]:
+    # 決定規則 (上から順に適用):
+    #   1) 候補が 1 つも無ければ空文字
+    #   2) PJ コード接頭辞が 管轄PJ表 にあればその計上カンパニー
+    #   3) 先頭が A / H なら "本部"
+    #   4) 先頭が J / P でインキュの候補があれば、優先順位が最も高いインキュ
+    #      (インキュの候補が 2 つ以上なら重複として記録する)
+    #   5) それ以外は最初に現れた計上カンパニー
+    objGrouped = objCandidates.groupby(SHEET10_COLUMN_PROJECT, sort=False)
+    objFirstCompany: pd.Series = objGrouped[SHEET10_COLUMN_COMPANY].first()
+    objBestRank: pd.Series = objGrouped[SHEET10_COLUMN_RANK].min()
+    objIncubationCount: pd.Series = objGrouped[SHEET10_COLUMN_RANK].count()
+    objRankToCompany: Dict[int, str] = {
+        iRank: pszName for pszName, iRank in INCUBATION_COMPANY_RANKS.items()
+    }
+
+    objProjects: pd.Series = objProjectNames.reset_index(drop=True)
+    objHasCandidates: np.ndarray = objProjects.isin(objFirstCompany.index).to_numpy()
+    objOrgCompany: pd.Series = (
+        (objProjects.str.split("_", n=1).str[0] + "_").map(objPrefixToCompany)
+    )
+    objHeadChar: pd.Series = objProjects.str[:1]
+    objFirst: pd.Series = objProjects.map(objFirstCompany).fillna("")
+    objIncubation: pd.Series = objProjects.map(objBestRank).map(objRankToCompany)
+    objCounts: pd.Series = objProjects.map(objIncubationCount).fillna(0)
+
+    objHasOrgCompany: np.ndarray = objOrgCompany.notna().to_numpy()
+    objIsHeadquarters: np.ndarray = objHeadChar.isin(["A", "H"]).to_numpy()
+    objIsIncubationTarget: np.ndarray = objHeadChar.isin(["J", "P"]).to_numpy()
+    objHasIncubation: np.ndarray = objIncubation.notna().to_numpy()
+
+    objAssigned: pd.Series = pd.Series(
+        np.select(
+            [
+                ~objHasCandidates,
+                objHasOrgCompany,
+                objIsHeadquarters,
+                objIsIncubationTarget & objHasIncubation,
+            ],
+            [
+                "",
+                objOrgCompany.to_numpy(dtype=object),
+                "本部",
+                objIncubation.to_numpy(dtype=object),
+            ],
+            default=objFirst.to_numpy(dtype=object),
+        ),
+        index=objProjectNames.index,
+        dtype=object,
+    )
+
+    objConflictMask: np.ndarray = (
+        objHasCandidates
+        & ~objHasOrgCompany
+        & ~objIsHeadquarters
+        & objIsIncubationTarget
+        & (objCounts.to_numpy() > 1)
+    )
+    objConflictProjects: pd.Series = objProjects[objConflictMask]
+    objCompanyLists: pd.Series = objGrouped[SHEET10_COLUMN_COMPANY].agg(" / ".join)
+    objConflicts: pd.DataFrame = pd.DataFrame(
+        {
+            INCUBATION_CONFLICT_COLUMNS[0]: objConflictProjects.to_numpy(dtype=object),
+            INCUBATION_CONFLICT_COLUMNS[1]: objConflictProjects.map(objIncubationCount)
+            .astype(int)
+            .astype(str)
+            .to_numpy(dtype=object),
+            INCUBATION_CONFLICT_COLUMNS[2]: objAssigned.to_numpy(dtype=object)[objConflictMask],
+            INCUBATION_CONFLICT_COLUMNS[3]: objConflictProjects.map(objCompanyLists).to_numpy(
+                dtype=object,
+            ),
+        },
+    )
+    return objAssigned, objConflicts
+
+
+def write_incubation_conflicts_step08(
+    objConflicts: pd.DataFrame,
+    pszOutputPath: str,
+) -> None:
+    # 重複があればヘッダー付きで書き出し、無ければ前回の表を残さない
+    if len(objConflicts) == 0:
+        if os.path.exists(pszOutputPath):
+            os.remove(pszOutputPath)
+        return
+    write_text_atomic(
+        pszOutputPath,
+        "\t".join(INCUBATION_CONFLICT_COLUMNS)
+        + "\n"
+        + join_frame_columns_as_tsv_text(objConflicts, INCUBATION_CONFLICT_COLUMNS),
+        "utf-8",
+        None,
+    )
+
+
+def sort_by_project_prefix_sheet12(objFrame: pd.DataFrame) -> pd.DataFrame:
+    # プロジェクト名の "_" より前 (接頭辞) で安定ソートする
+    objPrefixes: pd.Series = objFrame[SHEET10_COLUMN_PROJECT].str.split("_", n=1).str[0]
+    objOrder: np.ndarray = np.argsort(objPrefixes.to_numpy(dtype=object), kind="stable")
+    return objFrame.iloc[objOrder].reset_index(drop=True)
+
+
 # ///////////////////////////////////////////////////////////////
 #
 # main
 #
 # ///////////////////////////////////////////////////////////////
-def process_single_input(pszInputManhourCsvPath: str) -> int:
+def process_single_input(
+    pszInputManhourCsvPath: str,
+    bUseArtifactStore: bool = False,
+    objOutputManifest: OutputManifest | None = None,
+    objParsedInputCache: ParsedInputCache | None = None,
+) -> int:
+    if objOutputManifest is None:
+        objOutputManifest = OutputManifest(os.path.basename(__file__))
     objInputPath: Path = Path(pszInputManhourCsvPath)
 
     objCandidatePaths: List[Path] = [objInputPath]
@@ -3434,8 +4086,10 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         "csv_to_tsv_h_mm_ss",
         pszSource_csv_to_tsv_h_mm_ss_py,
     )
-    pszStep1DefaultTsvPath: str = objModuleCsvToTsv["convert_csv_to_tsv_file"](
+    pszStep1DefaultTsvPath: str = convert_csv_to_tsv_file_with_encoding_detection(
+        objModuleCsvToTsv,
         str(objInputPath),
+        objParsedInputCache,
     )
     iFileYear: int
     iFileMonth: int
@@ -3547,6 +4201,17 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         "make_sheet789_from_sheet4",
         pszSource_make_sheet789_from_sheet4_py,
     )
+    # 時間文字列と秒数の変換は共通カーネルに差し替える
+    objModuleMakeSheet789["convert_time_string_to_seconds"] = (
+        convert_time_string_to_seconds_with_kernel
+    )
+    objModuleMakeSheet789["convert_seconds_to_time_string"] = (
+        convert_seconds_to_time_string_with_kernel
+    )
+    # TSV の読み込みはファイルを 1 回だけ読む共通ローダーに差し替える
+    objModuleMakeSheet789["read_tsv_with_encoding_candidates"] = (
+        read_tsv_with_encoding_detection
+    )
     pszSheet7DefaultTsvPath: str = objModuleMakeSheet789[
         "build_output_file_full_path_for_sheet7"
     ](pszSheet4TsvPath)
@@ -3593,28 +4258,8 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     if pszSheet10DefaultTsvPath != pszSheet10StaffCompanyTsvPath:
         os.replace(pszSheet10DefaultTsvPath, pszSheet10StaffCompanyTsvPath)
 
-    def normalize_company_name_sheet10(pszCompanyName: str) -> str:
-        objReplaceTargets: List[Tuple[str, str]] = [
-            ("本部", "本部"),
-            ("事業開発", "事業開発"),
-            ("子会社", "子会社"),
-            ("投資先", "投資先"),
-            ("第１インキュ", "第一インキュ"),
-            ("第２インキュ", "第二インキュ"),
-            ("第３インキュ", "第三インキュ"),
-            ("第４インキュ", "第四インキュ"),
-            ("第1インキュ", "第一インキュ"),
-            ("第2インキュ", "第二インキュ"),
-            ("第3インキュ", "第三インキュ"),
-            ("第4インキュ", "第四インキュ"),
-        ]
-        for pszPrefix, pszReplacement in objReplaceTargets:
-            if pszCompanyName.startswith(pszPrefix):
-                return pszReplacement
-        return pszCompanyName
-
     with open(pszSheet10StaffCompanyTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        with open(pszSheet10CompanyTaskTsvPath, "w", encoding="utf-8") as objSheet10CompanyOutputFile:
+        with open_atomic_text_file(pszSheet10CompanyTaskTsvPath, "utf-8", None) as objSheet10CompanyOutputFile:
             for pszLine in objSheet10CompanyFile:
                 pszLineContent = pszLine.rstrip("\n")
                 if pszLineContent == "":
@@ -3659,40 +4304,6 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         / f"工数_{iFileYear}年{iFileMonth:02d}月_step09_昇順_合計_プロジェクト_計上カンパニー名_計上グループ_工数.tsv"
     )
 
-    def is_blank_sheet10(value: str | None) -> bool:
-        if value is None:
-            return True
-        if value == "":
-            return True
-        if value.strip() == "":
-            return True
-        if value.lower() == "nan":
-            return True
-        return False
-
-    def parse_manhour_to_seconds_sheet11(pszManhour: str) -> int:
-        objMatch = re.match(r"^(\d+):([0-5]\d):([0-5]\d)$", pszManhour)
-        if not objMatch:
-            raise ValueError(f"Invalid manhour format: {pszManhour}")
-        iHours: int = int(objMatch.group(1))
-        iMinutes: int = int(objMatch.group(2))
-        iSeconds: int = int(objMatch.group(3))
-        return iHours * 3600 + iMinutes * 60 + iSeconds
-
-    def format_seconds_to_manhour_sheet11(iTotalSeconds: int) -> str:
-        if iTotalSeconds < 0:
-            raise ValueError("Total seconds must not be negative.")
-        iHours: int = iTotalSeconds // 3600
-        iMinutes: int = (iTotalSeconds % 3600) // 60
-        iSeconds: int = iTotalSeconds % 60
-        return f"{iHours}:{iMinutes:02d}:{iSeconds:02d}"
-
-    def extract_project_prefix_sheet12(pszProjectName: str) -> str:
-        iUnderscoreIndex: int = pszProjectName.find("_")
-        if iUnderscoreIndex == -1:
-            return pszProjectName
-        return pszProjectName[:iUnderscoreIndex]
-
     #/*
     # *
     # * process_single_input後半
@@ -3716,52 +4327,18 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
     #
     # 1. 管轄PJ表の再生成（step0004）
     #
-    objOrgTableCsvPath: Path = Path(__file__).resolve().parent / "管轄PJ表.csv"
+    #    (管轄PJ表.csv の解析は OrgTable で 1 回だけ行い、
+    #     step0004 / step0005 はメモリ上の表から書き出す)
+    #
+    objOrgTableCsvPath: Path = get_org_table_csv_path()
     objOrgTableStep0004Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0004.tsv")
-    objOrgTableStep0003Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0003.tsv")
     objOrgTableStep0005Path: Path = objOrgTableCsvPath.with_name("管轄PJ表_step0005.tsv")
-    if objOrgTableCsvPath.exists():
-        with open(objOrgTableCsvPath, "r", encoding="utf-8") as objOrgTableCsvFile:
-            objOrgTableReader = csv.reader(objOrgTableCsvFile)
-            with open(objOrgTableStep0004Path, "w", encoding="utf-8") as objOrgTableTsvFile:
-                objOrgTableWriter = csv.writer(objOrgTableTsvFile, delimiter="\t", lineterminator="\n")
-                for objRow in objOrgTableReader:
-                    objRow = [objCell.replace("=match'", "") for objCell in objRow]
-                    while objRow and objRow[-1] == "":
-                        objRow.pop()
-                    if objRow and objRow[0] != "No":
-                        if len(objRow) >= 3:
-                            objRow[2] = normalize_org_table_project_code(objRow[2])
-                        if len(objRow) >= 2:
-                            pszProjectCodePrefix: str = ""
-                            if len(objRow) >= 3 and objRow[2]:
-                                pszProjectCodePrefix = objRow[2].split("_", 1)[0]
-                            pszProjectNameRaw: str = objRow[1]
-                            pszProjectNameTrimmed: str = pszProjectNameRaw.strip()
-                            if pszProjectCodePrefix and pszProjectNameTrimmed != pszProjectCodePrefix:
-                                if not pszProjectNameTrimmed.startswith(f"{pszProjectCodePrefix}_"):
-                                    objRow[1] = f"{pszProjectCodePrefix}_{pszProjectNameRaw}"
-                            objRow[1] = normalize_org_table_project_code(objRow[1])
-                    while objRow and objRow[-1] == "":
-                        objRow.pop()
-                    objOrgTableWriter.writerow(objRow)
-        if objOrgTableStep0003Path.exists():
-            with open(objOrgTableStep0003Path, "r", encoding="utf-8") as objOrgTableStep0003File:
-                objStep0003Reader = csv.reader(objOrgTableStep0003File, delimiter="\t")
-                with open(objOrgTableStep0005Path, "w", encoding="utf-8") as objOrgTableStep0005File:
-                    objStep0005Writer = csv.writer(
-                        objOrgTableStep0005File,
-                        delimiter="\t",
-                        lineterminator="\n",
-                    )
-
-                    for objRow in objStep0003Reader:
-                        if len(objRow) > 1:
-                            objRow = [objRow[0]] + objRow[2:]
-                        objRow = [objCell.replace("=match'", "") for objCell in objRow]
-                        while objRow and objRow[-1] == "":
-                            objRow.pop()
-                        objStep0005Writer.writerow(objRow)
+    objOrgTable: OrgTable | None = OrgTable.load(objOrgTableCsvPath)
+    objOrgTableStep0005Rows: List[List[str]] | None = None
+    if objOrgTable is not None:
+        objOrgTable.write_step_rows("step0004", objOrgTableStep0004Path)
+        objOrgTable.write_step_rows("step0005", objOrgTableStep0005Path)
+        objOrgTableStep0005Rows = objOrgTable.objStepRows["step0005"]
     else:
         pszOrgTableError = f"Error: 管轄PJ表.csv が見つかりません。Path = {objOrgTableCsvPath}"
         print(pszOrgTableError)
@@ -3770,442 +4347,412 @@ def process_single_input(pszInputManhourCsvPath: str) -> int:
         objRoot.withdraw()
         messagebox.showwarning("警告", pszOrgTableError)
         objRoot.destroy()
+        # 以前の実行で生成された step0005 が残っていればそれを使う
+        if objOrgTableStep0005Path.exists():
+            with open(objOrgTableStep0005Path, "r", encoding="utf-8") as objStep0005File:
+                objOrgTableStep0005Rows = list(csv.reader(objStep0005File, delimiter="\t"))
 
     #
     # 2. Sheet7/Sheet10 の生成と正規化
+    #    Sheet7 とカンパニー別 TSV を 1 回ずつ読み込み、
+    #    以降の step07〜step11 はこのフレームだけから作る。
+    #    アーティファクトストアを使う場合、step07〜step09 は
+    #    ファイルを作らずにストアへ保存する。
+    #    step07〜step11 の書き出しは作業スレッドで行い、後続の集計と重ねる。
     #
-    with open(pszSheet7TsvPath, "r", encoding="utf-8") as objSheet7File:
-        objSheet7Lines: List[str] = objSheet7File.readlines()
-    with open(pszSheet10CompanyTaskTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        objSheet10CompanyLines: List[str] = objSheet10CompanyFile.readlines()
-
-    objSheet10Rows: List[Tuple[str, str]] = []
-    with open(pszSheet10ProjectTsvPath, "w", encoding="utf-8") as objSheet10File:
-        for pszLine in objSheet7Lines:
-            pszLineContent: str = pszLine.rstrip("\n")
-            if pszLineContent == "":
-                objSheet10File.write("\t\n")
-                objSheet10Rows.append(("", ""))
-                continue
-            pszLineContent = preprocess_line_content_sheet10(pszLineContent)
-            objColumns: List[str] = pszLineContent.split("\t")
-            pszProjectName: str = ""
-            pszManhour: str = ""
-            if len(objColumns) > 0:
-                pszProjectName = objColumns[0]
-            if len(objColumns) > 2:
-                pszManhour = objColumns[2]
-            elif len(objColumns) > 1:
-                pszManhour = objColumns[1]
-            if is_blank_sheet10(pszProjectName):
-                pszNormalizedName: str = ""
-            else:
-                pszNormalizedName = normalize_project_name_sheet10(pszProjectName)
-            objSheet10File.write(pszNormalizedName + "\t" + pszManhour + "\n")
-            objSheet10Rows.append((pszNormalizedName, pszManhour))
-
-    with open(pszSheet10CompanyTsvPath, "w", encoding="utf-8") as objSheet10CompanyFile:
-        for pszLine in objSheet10CompanyLines:
-            pszLineContent = pszLine.rstrip("\n")
-            if pszLineContent == "":
-                objSheet10CompanyFile.write("\t\t\n")
-                continue
-            pszLineContent = preprocess_line_content_sheet10(pszLineContent)
-            objColumns = pszLineContent.split("\t")
-            pszProjectName = ""
-            pszCompanyName = ""
-            pszManhour = ""
-            if len(objColumns) > 0:
-                pszProjectName = objColumns[0]
-            if len(objColumns) > 1:
-                pszCompanyName = objColumns[1]
-            if len(objColumns) > 3:
-                pszManhour = objColumns[3]
-            elif len(objColumns) > 2:
-                pszManhour = objColumns[2]
-            elif len(objColumns) > 1:
-                pszManhour = objColumns[1]
-            if is_blank_sheet10(pszProjectName):
-                pszNormalizedName = ""
-            else:
-                pszNormalizedName = normalize_project_name_sheet10(pszProjectName)
-            objSheet10CompanyFile.write(
-                pszNormalizedName + "\t" + pszCompanyName + "\t" + pszManhour + "\n",
+    objArtifactStore: ManhourArtifactStore | None = None
+    if bUseArtifactStore:
+        objArtifactStore = ManhourArtifactStore(
+            build_artifact_store_path(str(objBaseDirectoryPath), iFileYear, iFileMonth),
+        )
+    bArtifactStoreCommitted: bool = False
+    try:
+        with BackgroundTsvWriter() as objBackgroundWriter:
+            objSheet10ProjectFrame: pd.DataFrame = build_sheet10_project_frame(pszSheet7TsvPath)
+            objSheet10CompanyFrame: pd.DataFrame = build_sheet10_company_frame(
+                pszSheet10CompanyTaskTsvPath,
+            )
+            write_frame_columns_tsv_sheet10(
+                objSheet10ProjectFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_MANHOUR],
+                pszSheet10ProjectTsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
+            )
+            write_frame_columns_tsv_sheet10(
+                objSheet10CompanyFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR],
+                pszSheet10CompanyTsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
             )
 
-    objSheet10CompanyRows: List[Tuple[str, str, str]] = []
-    with open(pszSheet10CompanyTsvPath, "r", encoding="utf-8") as objSheet10CompanyFile:
-        for pszLine in objSheet10CompanyFile:
-            pszLineContent = pszLine.rstrip("\n")
-            if pszLineContent == "":
-                continue
-            objColumns = pszLineContent.split("\t")
-            pszProjectName = ""
-            pszCompanyName = ""
-            pszManhour = ""
-            if len(objColumns) > 0:
-                pszProjectName = objColumns[0]
-            if len(objColumns) > 1:
-                pszCompanyName = objColumns[1]
-            if len(objColumns) > 2:
-                pszManhour = objColumns[2]
-            objSheet10CompanyRows.append((pszProjectName, pszCompanyName, pszManhour))
-
-    objPrefixPatternStep06: re.Pattern[str] = re.compile(r"^(P\d{5}_|[A-OQ-Z]\d{3}_)")
-
-    def extract_prefix_and_suffix_step06(pszName: str) -> tuple[str, str]:
-        objMatch = objPrefixPatternStep06.match(pszName)
-        if objMatch is None:
-            return "", pszName
-        pszPrefix = objMatch.group(1)
-        return pszPrefix, pszName[len(pszPrefix) :]
-
-    objStep07PrefixToName: Dict[str, str] = {}
-    for pszProjectName, _, _ in objSheet10CompanyRows:
-        pszNameStep07: str = pszProjectName.strip()
-        if pszNameStep07 in ["本部", "その他"] or pszNameStep07 == "":
-            continue
-        pszPrefixStep07, _ = extract_prefix_and_suffix_step06(pszNameStep07)
-        if pszPrefixStep07 and pszPrefixStep07 not in objStep07PrefixToName:
-            objStep07PrefixToName[pszPrefixStep07] = pszNameStep07
-
-    objOrgTableStep0006DatedPath: Path = objOrgTableCsvPath.with_name(
-        f"管轄PJ表_step0006_{iFileYear}年{iFileMonth:02d}月.tsv"
-    )
-    if objOrgTableStep0005Path.exists():
-        with open(objOrgTableStep0005Path, "r", encoding="utf-8") as objStep0005File:
-            objStep0005Reader = csv.reader(objStep0005File, delimiter="\t")
-            with open(objOrgTableStep0006DatedPath, "w", encoding="utf-8") as objStep0006File:
-                objStep0006Writer = csv.writer(objStep0006File, delimiter="\t", lineterminator="\n")
-                for objRow in objStep0005Reader:
-                    if len(objRow) > 1:
-                        pszNameStep0005: str = objRow[1].strip()
-                        if pszNameStep0005 not in ["本部", "その他"]:
-                            pszPrefixStep0005, pszSuffixStep0005 = extract_prefix_and_suffix_step06(pszNameStep0005)
-                            if pszPrefixStep0005 and pszPrefixStep0005 in objStep07PrefixToName:
-                                pszNameStep07: str = objStep07PrefixToName[pszPrefixStep0005]
-                                _, pszSuffixStep07 = extract_prefix_and_suffix_step06(pszNameStep07)
-                                if pszSuffixStep0005 != pszSuffixStep07:
-                                    objRow[1] = pszNameStep07
-                    objStep0006Writer.writerow(objRow)
+            objPrefixPatternStep06: re.Pattern[str] = re.compile(r"^(P\d{5}_|[A-OQ-Z]\d{3}_)")
 
-    #
-    # 3. 集計（プロジェクト別、カンパニー別）
-    #
-    objAggregatedSeconds: Dict[str, int] = {}
-    objAggregatedOrder: List[str] = []
-    for pszProjectName, pszManhour in objSheet10Rows:
-        if pszProjectName == "" and pszManhour == "":
-            continue
-        iSeconds = parse_manhour_to_seconds_sheet11(pszManhour)
-        if pszProjectName not in objAggregatedSeconds:
-            objAggregatedSeconds[pszProjectName] = 0
-            objAggregatedOrder.append(pszProjectName)
-        objAggregatedSeconds[pszProjectName] += iSeconds
-
-    objSheet11Rows: List[Tuple[str, str]] = []
-    with open(pszSheet11TsvPath, "w", encoding="utf-8") as objSheet11File:
-        for pszProjectName in objAggregatedOrder:
-            pszTotalManhour: str = format_seconds_to_manhour_sheet11(
-                objAggregatedSeconds[pszProjectName],
-            )
-            objSheet11File.write(pszProjectName + "\t" + pszTotalManhour + "\n")
-            objSheet11Rows.append((pszProjectName, pszTotalManhour))
-
-    objAggregatedCompanySeconds: Dict[str, int] = {}
-    objAggregatedCompanyOrder: List[str] = []
-    objAggregatedCompanyNames: Dict[str, List[str]] = {}
-    for pszProjectName, pszCompanyName, pszManhour in objSheet10CompanyRows:
-        if pszProjectName == "" and pszCompanyName == "" and pszManhour == "":
-            continue
-        iSeconds = parse_manhour_to_seconds_sheet11(pszManhour)
-        if pszProjectName not in objAggregatedCompanySeconds:
-            objAggregatedCompanySeconds[pszProjectName] = 0
-            objAggregatedCompanyOrder.append(pszProjectName)
-            objAggregatedCompanyNames[pszProjectName] = []
-        if pszCompanyName not in objAggregatedCompanyNames[pszProjectName]:
-            objAggregatedCompanyNames[pszProjectName].append(pszCompanyName)
-        objAggregatedCompanySeconds[pszProjectName] += iSeconds
-
-    objIncubationPriority: List[str] = [
-        "第一インキュ",
-        "第二インキュ",
-        "第三インキュ",
-        "第四インキュ",
-    ]
-    objIncubationPrioritySet: set[str] = set(objIncubationPriority)
-    #
-    # 4. 計上カンパニーのマッピング読み込み
-    #
-    objOrgTableBillingMap: Dict[str, str] = {}
-    objOrgTableGroupMap: Dict[str, str] = {}
-    objOrgTableTsvPath: Path = objOrgTableCsvPath.with_suffix(".tsv")
-    if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    pszBillingGroup: str = objRow[4].strip() if len(objRow) >= 5 else ""
-                    if pszProjectCodeOrg and (pszBillingCompany or pszBillingGroup):
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            if pszBillingCompany and pszProjectCodePrefix not in objOrgTableBillingMap:
-                                objOrgTableBillingMap[pszProjectCodePrefix] = pszBillingCompany
-                            if pszBillingGroup and pszProjectCodePrefix not in objOrgTableGroupMap:
-                                objOrgTableGroupMap[pszProjectCodePrefix] = pszBillingGroup
-    objHoldProjectLines: List[str] = []
+            def extract_prefix_and_suffix_step06(pszName: str) -> tuple[str, str]:
+                objMatch = objPrefixPatternStep06.match(pszName)
+                if objMatch is None:
+                    return "", pszName
+                pszPrefix = objMatch.group(1)
+                return pszPrefix, pszName[len(pszPrefix) :]
 
-    #
-    # 5. 計上カンパニー名の決定ロジック（select_company_name_step08）
-    #
-    def select_company_name_step08(
-        pszProjectName: str,
-        objCompanyNames: List[str],
-    ) -> str:
-        if not objCompanyNames:
-            return ""
-        pszProjectCodePrefix: str = pszProjectName.split("_", 1)[0] + "_"
-        if pszProjectCodePrefix in objOrgTableBillingMap:
-            return objOrgTableBillingMap[pszProjectCodePrefix]
-        pszProjectPrefix: str = pszProjectName[:1]
-        if pszProjectPrefix in ["A", "H"]:
-            return "本部"
-        if pszProjectPrefix in ["J", "P"]:
-            objIncubations: List[str] = [
-                name for name in objCompanyNames if name in objIncubationPrioritySet
-            ]
-            objIncubations.sort(
-                key=lambda name: objIncubationPriority.index(name),
-            )
-            if len(objIncubations) > 1:
-                objHoldProjectLines.append(
-                    f"{pszProjectName} → {' / '.join(objCompanyNames)}",
-                )
-            if objIncubations:
-                return objIncubations[0]
-        return objCompanyNames[0]
+            objStep07PrefixToName: Dict[str, str] = {}
+            for pszProjectName in pd.unique(objSheet10CompanyFrame[SHEET10_COLUMN_PROJECT]):
+                pszNameStep07: str = pszProjectName.strip()
+                if pszNameStep07 in ["本部", "その他"] or pszNameStep07 == "":
+                    continue
+                pszPrefixStep07, _ = extract_prefix_and_suffix_step06(pszNameStep07)
+                if pszPrefixStep07 and pszPrefixStep07 not in objStep07PrefixToName:
+                    objStep07PrefixToName[pszPrefixStep07] = pszNameStep07
 
-    #
-    # 6. カンパニー別合計TSVの出力
-    #
-    with open(pszSheet11CompanyTsvPath, "w", encoding="utf-8") as objSheet11CompanyFile:
-        objSheet11CompanyRows: List[Tuple[str, str, str]] = []
-        for pszProjectName in objAggregatedCompanyOrder:
-            pszTotalManhour = format_seconds_to_manhour_sheet11(
-                objAggregatedCompanySeconds[pszProjectName],
+            objOrgTableStep0006DatedPath: Path = objOrgTableCsvPath.with_name(
+                f"管轄PJ表_step0006_{iFileYear}年{iFileMonth:02d}月.tsv"
             )
-            pszCompanyName = select_company_name_step08(
-                pszProjectName,
-                objAggregatedCompanyNames.get(pszProjectName, []),
+            if objOrgTableStep0005Rows is not None:
+                with open_atomic_text_file(str(objOrgTableStep0006DatedPath), "utf-8", None) as objStep0006File:
+                    objStep0006Writer = csv.writer(objStep0006File, delimiter="\t", lineterminator="\n")
+                    for objRowStep0005 in objOrgTableStep0005Rows:
+                        objRow: List[str] = list(objRowStep0005)
+                        if len(objRow) > 1:
+                            pszNameStep0005: str = objRow[1].strip()
+                            if pszNameStep0005 not in ["本部", "その他"]:
+                                pszPrefixStep0005, pszSuffixStep0005 = extract_prefix_and_suffix_step06(pszNameStep0005)
+                                if pszPrefixStep0005 and pszPrefixStep0005 in objStep07PrefixToName:
+                                    pszNameStep07: str = objStep07PrefixToName[pszPrefixStep0005]
+                                    _, pszSuffixStep07 = extract_prefix_and_suffix_step06(pszNameStep07)
+                                    if pszSuffixStep0005 != pszSuffixStep07:
+                                        objRow[1] = pszNameStep07
+                        objStep0006Writer.writerow(objRow)
+
+            #
+            # 3. 集計（プロジェクト別、カンパニー別）
+            #    初出順を保つ groupby で秒数を合計する。
+            #
+            objSheet11Frame: pd.DataFrame = aggregate_manhour_seconds_sheet11(
+                objSheet10ProjectFrame,
+                [SHEET10_COLUMN_MANHOUR],
             )
-            objSheet11CompanyFile.write(
-                pszProjectName + "\t" + pszCompanyName + "\t" + pszTotalManhour + "\n",
+            write_frame_columns_tsv_sheet10(
+                objSheet11Frame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_MANHOUR],
+                pszSheet11TsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
             )
-            objSheet11CompanyRows.append((pszProjectName, pszCompanyName, pszTotalManhour))
 
-    #
-    # 7. インキュ重複プロジェクトの警告出力
-    #
-    if objHoldProjectLines:
-        pszInputFileLine: str = f"入力ファイル名: {objInputPath.name}"
-        pszCompanyTsvLine: str = f"対象TSV: {pszSheet10CompanyTsvPath}"
-        print(pszInputFileLine)
-        print(pszCompanyTsvLine)
-        write_debug_error(pszInputFileLine, objBaseDirectoryPath)
-        write_debug_error(pszCompanyTsvLine, objBaseDirectoryPath)
-        for pszLine in objHoldProjectLines:
-            print(pszLine)
-            write_debug_error(pszLine, objBaseDirectoryPath)
-        objMessage = (
-            "インキュがかぶっているプロジェクトがあります。\n"
-            + pszInputFileLine
-            + "\n"
-            + pszCompanyTsvLine
-            + "\n"
-            + "\n".join(objHoldProjectLines)
-        )
-        objRoot = tk.Tk()
-        objRoot.withdraw()
-        messagebox.showwarning("警告", objMessage)
-        objRoot.destroy()
+            objSheet11CompanyFrame: pd.DataFrame = aggregate_manhour_seconds_sheet11(
+                objSheet10CompanyFrame,
+                [SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR],
+            )
+            objCompanyCandidates: pd.DataFrame = build_company_candidates_sheet11(
+                objSheet10CompanyFrame,
+            )
 
-    #
-    # 8. 最終ソート・出力
-    #
-    objIndexedSheet11Rows: List[Tuple[int, Tuple[str, str]]] = list(enumerate(objSheet11Rows))
-    objIndexedSheet11Rows.sort(
-        key=lambda objItem: (
-            extract_project_prefix_sheet12(objItem[1][0]),
-            objItem[0],
-        ),
-    )
+            #
+            # 4. 計上カンパニーのマッピング読み込み
+            #    (OrgTable が 管轄PJ表.tsv と同じ内容から作成済みの辞書を使う)
+            #
+            objOrgTableForMap: OrgTable | None = objOrgTable if objOrgTable is not None else load_org_table()
+            objOrgTableBillingMap: Dict[str, str] = (
+                objOrgTableForMap.objPrefixToCompany if objOrgTableForMap is not None else {}
+            )
+            objOrgTableGroupMap: Dict[str, str] = (
+                objOrgTableForMap.objPrefixToGroup if objOrgTableForMap is not None else {}
+            )
 
-    with open(pszSheet12TsvPath, "w", encoding="utf-8") as objSheet12File:
-        for _, objRow in objIndexedSheet11Rows:
-            objSheet12File.write(objRow[0] + "\t" + objRow[1] + "\n")
+            #
+            # 5. 計上カンパニー名の決定 (全プロジェクトをまとめて決定)
+            #
+            objIncubationConflicts: pd.DataFrame
+            (
+                objSheet11CompanyFrame[SHEET10_COLUMN_COMPANY],
+                objIncubationConflicts,
+            ) = assign_company_names_step08(
+                objSheet11CompanyFrame[SHEET10_COLUMN_PROJECT],
+                objCompanyCandidates,
+                objOrgTableBillingMap,
+            )
 
-    objIndexedSheet11CompanyRows: List[Tuple[int, Tuple[str, str, str]]] = list(enumerate(objSheet11CompanyRows))
-    objIndexedSheet11CompanyRows.sort(
-        key=lambda objItem: (
-            extract_project_prefix_sheet12(objItem[1][0]),
-            objItem[0],
-        ),
-    )
+            #
+            # 6. カンパニー別合計TSVの出力
+            #
+            write_frame_columns_tsv_sheet10(
+                objSheet11CompanyFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR],
+                pszSheet11CompanyTsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
+            )
 
-    with open(pszSheet12CompanyTsvPath, "w", encoding="utf-8") as objSheet12CompanyFile:
-        for _, objRow in objIndexedSheet11CompanyRows:
-            objSheet12CompanyFile.write(objRow[0] + "\t" + objRow[1] + "\t" + objRow[2] + "\n")
+            #
+            # 7. インキュ重複プロジェクトの出力
+            #    重複の一覧は step08_インキュ重複プロジェクト.tsv に表として書き出し、
+            #    警告 (ポップアップ / エラーファイル) はその表から組み立てる。
+            #
+            pszIncubationConflictTsvPath: str = str(
+                objBaseDirectoryPath
+                / f"工数_{iFileYear}年{iFileMonth:02d}月_step08_インキュ重複プロジェクト.tsv"
+            )
+            write_incubation_conflicts_step08(objIncubationConflicts, pszIncubationConflictTsvPath)
+            if len(objIncubationConflicts) > 0:
+                objHoldProjectLines: List[str] = (
+                    objIncubationConflicts[INCUBATION_CONFLICT_COLUMNS[0]]
+                    + " → "
+                    + objIncubationConflicts[INCUBATION_CONFLICT_COLUMNS[3]]
+                ).tolist()
+                pszInputFileLine: str = f"入力ファイル名: {objInputPath.name}"
+                pszCompanyTsvLine: str = f"対象TSV: {pszSheet10CompanyTsvPath}"
+                pszConflictTsvLine: str = f"重複一覧TSV: {pszIncubationConflictTsvPath}"
+                print(pszInputFileLine)
+                print(pszCompanyTsvLine)
+                print(pszConflictTsvLine)
+                write_debug_error(pszInputFileLine, objBaseDirectoryPath)
+                write_debug_error(pszCompanyTsvLine, objBaseDirectoryPath)
+                write_debug_error(pszConflictTsvLine, objBaseDirectoryPath)
+                for pszLine in objHoldProjectLines:
+                    print(pszLine)
+                    write_debug_error(pszLine, objBaseDirectoryPath)
+                objMessage = (
+                    "インキュがかぶっているプロジェクトがあります。\n"
+                    + pszInputFileLine
+                    + "\n"
+                    + pszCompanyTsvLine
+                    + "\n"
+                    + pszConflictTsvLine
+                    + "\n"
+                    + "\n".join(objHoldProjectLines)
+                )
+                objRoot = tk.Tk()
+                objRoot.withdraw()
+                messagebox.showwarning("警告", objMessage)
+                objRoot.destroy()
+
+            #
+            # 8. 最終ソート・出力
+            #    接頭辞で安定ソートしたフレームから step09〜step11 を出力する。
+            #
+            objSheet12Frame: pd.DataFrame = sort_by_project_prefix_sheet12(objSheet11Frame)
+            objSheet12CompanyFrame: pd.DataFrame = sort_by_project_prefix_sheet12(objSheet11CompanyFrame)
+            pszColumnBillingGroup: str = "計上グループ"
+            objSheet12CompanyFrame[pszColumnBillingGroup] = [
+                objOrgTableGroupMap.get(pszProjectName.split("_", 1)[0] + "_", "")
+                for pszProjectName in objSheet12CompanyFrame[SHEET10_COLUMN_PROJECT].tolist()
+            ]
 
-    with open(pszSheet12CompanyGroupTsvPath, "w", encoding="utf-8") as objSheet12CompanyGroupFile:
-        for _, objRow in objIndexedSheet11CompanyRows:
-            pszProjectName, pszCompanyName, pszTotalManhour = objRow
-            pszProjectCodePrefix: str = pszProjectName.split("_", 1)[0] + "_"
-            pszBillingGroup: str = objOrgTableGroupMap.get(pszProjectCodePrefix, "")
-            objSheet12CompanyGroupFile.write(
-                pszProjectName
-                + "\t"
-                + pszCompanyName
-                + "\t"
-                + pszBillingGroup
-                + "\t"
-                + pszTotalManhour
-                + "\n",
+            write_frame_columns_tsv_sheet10(
+                objSheet12Frame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_MANHOUR],
+                pszSheet12TsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
+            )
+            write_frame_columns_tsv_sheet10(
+                objSheet12CompanyFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR],
+                pszSheet12CompanyTsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
+            )
+            write_frame_columns_tsv_sheet10(
+                objSheet12CompanyFrame,
+                [
+                    SHEET10_COLUMN_PROJECT,
+                    SHEET10_COLUMN_COMPANY,
+                    pszColumnBillingGroup,
+                    SHEET10_COLUMN_MANHOUR,
+                ],
+                pszSheet12CompanyGroupTsvPath,
+                objArtifactStore,
+                objBackgroundWriter,
             )
 
-    pszStep10OutputPath: str = str(
-        objBaseDirectoryPath
-        / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの工数.tsv"
-    )
-    pszStep10CompanyOutputPath: str = str(
-        objBaseDirectoryPath
-        / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの計上カンパニー名_工数.tsv"
-    )
-    pszStep10CompanyGroupOutputPath: str = str(
-        objBaseDirectoryPath
-        / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの計上カンパニー名_計上グループ_工数.tsv"
-    )
-    pszStep11CompanyOutputPath: str = str(
-        objBaseDirectoryPath
-        / f"工数_{iFileYear}年{iFileMonth:02d}月_step11_各プロジェクトの計上カンパニー名_工数_カンパニーの工数.tsv"
-    )
-    with open(pszStep10OutputPath, "w", encoding="utf-8") as objStep10File:
-        for _, (pszProjectName, pszTotalManhour) in objIndexedSheet11Rows:
-            if str(pszProjectName).startswith(("A", "H")):
-                continue
-            objStep10File.write(pszProjectName + "\t" + pszTotalManhour + "\n")
-    with open(pszStep10CompanyOutputPath, "w", encoding="utf-8") as objStep10CompanyFile:
-        for _, (pszProjectName, pszCompanyName, pszTotalManhour) in objIndexedSheet11CompanyRows:
-            if str(pszProjectName).startswith(("A", "H")):
-                continue
-            objStep10CompanyFile.write(
-                pszProjectName + "\t" + pszCompanyName + "\t" + pszTotalManhour + "\n"
+            pszStep10OutputPath: str = str(
+                objBaseDirectoryPath
+                / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの工数.tsv"
             )
-    with open(pszStep10CompanyGroupOutputPath, "w", encoding="utf-8") as objStep10CompanyGroupFile:
-        for _, (pszProjectName, pszCompanyName, pszTotalManhour) in objIndexedSheet11CompanyRows:
-            if str(pszProjectName).startswith(("A", "H")):
-                continue
-            pszProjectCodePrefix_step10: str = pszProjectName.split("_", 1)[0] + "_"
-            pszBillingGroup_step10: str = objOrgTableGroupMap.get(pszProjectCodePrefix_step10, "")
-            objStep10CompanyGroupFile.write(
-                pszProjectName
-                + "\t"
-                + pszCompanyName
-                + "\t"
-                + pszBillingGroup_step10
-                + "\t"
-                + pszTotalManhour
-                + "\n"
+            pszStep10CompanyOutputPath: str = str(
+                objBaseDirectoryPath
+                / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの計上カンパニー名_工数.tsv"
             )
-    with open(pszStep11CompanyOutputPath, "w", encoding="utf-8") as objStep11CompanyFile:
-        pszZeroManhour: str = "0:00:00"
-        for _, (pszProjectName, pszCompanyName, pszTotalManhour) in objIndexedSheet11CompanyRows:
-            if str(pszProjectName).startswith(("A", "H")):
-                continue
-            pszFirstIncubation: str = pszZeroManhour
-            pszSecondIncubation: str = pszZeroManhour
-            pszThirdIncubation: str = pszZeroManhour
-            pszFourthIncubation: str = pszZeroManhour
-            pszBusinessDevelopment: str = pszZeroManhour
-            bIsCompanyProject: bool = re.match(r"^C\d{3}_", str(pszProjectName)) is not None
-            if not bIsCompanyProject:
-                if pszCompanyName == "第一インキュ":
-                    pszFirstIncubation = pszTotalManhour
-                elif pszCompanyName == "第二インキュ":
-                    pszSecondIncubation = pszTotalManhour
-                elif pszCompanyName == "第三インキュ":
-                    pszThirdIncubation = pszTotalManhour
-                elif pszCompanyName == "第四インキュ":
-                    pszFourthIncubation = pszTotalManhour
-                elif pszCompanyName == "事業開発":
-                    pszBusinessDevelopment = pszTotalManhour
-            objStep11CompanyFile.write(
-                pszProjectName
-                + "\t"
-                + pszCompanyName
-                + "\t"
-                + pszTotalManhour
-                + "\t"
-                + pszFirstIncubation
-                + "\t"
-                + pszSecondIncubation
-                + "\t"
-                + pszThirdIncubation
-                + "\t"
-                + pszFourthIncubation
-                + "\t"
-                + pszBusinessDevelopment
-                + "\n"
+            pszStep10CompanyGroupOutputPath: str = str(
+                objBaseDirectoryPath
+                / f"工数_{iFileYear}年{iFileMonth:02d}月_step10_各プロジェクトの計上カンパニー名_計上グループ_工数.tsv"
+            )
+            pszStep11CompanyOutputPath: str = str(
+                objBaseDirectoryPath
+                / f"工数_{iFileYear}年{iFileMonth:02d}月_step11_各プロジェクトの計上カンパニー名_工数_カンパニーの工数.tsv"
+            )
+            # step10 / step11 は A / H で始まるプロジェクトを除外する
+            objStep10Frame: pd.DataFrame = objSheet12Frame.loc[
+                ~objSheet12Frame[SHEET10_COLUMN_PROJECT].str.startswith(("A", "H"))
+            ]
+            objStep10CompanyFrame: pd.DataFrame = objSheet12CompanyFrame.loc[
+                ~objSheet12CompanyFrame[SHEET10_COLUMN_PROJECT].str.startswith(("A", "H"))
+            ].copy()
+            write_frame_columns_tsv_sheet10(
+                objStep10Frame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_MANHOUR],
+                pszStep10OutputPath,
+                objBackgroundWriter=objBackgroundWriter,
+            )
+            write_frame_columns_tsv_sheet10(
+                objStep10CompanyFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR],
+                pszStep10CompanyOutputPath,
+                objBackgroundWriter=objBackgroundWriter,
+            )
+            write_frame_columns_tsv_sheet10(
+                objStep10CompanyFrame,
+                [
+                    SHEET10_COLUMN_PROJECT,
+                    SHEET10_COLUMN_COMPANY,
+                    pszColumnBillingGroup,
+                    SHEET10_COLUMN_MANHOUR,
+                ],
+                pszStep10CompanyGroupOutputPath,
+                objBackgroundWriter=objBackgroundWriter,
             )
 
-    # Staff_List.tsv の処理は削除
+            # step11: 計上カンパニー名に応じて、合計工数を該当カンパニー列へ振り分ける
+            #         (C\d{3}_ で始まるカンパニープロジェクトは振り分けない)
+            pszZeroManhour: str = "0:00:00"
+            objStep11ColumnNames: List[Tuple[str, str]] = [
+                ("第一インキュ", "第一インキュ工数"),
+                ("第二インキュ", "第二インキュ工数"),
+                ("第三インキュ", "第三インキュ工数"),
+                ("第四インキュ", "第四インキュ工数"),
+                ("事業開発", "事業開発工数"),
+            ]
+            objIsCompanyProject: pd.Series = objStep10CompanyFrame[SHEET10_COLUMN_PROJECT].str.match(
+                r"^C\d{3}_",
+            )
+            for pszCompanyNameStep11, pszColumnNameStep11 in objStep11ColumnNames:
+                objStep10CompanyFrame[pszColumnNameStep11] = objStep10CompanyFrame[
+                    SHEET10_COLUMN_MANHOUR
+                ].where(
+                    ~objIsCompanyProject
+                    & objStep10CompanyFrame[SHEET10_COLUMN_COMPANY].eq(pszCompanyNameStep11),
+                    pszZeroManhour,
+                )
+            write_frame_columns_tsv_sheet10(
+                objStep10CompanyFrame,
+                [SHEET10_COLUMN_PROJECT, SHEET10_COLUMN_COMPANY, SHEET10_COLUMN_MANHOUR]
+                + [pszColumnNameStep11 for _, pszColumnNameStep11 in objStep11ColumnNames],
+                pszStep11CompanyOutputPath,
+                objBackgroundWriter=objBackgroundWriter,
+            )
+
+            # Staff_List.tsv の処理は削除
 
-    pszRawDataTsvPath: str = str(objBaseDirectoryPath / "Raw_Data.tsv")
+            pszRawDataTsvPath: str = str(objBaseDirectoryPath / "Raw_Data.tsv")
+
+            # With_Salary.tsv の処理は削除
+
+        # with を抜けた時点で、作業スレッドの書き込みはすべて終わっている
+
+        #
+        # 9. アーティファクトストアへの格納
+        #    埋め込みスクリプトが作った中間 TSV (次の段階が読み込むもの) を
+        #    すべての段階が終わってからストアへ取り込み、ファイルは削除する。
+        #    最終成果物の step10 / step11 とインキュ重複一覧はファイルのまま残す。
+        #    ファイルの削除は、ストアへの保存を確定してから行う
+        #    (途中で失敗して保存を取り消した場合も、ファイルは残る)。
+        #
+        if objArtifactStore is not None:
+            objIntermediateTsvPaths: List[str] = [
+                pszStep1TsvPath,
+                pszStep2TsvPath,
+                pszStep3TsvPath,
+                pszSheet4TsvPath,
+                pszSheet4UniqueStaffCodeTsvPath,
+                pszSheet4StaffCodeRangeTsvPath,
+                pszSheet6TsvPath,
+                pszSheet7TsvPath,
+                pszSheet8TsvPath,
+                pszSheet9TsvPath,
+                pszSheet10StaffCompanyTsvPath,
+                pszSheet10CompanyTaskTsvPath,
+                str(objOrgTableStep0006DatedPath),
+            ]
+            objStoredTsvPaths: List[str] = []
+            for pszIntermediateTsvPath in objIntermediateTsvPaths:
+                if os.path.isfile(pszIntermediateTsvPath):
+                    objArtifactStore.put_file(pszIntermediateTsvPath, bRemoveFile=False)
+                    objStoredTsvPaths.append(pszIntermediateTsvPath)
+            objArtifactStore.close()
+            bArtifactStoreCommitted = True
+            for pszStoredTsvPath in objStoredTsvPaths:
+                os.remove(pszStoredTsvPath)
+            print(f"OK: stored intermediate files: {objArtifactStore.pszStorePath}")
+    finally:
+        # 途中で失敗した場合は、ストアへの保存を取り消して閉じる
+        if objArtifactStore is not None and not bArtifactStoreCommitted:
+            objArtifactStore.close(False)
 
-    # With_Salary.tsv の処理は削除
+    #
+    # 10. 出力マニフェストへの記録
+    #     フォルダを走査せず、この処理で作成したファイルだけを記録・表示する。
+    #     (ストアへ取り込んだファイルや、重複が無く作成しなかった一覧は
+    #      存在しないため記録されない)
+    #
+    objCreatedFiles: List[Tuple[str, str | None]] = [
+        (pszStep1TsvPath, "step01"),
+        (pszStep2TsvPath, "step02"),
+        (pszStep3TsvPath, "step03"),
+        (pszSheet4TsvPath, None),
+        (pszSheet4UniqueStaffCodeTsvPath, "step04"),
+        (pszSheet4StaffCodeRangeTsvPath, "step04"),
+        (pszSheet6TsvPath, None),
+        (pszSheet7TsvPath, None),
+        (pszSheet8TsvPath, None),
+        (pszSheet9TsvPath, None),
+        (pszSheet10StaffCompanyTsvPath, None),
+        (pszSheet10CompanyTaskTsvPath, None),
+        (pszSheet10ProjectTsvPath, None),
+        (pszSheet10CompanyTsvPath, None),
+        (pszSheet11TsvPath, None),
+        (pszSheet11CompanyTsvPath, None),
+        (pszIncubationConflictTsvPath, None),
+        (pszSheet12TsvPath, None),
+        (pszSheet12CompanyTsvPath, None),
+        (pszSheet12CompanyGroupTsvPath, None),
+        (pszStep10OutputPath, None),
+        (pszStep10CompanyOutputPath, None),
+        (pszStep10CompanyGroupOutputPath, None),
+        (pszStep11CompanyOutputPath, None),
+        (str(objOrgTableStep0006DatedPath), None),
+    ]
+    if objOrgTable is not None:
+        objCreatedFiles.append((str(objOrgTableStep0004Path), None))
+        objCreatedFiles.append((str(objOrgTableStep0005Path), None))
+    if objArtifactStore is not None:
+        objCreatedFiles.append((objArtifactStore.pszStorePath, "artifact_store"))
+    objCreatedFilePaths: List[str] = []
+    for pszCreatedFilePath, pszCreatedFileStage in objCreatedFiles:
+        if os.path.isfile(pszCreatedFilePath):
+            objOutputManifest.add(pszCreatedFilePath, pszCreatedFileStage)
+            objCreatedFilePaths.append(os.path.abspath(pszCreatedFilePath))
 
     print("OK: created files")
-    for objTsvPath in sorted(objBaseDirectoryPath.glob("*.tsv")):
-        print(str(objTsvPath))
+    for pszCreatedFilePath in sorted(objCreatedFilePaths):
+        print(pszCreatedFilePath)
 
     return 0
 
 
 
 def load_org_table_billing_map_for_step11() -> Dict[str, str]:
-    objOrgTableCsvPath: Path = Path(__file__).resolve().parent / "管轄PJ表.csv"
-    objOrgTableTsvPath: Path = objOrgTableCsvPath.with_suffix(".tsv")
-    objOrgTableBillingMapExact: Dict[str, str] = {}
-    objOrgTableBillingMapPrefix: Dict[str, str] = {}
-    if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    if pszProjectCodeOrg and pszBillingCompany:
-                        objOrgTableBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            objOrgTableBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
-    return {**objOrgTableBillingMapPrefix, **objOrgTableBillingMapExact}
-
-
-def write_step11_from_step10_only(pszStep10Path: str) -> int:
+    # PJ コード (完全一致) を接頭辞より優先した 計上カンパニー の辞書
+    objOrgTable: OrgTable | None = load_org_table()
+    if objOrgTable is None:
+        return {}
+    return objOrgTable.objBillingMapForStep11
+
+
+def write_step11_from_step10_only(
+    pszStep10Path: str,
+    objOutputManifest: OutputManifest | None = None,
+) -> int:
     objStep10Path: Path = Path(pszStep10Path).resolve()
     objBaseDirectoryPath: Path = objStep10Path.parent
     objMatch: re.Match[str] | None = re.match(
@@ -4221,10 +4768,10 @@ def write_step11_from_step10_only(pszStep10Path: str) -> int:
     pszStep11OutputPath: Path = objBaseDirectoryPath / f"工数_{iFileYear}年{iFileMonth:02d}月_step11_各プロジェクトの計上カンパニー名_工数_カンパニーの工数.tsv"
     objBillingMap: Dict[str, str] = load_org_table_billing_map_for_step11()
 
-    with open(objStep10Path, "r", encoding="utf-8") as objStep10File, open(
-        pszStep11OutputPath,
-        "w",
-        encoding="utf-8",
+    with open(objStep10Path, "r", encoding="utf-8") as objStep10File, open_atomic_text_file(
+        str(pszStep11OutputPath),
+        "utf-8",
+        None,
     ) as objStep11File:
         pszZeroManhour: str = "0:00:00"
         for pszLine in objStep10File:
@@ -4280,37 +4827,13 @@ def write_step11_from_step10_only(pszStep10Path: str) -> int:
                 + pszBusinessDevelopment
                 + "\n"
             )
+    if objOutputManifest is not None:
+        objOutputManifest.add(str(pszStep11OutputPath))
     print(f"OK: created file {pszStep11OutputPath}")
     return 0
 
 
 
-def load_org_table_billing_map_for_step11() -> Dict[str, str]:
-    objOrgTableCsvPath: Path = Path(__file__).resolve().parent / "管轄PJ表.csv"
-    objOrgTableTsvPath: Path = objOrgTableCsvPath.with_suffix(".tsv")
-    objOrgTableBillingMapExact: Dict[str, str] = {}
-    objOrgTableBillingMapPrefix: Dict[str, str] = {}
-    if objOrgTableTsvPath.exists():
-        with open(objOrgTableTsvPath, "r", encoding="utf-8") as objOrgTableFile:
-            objOrgTableReader = csv.reader(objOrgTableFile, delimiter="\t")
-            for objRow in objOrgTableReader:
-                if len(objRow) >= 4:
-                    pszProjectCodeOrg: str = objRow[2].strip()
-                    pszBillingCompany: str = objRow[3].strip()
-                    if pszProjectCodeOrg and pszBillingCompany:
-                        objOrgTableBillingMapExact.setdefault(pszProjectCodeOrg, pszBillingCompany)
-                        pszProjectCodePrefixMatchP: re.Match[str] | None = re.match(r"^(P\d{5}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefixMatchOther: re.Match[str] | None = re.match(r"^([A-OQ-Z]\d{3}_)", pszProjectCodeOrg)
-                        pszProjectCodePrefix: str = ""
-                        if pszProjectCodePrefixMatchP is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchP.group(1)
-                        elif pszProjectCodePrefixMatchOther is not None:
-                            pszProjectCodePrefix = pszProjectCodePrefixMatchOther.group(1)
-                        if pszProjectCodePrefix:
-                            objOrgTableBillingMapPrefix.setdefault(pszProjectCodePrefix, pszBillingCompany)
-    return {**objOrgTableBillingMapPrefix, **objOrgTableBillingMapExact}
-
-
 def is_step10_tsv_file(pszPath: str) -> bool:
     return re.match(r".*工数_\d{4}年\d{2}月_step10_各プロジェクトの工数\.tsv$", pszPath) is not None
 
@@ -4327,7 +4850,29 @@ def main() -> int:
         nargs="+",
         help="Input Jobcan manhour CSV file paths",
     )
+    objParser.add_argument(
+        "--artifact-store",
+        dest="bUseArtifactStore",
+        action="store_true",
+        help="Store intermediate TSV files in one SQLite file per month",
+    )
+    objParser.add_argument(
+        "--manifest",
+        dest="pszManifestPath",
+        default=None,
+        help="Write a JSON manifest of the created files to this path",
+    )
+    objParser.add_argument(
+        "--parsed-cache-dir",
+        dest="pszParsedCacheDirectoryPath",
+        default=None,
+        help="Reuse parsed Jobcan CSV rows cached in this directory (keyed by file content)",
+    )
     objArgs: argparse.Namespace = objParser.parse_args()
+    objOutputManifest: OutputManifest = OutputManifest(os.path.basename(__file__))
+    objParsedInputCache: ParsedInputCache | None = None
+    if objArgs.pszParsedCacheDirectoryPath is not None:
+        objParsedInputCache = ParsedInputCache(objArgs.pszParsedCacheDirectoryPath)
 
     convert_org_table_tsv(Path(__file__).resolve().parent)
 
@@ -4351,7 +4896,10 @@ def main() -> int:
     iExitCode: int = 0
     for pszStep10TsvPath in objStep10TsvFiles:
         try:
-            iResultStep10Only: int = write_step11_from_step10_only(pszStep10TsvPath)
+            iResultStep10Only: int = write_step11_from_step10_only(
+                pszStep10TsvPath,
+                objOutputManifest,
+            )
         except Exception as objException:
             print(
                 "Error: failed to process step10 TSV input: {0}. Detail = {1}".format(
@@ -4366,7 +4914,12 @@ def main() -> int:
 
     for pszInputManhourCsvPath in objManhourCsvFiles:
         try:
-            iResult: int = process_single_input(pszInputManhourCsvPath)
+            iResult: int = process_single_input(
+                pszInputManhourCsvPath,
+                objArgs.bUseArtifactStore,
+                objOutputManifest,
+                objParsedInputCache,
+            )
         except Exception as objException:
             print(
                 "Error: failed to process input file: {0}. Detail = {1}".format(
@@ -4379,6 +4932,8 @@ def main() -> int:
         if iResult != 0:
             iExitCode = 1
 
+    if objArgs.pszManifestPath is not None:
+        objOutputManifest.write(objArgs.pszManifestPath)
     return iExitCode
 
 
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# manhour_artifact_store.py
+#
+# 役割:
+#   make_manhour_to_sheet8_01_0001.py が 1 か月分の処理で作る
+#   中間 TSV (工数_yyyy年mm月.tsv, step04〜step09, 管轄PJ表_step0006 など) を、
+#   月ごとに 1 つの SQLite ファイル
+#       工数_yyyy年mm月_artifacts.sqlite
+#   へ名前付きの表としてまとめて保存する。
+#
+#   ・各表は「ファイル名」をキーとし、段階名 (step04 など)・行数・
+#     TSV の本文 (改行を含めてそのまま) を持つ。
+#   ・保存は 1 回の処理につき 1 トランザクションで行い、
+#     ファイルの作成・削除や fsync の回数を抑える。
+#     中間ファイルは入力から再作成できるため、
+#     ジャーナルはメモリ上に置き、同期書き込みも行わない。
+#   ・TSV が必要になったときだけ書き出す (遅延エクスポート)。
+#     書き出した TSV は、ストアを使わない場合に作られるファイルと
+#     バイト単位で同一になる (改行コードも、ファイルへ書く場合と
+#     同じ変換をしてから保存する)。
+#
+# 実行例 (エクスポート):
+#   python src/manhour_artifact_store.py 工数_2025年09月_artifacts.sqlite
+#   python src/manhour_artifact_store.py 工数_2025年09月_artifacts.sqlite --export 工数_2025年09月_step04_yyyy_mm_dd.tsv
+#   python src/manhour_artifact_store.py 工数_2025年09月_artifacts.sqlite --export-all --output-dir out
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from typing import List, Optional, Tuple
+
+
+ARTIFACT_STORE_FILE_SUFFIX: str = "_artifacts.sqlite"
+
+_OBJ_STAGE_NAME_PATTERN: re.Pattern[str] = re.compile(r"_(step\d+)")
+
+
+def build_artifact_store_path(pszDirectoryPath: str, iYear: int, iMonth: int) -> str:
+    return os.path.join(
+        pszDirectoryPath,
+        f"工数_{iYear}年{iMonth:02d}月{ARTIFACT_STORE_FILE_SUFFIX}",
+    )
+
+
+def extract_stage_name(pszArtifactName: str) -> str:
+    # ファイル名中の最初の "_stepNN" を段階名とする (無ければ空文字)
+    objMatch: Optional[re.Match[str]] = _OBJ_STAGE_NAME_PATTERN.search(pszArtifactName)
+    if objMatch is None:
+        return ""
+    return objMatch.group(1)
+
+
+def count_text_lines(pszText: str) -> int:
+    if pszText == "":
+        return 0
+    return pszText.count("\n") + (0 if pszText.endswith("\n") else 1)
+
+
+def translate_newlines(pszText: str, pszNewline: Optional[str]) -> str:
+    # open(..., "w", newline=pszNewline) で書いた場合と同じ改行コードにする
+    pszLineSeparator: str = os.linesep if pszNewline is None else pszNewline
+    if pszLineSeparator in ("", "\n"):
+        return pszText
+    return pszText.replace("\n", pszLineSeparator)
+
+
+class ManhourArtifactStore:
+    def __init__(self, pszStorePath: str) -> None:
+        self.pszStorePath: str = pszStorePath
+        self.objConnection: sqlite3.Connection = sqlite3.connect(pszStorePath)
+        self.objConnection.execute("PRAGMA journal_mode=MEMORY")
+        self.objConnection.execute("PRAGMA synchronous=OFF")
+        self.objConnection.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            " name TEXT PRIMARY KEY,"
+            " stage TEXT NOT NULL,"
+            " line_count INTEGER NOT NULL,"
+            " content TEXT NOT NULL"
+            ")"
+        )
+
+    def __enter__(self) -> "ManhourArtifactStore":
+        return self
+
+    def __exit__(self, objExcType: object, objExc: object, objTraceback: object) -> None:
+        self.close(objExcType is None)
+
+    # -----------------------------------------------------------
+    # 保存
+    # -----------------------------------------------------------
+    def put_text(self, pszArtifactName: str, pszText: str, pszNewline: Optional[str] = "") -> None:
+        # pszNewline は open() の newline と同じ意味で、ファイルへ書いた場合の
+        # 改行コードに変換してから保存する (None の場合は os.linesep)。
+        # エクスポートは変換せずに書き出すため、ファイルと同じバイト列になる。
+        pszText = translate_newlines(pszText, pszNewline)
+        self.objConnection.execute(
+            "INSERT OR REPLACE INTO artifacts (name, stage, line_count, content)"
+            " VALUES (?, ?, ?, ?)",
+            (
+                pszArtifactName,
+                extract_stage_name(pszArtifactName),
+                count_text_lines(pszText),
+                pszText,
+            ),
+        )
+
+    def put_file(self, pszFilePath: str, bRemoveFile: bool = True) -> None:
+        # 既存の TSV を取り込み、既定では元のファイルを削除する。
+        # 改行コードを変えないよう、newline="" で読み込む。
+        # 削除は保存の確定 (close) より前に行われるため、
+        # 取り消し得る場合は bRemoveFile=False とし、close の後で削除すること。
+        with open(pszFilePath, "r", encoding="utf-8", newline="") as objFile:
+            pszText: str = objFile.read()
+        self.put_text(os.path.basename(pszFilePath), pszText)
+        if bRemoveFile:
+            os.remove(pszFilePath)
+
+    # -----------------------------------------------------------
+    # 参照・エクスポート
+    # -----------------------------------------------------------
+    def list_artifacts(self) -> List[Tuple[str, str, int]]:
+        return list(
+            self.objConnection.execute(
+                "SELECT name, stage, line_count FROM artifacts ORDER BY name"
+            )
+        )
+
+    def get_text(self, pszArtifactName: str) -> str:
+        objRow: Optional[Tuple[str]] = self.objConnection.execute(
+            "SELECT content FROM artifacts WHERE name = ?",
+            (pszArtifactName,),
+        ).fetchone()
+        if objRow is None:
+            raise KeyError(f"Artifact not found: {pszArtifactName}")
+        return objRow[0]
+
+    def export_artifact(self, pszArtifactName: str, pszOutputDirectoryPath: str) -> str:
+        pszOutputPath: str = os.path.join(pszOutputDirectoryPath, pszArtifactName)
+        with open(pszOutputPath, "w", encoding="utf-8", newline="") as objFile:
+            objFile.write(self.get_text(pszArtifactName))
+        return pszOutputPath
+
+    def close(self, bCommit: bool = True) -> None:
+        if bCommit:
+            self.objConnection.commit()
+        else:
+            self.objConnection.rollback()
+        self.objConnection.close()
+
+
+def main() -> int:
+    objParser: argparse.ArgumentParser = argparse.ArgumentParser()
+    objParser.add_argument(
+        "pszStorePath",
+        help="Artifact store file (工数_yyyy年mm月_artifacts.sqlite)",
+    )
+    objParser.add_argument(
+        "--export",
+        dest="objExportNames",
+        nargs="+",
+        default=[],
+        help="Artifact names to export as TSV",
+    )
+    objParser.add_argument(
+        "--export-all",
+        dest="bExportAll",
+        action="store_true",
+        help="Export every artifact as TSV",
+    )
+    objParser.add_argument(
+        "--output-dir",
+        dest="pszOutputDirectoryPath",
+        default=None,
+        help="Output directory (default: the directory of the store)",
+    )
+    objArgs: argparse.Namespace = objParser.parse_args()
+
+    if not os.path.isfile(objArgs.pszStorePath):
+        print(f"Error: artifact store not found: {objArgs.pszStorePath}")
+        return 1
+    pszOutputDirectoryPath: str = objArgs.pszOutputDirectoryPath or os.path.dirname(
+        os.path.abspath(objArgs.pszStorePath)
+    )
+
+    with ManhourArtifactStore(objArgs.pszStorePath) as objStore:
+        objArtifacts: List[Tuple[str, str, int]] = objStore.list_artifacts()
+        objExportNames: List[str] = list(objArgs.objExportNames)
+        if objArgs.bExportAll:
+            objExportNames = [pszName for pszName, _, _ in objArtifacts]
+        if not objExportNames:
+            for pszName, pszStage, iLineCount in objArtifacts:
+                print(f"{pszStage or '-'}\t{iLineCount}\t{pszName}")
+            return 0
+        os.makedirs(pszOutputDirectoryPath, exist_ok=True)
+        iExitCode: int = 0
+        for pszName in objExportNames:
+            try:
+                print(objStore.export_artifact(pszName, pszOutputDirectoryPath))
+            except KeyError as objException:
+                print(f"Error: {objException.args[0]}")
+                iExitCode = 1
+        return iExitCode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# manhour_time_kernel.py
+#
+# 役割:
+#   工数 (H:MM:SS / H:MM) 文字列と秒数の相互変換、および
+#   金額などの数値文字列化を、各スクリプトで共通に使う
+#   カーネルとしてまとめたモジュール。
+#
+#   ・ベクトル化版
+#       Series / 配列をまとめて秒数 (int64) に変換し、
+#       有効判定マスクも同時に返す。
+#       秒数配列を H:MM:SS 文字列配列にまとめて変換する。
+#   ・スカラー版
+#       1 値ずつ変換する関数。functools.lru_cache で
+#       同一文字列・同一値の再計算を省く。
+#
+#   変換モード (pszMode) は既存の各関数の挙動をそのまま再現する。
+#       TIME_PARSE_MODE_LENIENT
+#           前後空白を除去し、H:MM:SS または H:MM を int() で解釈する。
+#           (convert_time_string_to_seconds /
+#            convert_time_text_to_seconds_for_project_list 相当)
+#       TIME_PARSE_MODE_HMS_ONLY
+#           前後空白を除去し、H:MM:SS のみを int() で解釈する。
+#           (SellGeneralAdminCost_Allocation_Cmd.parse_time_to_seconds 相当)
+#       TIME_PARSE_MODE_STRICT
+#           ^(\d+):([0-5]\d):([0-5]\d)$ に一致するもののみ有効とする。
+#           (parse_manhour_to_seconds_sheet11 相当)
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+TIME_PARSE_MODE_LENIENT: str = "lenient"
+TIME_PARSE_MODE_HMS_ONLY: str = "hms_only"
+TIME_PARSE_MODE_STRICT: str = "strict"
+
+# ///////////////////////////////////////////////////////////////
+# スカラー版キャッシュの上限件数。
+# 1 か月分の工数で出現する時間文字列の種類は数千程度なので、
+# 十分な余裕を持たせた値とする。
+# ///////////////////////////////////////////////////////////////
+TIME_KERNEL_CACHE_SIZE: int = 65536
+
+# ///////////////////////////////////////////////////////////////
+# ベクトル化版の高速経路で使う正規表現。
+# ASCII 数字のみの H:MM:SS は、どのモードでも同じ秒数になるため
+# この形に一致する値はまとめて数値演算で処理し、
+# それ以外 (H:MM や空白付き、全角数字など) はスカラー版に回す。
+# 時間の桁数は int64 を溢れない範囲に制限する。
+# ///////////////////////////////////////////////////////////////
+_PSZ_CANONICAL_TIME_PATTERN: str = r"^([0-9]{1,12}):([0-5][0-9]):([0-5][0-9])$"
+_OBJ_STRICT_TIME_PATTERN: re.Pattern[str] = re.compile(r"^(\d+):([0-5]\d):([0-5]\d)$")
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# スカラー版: 時間文字列 → 秒数
+#
+#   不正な形式や空文字の場合は None を返す。
+#   呼び出し側は None を 0 秒として扱うか、例外にするかを選ぶ。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=TIME_KERNEL_CACHE_SIZE)
+def parse_time_text_to_seconds_cached(
+    pszTimeText: str,
+    pszMode: str = TIME_PARSE_MODE_LENIENT,
+) -> Optional[int]:
+    if pszMode == TIME_PARSE_MODE_STRICT:
+        objMatch: Optional[re.Match[str]] = _OBJ_STRICT_TIME_PATTERN.match(pszTimeText)
+        if objMatch is None:
+            return None
+        return (
+            int(objMatch.group(1)) * 3600
+            + int(objMatch.group(2)) * 60
+            + int(objMatch.group(3))
+        )
+
+    pszWork: str = pszTimeText.strip()
+    if len(pszWork) == 0:
+        return None
+
+    objParts: List[str] = pszWork.split(":")
+    try:
+        if len(objParts) == 3:
+            iHour: int = int(objParts[0])
+            iMinute: int = int(objParts[1])
+            iSecond: int = int(objParts[2])
+        elif len(objParts) == 2 and pszMode == TIME_PARSE_MODE_LENIENT:
+            iHour = int(objParts[0])
+            iMinute = int(objParts[1])
+            iSecond = 0
+        else:
+            return None
+    except ValueError:
+        return None
+
+    return iHour * 3600 + iMinute * 60 + iSecond
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# スカラー版: 秒数 → H:MM:SS
+#
+#   24 時間を超えても、そのまま総時間数として出力する。
+#   負の値は ValueError とする (0 や空文字への置き換えは呼び出し側で行う)。
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=TIME_KERNEL_CACHE_SIZE)
+def format_seconds_to_time_text_cached(iTotalSeconds: int) -> str:
+    if iTotalSeconds < 0:
+        raise ValueError("Total seconds must not be negative.")
+    iHour: int = iTotalSeconds // 3600
+    iMinute: int = (iTotalSeconds % 3600) // 60
+    iSecond: int = iTotalSeconds % 60
+    return f"{iHour}:{iMinute:02d}:{iSecond:02d}"
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# スカラー版: 数値 → 文字列
+#
+#   整数とみなせる値 (誤差 1e-7 未満) は整数表記、
+#   それ以外は小数 6 桁で出力し、末尾の 0 と "." を取り除く。
+#   (SellGeneralAdminCost_Allocation_Cmd.format_number 相当)
+#
+#   金額はほぼすべて異なる値になり、キャッシュがほとんど当たらず
+#   かえって遅くなるため、この関数のみ LRU キャッシュを付けない。
+#   まとめて変換できる場合は format_number_values を使う。
+#
+# ///////////////////////////////////////////////////////////////
+def format_number_text(fValue: float) -> str:
+    if abs(fValue - round(fValue)) < 0.0000001:
+        return str(int(round(fValue)))
+    pszText: str = f"{fValue:.6f}"
+    pszText = pszText.rstrip("0").rstrip(".")
+    return pszText
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ベクトル化版: 時間文字列の並び → (秒数配列, 有効マスク)
+#
+#   ・pd.factorize で重複を除き、種類ごとに 1 回だけ変換する。
+#     None / NaN は不正値 (秒数 0、マスク False) として扱う。
+#   ・ASCII の H:MM:SS は str.extract と整数演算でまとめて変換する。
+#   ・それ以外の種類のみスカラー版 (LRU キャッシュ付き) で変換する。
+#   不正値の秒数は 0、マスクは False とする。
+#
+# ///////////////////////////////////////////////////////////////
+def parse_time_values_to_seconds(
+    objValues: Any,
+    pszMode: str = TIME_PARSE_MODE_LENIENT,
+) -> Tuple[np.ndarray, np.ndarray]:
+    objValueArray: np.ndarray = np.asarray(objValues, dtype=object).reshape(-1)
+    if objValueArray.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+    objCodes: np.ndarray
+    objUniqueValues: Any
+    objCodes, objUniqueValues = pd.factorize(objValueArray, sort=False)
+    objUniqueSeries: pd.Series = pd.Series(
+        [str(objValue) for objValue in objUniqueValues],
+        dtype=object,
+    )
+
+    objUniqueSeconds: np.ndarray = np.zeros(len(objUniqueSeries), dtype=np.int64)
+    objUniqueValid: np.ndarray = np.zeros(len(objUniqueSeries), dtype=bool)
+
+    # ----------------------------------------------------------------
+    # 高速経路: ASCII の H:MM:SS をまとめて数値化
+    # ----------------------------------------------------------------
+    objExtracted: pd.DataFrame = objUniqueSeries.str.extract(_PSZ_CANONICAL_TIME_PATTERN)
+    objCanonicalMask: np.ndarray = objExtracted[0].notna().to_numpy()
+    if objCanonicalMask.any():
+        objCanonicalParts: pd.DataFrame = objExtracted[objCanonicalMask].astype(np.int64)
+        objUniqueSeconds[objCanonicalMask] = (
+            objCanonicalParts[0].to_numpy() * 3600
+            + objCanonicalParts[1].to_numpy() * 60
+            + objCanonicalParts[2].to_numpy()
+        )
+        objUniqueValid[objCanonicalMask] = True
+
+    # ----------------------------------------------------------------
+    # 残りの種類はスカラー版で変換
+    # ----------------------------------------------------------------
+    objFallbackIndices: np.ndarray = np.flatnonzero(~objCanonicalMask)
+    for iUniqueIndex in objFallbackIndices:
+        objSeconds: Optional[int] = parse_time_text_to_seconds_cached(
+            objUniqueSeries.iat[iUniqueIndex],
+            pszMode,
+        )
+        if objSeconds is not None:
+            objUniqueSeconds[iUniqueIndex] = objSeconds
+            objUniqueValid[iUniqueIndex] = True
+
+    # 欠損値 (コード -1) 用に末尾へ「不正値」を 1 件追加してから展開する
+    objUniqueSeconds = np.append(objUniqueSeconds, np.int64(0))
+    objUniqueValid = np.append(objUniqueValid, False)
+    return objUniqueSeconds[objCodes], objUniqueValid[objCodes]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ベクトル化版: 秒数配列 → H:MM:SS 文字列配列 (dtype=object)
+#
+#   負の値が含まれる場合は ValueError とする。
+#
+# ///////////////////////////////////////////////////////////////
+def format_seconds_values_to_time_text(objSeconds: Any) -> np.ndarray:
+    objSecondsArray: np.ndarray = np.asarray(objSeconds, dtype=np.int64)
+    if objSecondsArray.size == 0:
+        return np.zeros(0, dtype=object)
+    if (objSecondsArray < 0).any():
+        raise ValueError("Total seconds must not be negative.")
+
+    objInverse: np.ndarray
+    objUniqueSecondsValues: Any
+    objInverse, objUniqueSecondsValues = pd.factorize(objSecondsArray, sort=False)
+    objUniqueSeconds: np.ndarray = np.asarray(objUniqueSecondsValues, dtype=np.int64)
+
+    objHours: np.ndarray = (objUniqueSeconds // 3600).astype(str)
+    objMinutes: np.ndarray = np.char.zfill(((objUniqueSeconds % 3600) // 60).astype(str), 2)
+    objSecondsPart: np.ndarray = np.char.zfill((objUniqueSeconds % 60).astype(str), 2)
+    objUniqueTexts: np.ndarray = np.char.add(
+        np.char.add(np.char.add(objHours, ":"), np.char.add(objMinutes, ":")),
+        objSecondsPart,
+    ).astype(object)
+    return objUniqueTexts[objInverse]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ベクトル化版: 数値配列 → 文字列配列 (dtype=object)
+#
+#   整数とみなせる値は整数演算で、小数を含む値は書式指定で
+#   それぞれまとめて文字列化する。
+#
+# ///////////////////////////////////////////////////////////////
+def format_number_values(objValues: Any) -> np.ndarray:
+    objValueArray: np.ndarray = np.asarray(objValues, dtype=np.float64).reshape(-1)
+    objTexts: np.ndarray = np.empty(objValueArray.size, dtype=object)
+    if objValueArray.size == 0:
+        return objTexts
+
+    objRounded: np.ndarray = np.round(objValueArray)
+    with np.errstate(invalid="ignore"):
+        objIntegerMask: np.ndarray = (
+            np.isfinite(objValueArray)
+            & (np.abs(objValueArray - objRounded) < 0.0000001)
+            & (np.abs(objRounded) < 9.0e15)
+        )
+    if objIntegerMask.any():
+        objTexts[objIntegerMask] = objRounded[objIntegerMask].astype(np.int64).astype(str).tolist()
+
+    # 小数を含む有限値は "%.6f" でまとめて文字列化し、末尾の 0 と "." を除く
+    objFractionMask: np.ndarray = ~objIntegerMask & np.isfinite(objValueArray)
+    if objFractionMask.any():
+        objFractionTexts: np.ndarray = np.char.mod("%.6f", objValueArray[objFractionMask])
+        objFractionTexts = np.char.rstrip(np.char.rstrip(objFractionTexts, "0"), ".")
+        objTexts[objFractionMask] = objFractionTexts.tolist()
+
+    # NaN / 無限大などはスカラー版に任せる (従来どおり例外となる)
+    for iIndex in np.flatnonzero(~objIntegerMask & ~objFractionMask):
+        objTexts[iIndex] = format_number_text(float(objValueArray[iIndex]))
+    return objTexts
+
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# output_manifest.py
+#
+# 役割:
+#   各 Cmd スクリプトが作成した出力ファイルの一覧を、
+#   機械で読める JSON (出力マニフェスト) として書き出す。
+#
+#   ・スクリプトは書き出したファイルを OutputManifest.add で記録し、
+#     処理の最後に write で JSON を書き出す。
+#   ・各ファイルについて、パス (絶対パス)・段階名・行数・
+#     内容の SHA-256 を記録する。行数と SHA-256 は書き出し時に
+#     ファイルを 1 回だけ読んで求める。
+#   ・reported は、スクリプトが成果物として標準出力に
+#     "Output: <path>" を表示したファイルかどうかを表す
+#     (report で記録したもの。add では既定で True)。
+#   ・後続の処理 (SellGeneralAdminCost_Allocation_DnD.py など) は、
+#     フォルダを走査したり標準出力の "Output:" 行を解析したりせずに、
+#     read_manifest_output_paths で作成されたファイルを正確に取得できる。
+#
+# マニフェストの形式:
+#   {
+#     "version": 1,
+#     "script": "PL_CsvToTsv_Cmd.py",
+#     "files": [
+#       {"path": "...", "stage": "step10", "rows": 120, "sha256": "...", "reported": true},
+#       ...
+#     ]
+#   }
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from atomic_tsv_writer import write_text_atomic
+
+
+OUTPUT_MANIFEST_VERSION: int = 1
+OUTPUT_MANIFEST_OPTION: str = "--manifest"
+OUTPUT_MANIFEST_READ_CHUNK_SIZE: int = 1024 * 1024
+
+# 行数を数える対象 (テキスト形式) の拡張子
+_OBJ_TEXT_FILE_SUFFIXES: Tuple[str, ...] = (".tsv", ".csv", ".txt")
+_OBJ_STAGE_NAME_PATTERN: re.Pattern[str] = re.compile(r"_(step\d+)")
+
+
+def extract_stage_name_from_file_name(pszFileName: str) -> str:
+    # ファイル名中の最初の "_stepNN" を段階名とする (無ければ "output")
+    objMatch: Optional[re.Match[str]] = _OBJ_STAGE_NAME_PATTERN.search(pszFileName)
+    if objMatch is None:
+        return "output"
+    return objMatch.group(1)
+
+
+def compute_file_rows_and_sha256(pszFilePath: str) -> Tuple[Optional[int], str]:
+    # テキスト形式のファイルは行数 (末尾に改行の無い最終行も 1 行) を数える。
+    # それ以外のファイルの行数は None とする。
+    bCountRows: bool = pszFilePath.lower().endswith(_OBJ_TEXT_FILE_SUFFIXES)
+    objHash = hashlib.sha256()
+    iRowCount: int = 0
+    bEndsWithNewline: bool = True
+    with open(pszFilePath, "rb") as objFile:
+        while True:
+            objChunk: bytes = objFile.read(OUTPUT_MANIFEST_READ_CHUNK_SIZE)
+            if not objChunk:
+                break
+            objHash.update(objChunk)
+            if bCountRows:
+                iRowCount += objChunk.count(b"\n")
+                bEndsWithNewline = objChunk.endswith(b"\n")
+    if not bCountRows:
+        return None, objHash.hexdigest()
+    if not bEndsWithNewline:
+        iRowCount += 1
+    return iRowCount, objHash.hexdigest()
+
+
+class OutputManifest:
+    def __init__(self, pszScriptName: str) -> None:
+        self.pszScriptName: str = pszScriptName
+        # 絶対パス -> 段階名 (記録した順を保つ)
+        self.objStagesByPath: Dict[str, str] = {}
+        self.objReportedPaths: set[str] = set()
+
+    def add(
+        self,
+        pszFilePath: str,
+        pszStage: Optional[str] = None,
+        bReported: bool = True,
+    ) -> None:
+        pszAbsolutePath: str = os.path.abspath(pszFilePath)
+        if pszStage is None:
+            pszStage = extract_stage_name_from_file_name(os.path.basename(pszAbsolutePath))
+        self.objStagesByPath[pszAbsolutePath] = pszStage
+        if bReported:
+            self.objReportedPaths.add(pszAbsolutePath)
+
+    def report(self, pszFilePath: str, pszStage: Optional[str] = None) -> None:
+        # 成果物として記録し、従来どおり "Output: <path>" を表示する
+        if pszStage is None:
+            pszStage = self.objStagesByPath.get(os.path.abspath(pszFilePath))
+        self.add(pszFilePath, pszStage, True)
+        print(f"Output: {pszFilePath}")
+
+    def clear(self) -> None:
+        self.objStagesByPath.clear()
+        self.objReportedPaths.clear()
+
+    def list_paths(self) -> List[str]:
+        # 記録したファイルのうち、現在存在するもの
+        return [
+            pszPath for pszPath in self.objStagesByPath if os.path.isfile(pszPath)
+        ]
+
+    def build_entries(self) -> List[Dict[str, Any]]:
+        objEntries: List[Dict[str, Any]] = []
+        for pszPath in self.list_paths():
+            iRowCount: Optional[int]
+            pszSha256: str
+            iRowCount, pszSha256 = compute_file_rows_and_sha256(pszPath)
+            objEntries.append(
+                {
+                    "path": pszPath,
+                    "stage": self.objStagesByPath[pszPath],
+                    "rows": iRowCount,
+                    "sha256": pszSha256,
+                    "reported": pszPath in self.objReportedPaths,
+                }
+            )
+        return objEntries
+
+    def write(self, pszManifestPath: str) -> None:
+        objManifest: Dict[str, Any] = {
+            "version": OUTPUT_MANIFEST_VERSION,
+            "script": self.pszScriptName,
+            "files": self.build_entries(),
+        }
+        write_text_atomic(
+            pszManifestPath,
+            json.dumps(objManifest, ensure_ascii=False, indent=2) + "\n",
+        )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# コマンドライン引数から --manifest <path> を取り除く
+#
+#   独自に sys.argv を解析しているスクリプト向け。
+#   (--manifest=<path> の形式も受け付ける)
+#   戻り値: (--manifest を除いた引数, マニフェストのパス または None)
+#
+# ///////////////////////////////////////////////////////////////
+def extract_manifest_option(objArgv: List[str]) -> Tuple[List[str], Optional[str]]:
+    objRemaining: List[str] = []
+    pszManifestPath: Optional[str] = None
+    iIndex: int = 0
+    while iIndex < len(objArgv):
+        pszArg: str = objArgv[iIndex]
+        if pszArg == OUTPUT_MANIFEST_OPTION:
+            if iIndex + 1 >= len(objArgv):
+                raise ValueError(f"{OUTPUT_MANIFEST_OPTION} requires a value.")
+            pszManifestPath = objArgv[iIndex + 1]
+            iIndex += 2
+            continue
+        if pszArg.startswith(OUTPUT_MANIFEST_OPTION + "="):
+            pszManifestPath = pszArg[len(OUTPUT_MANIFEST_OPTION) + 1:]
+            iIndex += 1
+            continue
+        objRemaining.append(pszArg)
+        iIndex += 1
+    return objRemaining, pszManifestPath
+
+
+def read_manifest_output_paths(
+    pszManifestPath: str,
+    bReportedOnly: bool = False,
+) -> Optional[List[str]]:
+    # マニフェストが無い・読めない場合は None を返す (呼び出し側で従来の方法に戻す)
+    try:
+        with open(pszManifestPath, "r", encoding="utf-8") as objFile:
+            objManifest: Any = json.load(objFile)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(objManifest, dict) or not isinstance(objManifest.get("files"), list):
+        return None
+    return [
+        str(objEntry["path"])
+        for objEntry in objManifest["files"]
+        if isinstance(objEntry, dict)
+        and "path" in objEntry
+        and (not bReportedOnly or bool(objEntry.get("reported", True)))
+    ]
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# parsed_input_cache.py
+#
+# 役割:
+#   工数yy.mm.csv / 損益計算書yy.mm.csv / Raw_Data.tsv などの入力を
+#   解析した結果 (DataFrame または 行のリスト) を、
+#   キャッシュフォルダへバイナリ形式で保存し、次回以降の実行で
+#   テキストの解析をせずに読み込めるようにする (使うかどうかは任意)。
+#
+#   ・キャッシュのキーは「入力ファイルの内容の SHA-256」と
+#     「解析処理の名前・バージョン」。ファイル名や更新日時は使わないため、
+#     内容が同じなら別の場所・別の名前のファイルでも再利用できる。
+#   ・DataFrame は pyarrow があれば Feather 形式、無ければ pickle で保存する。
+#     行のリスト (列数がそろっていない CSV など) は pickle で保存する。
+#   ・書き込みは一時ファイル + 置き換えで行い、壊れた項目は読み込み時に
+#     削除して解析し直す。
+#   ・古い項目は自動的に削除する。
+#       - 同じ解析処理の古いバージョンの項目
+#       - 最後に使われてから PARSED_INPUT_CACHE_MAX_AGE_DAYS 日を過ぎた項目
+#       - 項目数が PARSED_INPUT_CACHE_MAX_ENTRIES を超えた分 (古い順)
+#
+# 使い方:
+#   objCache = ParsedInputCache(pszCacheDirectoryPath)
+#   objRows = objCache.load_or_parse(
+#       pszInputPath, "pl_csv_rows", 1, read_csv_rows_without_cache,
+#   )
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    import pyarrow.feather  # noqa: F401
+
+    _B_HAS_PYARROW: bool = True
+except ImportError:
+    _B_HAS_PYARROW = False
+
+
+PARSED_INPUT_CACHE_OPTION: str = "--parsed-cache-dir"
+PARSED_INPUT_CACHE_MAX_ENTRIES: int = 256
+PARSED_INPUT_CACHE_MAX_AGE_DAYS: int = 30
+PARSED_INPUT_CACHE_HASH_CHUNK_SIZE: int = 1024 * 1024
+
+# <解析処理名>__v<バージョン>__<SHA-256>.<拡張子>
+_OBJ_CACHE_FILE_NAME_PATTERN: re.Pattern[str] = re.compile(
+    r"^(?P<parser>[A-Za-z0-9_]+)__v(?P<version>\d+)__(?P<hash>[0-9a-f]{64})\.(?P<ext>feather|pickle)$"
+)
+
+
+def compute_file_sha256(pszFilePath: str) -> str:
+    objHash = hashlib.sha256()
+    with open(pszFilePath, "rb") as objFile:
+        while True:
+            objChunk: bytes = objFile.read(PARSED_INPUT_CACHE_HASH_CHUNK_SIZE)
+            if not objChunk:
+                break
+            objHash.update(objChunk)
+    return objHash.hexdigest()
+
+
+class ParsedInputCache:
+    def __init__(self, pszCacheDirectoryPath: str) -> None:
+        self.pszCacheDirectoryPath: str = pszCacheDirectoryPath
+        os.makedirs(pszCacheDirectoryPath, exist_ok=True)
+        self.bEvicted: bool = False
+
+    # -----------------------------------------------------------
+    # 読み込み / 保存
+    # -----------------------------------------------------------
+    def build_entry_path(
+        self,
+        pszParserName: str,
+        iParserVersion: int,
+        pszSha256: str,
+        pszExtension: str,
+    ) -> str:
+        return os.path.join(
+            self.pszCacheDirectoryPath,
+            f"{pszParserName}__v{iParserVersion}__{pszSha256}.{pszExtension}",
+        )
+
+    def load_or_parse(
+        self,
+        pszInputPath: str,
+        pszParserName: str,
+        iParserVersion: int,
+        objParse: Callable[[str], Any],
+    ) -> Any:
+        if not self.bEvicted:
+            self.evict_stale_entries({pszParserName: iParserVersion})
+            self.bEvicted = True
+
+        pszSha256: str = compute_file_sha256(pszInputPath)
+        for pszExtension in ("feather", "pickle"):
+            pszEntryPath: str = self.build_entry_path(
+                pszParserName,
+                iParserVersion,
+                pszSha256,
+                pszExtension,
+            )
+            if not os.path.isfile(pszEntryPath):
+                continue
+            try:
+                objValue: Any = self.read_entry(pszEntryPath, pszExtension)
+            except Exception:
+                # 壊れた項目は削除して解析し直す
+                os.remove(pszEntryPath)
+                continue
+            # 最後に使った日時として更新日時を更新する (古い項目の削除に使う)
+            os.utime(pszEntryPath)
+            return objValue
+
+        objParsed: Any = objParse(pszInputPath)
+        self.write_entry(pszParserName, iParserVersion, pszSha256, objParsed)
+        return objParsed
+
+    def read_entry(self, pszEntryPath: str, pszExtension: str) -> Any:
+        if pszExtension == "feather":
+            return pd.read_feather(pszEntryPath)
+        with open(pszEntryPath, "rb") as objFile:
+            return pickle.load(objFile)
+
+    def write_entry(
+        self,
+        pszParserName: str,
+        iParserVersion: int,
+        pszSha256: str,
+        objValue: Any,
+    ) -> None:
+        bUseFeather: bool = (
+            _B_HAS_PYARROW
+            and isinstance(objValue, pd.DataFrame)
+            and isinstance(objValue.index, pd.RangeIndex)
+            and objValue.columns.is_unique
+        )
+        pszExtension: str = "feather" if bUseFeather else "pickle"
+        pszEntryPath: str = self.build_entry_path(
+            pszParserName,
+            iParserVersion,
+            pszSha256,
+            pszExtension,
+        )
+        iFileDescriptor: int
+        pszTemporaryPath: str
+        iFileDescriptor, pszTemporaryPath = tempfile.mkstemp(
+            prefix="." + os.path.basename(pszEntryPath) + ".",
+            suffix=".tmp",
+            dir=self.pszCacheDirectoryPath,
+        )
+        try:
+            with open(iFileDescriptor, "wb") as objFile:
+                if bUseFeather:
+                    objValue.to_feather(objFile)
+                else:
+                    pickle.dump(objValue, objFile, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(pszTemporaryPath, pszEntryPath)
+        except BaseException:
+            if os.path.exists(pszTemporaryPath):
+                os.remove(pszTemporaryPath)
+            raise
+
+    # -----------------------------------------------------------
+    # 古い項目の削除
+    # -----------------------------------------------------------
+    def list_entries(self) -> List[Tuple[str, str, int, float]]:
+        # (パス, 解析処理名, バージョン, 最後に使った日時)
+        objEntries: List[Tuple[str, str, int, float]] = []
+        for pszEntryName in os.listdir(self.pszCacheDirectoryPath):
+            objMatch: Optional[re.Match[str]] = _OBJ_CACHE_FILE_NAME_PATTERN.match(pszEntryName)
+            if objMatch is None:
+                continue
+            pszEntryPath: str = os.path.join(self.pszCacheDirectoryPath, pszEntryName)
+            try:
+                fLastUsed: float = os.path.getmtime(pszEntryPath)
+            except OSError:
+                continue
+            objEntries.append(
+                (
+                    pszEntryPath,
+                    objMatch.group("parser"),
+                    int(objMatch.group("version")),
+                    fLastUsed,
+                )
+            )
+        return objEntries
+
+    def evict_stale_entries(self, objCurrentVersions: Dict[str, int]) -> int:
+        fNow: float = time.time()
+        fMaxAgeSeconds: float = PARSED_INPUT_CACHE_MAX_AGE_DAYS * 24 * 60 * 60
+        objKeptEntries: List[Tuple[str, str, int, float]] = []
+        objRemovePaths: List[str] = []
+        for objEntry in self.list_entries():
+            pszEntryPath, pszParserName, iParserVersion, fLastUsed = objEntry
+            iCurrentVersion: Optional[int] = objCurrentVersions.get(pszParserName)
+            if iCurrentVersion is not None and iParserVersion != iCurrentVersion:
+                objRemovePaths.append(pszEntryPath)
+            elif fNow - fLastUsed > fMaxAgeSeconds:
+                objRemovePaths.append(pszEntryPath)
+            else:
+                objKeptEntries.append(objEntry)
+
+        if len(objKeptEntries) > PARSED_INPUT_CACHE_MAX_ENTRIES:
+            objKeptEntries.sort(key=lambda objEntry: objEntry[3])
+            iRemoveCount: int = len(objKeptEntries) - PARSED_INPUT_CACHE_MAX_ENTRIES
+            objRemovePaths.extend(objEntry[0] for objEntry in objKeptEntries[:iRemoveCount])
+
+        for pszRemovePath in objRemovePaths:
+            try:
+                os.remove(pszRemovePath)
+            except OSError:
+                pass
+        return len(objRemovePaths)
+
+
+def load_or_parse_with_optional_cache(
+    objCache: Optional[ParsedInputCache],
+    pszInputPath: str,
+    pszParserName: str,
+    iParserVersion: int,
+    objParse: Callable[[str], Any],
+) -> Any:
+    # キャッシュを使わない場合は、そのまま解析する
+    if objCache is None:
+        return objParse(pszInputPath)
+    return objCache.load_or_parse(pszInputPath, pszParserName, iParserVersion, objParse)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# コマンドライン引数から --parsed-cache-dir <path> を取り除く
+#
+#   独自に sys.argv を解析しているスクリプト向け。
+#   (--parsed-cache-dir=<path> の形式も受け付ける)
+#   戻り値: (オプションを除いた引数, キャッシュフォルダ または None)
+#
+# ///////////////////////////////////////////////////////////////
+def extract_parsed_input_cache_option(
+    objArgv: List[str],
+) -> Tuple[List[str], Optional[str]]:
+    objRemaining: List[str] = []
+    pszCacheDirectoryPath: Optional[str] = None
+    iIndex: int = 0
+    while iIndex < len(objArgv):
+        pszArg: str = objArgv[iIndex]
+        if pszArg == PARSED_INPUT_CACHE_OPTION:
+            if iIndex + 1 >= len(objArgv):
+                raise ValueError(f"{PARSED_INPUT_CACHE_OPTION} requires a value.")
+            pszCacheDirectoryPath = objArgv[iIndex + 1]
+            iIndex += 2
+            continue
+        if pszArg.startswith(PARSED_INPUT_CACHE_OPTION + "="):
+            pszCacheDirectoryPath = pszArg[len(PARSED_INPUT_CACHE_OPTION) + 1:]
+            iIndex += 1
+            continue
+        objRemaining.append(pszArg)
+        iIndex += 1
+    return objRemaining, pszCacheDirectoryPath
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# project_name_normalizer.py
+#
+# 役割:
+#   プロジェクト名の正規化処理を、各スクリプトで共通に使うために
+#   まとめたモジュール。
+#
+#   ・コード直後の区切り文字の補正
+#       従来は 5 回の re.sub で行っていた
+#         (P\d{5})(?![ _\t　【])         → \1_
+#         ([A-OQ-Z]\d{3})(?![ _\t　【])  → \1_
+#         ^(J\d{3}) +                    → \1_
+#         ([A-OQ-Z]\d{3})[ 　]+          → \1_
+#         (P\d{5})[ 　]+                 → \1_
+#       を、1 つのコンパイル済み正規表現 (選択 |) で 1 回の走査にまとめる。
+#       P コードと英大文字コードは互いに重なって一致することがなく、
+#       挿入する "_" も後続の置換の対象にならないため、
+#       順に置換した場合と結果は同一になる。
+#   ・【廃番】 / 【...】 / コード接頭辞の規則による名称の正規化
+#   ・上記を LRU キャッシュ (件数上限付き) でメモ化した関数
+#   ・重複を除いた値だけを 1 回ずつ正規化して元の並びに戻す一括 API
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
+
+
+# ///////////////////////////////////////////////////////////////
+# メモ化の上限件数。
+# 1 か月分のプロジェクト名は数百種類程度なので、
+# 行単位の前処理を含めても十分な大きさとする。
+# ///////////////////////////////////////////////////////////////
+PROJECT_NAME_CACHE_SIZE: int = 32768
+
+# ///////////////////////////////////////////////////////////////
+# コード直後の区切り補正 (5 つの置換を 1 つにまとめたもの)
+#   コードの後ろが半角・全角スペースの並びなら "_" に置き換え、
+#   区切り文字 ( _ / タブ / 全角スペース / 【 ) 以外が続く場合や
+#   文字列の末尾では "_" を挿入する。
+# ///////////////////////////////////////////////////////////////
+_OBJ_CODE_SEPARATOR_PATTERN: re.Pattern[str] = re.compile(
+    r"(P\d{5}|[A-OQ-Z]\d{3})(?:[ 　]+|(?![ _\t　【]))"
+)
+
+# ///////////////////////////////////////////////////////////////
+# コード直後のスペースのみを "_" に置き換える補正
+#   (Sheet7ToSheet10_NormalizeProjectName_Cmd.py の 3 つの置換
+#    ^(J\d{3}) + / ([A-OQ-Z]\d{3})[ 　]+ / (P\d{5})[ 　]+ をまとめたもの)
+# ///////////////////////////////////////////////////////////////
+_OBJ_CODE_SPACE_PATTERN: re.Pattern[str] = re.compile(r"(P\d{5}|[A-OQ-Z]\d{3})[ 　]+")
+
+_OBJ_QUOTED_TAB_PATTERN: re.Pattern[str] = re.compile(r'^"([^"]*)\t([^"]*)"([^\r\n]*)')
+_OBJ_STAFF_CODE_COLUMN_PATTERN: re.Pattern[str] = re.compile(r"\t[0-9]+\t")
+_OBJ_BRACKET_CODE_PATTERN: re.Pattern[str] = re.compile(r"(P\d{5}|[A-OQ-Z]\d{3})")
+
+# 【廃番】 の後ろから探すコードの先頭文字と桁数 (探索順)
+_OBJ_DISCONTINUED_CODE_PREFIXES: List[tuple[str, int]] = [
+    ("J", 4),
+    ("A", 4),
+    ("C", 4),
+    ("H", 4),
+    ("M", 4),
+    ("P", 6),
+]
+
+
+def rewrite_project_code_separators(pszText: str) -> str:
+    return _OBJ_CODE_SEPARATOR_PATTERN.sub(r"\1_", pszText)
+
+
+def rewrite_project_code_spaces(pszText: str) -> str:
+    return _OBJ_CODE_SPACE_PATTERN.sub(r"\1_", pszText)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# プロジェクト名の正規化規則 (キャッシュなし)
+#
+#   bHandleBracketCode が True の場合は、
+#   「【...】」で始まる名称の後ろにあるコードを先頭へ移す規則も適用する。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_project_name_rules(
+    pszSource: str,
+    bHandleBracketCode: bool = True,
+) -> str:
+    if pszSource.startswith("【廃番】"):
+        try:
+            # 先頭文字ごとに、コード桁数分の長さが残っている最初の位置を探す
+            # (find の終了位置を絞ることで、従来の 1 文字ずつの再探索と同じ結果になる)
+            for pszPrefix, iCodeLength in _OBJ_DISCONTINUED_CODE_PREFIXES:
+                iFoundIndex: int = pszSource.find(
+                    pszPrefix,
+                    0,
+                    max(len(pszSource) - iCodeLength + 1, 0),
+                )
+                if iFoundIndex != -1:
+                    pszCode: str = pszSource[iFoundIndex:iFoundIndex + iCodeLength]
+                    pszHead: str = pszSource[:iFoundIndex]
+                    pszTail: str = pszSource[iFoundIndex + iCodeLength:]
+                    return pszCode + "_" + pszHead + pszTail
+            return pszSource
+        except Exception:
+            return pszSource
+
+    if bHandleBracketCode and pszSource.startswith("【"):
+        iBracketEndIndex: int = pszSource.find("】")
+        if iBracketEndIndex != -1:
+            pszAfterBracket: str = pszSource[iBracketEndIndex + 1:]
+            objMatch: Optional[re.Match[str]] = _OBJ_BRACKET_CODE_PATTERN.search(pszAfterBracket)
+            if objMatch is not None:
+                pszBracketCode: str = objMatch.group(1)
+                pszBeforeCode: str = pszAfterBracket[:objMatch.start()]
+                pszAfterCode: str = pszAfterBracket[objMatch.end():]
+                if pszAfterCode.startswith(" ") or pszAfterCode.startswith("　"):
+                    pszAfterCode = pszAfterCode[1:]
+                pszRest: str = pszSource[: iBracketEndIndex + 1] + pszBeforeCode + pszAfterCode
+                return pszBracketCode + "_" + pszRest
+
+    if len(pszSource) >= 1 and pszSource[0] in ["J", "A", "C", "H", "M"]:
+        if len(pszSource) >= 5:
+            pszNextChar: str = pszSource[4]
+            if pszNextChar == "【":
+                return pszSource[:4] + "_" + pszSource[4:]
+            if pszNextChar == " " or pszNextChar == "　":
+                return pszSource[:4] + "_" + pszSource[5:]
+        return pszSource
+
+    if len(pszSource) >= 1 and pszSource[0] == "P":
+        if len(pszSource) >= 7:
+            pszNextCharP: str = pszSource[6]
+            if pszNextCharP == "【":
+                return pszSource[:6] + "_" + pszSource[6:]
+            if pszNextCharP == " " or pszNextCharP == "　":
+                return pszSource[:6] + "_" + pszSource[7:]
+        return pszSource
+
+    return pszSource
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# メモ化した正規化関数
+#
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=PROJECT_NAME_CACHE_SIZE)
+def normalize_project_name_cached(
+    pszSource: str,
+    bHandleBracketCode: bool = True,
+) -> str:
+    return normalize_project_name_rules(pszSource, bHandleBracketCode)
+
+
+# ///////////////////////////////////////////////////////////////
+# 工数 TSV の 1 行 (プロジェクト名 / スタッフコード / ... ) の前処理
+#   ・先頭の "..." 内のタブを "_" にする
+#   ・コード直後の区切りを補正する
+#   ・スタッフコード列 (タブで囲まれた数字のみの列) を取り除く
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=PROJECT_NAME_CACHE_SIZE)
+def preprocess_manhour_line_cached(pszLineContent: str) -> str:
+    if pszLineContent.startswith('"'):
+        iSecondQuoteIndex: int = pszLineContent.find('"', 1)
+        if iSecondQuoteIndex != -1:
+            if iSecondQuoteIndex + 1 < len(pszLineContent) and pszLineContent[iSecondQuoteIndex + 1] == "\t":
+                pszQuotedContent: str = pszLineContent[1:iSecondQuoteIndex].replace("\t", "_")
+                pszLineContent = pszQuotedContent + pszLineContent[iSecondQuoteIndex + 1:]
+    pszLineContent = _OBJ_QUOTED_TAB_PATTERN.sub(r"\1_\2\3", pszLineContent)
+    pszLineContent = rewrite_project_code_separators(pszLineContent)
+    pszLineContent = _OBJ_STAFF_CODE_COLUMN_PATTERN.sub("\t", pszLineContent)
+    return pszLineContent
+
+
+# ///////////////////////////////////////////////////////////////
+# 工数 TSV の 1 行の前処理 (コード直後のスペース補正のみ行う版)
+#   Sheet7ToSheet10_NormalizeProjectName_Cmd.py の前処理と同一。
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=PROJECT_NAME_CACHE_SIZE)
+def preprocess_manhour_line_spaces_only_cached(pszLineContent: str) -> str:
+    pszLineContent = _OBJ_QUOTED_TAB_PATTERN.sub(r"\1_\2\3", pszLineContent)
+    pszLineContent = rewrite_project_code_spaces(pszLineContent)
+    pszLineContent = _OBJ_STAFF_CODE_COLUMN_PATTERN.sub("\t", pszLineContent)
+    return pszLineContent
+
+
+# ///////////////////////////////////////////////////////////////
+# 損益計算書 CSV のプロジェクト名 (PJ名称行の各セル) の正規化
+#   タブを "_" にし、コード直後の区切りを補正してから規則を適用する。
+# ///////////////////////////////////////////////////////////////
+@lru_cache(maxsize=PROJECT_NAME_CACHE_SIZE)
+def normalize_pl_project_name_cached(pszProjectName: str) -> str:
+    if pszProjectName == "":
+        return pszProjectName
+    pszNormalized: str = rewrite_project_code_separators(pszProjectName.replace("\t", "_"))
+    return normalize_project_name_rules(pszNormalized, True)
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 一括 API
+#
+#   重複を除いた値だけを 1 回ずつ変換し、元の並びに展開して返す。
+#   objNormalizer には上記のメモ化関数など 1 引数の関数を渡す。
+#
+# ///////////////////////////////////////////////////////////////
+def normalize_values_batch(
+    objValues: Any,
+    objNormalizer: Callable[[str], str] = normalize_project_name_cached,
+) -> List[str]:
+    objConvertedByValue: dict[str, str] = {}
+    objResults: List[str] = []
+    for pszValue in objValues:
+        pszConverted: Optional[str] = objConvertedByValue.get(pszValue)
+        if pszConverted is None:
+            pszConverted = objNormalizer(pszValue)
+            objConvertedByValue[pszValue] = pszConverted
+        objResults.append(pszConverted)
+    return objResults
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# run_golden_regression.py
+#
+# 役割:
+#   input/ と expected/ にある「入力 → 期待される出力」の組を
+#   すべて実行し、出力が expected/ と一致するかを確認する
+#   (ゴールデンファイルによる回帰テスト)。
+#
+#   ・各ケースは一時フォルダに src/*.py と入力ファイルを複製して実行する。
+#     リポジトリ内のファイルは変更しない。
+#   ・ケースはプロセスプールで並列に実行する (--jobs)。
+#   ・出力の比較は、まずバイト単位で行い、一致しない場合は
+#     compare_tsv_with_blank_zero と同じ規則 (空欄と 0 を同一視) で比較する。
+#   ・ケースごとに PASS / FAIL と実行時間を表示する。
+#     --report で結果を JSON に保存し、--baseline に以前の JSON を渡すと、
+#     実行時間が大きく増えたケースを SLOW として表示する。
+#
+#   入力ファイルは expected/ の上流の出力を使うため、
+#   各ケースは互いに独立して実行できる。
+#
+# 実行例:
+#   python src/run_golden_regression.py
+#   python src/run_golden_regression.py --jobs 4 --report golden.json
+#   python src/run_golden_regression.py --baseline golden.json --case sheet
+#   python src/run_golden_regression.py --list
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from compare_tsv_with_blank_zero import (
+    build_mismatch_mask,
+    load_tsv_as_string_array,
+    normalize_value_arrays,
+)
+
+
+GOLDEN_REPORT_VERSION: int = 1
+# 基準より (SLOW_RATIO 倍 かつ SLOW_MIN_SECONDS 秒) 以上遅くなったら SLOW とする
+SLOW_RATIO: float = 1.5
+SLOW_MIN_SECONDS: float = 0.2
+# 失敗時に表示する標準出力・標準エラーの末尾の文字数
+OUTPUT_TAIL_LENGTH: int = 2000
+
+MANHOUR_CSV_NAME: str = "manhour_202511181454691c0a3179197.csv"
+MANHOUR_TSV_NAME: str = "manhour_202511181454691c0a3179197.tsv"
+MANHOUR_REMOVED_NAME: str = "manhour_202511181454691c0a3179197_removed_uninput.tsv"
+MANHOUR_SORTED_NAME: str = "manhour_202511181454691c0a3179197_removed_uninput_sorted_staff_code.tsv"
+SALARY_CSV_BASE_NAME: str = "支給・控除等一覧表_給与_2025年09月19日支給20251113"
+
+
+class GoldenCase(NamedTuple):
+    pszName: str
+    # (リポジトリ内の相対パス, 作業フォルダ内のファイル名)
+    objInputs: List[Tuple[str, str]]
+    # (src 内のスクリプト名, 引数) を順に実行する
+    objCommands: List[Tuple[str, List[str]]]
+    # (作業フォルダ内の出力ファイル名, 期待値のリポジトリ内の相対パス)
+    objOutputs: List[Tuple[str, str]]
+
+
+def build_golden_cases() -> List[GoldenCase]:
+    return [
+        GoldenCase(
+            "csv_to_tsv_h_mm_ss",
+            [(f"input/{MANHOUR_CSV_NAME}", MANHOUR_CSV_NAME)],
+            [("csv_to_tsv_h_mm_ss.py", [MANHOUR_CSV_NAME])],
+            [(MANHOUR_TSV_NAME, f"expected/{MANHOUR_TSV_NAME}")],
+        ),
+        GoldenCase(
+            "manhour_remove_uninput_rows",
+            [(f"expected/{MANHOUR_TSV_NAME}", MANHOUR_TSV_NAME)],
+            [("manhour_remove_uninput_rows.py", [MANHOUR_TSV_NAME])],
+            [(MANHOUR_REMOVED_NAME, f"expected/{MANHOUR_REMOVED_NAME}")],
+        ),
+        GoldenCase(
+            "sort_manhour_by_staff_code",
+            [(f"expected/{MANHOUR_REMOVED_NAME}", MANHOUR_REMOVED_NAME)],
+            [("sort_manhour_by_staff_code.py", [MANHOUR_REMOVED_NAME])],
+            [(MANHOUR_SORTED_NAME, f"expected/{MANHOUR_SORTED_NAME}")],
+        ),
+        GoldenCase(
+            "make_staff_code_range",
+            [("expected/Sheet4.tsv", "Sheet4.tsv")],
+            [("make_staff_code_range.py", ["Sheet4.tsv"])],
+            [("Sheet4_staff_code_range.tsv", "expected/Sheet4_staff_code_range.tsv")],
+        ),
+        GoldenCase(
+            "make_sheet6_from_sheet4",
+            [
+                ("expected/Sheet4.tsv", "Sheet4.tsv"),
+                ("expected/Sheet4_staff_code_range.tsv", "Sheet4_staff_code_range.tsv"),
+            ],
+            [("make_sheet6_from_sheet4.py", ["Sheet4.tsv", "Sheet4_staff_code_range.tsv"])],
+            [("Sheet6.tsv", "expected/Sheet6.tsv")],
+        ),
+        GoldenCase(
+            "make_sheet789_from_sheet4",
+            [
+                ("expected/Sheet4.tsv", "Sheet4.tsv"),
+                ("expected/Sheet4_staff_code_range.tsv", "Sheet4_staff_code_range.tsv"),
+                ("expected/Sheet6.tsv", "Sheet6.tsv"),
+            ],
+            [
+                (
+                    "make_sheet789_from_sheet4.py",
+                    ["Sheet4.tsv", "Sheet4_staff_code_range.tsv", "Sheet6.tsv"],
+                )
+            ],
+            [
+                ("Sheet7.tsv", "expected/Sheet7.tsv"),
+                ("Sheet8.tsv", "expected/Sheet8.tsv"),
+                ("Sheet9.tsv", "expected/Sheet9.tsv"),
+            ],
+        ),
+        GoldenCase(
+            # Excel 形式の出力には openpyxl が必要だが、比較するのは TSV だけ
+            "convert_salary_horizontal_to_vertical",
+            [(f"input/{SALARY_CSV_BASE_NAME}.csv", f"{SALARY_CSV_BASE_NAME}.csv")],
+            [("convert_salary_horizontal_to_vertical.py", [f"{SALARY_CSV_BASE_NAME}.csv"])],
+            [(f"{SALARY_CSV_BASE_NAME}_vertical.tsv", f"expected/{SALARY_CSV_BASE_NAME}_vertical.tsv")],
+        ),
+        GoldenCase(
+            # 工数yy.mm.csv から step06 までを通しで作る (Sheet4〜9 と同じ内容になる)
+            "make_manhour_to_sheet8",
+            [(f"input/{MANHOUR_CSV_NAME}", "工数25.9.csv")],
+            [("make_manhour_to_sheet8_01_0001.py", ["工数25.9.csv"])],
+            [
+                ("工数_2025年09月_removed_uninput.tsv", f"expected/{MANHOUR_REMOVED_NAME}"),
+                ("工数_2025年09月_step04_yyyy_mm_dd.tsv", "expected/Sheet4.tsv"),
+                (
+                    "工数_2025年09月_step04_yyyy_mm_dd_staff_code_range.tsv",
+                    "expected/Sheet4_staff_code_range.tsv",
+                ),
+                ("工数_2025年09月_step05_スタッフ別担当プロジェクト.tsv", "expected/Sheet6.tsv"),
+                ("工数_2025年09月_step06_プロジェクト_タスク_工数.tsv", "expected/Sheet7.tsv"),
+                ("工数_2025年09月_step06_旧版_スタッフ別_プロジェクト_タスク_工数.tsv", "expected/Sheet8.tsv"),
+                ("工数_2025年09月_step06_旧版_氏名_スタッフコード.tsv", "expected/Sheet9.tsv"),
+            ],
+        ),
+    ]
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 出力の比較
+#
+# ///////////////////////////////////////////////////////////////
+def compare_output_file(pszActualPath: str, pszExpectedPath: str) -> Tuple[bool, str]:
+    if not os.path.isfile(pszActualPath):
+        return False, "output not created"
+    with open(pszActualPath, "rb") as objActualFile, open(pszExpectedPath, "rb") as objExpectedFile:
+        if objActualFile.read() == objExpectedFile.read():
+            return True, "identical"
+
+    # バイト単位で異なる場合は、空欄と 0 を同一視して比較する
+    try:
+        arrActualHeader: List[str]
+        arrActualValues: np.ndarray
+        arrActualHeader, arrActualValues = load_tsv_as_string_array(pszActualPath)
+        arrExpectedValues: np.ndarray
+        _, arrExpectedValues = load_tsv_as_string_array(pszExpectedPath)
+    except Exception as objException:  # noqa: BLE001
+        return False, f"not identical and not comparable as TSV: {objException}"
+    if arrActualValues.shape != arrExpectedValues.shape:
+        return False, (
+            f"shape mismatch: actual {arrActualValues.shape[0]}x{arrActualValues.shape[1]}, "
+            f"expected {arrExpectedValues.shape[0]}x{arrExpectedValues.shape[1]}"
+        )
+    objActual, objExpected = normalize_value_arrays(arrActualValues, arrExpectedValues)
+    arrRowIndexes: np.ndarray = np.arange(arrActualValues.shape[0])
+    arrMismatchMask: np.ndarray = build_mismatch_mask(objActual, objExpected, arrRowIndexes, arrRowIndexes)
+    iMismatchCount: int = int(arrMismatchMask.sum())
+    if iMismatchCount == 0:
+        return True, "equal with blank/zero tolerance"
+    arrRows: np.ndarray
+    arrColumns: np.ndarray
+    arrRows, arrColumns = np.nonzero(arrMismatchMask)
+    return False, (
+        f"{iMismatchCount} differing cells (first at R{int(arrRows[0]) + 1} C{int(arrColumns[0]) + 1}, "
+        f"column {arrActualHeader[int(arrColumns[0])]})"
+    )
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# ケースの実行 (プロセスプールの作業プロセスで呼ばれる)
+#
+# ///////////////////////////////////////////////////////////////
+def prepare_case_directory(pszRepositoryPath: str, objCase: GoldenCase) -> Tuple[str, str, str]:
+    pszCaseDirectoryPath: str = tempfile.mkdtemp(prefix=f"golden_{objCase.pszName}_")
+    pszSourceDirectoryPath: str = os.path.join(pszCaseDirectoryPath, "src")
+    pszWorkDirectoryPath: str = os.path.join(pszCaseDirectoryPath, "work")
+    os.makedirs(pszSourceDirectoryPath)
+    os.makedirs(pszWorkDirectoryPath)
+    pszRepositorySourcePath: str = os.path.join(pszRepositoryPath, "src")
+    for pszFileName in os.listdir(pszRepositorySourcePath):
+        if pszFileName.endswith(".py"):
+            shutil.copy2(
+                os.path.join(pszRepositorySourcePath, pszFileName),
+                os.path.join(pszSourceDirectoryPath, pszFileName),
+            )
+    for pszRelativePath, pszWorkFileName in objCase.objInputs:
+        shutil.copy2(
+            os.path.join(pszRepositoryPath, pszRelativePath),
+            os.path.join(pszWorkDirectoryPath, pszWorkFileName),
+        )
+    return pszCaseDirectoryPath, pszSourceDirectoryPath, pszWorkDirectoryPath
+
+
+def run_golden_case(pszRepositoryPath: str, objCase: GoldenCase, bKeepWork: bool) -> Dict[str, Any]:
+    pszCaseDirectoryPath, pszSourceDirectoryPath, pszWorkDirectoryPath = prepare_case_directory(
+        pszRepositoryPath,
+        objCase,
+    )
+    objResult: Dict[str, Any] = {
+        "name": objCase.pszName,
+        "passed": False,
+        "seconds": 0.0,
+        "compare_seconds": 0.0,
+        "exit_codes": [],
+        "outputs": [],
+        "log": "",
+        "work_directory": pszCaseDirectoryPath if bKeepWork else None,
+    }
+    try:
+        fStart: float = time.perf_counter()
+        objLogs: List[str] = []
+        for pszScriptName, objArguments in objCase.objCommands:
+            objCompleted: subprocess.CompletedProcess[str] = subprocess.run(
+                [sys.executable, os.path.join(pszSourceDirectoryPath, pszScriptName), *objArguments],
+                cwd=pszWorkDirectoryPath,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+            )
+            objResult["exit_codes"].append(objCompleted.returncode)
+            objLogs.append(objCompleted.stdout + objCompleted.stderr)
+        objResult["seconds"] = time.perf_counter() - fStart
+
+        fCompareStart: float = time.perf_counter()
+        bAllPassed: bool = True
+        for pszOutputName, pszExpectedRelativePath in objCase.objOutputs:
+            bPassed: bool
+            pszDetail: str
+            bPassed, pszDetail = compare_output_file(
+                os.path.join(pszWorkDirectoryPath, pszOutputName),
+                os.path.join(pszRepositoryPath, pszExpectedRelativePath),
+            )
+            objResult["outputs"].append(
+                {
+                    "output": pszOutputName,
+                    "expected": pszExpectedRelativePath,
+                    "passed": bPassed,
+                    "detail": pszDetail,
+                }
+            )
+            bAllPassed = bAllPassed and bPassed
+        objResult["compare_seconds"] = time.perf_counter() - fCompareStart
+        objResult["passed"] = bAllPassed
+        if not bAllPassed:
+            objResult["log"] = "".join(objLogs)[-OUTPUT_TAIL_LENGTH:]
+    finally:
+        if not bKeepWork:
+            shutil.rmtree(pszCaseDirectoryPath, ignore_errors=True)
+    return objResult
+
+
+# ///////////////////////////////////////////////////////////////
+#
+# 結果の表示と保存
+#
+# ///////////////////////////////////////////////////////////////
+def read_baseline_seconds(pszBaselinePath: str) -> Dict[str, float]:
+    with open(pszBaselinePath, "r", encoding="utf-8") as objFile:
+        objBaseline: Any = json.load(objFile)
+    return {
+        str(objCase["name"]): float(objCase["seconds"])
+        for objCase in objBaseline.get("cases", [])
+        if isinstance(objCase, dict) and "name" in objCase and "seconds" in objCase
+    }
+
+
+def is_slow_case(fSeconds: float, fBaselineSeconds: Optional[float]) -> bool:
+    if fBaselineSeconds is None:
+        return False
+    return fSeconds > fBaselineSeconds * SLOW_RATIO and fSeconds - fBaselineSeconds > SLOW_MIN_SECONDS
+
+
+def print_results(objResults: List[Dict[str, Any]], objBaselineSeconds: Dict[str, float]) -> None:
+    for objResult in objResults:
+        fBaselineSeconds: Optional[float] = objBaselineSeconds.get(objResult["name"])
+        pszStatus: str = "PASS" if objResult["passed"] else "FAIL"
+        pszTiming: str = f"{objResult['seconds']:7.2f}s"
+        if fBaselineSeconds is not None:
+            pszTiming += f" (baseline {fBaselineSeconds:.2f}s)"
+            if is_slow_case(objResult["seconds"], fBaselineSeconds):
+                pszTiming += " SLOW"
+        print(f"{pszStatus}  {objResult['name']:<40} {pszTiming}")
+        for objOutput in objResult["outputs"]:
+            if not objOutput["passed"]:
+                print(f"      {objOutput['output']}: {objOutput['detail']}")
+        if not objResult["passed"]:
+            if any(iExitCode != 0 for iExitCode in objResult["exit_codes"]):
+                print(f"      exit codes: {objResult['exit_codes']}")
+            for pszLine in objResult["log"].splitlines()[-5:]:
+                print(f"      | {pszLine}")
+        if objResult["work_directory"] is not None:
+            print(f"      work: {objResult['work_directory']}")
+
+
+def main() -> int:
+    objParser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description="Run every input -> expected golden case and compare the outputs.",
+    )
+    objParser.add_argument("--jobs", dest="iJobs", type=int, default=os.cpu_count() or 1)
+    objParser.add_argument(
+        "--case",
+        dest="objCaseFilters",
+        action="append",
+        default=[],
+        help="Run only cases whose name contains this text (repeatable)",
+    )
+    objParser.add_argument("--report", dest="pszReportPath", default=None, help="Write results as JSON")
+    objParser.add_argument(
+        "--baseline",
+        dest="pszBaselinePath",
+        default=None,
+        help="Previous --report JSON; cases that became much slower are marked SLOW",
+    )
+    objParser.add_argument("--keep-work", dest="bKeepWork", action="store_true")
+    objParser.add_argument("--list", dest="bList", action="store_true", help="List cases and exit")
+    objArgs: argparse.Namespace = objParser.parse_args()
+
+    pszRepositoryPath: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    objCases: List[GoldenCase] = [
+        objCase
+        for objCase in build_golden_cases()
+        if not objArgs.objCaseFilters
+        or any(pszFilter in objCase.pszName for pszFilter in objArgs.objCaseFilters)
+    ]
+    if objArgs.bList:
+        for objCase in objCases:
+            print(objCase.pszName)
+        return 0
+    if not objCases:
+        print("Error: no golden cases matched.")
+        return 2
+
+    objBaselineSeconds: Dict[str, float] = {}
+    if objArgs.pszBaselinePath is not None:
+        objBaselineSeconds = read_baseline_seconds(objArgs.pszBaselinePath)
+
+    fStart: float = time.perf_counter()
+    iWorkerCount: int = max(1, min(objArgs.iJobs, len(objCases)))
+    with ProcessPoolExecutor(max_workers=iWorkerCount) as objExecutor:
+        objResults: List[Dict[str, Any]] = list(
+            objExecutor.map(
+                run_golden_case,
+                [pszRepositoryPath] * len(objCases),
+                objCases,
+                [objArgs.bKeepWork] * len(objCases),
+            )
+        )
+    fTotalSeconds: float = time.perf_counter() - fStart
+
+    print_results(objResults, objBaselineSeconds)
+    iPassedCount: int = sum(1 for objResult in objResults if objResult["passed"])
+    iSlowCount: int = sum(
+        1
+        for objResult in objResults
+        if is_slow_case(objResult["seconds"], objBaselineSeconds.get(objResult["name"]))
+    )
+    print(
+        f"{iPassedCount}/{len(objResults)} passed, {iSlowCount} slow, "
+        f"total {fTotalSeconds:.2f}s with {iWorkerCount} workers"
+    )
+
+    if objArgs.pszReportPath is not None:
+        with open(objArgs.pszReportPath, "w", encoding="utf-8") as objFile:
+            json.dump(
+                {
+                    "version": GOLDEN_REPORT_VERSION,
+                    "total_seconds": fTotalSeconds,
+                    "cases": objResults,
+                },
+                objFile,
+                ensure_ascii=False,
+                indent=2,
+            )
+            objFile.write("\n")
+
+    return 0 if iPassedCount == len(objResults) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
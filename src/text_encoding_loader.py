@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# ///////////////////////////////////////////////////////////////
+#
+# text_encoding_loader.py
+#
+# 役割:
+#   UTF-8(BOM付き) / cp932 のどちらで保存されているか分からない
+#   CSV / TSV を、ファイルを 1 回だけ読み込んで解析するための共通処理。
+#
+#   従来は「utf-8-sig で全体を読み込み、途中でデコードに失敗したら
+#   cp932 でファイル全体を読み直す」方式だったため、
+#   cp932 のファイルでは読み込みと解析が 2 回行われていた。
+#
+#   ・ファイルのバイト列を 1 回だけ読み込む。
+#   ・先頭の BOM を確認し、BOM があれば utf-8-sig と判定する。
+#   ・BOM が無ければ、候補のエンコーディングで順にデコードを試す。
+#     デコードはメモリ上のバイト列に対して行い、
+#     失敗した候補は最初の不正なバイトの位置で打ち切られる。
+#   ・デコードした文字列から CSV / TSV を解析する。
+#   ・判定したエンコーディング名を返すので、ログに記録できる。
+#     (BOM の無い UTF-8 は "utf-8" として返す)
+#
+#   候補の順序とデコード結果は従来の処理と同一になる。
+#   (BOM 付きなのに UTF-8 として不正なファイルだけは、cp932 で
+#    文字化けした内容を返さずに UnicodeDecodeError とする)
+#
+# ///////////////////////////////////////////////////////////////
+
+from __future__ import annotations
+
+import csv
+import io
+from typing import List, NamedTuple, Sequence, Tuple
+
+
+TEXT_ENCODING_CANDIDATES: Tuple[str, ...] = ("utf-8-sig", "cp932")
+
+_BYTES_UTF8_BOM: bytes = b"\xef\xbb\xbf"
+
+
+class DecodedText(NamedTuple):
+    pszText: str
+    pszEncoding: str
+
+
+def decode_bytes_with_encoding_detection(
+    objBytes: bytes,
+    objEncodingCandidates: Sequence[str] = TEXT_ENCODING_CANDIDATES,
+) -> DecodedText:
+    bHasUtf8Bom: bool = objBytes.startswith(_BYTES_UTF8_BOM)
+    objLastDecodeError: UnicodeDecodeError | None = None
+    for pszEncoding in objEncodingCandidates:
+        pszEncodingKey: str = pszEncoding.lower().replace("_", "-")
+        if bHasUtf8Bom and pszEncodingKey not in ("utf-8-sig", "utf-8", "utf8"):
+            # BOM 付きのファイルは UTF-8 系の候補だけを試す
+            continue
+        try:
+            pszText: str = objBytes.decode(pszEncoding, errors="strict")
+        except UnicodeDecodeError as objDecodeError:
+            objLastDecodeError = objDecodeError
+            continue
+        if pszEncodingKey == "utf-8-sig" and not bHasUtf8Bom:
+            return DecodedText(pszText, "utf-8")
+        return DecodedText(pszText, pszEncoding)
+
+    if objLastDecodeError is not None:
+        raise objLastDecodeError
+    raise UnicodeDecodeError(
+        objEncodingCandidates[0] if objEncodingCandidates else "utf-8",
+        objBytes[:1],
+        0,
+        min(len(objBytes), 1),
+        "cannot decode text with " + " nor ".join(objEncodingCandidates),
+    )
+
+
+def read_text_with_encoding_detection(
+    pszInputFilePath: str,
+    objEncodingCandidates: Sequence[str] = TEXT_ENCODING_CANDIDATES,
+) -> DecodedText:
+    with open(pszInputFilePath, "rb") as objFile:
+        objBytes: bytes = objFile.read()
+    return decode_bytes_with_encoding_detection(objBytes, objEncodingCandidates)
+
+
+def open_text_buffer(pszText: str) -> io.StringIO:
+    # open(..., newline="") と同じく、改行コードを変換せずに 1 行ずつ読める
+    return io.StringIO(pszText, newline="")
+
+
+def read_csv_rows_with_encoding_detection(
+    pszInputFilePath: str,
+    pszDelimiter: str = ",",
+    objEncodingCandidates: Sequence[str] = TEXT_ENCODING_CANDIDATES,
+) -> Tuple[List[List[str]], str]:
+    objDecoded: DecodedText = read_text_with_encoding_detection(
+        pszInputFilePath,
+        objEncodingCandidates,
+    )
+    objReader = csv.reader(open_text_buffer(objDecoded.pszText), delimiter=pszDelimiter)
+    return [list(objRow) for objRow in objReader], objDecoded.pszEncoding
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# src/ のスクリプトはモジュール名だけで互いに import しているため、
+# テストからも同じように import できるようにする
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from SellGeneralAdminCost_Allocation_Cmd import allocate_by_largest_remainder
+
+
+def allocate_by_fractions(iTotal: int, objWeights: list) -> list:
+    # 期待値: 有理数で按分し、切り捨てた端数を余りの大きい順 (同じなら上の行から) に配る
+    iWeightTotal: int = sum(objWeights)
+    objShares: list = [Fraction(iWeight * iTotal, iWeightTotal) for iWeight in objWeights]
+    objResults: list = [objShare.numerator // objShare.denominator for objShare in objShares]
+    iResidue: int = iTotal - sum(objResults)
+    objOrder: list = sorted(
+        range(len(objWeights)),
+        key=lambda iIndex: (-(objShares[iIndex] - objResults[iIndex]), iIndex),
+    )
+    for iIndex in objOrder[:iResidue]:
+        objResults[iIndex] += 1
+    return objResults
+
+
+@pytest.mark.parametrize(
+    "iTotal, objWeights, objExpected",
+    [
+        (100, [1, 1, 1], [34, 33, 33]),
+        (10, [3, 3, 4], [3, 3, 4]),
+        (7, [0, 5, 0, 5], [0, 4, 0, 3]),
+        (-100, [1, 1, 1], [-33, -33, -34]),
+        (-7, [2, 3], [-3, -4]),
+        (0, [5, 7], [0, 0]),
+    ],
+)
+def test_int64_path(iTotal: int, objWeights: list, objExpected: list) -> None:
+    arrResults: np.ndarray = allocate_by_largest_remainder(iTotal, np.array(objWeights, dtype=np.int64))
+    assert arrResults.dtype == np.int64
+    assert arrResults.tolist() == objExpected
+    assert int(arrResults.sum()) == iTotal
+
+
+@pytest.mark.parametrize("iTotal", [10**12, -(10**12), 10**12 + 7])
+def test_object_path_when_product_overflows_int64(iTotal: int) -> None:
+    # 重み × 総額が int64 を超える場合 (object 型で計算する)
+    objWeights: list = [3 * 10**8, 10**8 + 1, 2 * 10**8 + 3]
+    assert max(objWeights) * abs(iTotal) > np.iinfo(np.int64).max
+    arrResults: np.ndarray = allocate_by_largest_remainder(iTotal, np.array(objWeights, dtype=np.int64))
+    assert arrResults.dtype == np.int64
+    assert arrResults.tolist() == allocate_by_fractions(iTotal, objWeights)
+    assert int(arrResults.sum()) == iTotal
+
+
+def test_random_allocations_sum_to_total() -> None:
+    objRandom: np.random.Generator = np.random.default_rng(0)
+    for _ in range(500):
+        iCount: int = int(objRandom.integers(1, 9))
+        iWeightLimit: int = int(objRandom.choice([3, 1000, 10**11]))
+        objWeights: list = objRandom.integers(0, iWeightLimit, size=iCount).tolist()
+        if sum(objWeights) <= 0:
+            continue
+        iTotal: int = int(objRandom.integers(-(10**10), 10**10))
+        arrResults: np.ndarray = allocate_by_largest_remainder(iTotal, np.array(objWeights, dtype=np.int64))
+        assert arrResults.tolist() == allocate_by_fractions(iTotal, objWeights)
+        assert int(arrResults.sum()) == iTotal
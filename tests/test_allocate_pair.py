@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+import pytest
+
+import SellGeneralAdminCost_Allocation_Cmd
+from SellGeneralAdminCost_Allocation_Cmd import AllocationPair, allocate_pair
+from atomic_tsv_writer import BackgroundTsvWriter
+
+
+def test_error_in_body_is_not_replaced_by_step_writer_error(tmp_path, monkeypatch) -> None:
+    pszManhourPath: str = str(tmp_path / "工数.tsv")
+    with open(pszManhourPath, "w", encoding="utf-8") as objFile:
+        objFile.write("P10001_A\t1Cカンパニー\t1:00:00\t0:00:00\t0:00:00\t0:00:00\t0:00:00\t0:00:00\n")
+
+    def fail_to_write() -> None:
+        raise OSError("step write failed")
+
+    def process_pl_tsv_with_error(*objArgs: object) -> None:
+        objStepWriter: Optional[BackgroundTsvWriter] = objArgs[-1]  # type: ignore[assignment]
+        assert objStepWriter is not None
+        objStepWriter.submit(fail_to_write)
+        raise ValueError("allocation failed")
+
+    monkeypatch.setattr(SellGeneralAdminCost_Allocation_Cmd, "process_pl_tsv", process_pl_tsv_with_error)
+    objPair: AllocationPair = AllocationPair(
+        pszManhourPath,
+        str(tmp_path / "損益計算書.tsv"),
+        str(tmp_path / "出力.tsv"),
+    )
+    with pytest.raises(ValueError, match="allocation failed"):
+        allocate_pair(objPair, True)
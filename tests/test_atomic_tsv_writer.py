@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import stat
+import threading
+
+import pytest
+
+import atomic_tsv_writer
+from atomic_tsv_writer import BackgroundTsvWriter, write_text_atomic
+
+
+def fail_umask(iMask: int) -> int:
+    raise AssertionError("os.umask must not be called while writing")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="file mode bits are POSIX only")
+def test_written_file_mode_follows_umask_without_changing_it(tmp_path, monkeypatch) -> None:
+    pszExpectedPath: str = str(tmp_path / "expected.tsv")
+    with open(pszExpectedPath, "w", encoding="utf-8") as objFile:
+        objFile.write("a\n")
+    iExpectedMode: int = stat.S_IMODE(os.stat(pszExpectedPath).st_mode)
+
+    monkeypatch.setattr(atomic_tsv_writer.os, "umask", fail_umask)
+    pszOutputPath: str = str(tmp_path / "output.tsv")
+    write_text_atomic(pszOutputPath, "a\tb\n")
+    assert stat.S_IMODE(os.stat(pszOutputPath).st_mode) == iExpectedMode
+    assert sorted(os.listdir(tmp_path)) == ["expected.tsv", "output.tsv"]
+
+
+def test_failed_write_removes_temporary_file(tmp_path) -> None:
+    pszOutputPath: str = str(tmp_path / "output.tsv")
+    with pytest.raises(ZeroDivisionError):
+        with atomic_tsv_writer.open_atomic_text_file(pszOutputPath) as objFile:
+            objFile.write("a\n")
+            raise ZeroDivisionError
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize(
+    "pszEncoding, pszNewline, objExceptionType",
+    [("unknown-encoding", "", LookupError), ("utf-8", "invalid", ValueError)],
+)
+def test_failed_open_closes_descriptor_and_removes_temporary_file(
+    tmp_path,
+    monkeypatch,
+    pszEncoding,
+    pszNewline,
+    objExceptionType,
+) -> None:
+    objDescriptors: list[int] = []
+    objCreateTemporaryFile = atomic_tsv_writer.create_temporary_file
+
+    def create_temporary_file_with_log(pszOutputPath: str) -> tuple[int, str]:
+        objResult: tuple[int, str] = objCreateTemporaryFile(pszOutputPath)
+        objDescriptors.append(objResult[0])
+        return objResult
+
+    monkeypatch.setattr(atomic_tsv_writer, "create_temporary_file", create_temporary_file_with_log)
+    with pytest.raises(objExceptionType):
+        write_text_atomic(str(tmp_path / "output.tsv"), "a\n", pszEncoding, pszNewline)
+    assert len(objDescriptors) == 1
+    with pytest.raises(OSError):
+        os.fstat(objDescriptors[0])
+    assert os.listdir(tmp_path) == []
+
+
+def test_background_writer_finishes_worker_when_block_fails(tmp_path, capsys) -> None:
+    pszMissingDirectoryPath: str = str(tmp_path / "missing" / "output.tsv")
+    objThread: threading.Thread
+    with pytest.raises(ZeroDivisionError):
+        with BackgroundTsvWriter() as objWriter:
+            objThread = objWriter.objThread
+            objWriter.submit_text(pszMissingDirectoryPath, lambda: "a\n")
+            raise ZeroDivisionError
+    assert not objThread.is_alive()
+    assert "background write failed" in capsys.readouterr().out
+
+
+def test_background_writer_raises_write_error_on_close(tmp_path) -> None:
+    pszMissingDirectoryPath: str = str(tmp_path / "missing" / "output.tsv")
+    with pytest.raises(OSError):
+        with BackgroundTsvWriter() as objWriter:
+            objWriter.submit_text(pszMissingDirectoryPath, lambda: "a\n")
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+import manhour_artifact_store
+from atomic_tsv_writer import write_text_atomic
+from manhour_artifact_store import ManhourArtifactStore
+
+PSZ_ARTIFACT_NAME: str = "工数_2025年09月_step07_計算前_プロジェクト_工数.tsv"
+PSZ_TEXT: str = "P10001_A\t1:00:00\nP10002_B\t0:30:00\n"
+
+
+def read_bytes(pszPath: str) -> bytes:
+    with open(pszPath, "rb") as objFile:
+        return objFile.read()
+
+
+@pytest.mark.parametrize("pszNewline", [None, "", "\n", "\r\n"])
+def test_export_matches_file_written_with_same_newline(tmp_path, pszNewline) -> None:
+    pszFilePath: str = str(tmp_path / "file" / PSZ_ARTIFACT_NAME)
+    os.makedirs(os.path.dirname(pszFilePath))
+    write_text_atomic(pszFilePath, PSZ_TEXT, "utf-8", pszNewline)
+
+    pszExportDirectoryPath: str = str(tmp_path / "export")
+    os.makedirs(pszExportDirectoryPath)
+    with ManhourArtifactStore(str(tmp_path / "store.sqlite")) as objStore:
+        objStore.put_text(PSZ_ARTIFACT_NAME, PSZ_TEXT, pszNewline)
+        pszExportPath: str = objStore.export_artifact(PSZ_ARTIFACT_NAME, pszExportDirectoryPath)
+        assert objStore.list_artifacts() == [(PSZ_ARTIFACT_NAME, "step07", 2)]
+    assert read_bytes(pszExportPath) == read_bytes(pszFilePath)
+
+
+def test_platform_newline_is_stored_as_crlf_on_windows(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(manhour_artifact_store.os, "linesep", "\r\n")
+    with ManhourArtifactStore(str(tmp_path / "store.sqlite")) as objStore:
+        objStore.put_text(PSZ_ARTIFACT_NAME, PSZ_TEXT, None)
+        assert objStore.get_text(PSZ_ARTIFACT_NAME) == PSZ_TEXT.replace("\n", "\r\n")
+
+
+def test_close_without_commit_discards_entries(tmp_path) -> None:
+    pszStorePath: str = str(tmp_path / "store.sqlite")
+    ManhourArtifactStore(pszStorePath).close()
+    objStore: ManhourArtifactStore = ManhourArtifactStore(pszStorePath)
+    objStore.put_text(PSZ_ARTIFACT_NAME, PSZ_TEXT)
+    objStore.close(False)
+    with ManhourArtifactStore(pszStorePath) as objStore:
+        assert objStore.list_artifacts() == []
+
+
+def test_rolled_back_store_keeps_files_not_removed_on_put(tmp_path) -> None:
+    pszFilePath: str = str(tmp_path / PSZ_ARTIFACT_NAME)
+    write_text_atomic(pszFilePath, PSZ_TEXT)
+    objStore: ManhourArtifactStore = ManhourArtifactStore(str(tmp_path / "store.sqlite"))
+    objStore.put_file(pszFilePath, bRemoveFile=False)
+    objStore.close(False)
+    assert read_bytes(pszFilePath) == PSZ_TEXT.encode("utf-8")
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from SellGeneralAdminCost_Allocation_Cmd import (
+    MonthlyReportCube,
+    build_month_sequence,
+    build_report_file_path,
+    sum_tsv_sheets,
+    write_tsv_rows,
+)
+
+
+_PSZ_INPUT_PREFIX: str = "損益計算書"
+_OBJ_START_MONTH: Tuple[int, int] = (2025, 1)
+
+
+def create_cube(pszDirectory: str, objMonthRows: List[List[List[str]]]) -> MonthlyReportCube:
+    objMonths: List[Tuple[int, int]] = build_month_sequence(
+        _OBJ_START_MONTH,
+        (_OBJ_START_MONTH[0], _OBJ_START_MONTH[1] + len(objMonthRows) - 1),
+    )
+    for objMonth, objRows in zip(objMonths, objMonthRows):
+        write_tsv_rows(build_report_file_path(pszDirectory, _PSZ_INPUT_PREFIX, objMonth), objRows)
+    return MonthlyReportCube(pszDirectory, _PSZ_INPUT_PREFIX, objMonths)
+
+
+def build_single_cell_months(objValues: List[str]) -> List[List[List[str]]]:
+    return [[["科目名", "P10001_A"], ["売上高", pszValue]] for pszValue in objValues]
+
+
+def sum_all_months(
+    objCube: MonthlyReportCube,
+    objMonthRows: List[List[List[str]]],
+    monkeypatch,
+) -> Tuple[Optional[List[List[str]]], int]:
+    # 戻り値: (キューブで求めた合計, float で足し直した回数)
+    objReplayCalls: List[Tuple[int, int]] = []
+    objReplayFloatSums = MonthlyReportCube.replay_float_sums
+
+    def replay_float_sums_with_log(self: MonthlyReportCube, iStartIndex: int, iEndIndex: int) -> np.ndarray:
+        objReplayCalls.append((iStartIndex, iEndIndex))
+        return objReplayFloatSums(self, iStartIndex, iEndIndex)
+
+    monkeypatch.setattr(MonthlyReportCube, "replay_float_sums", replay_float_sums_with_log)
+    objTotalRows: Optional[List[List[str]]] = objCube.sum_range(objCube.objMonths[0], objCube.objMonths[-1])
+    assert objTotalRows == sum_tsv_sheets(objMonthRows)
+    return objTotalRows, len(objReplayCalls)
+
+
+def test_fraction_just_below_error_limit_uses_exact_sum(tmp_path, monkeypatch) -> None:
+    # 絶対値の合計 (100 万倍) × (2 か月 + 1) が 2 ** 51 未満
+    objMonthRows = build_single_cell_months(["750599937.895081", "0.000001"])
+    objTotalRows, iReplayCount = sum_all_months(create_cube(str(tmp_path), objMonthRows), objMonthRows, monkeypatch)
+    assert objTotalRows == [["科目名", "P10001_A"], ["売上高", "750599937.895082"]]
+    assert iReplayCount == 0
+
+
+def test_fraction_at_error_limit_replays_float_sum(tmp_path, monkeypatch) -> None:
+    objMonthRows = build_single_cell_months(["750599937.895082", "0.000001"])
+    _, iReplayCount = sum_all_months(create_cube(str(tmp_path), objMonthRows), objMonthRows, monkeypatch)
+    assert iReplayCount == 1
+
+
+def test_float_rounding_error_is_reproduced(tmp_path, monkeypatch) -> None:
+    # 正確な合計は 18751919728.424800 だが、float で足すと ...424797 になる
+    objMonthRows = build_single_cell_months(
+        ["2626639569.707705", "9524380752.180777", "6600899406.536317"]
+    )
+    objTotalRows, iReplayCount = sum_all_months(create_cube(str(tmp_path), objMonthRows), objMonthRows, monkeypatch)
+    assert objTotalRows == [["科目名", "P10001_A"], ["売上高", "18751919728.424797"]]
+    assert iReplayCount == 1
+
+
+def test_integers_use_exact_sum(tmp_path, monkeypatch) -> None:
+    # 整数だけなら、絶対値が大きくても float で足し直さない
+    # (np.round を通した値は sum_tsv_sheets と同じになる)
+    objMonthRows = build_single_cell_months(["8046130", "-595974725355.0", "1e3"])
+    _, iReplayCount = sum_all_months(create_cube(str(tmp_path), objMonthRows), objMonthRows, monkeypatch)
+    assert iReplayCount == 0
+
+
+def test_values_without_exact_micro_value_replay_float_sum(tmp_path, monkeypatch) -> None:
+    for objValues in [["0.1234567", "1"], ["-0", "0"], ["1e20", "1"]]:
+        objMonthRows = build_single_cell_months(objValues)
+        pszDirectory: str = str(tmp_path / objValues[0])
+        (tmp_path / objValues[0]).mkdir()
+        _, iReplayCount = sum_all_months(create_cube(pszDirectory, objMonthRows), objMonthRows, monkeypatch)
+        assert iReplayCount == 1
+
+
+def test_text_and_blank_cells_follow_sum_tsv_sheets(tmp_path, monkeypatch) -> None:
+    objMonthRows = [
+        [["科目名", "A", "B", "C"], ["売上高", "", "12", "-"], ["原価", "x"]],
+        [["科目名", "A", "B", "C"], ["売上高", "3", "", "5"], ["原価", "4"]],
+        [["科目名", "A", "B", "C"], ["売上高", "4", "", "6"], ["原価", "y"]],
+    ]
+    objTotalRows, _ = sum_all_months(create_cube(str(tmp_path), objMonthRows), objMonthRows, monkeypatch)
+    assert objTotalRows == [["科目名", "A", "B", "C"], ["売上高", "7", "12", "-"], ["原価", "x"]]
+
+
+def test_different_layout_falls_back_without_building_cube(tmp_path, monkeypatch) -> None:
+    objMonthRows = [
+        [["科目名", "A", "B"], ["売上高", "1", "2"]],
+        [["科目名", "B", "A"], ["売上高", "10", "20"]],
+    ]
+    objCube: MonthlyReportCube = create_cube(str(tmp_path), objMonthRows)
+    objTotalRows, _ = sum_all_months(objCube, objMonthRows, monkeypatch)
+    assert objTotalRows == [["科目名", "A", "B"], ["売上高", "21", "12"]]
+    assert not objCube.bBuilt
+
+
+def test_random_ranges_match_sum_tsv_sheets(tmp_path) -> None:
+    objRandom: random.Random = random.Random(0)
+
+    def create_value() -> str:
+        fChoice: float = objRandom.random()
+        if fChoice < 0.15:
+            return ""
+        if fChoice < 0.2:
+            return objRandom.choice(["-", "x", "1e3", "-0", "0.1234567"])
+        if fChoice < 0.5:
+            return f"{objRandom.uniform(-1e10, 1e10):.6f}"
+        return str(objRandom.randint(-10 ** 12, 10 ** 12))
+
+    objMonthRows: List[List[List[str]]] = [
+        [["科目名", "A", "B", "C", "D"]]
+        + [[f"科目{iRowIndex}"] + [create_value() for _ in range(4)] for iRowIndex in range(6)]
+        for _ in range(8)
+    ]
+    objCube: MonthlyReportCube = create_cube(str(tmp_path), objMonthRows)
+    for iStartIndex in range(len(objMonthRows)):
+        for iEndIndex in range(iStartIndex, len(objMonthRows)):
+            assert objCube.sum_range(
+                objCube.objMonths[iStartIndex],
+                objCube.objMonths[iEndIndex],
+            ) == sum_tsv_sheets(objMonthRows[iStartIndex : iEndIndex + 1])
+    assert objCube.bBuilt
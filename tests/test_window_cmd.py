@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from typing import List, Optional, Tuple
+
+import SellGeneralAdminCost_Allocation_Cmd
+import SellGeneralAdminCost_Window_Cmd
+from SellGeneralAdminCost_Allocation_Cmd import (
+    build_cumulative_file_path,
+    build_month_sequence,
+    build_report_file_path,
+    read_tsv_rows,
+    write_tsv_rows,
+)
+from SellGeneralAdminCost_Window_Cmd import (
+    WINDOW_REPORT_PREFIXES,
+    create_window_reports,
+    group_windows_into_month_runs,
+)
+
+
+def test_group_windows_into_month_runs() -> None:
+    objRuns = group_windows_into_month_runs(
+        [
+            ((2025, 4), (2025, 6)),
+            ((2015, 1), (2015, 3)),
+            ((2025, 1), (2025, 3)),
+            ((2024, 12), (2025, 2)),
+            ((2015, 5), (2015, 5)),
+        ]
+    )
+    assert objRuns == [
+        (((2015, 1), (2015, 3)), [((2015, 1), (2015, 3))]),
+        (((2015, 5), (2015, 5)), [((2015, 5), (2015, 5))]),
+        (
+            ((2024, 12), (2025, 6)),
+            [((2024, 12), (2025, 2)), ((2025, 1), (2025, 3)), ((2025, 4), (2025, 6))],
+        ),
+    ]
+
+
+def test_distant_windows_read_only_requested_months(tmp_path, monkeypatch) -> None:
+    pszDirectory: str = str(tmp_path)
+    for _, pszInputPrefix in WINDOW_REPORT_PREFIXES:
+        for iIndex, (iYear, iMonth) in enumerate(build_month_sequence((2015, 1), (2025, 3))):
+            write_tsv_rows(
+                build_report_file_path(pszDirectory, pszInputPrefix, (iYear, iMonth)),
+                [["科目名", "P10001_A"], ["売上高", str(iIndex + 1)]],
+            )
+
+    objReadMonths: List[Tuple[str, Tuple[int, int]]] = []
+    objReadReportRows = SellGeneralAdminCost_Allocation_Cmd.read_report_rows
+
+    def read_report_rows_with_log(
+        pszDirectory: str,
+        pszPrefix: str,
+        objMonth: Tuple[int, int],
+    ) -> Optional[List[List[str]]]:
+        objReadMonths.append((pszPrefix, objMonth))
+        return objReadReportRows(pszDirectory, pszPrefix, objMonth)
+
+    monkeypatch.setattr(
+        SellGeneralAdminCost_Allocation_Cmd,
+        "read_report_rows",
+        read_report_rows_with_log,
+    )
+    monkeypatch.setattr(
+        SellGeneralAdminCost_Window_Cmd,
+        "_OBJ_OUTPUT_MANIFEST",
+        SellGeneralAdminCost_Window_Cmd.OutputManifest("test_window_cmd"),
+    )
+
+    objWindows = [((2025, 1), (2025, 3)), ((2015, 1), (2015, 3))]
+    assert create_window_reports(pszDirectory, objWindows) == 0
+
+    objRequestedMonths = set(
+        build_month_sequence((2015, 1), (2015, 3)) + build_month_sequence((2025, 1), (2025, 3))
+    )
+    assert len(objReadMonths) == len(WINDOW_REPORT_PREFIXES) * len(objRequestedMonths)
+    assert {objMonth for _, objMonth in objReadMonths} == objRequestedMonths
+
+    # 2015年01月〜03月は 1 + 2 + 3, 2025年01月〜03月は 121 + 122 + 123
+    for objWindow, pszExpected in zip(objWindows, ["366", "6"]):
+        pszOutputPath: str = build_cumulative_file_path(pszDirectory, "損益計算書", *objWindow)
+        assert read_tsv_rows(pszOutputPath) == [["科目名", "P10001_A"], ["売上高", pszExpected]]